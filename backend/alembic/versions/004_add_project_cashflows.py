@@ -0,0 +1,40 @@
+"""Add project_cashflows ledger table
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Flux mensuels normalisés (project_id, month) pour l'agrégation portefeuille
+    op.create_table(
+        'project_cashflows',
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('acquisition', sa.Float(), nullable=True, default=0),
+        sa.Column('capex', sa.Float(), nullable=True, default=0),
+        sa.Column('revenue', sa.Float(), nullable=True, default=0),
+        sa.Column('debt_drawdown', sa.Float(), nullable=True, default=0),
+        sa.Column('debt_service', sa.Float(), nullable=True, default=0),
+        sa.Column('sale', sa.Float(), nullable=True, default=0),
+        sa.Column('net', sa.Float(), nullable=True, default=0),
+        sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('project_id', 'month')
+    )
+    op.create_index('ix_project_cashflows_month', 'project_cashflows', ['month'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_project_cashflows_month', table_name='project_cashflows')
+    op.drop_table('project_cashflows')
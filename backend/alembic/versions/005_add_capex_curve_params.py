@@ -0,0 +1,24 @@
+"""Add capex_curve_params to project_timelines
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Paramètres de la courbe de décaissement (steepness, alpha/beta, jalons, table)
+    op.add_column('project_timelines', sa.Column('capex_curve_params', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('project_timelines', 'capex_curve_params')
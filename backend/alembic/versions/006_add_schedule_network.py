@@ -0,0 +1,24 @@
+"""Add schedule_network to project_timelines
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Réseau de tâches (phases, procédures, liens) pour le calcul du chemin critique
+    op.add_column('project_timelines', sa.Column('schedule_network', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('project_timelines', 'schedule_network')
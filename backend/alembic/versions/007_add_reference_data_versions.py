@@ -0,0 +1,43 @@
+"""Add reference_data_versions and composite lookup indexes
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+DATASETS = ('administrative_delays', 'capex_costs', 'plu_zones')
+
+
+def upgrade():
+    # Compteur de version par jeu de référence (rechargement des caches sans redémarrage)
+    versions = op.create_table(
+        'reference_data_versions',
+        sa.Column('dataset', sa.String(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('dataset')
+    )
+    # Version 1 : les lignes déjà présentes sont chargées au premier rafraîchissement
+    op.bulk_insert(versions, [{'dataset': dataset, 'version': 1} for dataset in DATASETS])
+
+    # Index des clés de recherche (ville, procédure), (poste, niveau), (ville, zone)
+    op.create_index('ix_administrative_delays_city_procedure', 'administrative_delays', ['city', 'procedure_type'], unique=False)
+    op.create_index('ix_capex_costs_item_tier', 'capex_costs', ['category', 'subcategory', 'city_tier'], unique=False)
+    op.create_index('ix_plu_zones_city_zone', 'plu_zones', ['city', 'zone_name'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_plu_zones_city_zone', table_name='plu_zones')
+    op.drop_index('ix_capex_costs_item_tier', table_name='capex_costs')
+    op.drop_index('ix_administrative_delays_city_procedure', table_name='administrative_delays')
+    op.drop_table('reference_data_versions')
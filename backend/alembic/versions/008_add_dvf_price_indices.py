@@ -0,0 +1,41 @@
+"""Add dvf_price_indices table
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Indice des prix au m² DVF par (commune, type de local, mois / trimestre)
+    op.create_table(
+        'dvf_price_indices',
+        sa.Column('code_commune', sa.String(length=5), nullable=False),
+        sa.Column('type_local', sa.String(), nullable=False),
+        sa.Column('period_type', sa.String(), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('median', sa.Float(), nullable=False),
+        sa.Column('trimmed_mean', sa.Float(), nullable=False),
+        sa.Column('p25', sa.Float(), nullable=False),
+        sa.Column('p75', sa.Float(), nullable=False),
+        sa.Column('sketch', sa.LargeBinary(), nullable=False),
+        sa.Column('fingerprint', sa.String(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('code_commune', 'type_local', 'period_type', 'period_start')
+    )
+    op.create_index('ix_dvf_price_indices_period', 'dvf_price_indices', ['period_type', 'period_start'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_dvf_price_indices_period', table_name='dvf_price_indices')
+    op.drop_table('dvf_price_indices')
@@ -19,7 +19,9 @@ from app.api import (
     compliance,
     scoring,
     exports,
-    dashboard  # BP
+    dashboard,  # BP
+    portfolio,
+    reference_data
 )
 
 api_router = APIRouter(prefix="/api")
@@ -44,3 +46,5 @@ api_router.include_router(compliance.router)
 api_router.include_router(scoring.router)
 api_router.include_router(exports.router)
 api_router.include_router(dashboard.router)  # BP
+api_router.include_router(portfolio.router)
+api_router.include_router(reference_data.router)
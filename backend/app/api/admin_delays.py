@@ -2,8 +2,9 @@
 Routes API pour le service de délais administratifs
 """
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Dict, List, Optional
 from app.services.administrative_delay_service import (
     administrative_delay_service,
     ComplexityLevel,
@@ -32,6 +33,43 @@ class ProjectTimelineRequest(BaseModel):
     parallel_execution: bool = False
 
 
+class CriticalPathProcedure(BaseModel):
+    id: Optional[str] = None
+    type: str
+    complexity: float = ComplexityLevel.SIMPLE
+    has_abf: bool = False
+
+
+class CriticalPathLink(BaseModel):
+    from_: str = Field(alias="from")
+    to: str
+    type: str = "FS"
+    lag: float = 0
+
+
+class CriticalPathRequest(BaseModel):
+    city: str
+    procedures: List[CriticalPathProcedure] = Field(max_length=500)
+    links: List[CriticalPathLink] = []
+    studies_days: Optional[Dict[str, int]] = None
+    construction_months: int = Field(default=6, ge=0, le=120)
+
+
+class CarryCosts(BaseModel):
+    debt_amount: float = Field(default=0, ge=0)
+    interest_rate: float = Field(default=0, ge=0, description="Taux annuel (0.05 = 5%)")
+    monthly_holding_costs: float = Field(default=0, ge=0)
+
+
+class DurationSimulationRequest(CriticalPathRequest):
+    construction_overrun: float = Field(default=0.10, ge=0, le=2)
+    distribution: str = "pert"
+    n_simulations: int = Field(default=10_000, ge=1, le=100_000)
+    seed: Optional[int] = None
+    start_date: Optional[datetime] = None
+    carry: Optional[CarryCosts] = None
+
+
 class FullProjectDurationRequest(BaseModel):
     city: str
     has_pc: bool = False
@@ -111,6 +149,85 @@ async def calculate_project_timeline(request: ProjectTimelineRequest):
     }
 
 
+@router.post("/critical-path")
+async def calculate_critical_path(request: CriticalPathRequest):
+    """
+    Planning par chemin critique (études, procédures, recours, travaux, DAACT)
+    
+    Body:
+        {
+            "city": "Paris",
+            "procedures": [
+                {"id": "cu", "type": "certificat_urbanisme"},
+                {"id": "pc", "type": "permis_construire", "has_abf": true}
+            ],
+            "links": [{"from": "cu", "to": "pc", "type": "FS", "lag": 0}],
+            "construction_months": 12
+        }
+    
+    Returns:
+        Durées min/avg/max, chemin critique, marges par tâche et réseau
+        réutilisable pour POST /timeline/{project_id}/schedule
+    """
+    try:
+        result = administrative_delay_service.calculate_critical_path(
+            request.city,
+            [proc.model_dump() for proc in request.procedures],
+            [link.model_dump(by_alias=True) for link in request.links],
+            request.studies_days,
+            request.construction_months
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "success": True,
+        **result
+    }
+
+
+@router.post("/simulate-duration")
+async def simulate_project_duration(request: DurationSimulationRequest):
+    """
+    Distribution Monte Carlo de la durée du projet (P10 / P50 / P90)
+    
+    Body:
+        {
+            "city": "Paris",
+            "procedures": [{"id": "pc", "type": "permis_construire", "has_abf": true}],
+            "construction_months": 12,
+            "distribution": "pert",
+            "n_simulations": 10000,
+            "carry": {"debt_amount": 2000000, "interest_rate": 0.05, "monthly_holding_costs": 3000}
+        }
+    
+    Returns:
+        Dates d'achèvement P10 / P50 / P90, probabilité de retard, indice de criticité
+        des tâches et surcoût de portage lié au retard
+    """
+    try:
+        result = administrative_delay_service.simulate_project_duration(
+            request.city,
+            [proc.model_dump() for proc in request.procedures],
+            [link.model_dump(by_alias=True) for link in request.links],
+            request.studies_days,
+            request.construction_months,
+            construction_overrun=request.construction_overrun,
+            distribution=request.distribution,
+            n_simulations=request.n_simulations,
+            seed=request.seed,
+            start_date=request.start_date,
+            carry=request.carry.model_dump() if request.carry else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "success": True,
+        **result
+    }
+
+
 @router.post("/full-duration")
 async def estimate_full_project_duration(request: FullProjectDurationRequest):
     """
@@ -2,10 +2,11 @@
 Routes API pour le service CAPEX
 """
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional, Union
 from app.services.capex_service import capex_service, CityTier
 from app.services.capex_ai_service import capex_ai_service
+from app.services.llm_gateway import llm_gateway
 
 router = APIRouter(prefix="/capex", tags=["CAPEX"])
 
@@ -21,6 +22,20 @@ class ProjectCAPEXRequest(BaseModel):
     contingency_rate: float = 0.10
 
 
+class BulkCAPEXProject(BaseModel):
+    id: Optional[Union[int, str]] = None
+    items: List[CAPEXItemRequest]
+    city_tier: Optional[int] = None
+    contingency_rate: Optional[float] = None
+
+
+class BulkCAPEXRequest(BaseModel):
+    projects: List[BulkCAPEXProject] = Field(min_length=1, max_length=5000)
+    city_tier: int = CityTier.TIER_1
+    contingency_rate: float = 0.10
+    detail: bool = False
+
+
 class RenovationEstimateRequest(BaseModel):
     surface: float
     renovation_level: str  # "light", "medium", "heavy", "complete"
@@ -110,6 +125,37 @@ async def calculate_project_capex(request: ProjectCAPEXRequest):
     }
 
 
+@router.post("/bulk")
+async def estimate_bulk_capex(request: BulkCAPEXRequest):
+    """
+    Estimation CAPEX d'un lot de projets (budgétisation portefeuille)
+    
+    Body:
+        {
+            "projects": [
+                {"id": "immeuble_1", "items": [{"key": "facade_ravalement_simple", "quantity": 100}], "city_tier": 2}
+            ],
+            "contingency_rate": 0.10,
+            "detail": false
+        }
+    
+    Returns:
+        Coûts de base, aléas et total par projet et pour le lot
+        (détail par poste seulement si detail = true)
+    """
+    result = capex_service.estimate_bulk(
+        [project.model_dump(exclude_none=True) for project in request.projects],
+        request.city_tier,
+        request.contingency_rate,
+        request.detail
+    )
+    
+    return {
+        "success": True,
+        **result
+    }
+
+
 @router.post("/renovation-estimate")
 async def estimate_renovation_budget(request: RenovationEstimateRequest):
     """
@@ -191,8 +237,8 @@ async def suggest_capex_with_ai(request: CAPEXAISuggestRequest):
     🤖 NOUVEAU : Suggestions CAPEX intelligentes avec IA
     
     Utilise:
-    - LangChain + GPT-4 pour analyse projet
-    - ChromaDB RAG pour projets similaires historiques
+    - GPT-4 via la passerelle LLM async (cache, fusion des requêtes identiques)
+    - Index local (sans réseau) des projets similaires historiques
     - Base de données CAPEX pour coûts réels
     
     Body:
@@ -222,6 +268,49 @@ async def suggest_capex_with_ai(request: CAPEXAISuggestRequest):
     return result
 
 
+@router.get("/suggest/stats")
+async def get_llm_gateway_stats():
+    """
+    Statistiques de la passerelle LLM
+    
+    Requêtes, réponses servies par le cache, requêtes fusionnées avec un appel
+    identique en cours, appels réels au modèle et erreurs.
+    """
+    return {
+        "success": True,
+        **llm_gateway.stats()
+    }
+
+
+class SimilarProjectsRequest(BaseModel):
+    project_description: str
+    k: int = Field(default=3, ge=1, le=50)
+    typologie: Optional[str] = None
+
+
+@router.post("/similar-projects")
+async def find_similar_projects(request: SimilarProjectsRequest):
+    """
+    Projets CAPEX historiques (libérés par le Privacy Shield) les plus proches d'une description
+    
+    Recherche locale, disponible sans clé OpenAI.
+    
+    Returns:
+        Projets triés par similarité décroissante
+    """
+    projects = capex_ai_service.history_index.search(
+        request.project_description,
+        k=request.k,
+        typologie=request.typologie
+    )
+    
+    return {
+        "success": True,
+        "count": len(projects),
+        "projects": projects
+    }
+
+
 # ===== TYPOLOGIE BP : HABITATION / BUREAUX / COMMERCE =====
 
 from app.services.capex_typologie_service import (
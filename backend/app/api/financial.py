@@ -1,9 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from app.core.memoize import memo_cache
 from app.services import financial_service
 from app.services.notary_fee_service import notary_fee_service
 from app.services.waterfall_service import waterfall_service
+from app.services.irr_solver import npv_batch, xnpv_batch
+from app.services.monte_carlo_service import monte_carlo_service
+from app.services.sensitivity_service import sensitivity_service
+from app.services.goal_seek_service import goal_seek_service
+from app.services.exit_timing_service import exit_timing_service
+from app.services.investor_allocation_service import investor_allocation_service
+from app.services.excel_service import excel_service
 from typing import List, Optional, Dict, Any
+import time
+from datetime import date
 
 router = APIRouter(prefix="/financial", tags=["financial"])
 
@@ -26,6 +37,8 @@ class FinancialAnalysisResponse(BaseModel):
     annual_debt_service: float
     annual_rent: float
     tri: float
+    tri_converged: bool = True
+    tri_status: str = "converged"
     van: float
     ltv: float
     ltc: float
@@ -34,7 +47,7 @@ class FinancialAnalysisResponse(BaseModel):
     cash_flows: List[float]
 
 @router.post("/analyze", response_model=FinancialAnalysisResponse)
-async def calculate_financial_analysis(data: FinancialInput):
+async def calculate_financial_analysis(data: FinancialInput, use_cache: bool = True):
     """Calculer une analyse financière complète"""
     
     try:
@@ -47,7 +60,8 @@ async def calculate_financial_analysis(data: FinancialInput):
             loan_duration=data.loan_duration,
             monthly_rent=data.monthly_rent,
             resale_price=data.resale_price,
-            project_type=data.project_type
+            project_type=data.project_type,
+            use_cache=use_cache
         )
         
         return analysis
@@ -64,12 +78,412 @@ async def calculate_tri(
 ):
     """Calculer le TRI (Taux de Rendement Interne)"""
     
-    tri = financial_service.calculate_tri(
+    result = financial_service.calculate_tri_detailed(
         initial_investment=initial_investment,
         cash_flows=cash_flows
     )
+    tri = result["tri"] if result["converged"] else 0.0
     
-    return {"tri": tri, "tri_percentage": f"{tri * 100:.2f}%"}
+    return {
+        "tri": tri,
+        "tri_percentage": f"{tri * 100:.2f}%",
+        "converged": result["converged"],
+        "status": result["status"]
+    }
+
+
+class TRIBatchRequest(BaseModel):
+    cash_flows: List[List[float]] = Field(..., min_length=1, max_length=100000)  # flux t0 en 1ère colonne
+    guess: float = 0.1
+    discount_rate: Optional[float] = None  # Si renseigné, VAN calculée pour chaque vecteur
+
+
+@router.post("/tri/batch")
+async def calculate_tri_batch(request: TRIBatchRequest):
+    """
+    Calculer le TRI de plusieurs vecteurs de flux en une passe
+    
+    Body:
+        {
+            "cash_flows": [[-100000, 10000, 10000, 110000], [-50000, 60000]],
+            "guess": 0.1,
+            "discount_rate": 0.08
+        }
+    
+    Returns:
+        TRI et statut de convergence par vecteur
+    """
+    try:
+        result = financial_service.calculate_tri_batch(request.cash_flows, guess=request.guess)
+        items = result.to_list()
+        
+        if request.discount_rate is not None:
+            vans = npv_batch(request.cash_flows, request.discount_rate)
+            for item, van in zip(items, vans.tolist()):
+                item["van"] = van
+        
+        return {
+            "success": True,
+            "count": len(items),
+            "converged_count": int(result.converged.sum()),
+            "results": items
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur calcul TRI: {str(e)}")
+
+
+class DatedCashFlow(BaseModel):
+    date: date
+    amount: float
+
+
+class XIRRRequest(BaseModel):
+    cash_flows: List[DatedCashFlow] = Field(..., min_length=2)
+    guess: float = 0.1
+    discount_rate: Optional[float] = None
+
+
+class XIRRBatchRequest(BaseModel):
+    series: List[List[DatedCashFlow]] = Field(..., min_length=1, max_length=100000)
+    guess: float = 0.1
+
+
+@router.post("/xirr")
+async def calculate_xirr(request: XIRRRequest):
+    """
+    Calculer le TRI daté (XIRR) d'une série de flux
+    
+    Body:
+        {
+            "cash_flows": [
+                {"date": "2026-01-15", "amount": -1000000},
+                {"date": "2027-06-30", "amount": 1250000}
+            ]
+        }
+    
+    Returns:
+        TRI annuel et statut de convergence
+    """
+    try:
+        dates = [flow.date for flow in request.cash_flows]
+        amounts = [flow.amount for flow in request.cash_flows]
+        result = financial_service.calculate_xirr(dates, amounts, guess=request.guess)
+        
+        if request.discount_rate is not None:
+            result["xnpv"] = float(xnpv_batch([dates], [amounts], request.discount_rate)[0])
+        
+        return {
+            "success": True,
+            **result
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur calcul XIRR: {str(e)}")
+
+
+@router.post("/xirr/batch")
+async def calculate_xirr_batch(request: XIRRBatchRequest):
+    """
+    Calculer le XIRR de plusieurs séries datées en une passe
+    
+    Returns:
+        TRI annuel et statut de convergence par série
+    """
+    try:
+        result = financial_service.calculate_xirr_batch(
+            [[flow.date for flow in series] for series in request.series],
+            [[flow.amount for flow in series] for series in request.series],
+            guess=request.guess
+        )
+        
+        return {
+            "success": True,
+            "count": len(result),
+            "converged_count": int(result.converged.sum()),
+            "results": result.to_list()
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur calcul XIRR: {str(e)}")
+
+
+class MonteCarloRequest(BaseModel):
+    base: FinancialInput
+    distributions: Optional[Dict[str, Dict[str, Any]]] = None
+    n_simulations: int = Field(10000, ge=1, le=100000)
+    seed: Optional[int] = None
+    thresholds: Optional[Dict[str, float]] = None
+    histogram_bins: int = Field(20, ge=1, le=200)
+
+
+@router.post("/monte-carlo")
+async def run_monte_carlo(request: MonteCarloRequest):
+    """
+    Simulation Monte Carlo de l'analyse financière
+    
+    Body:
+        {
+            "base": {"purchase_price": 200000, "renovation_budget": 20000, ...},
+            "distributions": {
+                "monthly_rent": {"distribution": "normal", "mean": 1200, "std": 120},
+                "vacancy_rate": {"distribution": "uniform", "low": 0, "high": 0.1}
+            },
+            "n_simulations": 10000,
+            "seed": 42,
+            "thresholds": {"dscr_min": 1.2, "tri_min": 0.08}
+        }
+    
+    Returns:
+        Percentiles P5/P50/P95, histogrammes et probabilités de seuils (TRI, VAN, DSCR, ROI)
+    """
+    try:
+        result = monte_carlo_service.run_simulation(
+            base=request.base.model_dump(),
+            distributions=request.distributions,
+            n_simulations=request.n_simulations,
+            seed=request.seed,
+            thresholds=request.thresholds,
+            histogram_bins=request.histogram_bins
+        )
+        
+        return {
+            "success": True,
+            **result
+        }
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Paramètres de simulation invalides: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur simulation: {str(e)}")
+
+
+class SensitivityVariable(BaseModel):
+    name: str  # purchase_price, monthly_rent, exit_yield, interest_rate, ...
+    min: float
+    max: float
+    steps: int = Field(11, ge=2, le=200)
+
+
+class SensitivityGridRequest(BaseModel):
+    base: FinancialInput
+    variables: List[SensitivityVariable] = Field(..., min_length=1, max_length=2)
+
+
+class TornadoRequest(BaseModel):
+    base: FinancialInput
+    variation: float = Field(0.10, gt=0, lt=1)
+    variables: Optional[List[str]] = None
+
+
+@router.post("/sensitivity/grid")
+async def calculate_sensitivity_grid(request: SensitivityGridRequest):
+    """
+    Grille de sensibilité TRI / VAN / ROI / DSCR sur une ou deux variables
+    
+    Body:
+        {
+            "base": {"purchase_price": 200000, ...},
+            "variables": [
+                {"name": "purchase_price", "min": 180000, "max": 240000, "steps": 50},
+                {"name": "exit_yield", "min": 0.04, "max": 0.07, "steps": 50}
+            ]
+        }
+    
+    Returns:
+        Matrices d'indicateurs (lignes = 1ère variable, colonnes = 2ème variable)
+    """
+    try:
+        result = sensitivity_service.calculate_grid(
+            base=request.base.model_dump(),
+            variables=[variable.model_dump() for variable in request.variables]
+        )
+        
+        return {
+            "success": True,
+            **result
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur sensibilité: {str(e)}")
+
+
+@router.post("/sensitivity/tornado")
+async def calculate_sensitivity_tornado(request: TornadoRequest):
+    """
+    Graphique tornado : écart de TRI pour ±X% sur chaque variable
+    
+    Body:
+        {
+            "base": {"purchase_price": 200000, ...},
+            "variation": 0.10,
+            "variables": ["purchase_price", "monthly_rent", "exit_yield", "interest_rate"]
+        }
+    
+    Returns:
+        Barres triées par amplitude de TRI décroissante
+    """
+    try:
+        result = sensitivity_service.calculate_tornado(
+            base=request.base.model_dump(),
+            variation=request.variation,
+            variables=request.variables
+        )
+        
+        return {
+            "success": True,
+            **result
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur tornado: {str(e)}")
+
+
+class GoalSeekRequest(BaseModel):
+    base: FinancialInput
+    variable: str = "purchase_price"  # purchase_price, loan_amount, monthly_rent, resale_price
+    constraints: Dict[str, float]  # {"tri_min": 0.12, "dscr_min": 1.25, "ltv_max": 0.8}
+    objective: Optional[str] = None  # "max" / "min" (défaut selon la variable)
+    bounds: Optional[List[float]] = Field(None, min_length=2, max_length=2)
+    tolerance: float = Field(1.0, gt=0)
+
+
+class GoalSeekBatchRequest(BaseModel):
+    deals: List[FinancialInput] = Field(..., min_length=1, max_length=10000)
+    variable: str = "purchase_price"
+    constraints: Dict[str, float]
+    objective: Optional[str] = None
+    bounds: Optional[List[float]] = Field(None, min_length=2, max_length=2)
+    tolerance: float = Field(1.0, gt=0)
+
+
+@router.post("/goal-seek")
+async def goal_seek(request: GoalSeekRequest):
+    """
+    Recherche d'objectif : valeur d'une variable pour atteindre des cibles
+    
+    Body:
+        {
+            "base": {"purchase_price": 200000, ...},
+            "variable": "purchase_price",
+            "constraints": {"tri_min": 0.12, "dscr_min": 1.25}
+        }
+    
+    Returns:
+        Prix maximal (ou loyer minimal...), contrainte limitante et indicateurs à la solution
+    """
+    try:
+        result = goal_seek_service.solve(
+            base=request.base.model_dump(),
+            variable=request.variable,
+            constraints=request.constraints,
+            objective=request.objective,
+            bounds=tuple(request.bounds) if request.bounds else None,
+            tolerance=request.tolerance
+        )
+        
+        return {
+            "success": True,
+            **result
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur goal-seek: {str(e)}")
+
+
+@router.post("/goal-seek/batch")
+async def goal_seek_batch(request: GoalSeekBatchRequest):
+    """
+    Recherche d'objectif sur un pipeline d'affaires (bissection vectorisée)
+    
+    Body:
+        {
+            "deals": [{"purchase_price": 200000, ...}, {...}],
+            "variable": "purchase_price",
+            "constraints": {"tri_min": 0.12, "dscr_min": 1.25}
+        }
+    
+    Returns:
+        Un résultat par affaire, dans l'ordre d'entrée
+    """
+    try:
+        results = goal_seek_service.solve_batch(
+            deals=[deal.model_dump() for deal in request.deals],
+            variable=request.variable,
+            constraints=request.constraints,
+            objective=request.objective,
+            bounds=tuple(request.bounds) if request.bounds else None,
+            tolerance=request.tolerance
+        )
+        
+        return {
+            "success": True,
+            "count": len(results),
+            "feasible_count": sum(1 for result in results if result["feasible"]),
+            "results": results
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur goal-seek: {str(e)}")
+
+class ExitTimingRequest(BaseModel):
+    base: FinancialInput
+    horizon_months: Optional[int] = Field(None, ge=1, le=600)
+    exit_yield: Optional[float] = Field(None, gt=0)
+    appreciation_rate: float = 0.0
+    rent_growth: float = 0.0
+    selling_costs: float = Field(0.0, ge=0, lt=1)
+    amortization_type: str = "classic"
+    min_hold_months: int = Field(1, ge=1)
+    deferred_months: int = Field(0, ge=0)
+    deferred_interest_capitalized: bool = False
+
+
+@router.post("/exit-timing")
+async def calculate_exit_timing(request: ExitTimingRequest):
+    """
+    Courbe de sortie : TRI, multiple et profit pour une revente à chaque mois
+    
+    Body:
+        {
+            "base": {"purchase_price": 300000, "loan_duration": 30, ...},
+            "exit_yield": 0.05,
+            "rent_growth": 0.02,
+            "selling_costs": 0.05
+        }
+    
+    Returns:
+        Courbe colonnaire (un tableau par indicateur) et mois de sortie optimal
+    """
+    try:
+        result = exit_timing_service.calculate_exit_curve(
+            base=request.base.model_dump(),
+            horizon_months=request.horizon_months,
+            exit_yield=request.exit_yield,
+            appreciation_rate=request.appreciation_rate,
+            rent_growth=request.rent_growth,
+            selling_costs=request.selling_costs,
+            amortization_type=request.amortization_type,
+            min_hold_months=request.min_hold_months,
+            deferred_months=request.deferred_months,
+            deferred_interest_capitalized=request.deferred_interest_capitalized
+        )
+        
+        return {
+            "success": True,
+            **result
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur courbe de sortie: {str(e)}")
+
 
 @router.post("/ltv")
 async def calculate_ltv(
@@ -117,7 +531,7 @@ class NotaryFeeComparisonRequest(BaseModel):
 
 
 @router.post("/notary-fees")
-async def calculate_notary_fees(data: NotaryFeeRequest):
+async def calculate_notary_fees(data: NotaryFeeRequest, use_cache: bool = True):
     """
     Calculer les frais de notaire avec intelligence fiscale
     
@@ -133,7 +547,8 @@ async def calculate_notary_fees(data: NotaryFeeRequest):
             purchase_price=data.purchase_price,
             buyer_profile=data.buyer_profile,
             building_age_years=data.building_age_years,
-            construction_completion_date=data.construction_completion_date
+            construction_completion_date=data.construction_completion_date,
+            use_cache=use_cache
         )
         return result
     
@@ -150,7 +565,7 @@ async def calculate_notary_fees(data: NotaryFeeRequest):
 
 
 @router.post("/notary-fees/compare")
-async def compare_notary_profiles(data: NotaryFeeComparisonRequest):
+async def compare_notary_profiles(data: NotaryFeeComparisonRequest, use_cache: bool = True):
     """
     Comparer les frais de notaire selon différents profils
     
@@ -162,7 +577,8 @@ async def compare_notary_profiles(data: NotaryFeeComparisonRequest):
     try:
         result = notary_fee_service.compare_profiles(
             purchase_price=data.purchase_price,
-            building_age_years=data.building_age_years
+            building_age_years=data.building_age_years,
+            use_cache=use_cache
         )
         return result
     
@@ -232,6 +648,78 @@ class WaterfallAdvancedRequest(BaseModel):
     )
 
 
+class WaterfallFlow(BaseModel):
+    """Flux daté d'un waterfall (apport ou distribution)"""
+    date: date
+    amount: float = Field(ge=0)
+    deal: Optional[str] = None
+
+
+class WaterfallTier(BaseModel):
+    """Palier de partage jusqu'à un TRI investisseur"""
+    hurdle_irr: Optional[float] = None
+    gp_share: float = Field(ge=0, lt=1)
+
+
+class WaterfallCatchUp(BaseModel):
+    rate: float = Field(default=1.0, gt=0, le=1)
+    target_share: float = Field(gt=0, lt=1)
+
+
+class WaterfallTimeseriesRequest(BaseModel):
+    """Requête de waterfall daté (TRI réels)"""
+    contributions: List[WaterfallFlow] = Field(..., min_length=1)
+    distributions: List[WaterfallFlow] = Field(..., min_length=1)
+    preferred_return: float = Field(default=0.08, gt=-1)
+    tiers: List[WaterfallTier] = Field(
+        default_factory=lambda: [WaterfallTier(hurdle_irr=None, gp_share=0.20)], min_length=1
+    )
+    catch_up: Optional[WaterfallCatchUp] = None
+    style: str = Field(default="european", description="european ou american")
+    gp_commitment_pct: float = Field(default=0.0, ge=0, lt=1)
+    clawback: bool = True
+
+
+class FundInvestor(BaseModel):
+    """Investisseur d'un fonds (compte de capital)"""
+    id: str
+    commitment: float = Field(gt=0)
+    commitment_date: Optional[date] = None
+    investor_class: Optional[str] = Field(default=None, alias="class")
+    side_letter: Optional[Dict[str, Any]] = None
+
+
+class InvestorAllocationRequest(BaseModel):
+    """Requête d'allocation multi-investisseurs"""
+    fund_name: str = "Fonds"
+    investors: List[FundInvestor] = Field(..., min_length=1, max_length=2000)
+    capital_calls: List[WaterfallFlow] = Field(..., min_length=1)
+    distributions: List[WaterfallFlow] = Field(..., min_length=1)
+    preferred_return: float = Field(default=0.08, gt=-1)
+    tiers: List[WaterfallTier] = Field(
+        default_factory=lambda: [WaterfallTier(hurdle_irr=None, gp_share=0.20)], min_length=1
+    )
+    catch_up: Optional[WaterfallCatchUp] = None
+    management_fee: float = Field(default=0.0, ge=0, lt=1)
+    classes: Optional[Dict[str, Dict[str, Any]]] = None
+    include_flows: bool = False
+
+
+def _run_investor_allocation(data: InvestorAllocationRequest) -> Dict[str, Any]:
+    """Appelle le service d'allocation depuis la requête"""
+    return investor_allocation_service.allocate(
+        investors=[investor.model_dump(by_alias=True) for investor in data.investors],
+        capital_calls=[flow.model_dump() for flow in data.capital_calls],
+        distributions=[flow.model_dump() for flow in data.distributions],
+        preferred_return=data.preferred_return,
+        tiers=[tier.model_dump() for tier in data.tiers],
+        catch_up=data.catch_up.model_dump() if data.catch_up else None,
+        management_fee=data.management_fee,
+        classes=data.classes,
+        include_flows=data.include_flows
+    )
+
+
 class PromoteSensitivityRequest(BaseModel):
     """Requête d'analyse de sensibilité promote"""
     equity_invested: float = Field(gt=0, description="Capital investi")
@@ -242,8 +730,22 @@ class PromoteSensitivityRequest(BaseModel):
     promote_share: float = Field(default=0.20, ge=0, le=1)
 
 
+class PromoteSurfaceRequest(BaseModel):
+    """Requête de surface de sensibilité promote (profit x hurdle ou profit x promote)"""
+    equity_invested: float = Field(gt=0, description="Capital investi")
+    min_profit: float = Field(ge=0, description="Profit minimum")
+    max_profit: float = Field(gt=0, description="Profit maximum")
+    profit_steps: int = Field(default=100, ge=2, le=2000, description="Nombre de points de profit")
+    parameter: str = Field(default="hurdle_rate", description="hurdle_rate ou promote_share")
+    min_value: float = Field(ge=0, le=1, description="Valeur minimale du paramètre")
+    max_value: float = Field(ge=0, le=1, description="Valeur maximale du paramètre")
+    value_steps: int = Field(default=20, ge=2, le=500, description="Nombre de valeurs du paramètre")
+    hurdle_rate: float = Field(default=0.10, ge=0, le=1)
+    promote_share: float = Field(default=0.20, ge=0, le=1)
+
+
 @router.post("/waterfall/simple")
-async def calculate_waterfall_simple(data: WaterfallSimpleRequest):
+async def calculate_waterfall_simple(data: WaterfallSimpleRequest, use_cache: bool = True):
     """
     Calculer une distribution waterfall simplifiée (2 paliers)
     
@@ -262,7 +764,8 @@ async def calculate_waterfall_simple(data: WaterfallSimpleRequest):
             hurdle_rate=data.hurdle_rate,
             lp_share_below_hurdle=data.lp_share_below_hurdle,
             lp_share_above_hurdle=data.lp_share_above_hurdle,
-            gp_share_above_hurdle=data.gp_share_above_hurdle
+            gp_share_above_hurdle=data.gp_share_above_hurdle,
+            use_cache=use_cache
         )
         return result
     
@@ -279,7 +782,7 @@ async def calculate_waterfall_simple(data: WaterfallSimpleRequest):
 
 
 @router.post("/waterfall/advanced")
-async def calculate_waterfall_advanced(data: WaterfallAdvancedRequest):
+async def calculate_waterfall_advanced(data: WaterfallAdvancedRequest, use_cache: bool = True):
     """
     Calculer une distribution waterfall multi-paliers personnalisée
     
@@ -300,7 +803,8 @@ async def calculate_waterfall_advanced(data: WaterfallAdvancedRequest):
         result = waterfall_service.calculate_waterfall_advanced(
             total_profit=data.total_profit,
             equity_invested=data.equity_invested,
-            tiers=data.tiers
+            tiers=data.tiers,
+            use_cache=use_cache
         )
         return result
     
@@ -316,8 +820,93 @@ async def calculate_waterfall_advanced(data: WaterfallAdvancedRequest):
         )
 
 
+@router.post("/waterfall/timeseries")
+async def calculate_waterfall_timeseries(data: WaterfallTimeseriesRequest, use_cache: bool = True):
+    """
+    Waterfall daté : hurdles sur le TRI réel des investisseurs
+    
+    Étapes : retour du capital, rendement préférentiel, catch-up GP (optionnel),
+    paliers de partage jusqu'à chaque hurdle de TRI, solde au dernier palier.
+    
+    Styles :
+    - **european** : un waterfall sur l'ensemble du fonds
+    - **american** : un waterfall par deal (champ `deal`), avec clawback en fin de fonds
+    """
+    try:
+        # Durée mesurée hors cache : un résultat mémoïsé ne rapporte pas le temps du calcul initial
+        start = time.perf_counter()
+        result = waterfall_service.calculate_waterfall_timeseries(
+            contributions=[flow.model_dump() for flow in data.contributions],
+            distributions=[flow.model_dump() for flow in data.distributions],
+            preferred_return=data.preferred_return,
+            tiers=[tier.model_dump() for tier in data.tiers],
+            catch_up=data.catch_up.model_dump() if data.catch_up else None,
+            style=data.style,
+            gp_commitment_pct=data.gp_commitment_pct,
+            clawback=data.clawback,
+            use_cache=use_cache
+        )
+        return {
+            "success": True,
+            **result,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur lors du calcul waterfall daté: {str(e)}"
+        )
+
+
+@router.post("/waterfall/investors")
+async def allocate_investors(data: InvestorAllocationRequest):
+    """
+    Allocation multi-investisseurs : comptes de capital, waterfall par LP
+    
+    - Appels au prorata des engagements (investisseurs entrés à la date d'appel)
+    - Frais de gestion par classe (taux annuel sur engagement)
+    - Distributions au prorata des comptes de capital
+    - Waterfall par investisseur, termes surchargés par classe (`classes`) ou side letter
+    
+    Returns:
+        TRI, multiple, promote et distributions nettes par investisseur
+    """
+    try:
+        return {
+            "success": True,
+            **_run_investor_allocation(data)
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur allocation investisseurs: {str(e)}")
+
+
+@router.post("/waterfall/investors/export")
+async def export_investor_allocation(data: InvestorAllocationRequest):
+    """
+    Export Excel de l'allocation multi-investisseurs
+    """
+    try:
+        allocation = _run_investor_allocation(data)
+        content = excel_service.generate_investor_allocation_excel(allocation, fund_name=data.fund_name)
+        return Response(
+            content=content,
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            headers={
+                "Content-Disposition": f"attachment; filename=allocation_{data.fund_name.replace(' ', '_')}.xlsx"
+            }
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur export allocation: {str(e)}")
+
+
 @router.post("/waterfall/sensitivity")
-async def analyze_promote_sensitivity(data: PromoteSensitivityRequest):
+async def analyze_promote_sensitivity(data: PromoteSensitivityRequest, use_cache: bool = True):
     """
     Analyse de sensibilité : impact du profit sur la distribution LP/GP
     
@@ -342,7 +931,8 @@ async def analyze_promote_sensitivity(data: PromoteSensitivityRequest):
             equity_invested=data.equity_invested,
             profit_range=profit_range,
             hurdle_rate=data.hurdle_rate,
-            promote_share=data.promote_share
+            promote_share=data.promote_share,
+            use_cache=use_cache
         )
         
         return {
@@ -361,6 +951,51 @@ async def analyze_promote_sensitivity(data: PromoteSensitivityRequest):
         )
 
 
+@router.post("/waterfall/sensitivity/surface")
+async def analyze_promote_surface(data: PromoteSurfaceRequest, use_cache: bool = True):
+    """
+    Surface de sensibilité 2D du promote pour les écrans de négociation
+    
+    Lignes : hurdle ou part de promote ; colonnes : profit distribué.
+    Évaluation en forme fermée (partage linéaire par morceaux en profit).
+    """
+    try:
+        profit_range = [
+            data.min_profit + (data.max_profit - data.min_profit) * i / (data.profit_steps - 1)
+            for i in range(data.profit_steps)
+        ]
+        values = [
+            data.min_value + (data.max_value - data.min_value) * i / (data.value_steps - 1)
+            for i in range(data.value_steps)
+        ]
+        
+        start = time.perf_counter()
+        result = waterfall_service.calculate_promote_surface(
+            equity_invested=data.equity_invested,
+            profit_range=profit_range,
+            parameter=data.parameter,
+            values=values,
+            hurdle_rate=data.hurdle_rate,
+            promote_share=data.promote_share,
+            use_cache=use_cache
+        )
+        
+        return {
+            "success": True,
+            "equity_invested": data.equity_invested,
+            **result,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur lors de la surface de sensibilité: {str(e)}"
+        )
+
+
 @router.get("/waterfall/templates")
 async def get_waterfall_templates():
     """
@@ -427,6 +1062,9 @@ class LoanScheduleRequest(BaseModel):
     amortization_type: str = Field(default="classic", description="classic, in_fine ou deferred")
     deferred_months: int = Field(default=0, ge=0, description="Mois de différé (pour type deferred)")
     deferred_interest_capitalized: bool = Field(default=False, description="Capitaliser intérêts du différé")
+    format: str = Field(default="rows", description="rows, columnar ou ndjson (streaming)")
+    cursor: Optional[int] = Field(default=None, ge=0, description="Nombre de mois déjà lus (pagination)")
+    limit: Optional[int] = Field(default=None, ge=1, le=360, description="Nombre maximal de mois retournés")
 
 
 class AmortizationComparisonRequest(BaseModel):
@@ -455,15 +1093,38 @@ async def generate_loan_schedule(data: LoanScheduleRequest):
     - Mensualité, capital, intérêts par mois
     - Capital restant dû
     - Cumuls
+    
+    Formats :
+    - **rows** : liste de lignes (format historique)
+    - **columnar** : un tableau par colonne (month, payment, principal...)
+    - **ndjson** : flux application/x-ndjson, en-tête puis une ligne par mois
+    
+    Pagination : `limit` mois à partir de `cursor` ; `pagination.next_cursor`
+    donne le curseur de la page suivante (null en fin de tableau).
     """
     try:
+        if data.format == "ndjson":
+            lines = financial_service.stream_loan_schedule(
+                loan_amount=data.loan_amount,
+                annual_rate=data.annual_rate,
+                years=data.years,
+                amortization_type=data.amortization_type,
+                deferred_months=data.deferred_months,
+                deferred_interest_capitalized=data.deferred_interest_capitalized,
+                cursor=data.cursor
+            )
+            return StreamingResponse(lines, media_type="application/x-ndjson")
+        
         schedule = financial_service.calculate_loan_schedule(
             loan_amount=data.loan_amount,
             annual_rate=data.annual_rate,
             years=data.years,
             amortization_type=data.amortization_type,
             deferred_months=data.deferred_months,
-            deferred_interest_capitalized=data.deferred_interest_capitalized
+            deferred_interest_capitalized=data.deferred_interest_capitalized,
+            schedule_format=data.format,
+            cursor=data.cursor,
+            limit=data.limit
         )
         return schedule
     
@@ -480,7 +1141,7 @@ async def generate_loan_schedule(data: LoanScheduleRequest):
 
 
 @router.post("/loan/compare")
-async def compare_amortization_options(data: AmortizationComparisonRequest):
+async def compare_amortization_options(data: AmortizationComparisonRequest, use_cache: bool = True):
     """
     Comparer les coûts selon différents types d'amortissement
     
@@ -500,7 +1161,8 @@ async def compare_amortization_options(data: AmortizationComparisonRequest):
             loan_amount=data.loan_amount,
             annual_rate=data.annual_rate,
             years=data.years,
-            deferred_months=data.deferred_months
+            deferred_months=data.deferred_months,
+            use_cache=use_cache
         )
         return comparison
     
@@ -571,3 +1233,30 @@ async def get_loan_types():
             "vefa_developer": "in_fine"
         }
     }
+
+
+# === CACHE DES CALCULATEURS ===
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Statistiques du cache des calculateurs purs
+    
+    Compteurs hits / misses / bypassed / evictions / expirations et taille par fonction.
+    Chaque endpoint mis en cache accepte `?use_cache=false` pour forcer le recalcul.
+    """
+    return {
+        "success": True,
+        **memo_cache.stats()
+    }
+
+
+@router.delete("/cache")
+async def clear_cache(function: Optional[str] = None):
+    """
+    Vider le cache (entièrement ou pour une fonction, ex: financial.calculate_full_analysis)
+    """
+    return {
+        "success": True,
+        "removed": memo_cache.clear(function)
+    }
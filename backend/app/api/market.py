@@ -1,10 +1,14 @@
 """
 Routes API pour l'analyse de marché (DVF et comparables)
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any, Optional
+from app.core.database import get_db
+from app.services.dvf_price_index import dvf_price_index
 from app.services.dvf_service import DVFService, MarketAnalysisService
+from app.services.dvf_store import dvf_store
 
 router = APIRouter(prefix="/market", tags=["market"])
 
@@ -19,10 +23,14 @@ class MarketAnalysisRequest(BaseModel):
     surface: float
     type_bien: str = "appartement"
     purchase_price: Optional[float] = 0
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    nombre_pieces: Optional[int] = None
+    rayon_km: float = 1.0
 
 
 @router.post("/analyze")
-async def analyze_market(request: MarketAnalysisRequest):
+async def analyze_market(request: MarketAnalysisRequest, db: AsyncSession = Depends(get_db)):
     """
     Analyse complète du marché immobilier local
     
@@ -34,10 +42,14 @@ async def analyze_market(request: MarketAnalysisRequest):
         "address": request.address,
         "surface": request.surface,
         "type_bien": request.type_bien,
-        "purchase_price": request.purchase_price
+        "purchase_price": request.purchase_price,
+        "latitude": request.latitude,
+        "longitude": request.longitude,
+        "nombre_pieces": request.nombre_pieces,
+        "rayon_km": request.rayon_km
     }
     
-    analysis = await market_service.full_market_analysis(project_data)
+    analysis = await market_service.full_market_analysis(project_data, db=db)
     
     return {
         "analysis": analysis,
@@ -50,7 +62,10 @@ async def analyze_market(request: MarketAnalysisRequest):
 async def get_comparables(
     commune: str,
     type_local: str = "Appartement",
-    months_back: int = 24
+    months_back: int = 24,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    rayon_km: float = 1.0
 ):
     """
     Récupère les ventes comparables DVF
@@ -59,19 +74,24 @@ async def get_comparables(
         commune: Code INSEE ou nom de la commune
         type_local: Maison, Appartement, Local commercial, etc.
         months_back: Nombre de mois en arrière
+        latitude, longitude: Centre de recherche (ventes du rayon, base locale géolocalisée)
+        rayon_km: Rayon de recherche en km
     
     Returns:
         Liste des transactions comparables
     """
-    comparables = await dvf_service.get_comparable_sales(
+    result = await dvf_service.search_comparables(
         commune=commune,
         type_local=type_local,
-        months_back=months_back
+        months_back=months_back,
+        limit=50,
+        latitude=latitude,
+        longitude=longitude,
+        rayon_km=rayon_km
     )
     
     return {
-        "comparables": comparables[:50],  # Limiter à 50
-        "total_found": len(comparables),
+        **result,
         "commune": commune,
         "type_local": type_local,
         "period": f"{months_back} derniers mois"
@@ -79,16 +99,17 @@ async def get_comparables(
 
 
 @router.get("/trend/{commune}")
-async def get_market_trend(commune: str, type_bien: str = "appartement"):
+async def get_market_trend(commune: str, type_bien: str = "appartement", db: AsyncSession = Depends(get_db)):
     """
     Analyse la tendance du marché immobilier
     
     Returns:
-        Évolution des prix sur 12 mois
+        Évolution des prix sur 12 mois (et série trimestrielle si la commune est indexée)
     """
     trend = await dvf_service.analyze_market_trend(
         commune=commune,
-        type_bien=type_bien
+        type_bien=type_bien,
+        db=db
     )
     
     return {
@@ -99,7 +120,7 @@ async def get_market_trend(commune: str, type_bien: str = "appartement"):
 
 
 @router.post("/valuation")
-async def calculate_valuation(request: MarketAnalysisRequest):
+async def calculate_valuation(request: MarketAnalysisRequest, db: AsyncSession = Depends(get_db)):
     """
     Calcule la valeur de marché d'un bien
     
@@ -110,7 +131,12 @@ async def calculate_valuation(request: MarketAnalysisRequest):
         address=request.address,
         surface=request.surface,
         commune=request.commune,
-        type_bien=request.type_bien
+        type_bien=request.type_bien,
+        latitude=request.latitude,
+        longitude=request.longitude,
+        nombre_pieces=request.nombre_pieces,
+        rayon_km=request.rayon_km,
+        db=db
     )
     
     return {
@@ -121,3 +147,54 @@ async def calculate_valuation(request: MarketAnalysisRequest):
             "type": request.type_bien
         }
     }
+
+
+@router.get("/dvf/status")
+async def get_dvf_store_status():
+    """
+    État de la base DVF locale
+    
+    Returns:
+        Nombre de ventes, période couverte, fichiers sources (available=False si vide)
+    """
+    return dvf_store.stats()
+
+
+@router.get("/price-index/{commune}")
+async def get_price_index(
+    commune: str,
+    type_local: str = "Appartement",
+    period_type: str = "quarter",
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Série précalculée des prix au m² (médiane, moyenne tronquée, quartiles)
+    
+    Args:
+        commune: Code INSEE ou nom de la commune
+        period_type: month ou quarter
+    """
+    try:
+        series = await dvf_price_index.series(
+            db, DVFService.INSEE_CODES.get(commune, commune), type_local, period_type
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "series": series,
+        "commune": commune,
+        "type_local": type_local,
+        "period_type": period_type
+    }
+
+
+@router.post("/dvf/price-index/refresh")
+async def refresh_price_index(db: AsyncSession = Depends(get_db)):
+    """
+    Met à jour l'indice des prix après une ingestion DVF (périodes modifiées uniquement)
+    
+    Returns:
+        Périodes insérées, mises à jour, supprimées et inchangées
+    """
+    return await dvf_price_index.refresh(db)
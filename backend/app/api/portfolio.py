@@ -0,0 +1,117 @@
+"""
+Routes API portefeuille : flux agrégés et indicateurs fonds
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import List, Optional
+from datetime import date
+
+from app.core.database import get_db
+from app.core.deps import get_current_active_user
+from app.models import Project, User
+from app.models.cashflow import ProjectCashflow
+from app.services.portfolio_service import portfolio_service, CASHFLOW_COLUMNS
+
+router = APIRouter(prefix="/portfolio", tags=["portfolio"])
+
+
+async def _get_user_project(db: AsyncSession, project_id: int, user: User) -> Project:
+    """Projet de l'utilisateur ou 404"""
+    result = await db.execute(
+        select(Project).where(Project.id == project_id, Project.user_id == user.id)
+    )
+    project = result.scalar_one_or_none()
+    
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Projet non trouvé"
+        )
+    return project
+
+
+@router.get("/summary")
+async def get_portfolio_summary(
+    project_ids: Optional[List[int]] = Query(None),
+    as_of: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Synthèse portefeuille
+    
+    Returns:
+        TRI fonds, TVPI/DPI, besoin d'equity max et flux mensuels agrégés (format colonnes)
+    """
+    summary = await portfolio_service.get_portfolio_summary(
+        db, current_user.id, project_ids=project_ids, as_of=as_of
+    )
+    
+    return {
+        "success": True,
+        **summary
+    }
+
+
+@router.post("/refresh")
+async def refresh_portfolio(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Recalculer les flux de tous les projets de l'utilisateur
+    """
+    refreshed = await portfolio_service.refresh_user_projects(db, current_user.id)
+    await db.commit()
+    
+    return {
+        "success": True,
+        "projects_refreshed": len(refreshed),
+        "months_written": sum(refreshed.values())
+    }
+
+
+@router.post("/projects/{project_id}/refresh")
+async def refresh_project_cashflows(
+    project_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Recalculer les flux d'un seul projet (les autres lignes ne sont pas touchées)
+    """
+    await _get_user_project(db, project_id, current_user)
+    months = await portfolio_service.refresh_project_cashflows(db, project_id)
+    await db.commit()
+    
+    return {
+        "success": True,
+        "project_id": project_id,
+        "months_written": months
+    }
+
+
+@router.get("/projects/{project_id}/cashflows")
+async def get_project_cashflows(
+    project_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Flux mensuels stockés d'un projet (format colonnes)
+    """
+    await _get_user_project(db, project_id, current_user)
+    result = await db.execute(
+        select(ProjectCashflow)
+        .where(ProjectCashflow.project_id == project_id)
+        .order_by(ProjectCashflow.month)
+    )
+    rows = result.scalars().all()
+    
+    return {
+        "success": True,
+        "project_id": project_id,
+        "month": [row.month.isoformat() for row in rows],
+        **{name: [getattr(row, name) for row in rows] for name in CASHFLOW_COLUMNS}
+    }
@@ -5,6 +5,9 @@ from typing import List
 from app.core.database import get_db
 from app.core.deps import get_current_active_user
 from app.models import Project, ProjectStatus, ProjectType, User
+from app.models.timeline import ProjectTimeline
+from app.services.portfolio_service import portfolio_service
+from app.services.timeline_service import timeline_service
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -222,6 +225,17 @@ async def update_project(
     for key, value in project_data.model_dump(exclude_unset=True).items():
         setattr(project, key, value)
     
+    # Échéancier de la timeline si loyers ou valeur de sortie ont changé
+    timeline = (await db.execute(
+        select(ProjectTimeline).where(ProjectTimeline.project_id == project_id)
+    )).scalar_one_or_none()
+    if timeline is not None:
+        timeline_service.refresh_cashflow_schedule(timeline, project)
+    
+    # Flux portefeuille de ce projet uniquement
+    await db.flush()
+    await portfolio_service.refresh_project_cashflows(db, project_id)
+    
     await db.commit()
     await db.refresh(project)
     
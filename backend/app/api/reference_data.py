@@ -0,0 +1,72 @@
+"""
+Routes API pour les données de référence (délais, prix CAPEX, zones PLU)
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.services.reference_data import reference_data
+
+router = APIRouter(prefix="/reference-data", tags=["Reference Data"])
+
+
+@router.get("/status")
+async def get_reference_data_status():
+    """
+    Versions chargées et taille des index en mémoire
+    """
+    snapshot = reference_data.snapshot
+
+    return {
+        "success": True,
+        "versions": dict(snapshot.versions),
+        "counts": {
+            "administrative_delays": len(snapshot.delays),
+            "capex_costs": len(snapshot.capex),
+            "plu_zones": len(snapshot.plu),
+        },
+    }
+
+
+@router.post("/refresh")
+async def refresh_reference_data(db: AsyncSession = Depends(get_db)):
+    """
+    Recharge immédiatement les jeux dont la version a changé
+    """
+    reloaded = await reference_data.refresh(db)
+
+    return {
+        "success": True,
+        "reloaded": reloaded,
+        "versions": dict(reference_data.snapshot.versions),
+    }
+
+
+@router.get("/plu-zones/{city}")
+async def get_city_plu_zones(city: str):
+    """
+    Zones PLU connues pour une ville
+    """
+    snapshot = reference_data.snapshot
+    zones = snapshot.plu_cities.get(city, ())
+
+    return {
+        "success": True,
+        "city": city,
+        "zones": [dict(snapshot.plu_zone(city, zone)) for zone in zones],
+    }
+
+
+@router.get("/plu-zones/{city}/{zone}")
+async def get_plu_zone(city: str, zone: str):
+    """
+    Règles d'une zone PLU (hauteur, CES, COS, destinations autorisées)
+    """
+    record = reference_data.snapshot.plu_zone(city, zone)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Zone {zone} inconnue pour {city}")
+
+    return {
+        "success": True,
+        **record
+    }
@@ -7,7 +7,6 @@ from datetime import datetime
 
 from app.core.database import get_db
 from app.models.project import Project
-from app.workers.tasks import scrape_all_project_data
 
 router = APIRouter(prefix="/scraper", tags=["scraper"])
 
@@ -54,7 +53,9 @@ async def start_project_scraping(
             detail="Le projet doit avoir une adresse complète pour le scraping"
         )
     
-    # Lancer la tâche Celery
+    # Lancer la tâche Celery (celery chargé au premier lancement)
+    from app.workers.tasks import scrape_all_project_data
+    
     task = scrape_all_project_data.apply_async(
         args=[
             project_id,
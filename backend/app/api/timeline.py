@@ -9,6 +9,9 @@ from app.core.database import get_db
 from app.models.timeline import ProjectTimeline, CurveType
 from app.models.project import Project
 from app.services.timeline_service import timeline_service
+from app.services.capex_curves import available_curves
+from app.services.schedule_engine import ScheduleNetwork
+from app.services.portfolio_service import portfolio_service
 
 router = APIRouter(prefix="/timeline", tags=["timeline"])
 
@@ -30,10 +33,18 @@ class TimelineCreateRequest(BaseModel):
     construction_duration_months: int = Field(ge=1, le=60, description="Durée travaux")
     construction_budget: float = Field(ge=0, description="Budget travaux")
     capex_curve_type: str = Field(default="s_curve", description="Type courbe CAPEX")
+    capex_curve_params: Optional[Dict[str, Any]] = Field(
+        default=None, description="Paramètres de courbe (steepness, alpha/beta, milestones, percentages)"
+    )
     
     # Phase Commercialisation
     commercialization_duration_months: int = Field(ge=0, le=60)
     commercialization_type: str = Field(description="VEFA, RENTAL, RESALE, MIXED")
+    vefa_reservations_schedule: Optional[List[Dict[str, Any]]] = Field(
+        default=None, description="[{month, pct_sold, cash_in}] - month = mois de commercialisation (1 = premier)"
+    )
+    rental_start_date: Optional[datetime] = None
+    resale_date: Optional[datetime] = None
     
     # Options
     execution_mode: str = Field(default="sequential", description="sequential ou parallel")
@@ -50,12 +61,82 @@ class TimelineUpdateRequest(BaseModel):
     construction_duration_months: Optional[int] = None
     construction_budget: Optional[float] = None
     capex_curve_type: Optional[str] = None
+    capex_curve_params: Optional[Dict[str, Any]] = None
     commercialization_duration_months: Optional[int] = None
     commercialization_type: Optional[str] = None
+    vefa_reservations_schedule: Optional[List[Dict[str, Any]]] = None
+    rental_start_date: Optional[datetime] = None
+    resale_date: Optional[datetime] = None
     execution_mode: Optional[str] = None
     notes: Optional[str] = None
 
 
+class ScheduleTask(BaseModel):
+    """Tâche du réseau (durée en jours)"""
+    id: str
+    duration: float = Field(ge=0, description="Durée en jours")
+    phase: Optional[str] = Field(default=None, description="studies, permit, construction, commercialization")
+    name: Optional[str] = None
+
+
+class ScheduleLink(BaseModel):
+    """Lien entre tâches"""
+    from_: str = Field(alias="from")
+    to: str
+    type: str = Field(default="FS", description="FS (fin-début), SS (début-début), FF (fin-fin)")
+    lag: float = Field(default=0, description="Décalage en jours")
+
+
+class ScheduleRequest(BaseModel):
+    """Réseau de tâches d'un projet"""
+    start_date: Optional[datetime] = None
+    tasks: List[ScheduleTask] = Field(min_length=1, max_length=2000)
+    links: List[ScheduleLink] = []
+
+
+class TaskDurationUpdate(BaseModel):
+    """Nouvelle durée d'une tâche"""
+    duration: float = Field(ge=0, description="Durée en jours")
+
+
+# Champs de mise à jour qui redéfinissent le calendrier des phases
+PHASE_UPDATE_FIELDS = (
+    "study_phase_start", "study_duration_months", "permit_duration_months",
+    "construction_duration_months", "commercialization_duration_months", "execution_mode",
+)
+
+
+# Champ de durée (mois) -> phase du réseau de tâches
+PHASE_DURATION_FIELDS = {
+    "study_duration_months": "studies",
+    "permit_duration_months": "permit",
+    "construction_duration_months": "construction",
+    "commercialization_duration_months": "commercialization",
+}
+
+
+def _phase_months(start: Optional[datetime], end: Optional[datetime]) -> int:
+    """Durée d'une phase stockée, en mois"""
+    if start is None or end is None:
+        return 0
+    return (end.year - start.year) * 12 + end.month - start.month
+
+
+async def _stored_schedule(db: AsyncSession, timeline: ProjectTimeline) -> Dict[str, Any]:
+    """
+    Échéancier stocké de la timeline
+    
+    Calculé et enregistré une seule fois pour les timelines créées avant son introduction.
+    """
+    if timeline.cashflow_schedule:
+        return timeline.cashflow_schedule
+    
+    project = (await db.execute(select(Project).where(Project.id == timeline.project_id))).scalar_one_or_none()
+    timeline_service.refresh_cashflow_schedule(timeline, project)
+    await db.commit()
+    return timeline.cashflow_schedule
+
+
 class TimelineResponse(BaseModel):
     """Réponse avec timeline complète"""
     id: int
@@ -79,6 +160,7 @@ class TimelineResponse(BaseModel):
     construction_phase_end: Optional[datetime]
     construction_budget: float
     capex_curve_type: str
+    capex_curve_params: Optional[Dict[str, Any]] = None
     
     commercialization_phase_start: Optional[datetime]
     commercialization_phase_end: Optional[datetime]
@@ -136,13 +218,6 @@ async def create_timeline(
         execution_mode=data.execution_mode
     )
     
-    # Calculer la courbe CAPEX
-    capex_curve = timeline_service.calculate_capex_curve(
-        total_capex=data.construction_budget,
-        construction_months=data.construction_duration_months,
-        curve_type=data.capex_curve_type
-    )
-    
     # Calculer durée totale
     duration = timeline_service.calculate_project_duration(
         study_months=data.study_duration_months,
@@ -171,11 +246,15 @@ async def create_timeline(
         construction_phase_end=phases["construction"]["end"],
         construction_budget=data.construction_budget,
         capex_curve_type=data.capex_curve_type,
+        capex_curve_params=data.capex_curve_params,
         
         # Phase Commercialisation
         commercialization_phase_start=phases["commercialization"]["start"],
         commercialization_phase_end=phases["commercialization"]["end"],
         commercialization_type=data.commercialization_type,
+        vefa_reservations_schedule=data.vefa_reservations_schedule,
+        rental_start_date=data.rental_start_date,
+        resale_date=data.resale_date,
         
         # Calculés
         project_start_date=phases["studies"]["start"],
@@ -184,19 +263,35 @@ async def create_timeline(
         
         # Méta
         execution_mode=data.execution_mode,
-        notes=data.notes,
-        
-        # Stockage courbe CAPEX
-        construction_milestones=capex_curve
+        notes=data.notes
     )
     
+    # Échéancier de trésorerie mensuel (études, permis, CAPEX, VEFA, loyers, revente)
+    try:
+        timeline_service.refresh_cashflow_schedule(timeline, project)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
     db.add(timeline)
+    await db.flush()
+    
+    # Flux portefeuille de ce projet uniquement
+    await portfolio_service.refresh_project_cashflows(db, data.project_id)
+    
     await db.commit()
     await db.refresh(timeline)
     
     return timeline
 
 
+@router.get("/curve-types")
+async def get_curve_types():
+    """
+    Courbes de décaissement CAPEX disponibles
+    """
+    return {"curves": available_curves()}
+
+
 @router.get("/{project_id}", response_model=TimelineResponse)
 async def get_timeline(
     project_id: int,
@@ -227,6 +322,9 @@ async def update_timeline(
 ):
     """
     Mettre à jour une timeline existante
+    
+    Timeline ordonnancée (POST /schedule) : les durées de phase sont reportées sur
+    les tâches du réseau, recalculé par chemin critique.
     """
     result = await db.execute(
         select(ProjectTimeline).where(ProjectTimeline.project_id == project_id)
@@ -242,12 +340,75 @@ async def update_timeline(
     # Mise à jour des champs fournis
     update_data = data.model_dump(exclude_unset=True)
     
+    # Nouvelle courbe sans paramètres : ceux de l'ancienne courbe ne s'appliquent plus
+    if (
+        update_data.get("capex_curve_type") not in (None, timeline.capex_curve_type)
+        and "capex_curve_params" not in update_data
+    ):
+        update_data["capex_curve_params"] = None
+    
     for field, value in update_data.items():
         if hasattr(timeline, field):
             setattr(timeline, field, value)
     
-    # Recalculer les dates si nécessaire
-    # TODO: Ajouter logique de recalcul intelligent
+    # Timeline ordonnancée par chemin critique : durées reportées sur le réseau
+    if timeline.schedule_network and any(field in update_data for field in PHASE_UPDATE_FIELDS):
+        try:
+            network = timeline_service.schedule_network(project_id, timeline.schedule_network)
+            timeline_service.rescale_phases(network, {
+                phase: update_data[field] for field, phase in PHASE_DURATION_FIELDS.items()
+                if update_data.get(field) is not None
+            })
+            start_date = update_data.get("study_phase_start") or datetime.fromisoformat(
+                timeline.schedule_network["start_date"]
+            )
+            timeline_service.apply_schedule(timeline, network, start_date)
+        except ValueError as e:
+            timeline_service.discard_network(project_id)
+            await db.rollback()
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    # Recalculer les dates des phases si le calendrier a changé
+    elif any(field in update_data for field in PHASE_UPDATE_FIELDS):
+        durations = {
+            "study_months": update_data.get("study_duration_months")
+            or _phase_months(timeline.study_phase_start, timeline.study_phase_end),
+            "permit_months": update_data.get("permit_duration_months")
+            or _phase_months(timeline.permit_phase_start, timeline.permit_phase_end),
+            "construction_months": update_data.get("construction_duration_months")
+            or _phase_months(timeline.construction_phase_start, timeline.construction_phase_end),
+            "commercialization_months": update_data.get(
+                "commercialization_duration_months",
+                _phase_months(timeline.commercialization_phase_start, timeline.commercialization_phase_end)
+            ),
+        }
+        execution_mode = timeline.execution_mode or "sequential"
+        phases = timeline_service.generate_phase_dates(
+            start_date=timeline.study_phase_start, execution_mode=execution_mode, **durations
+        )
+        for phase, prefix in (
+            ("studies", "study"), ("permit", "permit"),
+            ("construction", "construction"), ("commercialization", "commercialization"),
+        ):
+            setattr(timeline, f"{prefix}_phase_start", phases[phase]["start"])
+            setattr(timeline, f"{prefix}_phase_end", phases[phase]["end"])
+        
+        duration = timeline_service.calculate_project_duration(execution_mode=execution_mode, **durations)
+        timeline.project_start_date = phases["studies"]["start"]
+        timeline.project_end_date = phases["commercialization"]["end"]
+        timeline.total_duration_months = duration["total_months"]
+    
+    # Échéancier recalculé uniquement si l'une de ses entrées a changé
+    project = (await db.execute(select(Project).where(Project.id == project_id))).scalar_one_or_none()
+    try:
+        timeline_service.refresh_cashflow_schedule(timeline, project)
+    except ValueError as e:
+        timeline_service.discard_network(project_id)
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    await db.flush()
+    await portfolio_service.refresh_project_cashflows(db, project_id)
     
     await db.commit()
     await db.refresh(timeline)
@@ -255,6 +416,125 @@ async def update_timeline(
     return timeline
 
 
+async def _apply_schedule(
+    db: AsyncSession,
+    timeline: ProjectTimeline,
+    network: ScheduleNetwork,
+    start_date: datetime
+) -> Dict[str, Any]:
+    """Reporte l'ordonnancement sur la timeline, puis échéancier et flux portefeuille"""
+    schedule = timeline_service.apply_schedule(timeline, network, start_date)
+    
+    project = (await db.execute(select(Project).where(Project.id == timeline.project_id))).scalar_one_or_none()
+    timeline_service.refresh_cashflow_schedule(timeline, project)
+    await db.flush()
+    await portfolio_service.refresh_project_cashflows(db, timeline.project_id)
+    await db.commit()
+    
+    return schedule
+
+
+@router.post("/{project_id}/schedule")
+async def set_schedule(
+    project_id: int,
+    data: ScheduleRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Ordonnancer le projet par chemin critique
+    
+    Les tâches portant une phase (studies, permit, construction, commercialization)
+    définissent les dates de cette phase dans la timeline.
+    """
+    result = await db.execute(
+        select(ProjectTimeline).where(ProjectTimeline.project_id == project_id)
+    )
+    timeline = result.scalar_one_or_none()
+    
+    if not timeline:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Aucune timeline pour le projet {project_id}"
+        )
+    
+    try:
+        network = ScheduleNetwork(
+            [task.model_dump(exclude_none=True) for task in data.tasks],
+            [link.model_dump(by_alias=True) for link in data.links]
+        )
+        start_date = data.start_date or timeline.project_start_date or timeline.study_phase_start
+        schedule = await _apply_schedule(db, timeline, network, start_date)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    return {"success": True, "project_id": project_id, **schedule}
+
+
+@router.get("/{project_id}/schedule")
+async def get_schedule(
+    project_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Ordonnancement courant : tâches (dates au plus tôt / au plus tard, marges) et chemin critique
+    """
+    result = await db.execute(
+        select(ProjectTimeline).where(ProjectTimeline.project_id == project_id)
+    )
+    timeline = result.scalar_one_or_none()
+    
+    if not timeline or not timeline.schedule_network:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Aucun ordonnancement pour le projet {project_id}"
+        )
+    
+    network = timeline_service.schedule_network(project_id, timeline.schedule_network)
+    start_date = datetime.fromisoformat(timeline.schedule_network["start_date"])
+    
+    return {
+        "project_id": project_id,
+        "start_date": start_date.isoformat(),
+        "duration_days": float(network.result.project_duration),
+        "critical_path": network.critical_path(),
+        "tasks": timeline_service.schedule_rows(network, start_date),
+    }
+
+
+@router.patch("/{project_id}/schedule/tasks/{task_id}")
+async def update_schedule_task(
+    project_id: int,
+    task_id: str,
+    data: TaskDurationUpdate,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Modifier la durée d'une tâche (recalcul incrémental du réseau en mémoire)
+    """
+    result = await db.execute(
+        select(ProjectTimeline).where(ProjectTimeline.project_id == project_id)
+    )
+    timeline = result.scalar_one_or_none()
+    
+    if not timeline or not timeline.schedule_network:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Aucun ordonnancement pour le projet {project_id}"
+        )
+    
+    try:
+        network = timeline_service.schedule_network(project_id, timeline.schedule_network)
+        network.update_duration(task_id, data.duration)
+        start_date = datetime.fromisoformat(timeline.schedule_network["start_date"])
+        schedule = await _apply_schedule(db, timeline, network, start_date)
+    except ValueError as e:
+        timeline_service.discard_network(project_id)
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    return {"success": True, "project_id": project_id, **schedule}
+
+
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_timeline(
     project_id: int,
@@ -297,12 +577,14 @@ async def get_capex_curve(
             detail=f"Aucune timeline pour le projet {project_id}"
         )
     
+    schedule = await _stored_schedule(db, timeline)
+    
     return {
         "project_id": project_id,
-        "curve_type": timeline.capex_curve_type,
+        "curve_type": schedule["construction"]["curve_type"],
         "total_budget": timeline.construction_budget,
         "duration_months": timeline.total_duration_months,
-        "curve": timeline.construction_milestones or []
+        "curve": timeline_service.schedule_capex_curve(schedule)
     }
 
 
@@ -325,8 +607,15 @@ async def get_timeline_summary(
             detail=f"Aucune timeline pour le projet {project_id}"
         )
     
+    schedule = await _stored_schedule(db, timeline)
+    
+    # TRI daté sur les flux complets du projet (acquisition, frais, dette, échéancier)
+    project = (await db.execute(select(Project).where(Project.id == project_id))).scalar_one_or_none()
+    xirr = portfolio_service.project_xirr(project, timeline) if project else None
+    
     return {
         "project_id": project_id,
+        "xirr": xirr,
         "total_duration_months": timeline.total_duration_months,
         "total_duration_years": round(timeline.total_duration_months / 12, 1),
         "start_date": timeline.project_start_date,
@@ -354,5 +643,12 @@ async def get_timeline_summary(
                 "type": timeline.commercialization_type
             }
         },
+        "cashflow": {
+            "start": schedule["start"],
+            "months": schedule["months"],
+            "totals": schedule["totals"],
+            "peak_funding": schedule["peak_funding"],
+            "breakeven_month": schedule["breakeven_month"]
+        },
         "execution_mode": timeline.execution_mode
     }
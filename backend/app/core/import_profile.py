@@ -0,0 +1,119 @@
+"""
+Profil du temps d'import de l'API (équivalent lisible de `python -X importtime`)
+
+Usage (depuis backend/) :
+    python -m app.core.import_profile
+    python -m app.core.import_profile --module app.main --top 30
+"""
+from typing import Any, Dict, List
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+
+MARKER = "__IMPORT_PROFILE__"
+
+# Dépendances qui ne doivent pas être importées au démarrage de l'API
+HEAVY_MODULES = (
+    "openai", "langchain", "langchain_core", "langchain_openai", "langchain_community", "chromadb",
+    "scipy", "reportlab", "PyPDF2", "PIL", "pytesseract", "openpyxl", "xlsxwriter", "docx",
+    "requests", "httpx", "celery", "pandas",
+)
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)$")
+
+_SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+from app.core.lazy import lazy_status
+print("{marker}" + json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules), "lazy": lazy_status()}}))
+"""
+
+
+def profile_imports(module: str = "app.main") -> Dict[str, Any]:
+    """
+    Importe un module dans un interpréteur neuf avec -X importtime
+
+    Returns:
+        {
+            "seconds": durée d'import mesurée,
+            "modules": modules chargés,
+            "lazy": {mandataire: chargé ?},
+            "imports": [{"module", "depth", "self_ms", "cumulative_ms"}]
+        }
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _SCRIPT.format(module=module, marker=MARKER)],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    )
+    payload = next((line for line in result.stdout.splitlines() if line.startswith(MARKER)), None)
+    if result.returncode != 0 or payload is None:
+        raise RuntimeError(f"Import de {module} impossible:\n{result.stderr[-2000:]}")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            imports.append({
+                "module": match.group(4),
+                "depth": len(match.group(3)) // 2,
+                "self_ms": int(match.group(1)) / 1000,
+                "cumulative_ms": int(match.group(2)) / 1000,
+            })
+
+    return {**json.loads(payload[len(MARKER):]), "imports": imports}
+
+
+def package_totals(imports: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Temps propre cumulé par paquet de premier niveau (ms), décroissant"""
+    totals: Dict[str, float] = {}
+    for entry in imports:
+        package = entry["module"].split(".")[0]
+        totals[package] = totals.get(package, 0.0) + entry["self_ms"]
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def format_report(profile: Dict[str, Any], top: int = 20) -> str:
+    """Rapport texte : durée totale, paquets, modules de l'application, dépendances lourdes"""
+    lines = [f"Import total : {profile['seconds'] * 1000:.0f} ms ({len(profile['modules'])} modules)", ""]
+
+    lines.append(f"{'paquet':<32} {'ms':>9}")
+    for package, ms in list(package_totals(profile["imports"]).items())[:top]:
+        lines.append(f"{package:<32} {ms:>9.1f}")
+
+    lines += ["", f"{'module de l application (cumulé)':<48} {'ms':>9}"]
+    app_modules = sorted(
+        (entry for entry in profile["imports"] if entry["module"].startswith("app.")),
+        key=lambda entry: entry["cumulative_ms"],
+        reverse=True
+    )
+    for entry in app_modules[:top]:
+        lines.append(f"{entry['module']:<48} {entry['cumulative_ms']:>9.1f}")
+
+    loaded = [name for name in HEAVY_MODULES if name in profile["modules"]]
+    lines += ["", "Dépendances lourdes chargées au démarrage : " + (", ".join(loaded) or "aucune")]
+    pending = [name for name, is_loaded in profile["lazy"].items() if not is_loaded]
+    lines.append("Chargement différé : " + (", ".join(pending) or "aucun"))
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Profil du temps d'import")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Profil brut en JSON")
+    args = parser.parse_args()
+
+    profile = profile_imports(args.module)
+    print(json.dumps(profile, indent=2) if args.json else format_report(profile, args.top))
+
+
+if __name__ == "__main__":
+    main()
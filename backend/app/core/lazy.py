@@ -0,0 +1,107 @@
+"""
+Chargement différé des dépendances lourdes (openai, reportlab, PyPDF2, PIL, scipy...)
+
+lazy_import() renvoie un module mandataire importé au premier accès à un attribut ;
+lazy_instance() fait de même pour un singleton de service. Tous les mandataires sont
+enregistrés pour pouvoir être chargés en tâche de fond après le démarrage (warm_up).
+"""
+from typing import Any, Callable, Dict, List, Optional
+import importlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+_registry: List["_LazyProxy"] = []
+
+
+class _LazyProxy:
+    """Mandataire résolu une seule fois, au premier accès"""
+
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        object.__setattr__(self, "_lazy_name", name)
+        object.__setattr__(self, "_lazy_loader", loader)
+        object.__setattr__(self, "_lazy_target", None)
+        object.__setattr__(self, "_lazy_lock", threading.Lock())
+        _registry.append(self)
+
+    def _resolve(self) -> Any:
+        target = self._lazy_target
+        if target is None:
+            with self._lazy_lock:
+                target = self._lazy_target
+                if target is None:
+                    target = self._lazy_loader()
+                    object.__setattr__(self, "_lazy_target", target)
+        return target
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._lazy_target is not None
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._resolve(), attribute)
+
+    def __setattr__(self, attribute: str, value: Any) -> None:
+        # unittest.mock.patch et les tests remplacent des attributs sur l'objet réel
+        setattr(self._resolve(), attribute, value)
+
+    def __delattr__(self, attribute: str) -> None:
+        delattr(self._resolve(), attribute)
+
+    def __repr__(self) -> str:
+        state = "chargé" if self.is_loaded else "non chargé"
+        return f"<lazy {self._lazy_name} ({state})>"
+
+
+def lazy_import(module: str) -> Any:
+    """
+    Module importé au premier accès à l'un de ses attributs
+
+    Exemple :
+        PyPDF2 = lazy_import("PyPDF2")
+        reader = PyPDF2.PdfReader(file)  # import effectif ici
+    """
+    return _LazyProxy(module, lambda: importlib.import_module(module))
+
+
+def lazy_instance(name: str, factory: Callable[[], Any]) -> Any:
+    """
+    Singleton construit au premier accès à l'un de ses attributs
+
+    Args:
+        name: Nom affiché (statistiques de préchargement)
+        factory: Constructeur sans argument
+    """
+    return _LazyProxy(name, factory)
+
+
+def warm_up(names: Optional[List[str]] = None) -> Dict[str, float]:
+    """
+    Charge les mandataires encore non résolus (tâche de fond après démarrage)
+
+    Args:
+        names: Mandataires à charger (défaut : tous)
+
+    Returns:
+        {nom: durée de chargement en secondes}
+    """
+    timings = {}
+    for proxy in list(_registry):
+        if proxy.is_loaded or (names is not None and proxy._lazy_name not in names):
+            continue
+        start = time.perf_counter()
+        try:
+            proxy._resolve()
+        except Exception as e:
+            logger.warning(f"Préchargement de {proxy._lazy_name} impossible: {e}")
+            continue
+        timings[proxy._lazy_name] = round(time.perf_counter() - start, 4)
+    return timings
+
+
+def lazy_status() -> Dict[str, bool]:
+    """{nom: chargé ?} pour chaque mandataire"""
+    return {proxy._lazy_name: proxy.is_loaded for proxy in _registry}
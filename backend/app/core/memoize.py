@@ -0,0 +1,215 @@
+"""
+Mémoïsation des calculateurs purs (financier, frais de notaire, waterfall, financement)
+
+Clé = SHA-256 des arguments canonisés (JSON trié) ; cache LRU borné avec expiration (TTL),
+compteurs hit/miss par fonction et désactivation par appel (use_cache=False).
+Les valeurs sont copiées à l'écriture et à la lecture : modifier un résultat renvoyé
+ne modifie jamais l'entrée du cache.
+"""
+from collections import OrderedDict
+from datetime import date, datetime
+from enum import Enum
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+import copy
+import hashlib
+import inspect
+import json
+import threading
+import time
+
+import numpy as np
+
+from app.core.config import settings
+
+
+def _canonical(value: Any) -> Any:
+    """Convertit une valeur en structure JSON déterministe"""
+    if isinstance(value, Enum):
+        return _canonical(value.value)
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(_canonical(item) for item in value)
+    if isinstance(value, np.ndarray):
+        return _canonical(value.tolist())
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        # 200000 et 200000.0 donnent la même clé
+        return int(value)
+    if hasattr(value, "model_dump"):
+        return _canonical(value.model_dump())
+    return value
+
+
+def canonical_key(name: str, arguments: Dict[str, Any]) -> str:
+    """
+    Clé de cache : SHA-256 du nom de fonction et des arguments canonisés
+
+    Args:
+        name: Nom qualifié de la fonction
+        arguments: Arguments nommés (valeurs par défaut incluses)
+
+    Returns:
+        Empreinte hexadécimale
+    """
+    payload = json.dumps(
+        {"fn": name, "args": _canonical(arguments)},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=repr,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoCache:
+    """Cache LRU + TTL partagé, avec statistiques par fonction"""
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: Optional[float] = 600):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _counter(self, name: str) -> Dict[str, int]:
+        return self._stats.setdefault(
+            name, {"hits": 0, "misses": 0, "bypassed": 0, "evictions": 0, "expirations": 0}
+        )
+
+    def get(self, name: str, key: str) -> tuple:
+        """
+        Lit une entrée
+
+        Returns:
+            (trouvé, copie de la valeur)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds is not None and time.monotonic() >= entry[2]:
+                del self._entries[key]
+                self._counter(entry[0])["expirations"] += 1
+                entry = None
+
+            if entry is None:
+                self._counter(name)["misses"] += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self._counter(name)["hits"] += 1
+            value = entry[1]
+
+        return True, copy.deepcopy(value)
+
+    def set(self, name: str, key: str, value: Any) -> None:
+        """Enregistre une copie de la valeur et évince les entrées les plus anciennes"""
+        if self.maxsize <= 0:
+            return
+
+        stored = copy.deepcopy(value)
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else None
+
+        with self._lock:
+            self._entries[key] = (name, stored, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                _, (evicted_name, _, _) = self._entries.popitem(last=False)
+                self._counter(evicted_name)["evictions"] += 1
+
+    def record_bypass(self, name: str) -> None:
+        with self._lock:
+            self._counter(name)["bypassed"] += 1
+
+    def clear(self, name: Optional[str] = None) -> int:
+        """
+        Vide le cache (entièrement ou pour une fonction)
+
+        Returns:
+            Nombre d'entrées supprimées
+        """
+        with self._lock:
+            if name is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+
+            keys = [key for key, entry in self._entries.items() if entry[0] == name]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs par fonction, taux de succès et taille courante"""
+        with self._lock:
+            sizes: Dict[str, int] = {}
+            for name, _, _ in self._entries.values():
+                sizes[name] = sizes.get(name, 0) + 1
+
+            functions = {}
+            for name, counter in sorted(self._stats.items()):
+                lookups = counter["hits"] + counter["misses"]
+                functions[name] = {
+                    **counter,
+                    "size": sizes.get(name, 0),
+                    "hit_rate": round(counter["hits"] / lookups, 4) if lookups else 0.0,
+                }
+
+            return {
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl_seconds,
+                "size": len(self._entries),
+                "functions": functions,
+            }
+
+
+# Instance globale (bornes configurables via MEMO_CACHE_MAXSIZE / MEMO_CACHE_TTL_SECONDS)
+memo_cache = MemoCache(
+    maxsize=settings.MEMO_CACHE_MAXSIZE,
+    ttl_seconds=settings.MEMO_CACHE_TTL_SECONDS,
+)
+
+
+def memoize(name: Optional[str] = None, cache: Optional[MemoCache] = None) -> Callable:
+    """
+    Décorateur de mémoïsation pour fonctions et méthodes sans état
+
+    Les arguments sont liés à la signature (positionnels et nommés donnent la même clé) ;
+    `self` est ignoré. La fonction décorée accepte `use_cache=False` pour forcer le calcul.
+
+    Exemple :
+        @memoize("notary.calculate_notary_fees")
+        def calculate_notary_fees(self, property_price, ...):
+    """
+    def decorator(func: Callable) -> Callable:
+        qualified_name = name or f"{func.__module__}.{func.__qualname__}"
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(*args, use_cache: bool = True, **kwargs):
+            target = cache or memo_cache
+            if not use_cache:
+                target.record_bypass(qualified_name)
+                return func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {key: value for key, value in bound.arguments.items() if key != "self"}
+            key = canonical_key(qualified_name, arguments)
+
+            found, value = target.get(qualified_name, key)
+            if found:
+                return value
+
+            result = func(*args, **kwargs)
+            target.set(qualified_name, key, result)
+            return copy.deepcopy(result)
+
+        wrapper.cache_name = qualified_name
+        return wrapper
+
+    return decorator
@@ -174,6 +174,41 @@ async def api_status():
         "timestamp": time.time(),
     }
 
+# Rafraîchissement des données de référence (délais, prix CAPEX, zones PLU)
+@app.on_event("startup")
+async def start_reference_data_refresh():
+    from app.core.database import AsyncSessionLocal
+    from app.services.reference_data import reference_data
+    app.state.reference_data_task = asyncio.create_task(reference_data.watch(AsyncSessionLocal))
+
+@app.on_event("shutdown")
+async def stop_reference_data_refresh():
+    task = getattr(app.state, "reference_data_task", None)
+    if task:
+        task.cancel()
+
+# Préchargement des dépendances lourdes (openai, reportlab, PyPDF2...) chargées à la demande
+# et des index géographiques de la base DVF locale
+@app.on_event("startup")
+async def start_lazy_import_warmup():
+    if not settings.LAZY_IMPORT_WARMUP:
+        return
+    from app.core.lazy import warm_up
+    from app.services.dvf_store import dvf_store
+
+    async def run():
+        await asyncio.sleep(settings.LAZY_IMPORT_WARMUP_DELAY_SECONDS)
+        await asyncio.to_thread(warm_up)
+        await asyncio.to_thread(dvf_store.warm_up)
+
+    app.state.lazy_import_warmup_task = asyncio.create_task(run())
+
+@app.on_event("shutdown")
+async def stop_lazy_import_warmup():
+    task = getattr(app.state, "lazy_import_warmup_task", None)
+    if task:
+        task.cancel()
+
 # Import des routes
 from app.api import api_router
 app.include_router(api_router)
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, Float, Date, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class ProjectCashflow(Base):
+    """
+    Flux de trésorerie mensuels d'un projet (une ligne par projet et par mois)
+    Table normalisée : l'agrégation portefeuille est un simple GROUP BY month
+    
+    Convention de signe : montants positifs, `net` du point de vue de l'investisseur
+    (net = revenus + cession + tirage dette - acquisition - CAPEX - service dette)
+    """
+    __tablename__ = "project_cashflows"
+    
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Date, primary_key=True)  # 1er jour du mois
+    
+    acquisition = Column(Float, default=0)  # Prix + frais de notaire
+    capex = Column(Float, default=0)  # Études, permis, travaux
+    revenue = Column(Float, default=0)  # Loyers encaissés
+    debt_drawdown = Column(Float, default=0)  # Tirage du prêt
+    debt_service = Column(Float, default=0)  # Mensualités + remboursement anticipé à la sortie
+    sale = Column(Float, default=0)  # Prix de cession
+    net = Column(Float, default=0)  # Flux net equity
+    
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_project_cashflows_month", "month"),
+    )
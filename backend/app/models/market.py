@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, Float, String, Date, DateTime, LargeBinary, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class DVFPriceIndex(Base):
+    """
+    Indice des prix au m² DVF par commune, type de local et période (mois ou trimestre)
+    Calculé depuis la base DVF locale (dvf_price_index) ; les séries de tendance et
+    d'évaluation sont lues ici plutôt que recalculées sur les transactions
+    
+    fingerprint = nombre de ventes et somme des prix au m² de la période : seules les
+    périodes dont l'empreinte change sont recalculées après une nouvelle ingestion
+    """
+    __tablename__ = "dvf_price_indices"
+    
+    code_commune = Column(String(5), primary_key=True)  # Code INSEE
+    type_local = Column(String, primary_key=True)  # Libellé DVF (Maison, Appartement...)
+    period_type = Column(String, primary_key=True)  # month, quarter
+    period_start = Column(Date, primary_key=True)  # 1er jour du mois / trimestre
+    
+    count = Column(Integer, nullable=False)  # Ventes retenues (prix au m² valide)
+    median = Column(Float, nullable=False)  # Médiane exacte
+    trimmed_mean = Column(Float, nullable=False)  # Moyenne tronquée (10 % de chaque côté)
+    p25 = Column(Float, nullable=False)  # Quartiles de l'esquisse (erreur relative ≤ 1 %)
+    p75 = Column(Float, nullable=False)
+    sketch = Column(LargeBinary, nullable=False)  # Esquisse de quantiles fusionnable (PriceSketch)
+    fingerprint = Column(String, nullable=False)
+    
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_dvf_price_indices_period", "period_type", "period_start"),
+    )
@@ -0,0 +1,67 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, JSON
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class AdministrativeDelay(Base):
+    """Délais administratifs par ville et procédure (city = "default" pour la valeur nationale)"""
+    __tablename__ = "administrative_delays"
+
+    id = Column(Integer, primary_key=True)
+    city = Column(String, nullable=False, index=True)
+    postal_code = Column(String)
+    procedure_type = Column(String, nullable=False, index=True)  # permis_construire, declaration_prealable, etc.
+    avg_delay_days = Column(Integer, nullable=False)
+    min_delay_days = Column(Integer)
+    max_delay_days = Column(Integer)
+    complexity_factor = Column(Float, default=1.0)
+    last_updated = Column(DateTime(timezone=True), server_default=func.now())
+    source = Column(String)
+
+
+class CapexCost(Base):
+    """Prix unitaires CAPEX par poste (catégorie + sous-catégorie) et niveau de ville"""
+    __tablename__ = "capex_costs"
+
+    id = Column(Integer, primary_key=True)
+    category = Column(String, nullable=False, index=True)  # structure, facade, toiture, etc.
+    subcategory = Column(String)  # ravalement_simple -> poste "facade_ravalement_simple"
+    unit = Column(String, nullable=False)  # m2, m3, unite, forfait, pourcentage
+    min_price = Column(Float, nullable=False)
+    avg_price = Column(Float, nullable=False)
+    max_price = Column(Float, nullable=False)
+    city_tier = Column(Integer, nullable=False, default=1, index=True)  # 1=Paris/Lyon, 2=Grandes villes, 3=Province
+    description = Column(String)
+    source = Column(String)  # FFB, CSTB, etc.
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class PluZone(Base):
+    """Zones PLU préchargées par ville"""
+    __tablename__ = "plu_zones"
+
+    id = Column(Integer, primary_key=True)
+    city = Column(String, nullable=False, index=True)
+    zone_name = Column(String, nullable=False, index=True)  # UC, UB, N, A, etc.
+    zone_type = Column(String, nullable=False)  # urbain, agricole, naturel
+    is_constructible = Column(Boolean, nullable=False)
+    max_height = Column(Float)
+    cos = Column(Float)  # Coefficient d'Occupation des Sols
+    ces = Column(Float)  # Coefficient d'Emprise au Sol
+    constraints = Column(JSON)
+    permitted_uses = Column(JSON)
+    document_url = Column(String)
+    last_updated = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ReferenceDataVersion(Base):
+    """
+    Compteur de version par jeu de référence
+    Incrémenté à chaque modification des données : les caches applicatifs rechargent
+    le jeu concerné dès qu'ils constatent un changement de version.
+    """
+    __tablename__ = "reference_data_versions"
+
+    dataset = Column(String, primary_key=True)  # administrative_delays, capex_costs, plu_zones
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
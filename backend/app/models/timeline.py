@@ -23,6 +23,9 @@ class CurveType(str, enum.Enum):
     S_CURVE = "s_curve"  # Courbe en S (classique)
     FRONT_LOADED = "front_loaded"  # Chargé au début
     BACK_LOADED = "back_loaded"  # Chargé en fin
+    BETA = "beta"  # Loi bêta (alpha, beta)
+    MILESTONES = "milestones"  # Décaissements aux jalons
+    TABLE = "table"  # Pourcentages mensuels saisis
     
     def __str__(self):
         return self.value
@@ -58,6 +61,7 @@ class ProjectTimeline(Base):
     construction_phase_end = Column(DateTime(timezone=True))
     construction_budget = Column(Float, default=0)  # CAPEX travaux
     capex_curve_type = Column(String, default="s_curve")  # Type de courbe
+    capex_curve_params = Column(JSON)  # Paramètres de courbe {steepness | alpha, beta | milestones | percentages}
     
     # Jalons travaux (optionnel)
     construction_milestones = Column(JSON)  # [{name, date, budget_pct}]
@@ -89,6 +93,10 @@ class ProjectTimeline(Base):
     # Cash-flow mensuel pré-calculé pour performances
     cashflow_schedule = Column(JSON)  # [{month, capex_out, revenue_in, net}]
     
+    # === ORDONNANCEMENT ===
+    # Réseau de tâches (phases et procédures) : {start_date, tasks: [{id, duration, phase}], links}
+    schedule_network = Column(JSON)
+    
     # === MÉTADONNÉES ===
     execution_mode = Column(String, default="sequential")  # "sequential" ou "parallel"
     notes = Column(String)  # Notes libres
@@ -2,8 +2,48 @@
 Service de gestion des délais administratifs
 Fournit des estimations de délais pour les différentes procédures
 """
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
+import numpy as np
+
+from app.services.reference_data import ReferenceSnapshot, reference_data
+from app.services.schedule_engine import ScheduleNetwork
+
+
+DURATION_DISTRIBUTIONS = ("triangular", "pert")
+
+DURATION_PERCENTILES = (10, 50, 90)
+
+MAX_DURATION_SIMULATIONS = 100_000
+
+
+def _sample_durations(
+    low: np.ndarray,
+    mode: np.ndarray,
+    high: np.ndarray,
+    n_simulations: int,
+    distribution: str,
+    rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Tirages (n_simulations, n_tâches) de durées bornées [low, high] de mode `mode`
+    
+    Les tâches de durée certaine (low == high) restent constantes.
+    """
+    width = high - low
+    certain = width <= 0
+    safe_width = np.where(certain, 1.0, width)
+    peak = np.where(certain, 0.5, (mode - low) / safe_width)
+    
+    if distribution == "pert":
+        # Bêta-PERT : alpha = 1 + 4 x mode relatif, beta = 1 + 4 x (1 - mode relatif)
+        unit = rng.beta(1 + 4 * peak, 1 + 4 * (1 - peak), size=(n_simulations, low.size))
+    else:
+        # Triangulaire par inversion de la fonction de répartition
+        u = rng.random((n_simulations, low.size))
+        unit = np.where(u < peak, np.sqrt(u * peak), 1 - np.sqrt((1 - u) * (1 - peak)))
+    
+    return low + unit * np.where(certain, 0.0, width)
 
 
 class ProcedureType:
@@ -16,6 +56,7 @@ class ProcedureType:
     ABF = "avis_abf"                   # Avis Architecte des Bâtiments de France
     DAACT = "declaration_achevement"   # Déclaration d'Achèvement
     CU = "certificat_urbanisme"        # Certificat d'Urbanisme
+    RECOURS = "purge_recours"          # Purge des recours des tiers et du retrait
 
 
 # Base de données des délais par défaut (en jours)
@@ -120,6 +161,16 @@ DEFAULT_ADMINISTRATIVE_DELAYS = {
         "description": "Délai moyen CU"
     },
     
+    # PURGE DES RECOURS
+    "default_purge_recours": {
+        "procedure": ProcedureType.RECOURS,
+        "avg_delay": 90,
+        "min_delay": 60,
+        "max_delay": 120,
+        "complexity_factor": 1.0,
+        "description": "Recours des tiers (2 mois après affichage) et retrait (3 mois)"
+    },
+    
     # DAACT
     "default_declaration_achevement": {
         "procedure": ProcedureType.DAACT,
@@ -143,8 +194,10 @@ class ComplexityLevel:
 class AdministrativeDelayService:
     """Service de calcul des délais administratifs"""
     
-    def __init__(self):
-        self.delays_db = DEFAULT_ADMINISTRATIVE_DELAYS
+    @property
+    def reference(self) -> ReferenceSnapshot:
+        """Données de référence courantes (table administrative_delays, repli sur les valeurs intégrées)"""
+        return reference_data.snapshot
     
     def get_procedure_delay(
         self,
@@ -166,14 +219,10 @@ class AdministrativeDelayService:
             Dict avec min/avg/max delays en jours
         """
         # Recherche délai spécifique ville ou défaut
-        key = f"{city}_{procedure_type}"
-        default_key = f"default_{procedure_type}"
-        
-        if key in self.delays_db:
-            delay_data = self.delays_db[key]
-        elif default_key in self.delays_db:
-            delay_data = self.delays_db[default_key]
-        else:
+        reference = self.reference
+        delay_data = reference.delay(city, procedure_type)
+        
+        if delay_data is None:
             return {
                 "error": f"Procédure '{procedure_type}' non trouvée",
                 "available_procedures": self._get_available_procedures()
@@ -190,7 +239,7 @@ class AdministrativeDelayService:
         # Ajouter délai ABF si nécessaire
         abf_delay = 0
         if has_abf and procedure_type in [ProcedureType.PC, ProcedureType.DP]:
-            abf_data = self.delays_db["default_avis_abf"]
+            abf_data = reference.delay(city, ProcedureType.ABF)
             abf_delay = abf_data["avg_delay"]
             min_delay += abf_data["min_delay"]
             avg_delay += abf_data["avg_delay"]
@@ -291,6 +340,254 @@ class AdministrativeDelayService:
             }
         }
     
+    def _procedure_network(
+        self,
+        city: str,
+        procedures: List[Dict],
+        links: Optional[List[Dict]],
+        studies_days: Optional[Dict[str, int]],
+        construction_months: int,
+        construction_overrun: float = 0.0
+    ) -> Tuple[ScheduleNetwork, List[Dict]]:
+        """
+        Réseau études -> procédures -> recours -> travaux -> DAACT
+        
+        Les travaux durent construction_months x 30 jours (min et avg), jusqu'à
+        (1 + construction_overrun) fois plus en scénario max.
+        
+        Returns:
+            (réseau aux durées moyennes, tâches avec leurs délais min / avg / max)
+        """
+        studies_days = studies_days or {"min": 30, "avg": 60, "max": 90}
+        scenarios = ("min", "avg", "max")
+        
+        tasks = [{"id": "studies", "name": "Études", "phase": "studies", "delays": studies_days}]
+        authorizations = []
+        for proc in procedures:
+            delay = self.get_procedure_delay(
+                city, proc.get("type"), proc.get("complexity", ComplexityLevel.SIMPLE), proc.get("has_abf", False)
+            )
+            if "error" in delay:
+                raise ValueError(delay["error"])
+            task_id = str(proc.get("id") or proc.get("type"))
+            tasks.append({
+                "id": task_id, "name": delay["description"], "phase": "permit", "delays": delay["delays_days"],
+            })
+            if proc.get("type") in (ProcedureType.PC, ProcedureType.DP, ProcedureType.PA, ProcedureType.PD):
+                authorizations.append(task_id)
+        
+        recours = self.reference.delay(city, ProcedureType.RECOURS)
+        daact = self.reference.delay(city, ProcedureType.DAACT)
+        construction_days = construction_months * 30
+        if authorizations:
+            tasks.append({
+                "id": "recours", "name": recours["description"], "phase": "permit",
+                "delays": {scenario: recours[f"{scenario}_delay"] for scenario in scenarios},
+            })
+        tasks.append({
+            "id": "construction", "name": "Travaux", "phase": "construction",
+            "delays": {
+                "min": construction_days, "avg": construction_days,
+                "max": round(construction_days * (1 + construction_overrun)),
+            },
+        })
+        tasks.append({
+            "id": "daact", "name": daact["description"], "phase": "completion",
+            "delays": {scenario: daact[f"{scenario}_delay"] for scenario in scenarios},
+        })
+        
+        procedure_ids = [task["id"] for task in tasks[1:len(procedures) + 1]]
+        default_links = [{"from": "studies", "to": task_id, "type": "FS"} for task_id in procedure_ids]
+        before_construction = procedure_ids
+        if authorizations:
+            default_links += [{"from": task_id, "to": "recours", "type": "FS"} for task_id in authorizations]
+            before_construction = [task_id for task_id in procedure_ids if task_id not in authorizations] + ["recours"]
+        default_links += [{"from": task_id, "to": "construction", "type": "FS"} for task_id in before_construction or ["studies"]]
+        default_links.append({"from": "construction", "to": "daact", "type": "FS"})
+        
+        network = ScheduleNetwork(
+            [
+                {"id": task["id"], "name": task["name"], "phase": task["phase"], "duration": task["delays"]["avg"]}
+                for task in tasks
+            ],
+            default_links + list(links or [])
+        )
+        return network, tasks
+    
+    def calculate_critical_path(
+        self,
+        city: str,
+        procedures: List[Dict],
+        links: Optional[List[Dict]] = None,
+        studies_days: Optional[Dict[str, int]] = None,
+        construction_months: int = 6
+    ) -> Dict:
+        """
+        Planning par chemin critique : études, procédures, purge des recours, travaux, DAACT
+        
+        Réseau par défaut : les procédures démarrent après les études et se déroulent en
+        parallèle ; la purge des recours suit les autorisations (PC, DP, PA, PD), puis
+        travaux et DAACT. `links` ajoute des contraintes (ex: CU fin -> début PC, ABF
+        début -> début PC avec décalage). Les scénarios min / avg / max sont calculés
+        ensemble (une ligne de durées par scénario).
+        
+        Args:
+            city: Ville du projet
+            procedures: [{"id": "pc", "type": "permis_construire", "complexity": 1.3, "has_abf": true}]
+            links: Liens supplémentaires [{"from": "cu", "to": "pc", "type": "FS", "lag": 0}]
+            studies_days: Durées des études {"min", "avg", "max"} (défaut 30 / 60 / 90)
+            construction_months: Durée des travaux
+        
+        Returns:
+            Durées totales min / avg / max, chemin critique, tâches (marges) et réseau
+            réutilisable pour la timeline du projet
+        """
+        scenarios = ("min", "avg", "max")
+        network, tasks = self._procedure_network(city, procedures, links, studies_days, construction_months)
+        durations = np.array([[task["delays"][scenario] for task in tasks] for scenario in scenarios], dtype=float)
+        result = network.compute(durations)
+        totals = {scenario: int(result.project_duration[i]) for i, scenario in enumerate(scenarios)}
+        
+        rows = network.to_rows()
+        for row, task in zip(rows, tasks):
+            row["delays"] = task["delays"]
+        
+        today = datetime.now()
+        
+        return {
+            "city": city,
+            "total_delays_days": totals,
+            "total_delays_months": {scenario: round(days / 30, 1) for scenario, days in totals.items()},
+            "estimated_completion": {
+                label: (today + timedelta(days=totals[scenario])).strftime("%Y-%m-%d")
+                for label, scenario in (("optimistic", "min"), ("realistic", "avg"), ("pessimistic", "max"))
+            },
+            "critical_path": network.critical_path(),
+            "critical_path_by_scenario": {
+                scenario: [network.ids[j] for j in np.flatnonzero(result.critical[i])]
+                for i, scenario in enumerate(scenarios)
+            },
+            "tasks": rows,
+            "network": network.to_dict(),
+        }
+    
+    def simulate_project_duration(
+        self,
+        city: str,
+        procedures: List[Dict],
+        links: Optional[List[Dict]] = None,
+        studies_days: Optional[Dict[str, int]] = None,
+        construction_months: int = 6,
+        construction_overrun: float = 0.10,
+        distribution: str = "pert",
+        n_simulations: int = 10_000,
+        seed: Optional[int] = None,
+        start_date: Optional[datetime] = None,
+        carry: Optional[Dict[str, float]] = None
+    ) -> Dict[str, Any]:
+        """
+        Distribution de la durée du projet par simulation Monte Carlo
+        
+        Chaque tâche du réseau de calculate_critical_path (études, procédures, recours,
+        travaux, DAACT) est tirée entre ses délais min et max, de mode avg ; les
+        n_simulations jeux de durées traversent le réseau en un seul calcul matriciel.
+        
+        Args:
+            city: Ville du projet
+            procedures: Procédures (voir calculate_critical_path)
+            links: Liens supplémentaires entre tâches
+            studies_days: Durées des études {"min", "avg", "max"}
+            construction_months: Durée prévue des travaux
+            construction_overrun: Dépassement maximal des travaux (0.10 = +10%)
+            distribution: "pert" (bêta-PERT) ou "triangular"
+            n_simulations: Nombre de tirages (max 100 000)
+            seed: Graine aléatoire (reproductibilité)
+            start_date: Date de démarrage (défaut : aujourd'hui)
+            carry: Coûts de portage {"debt_amount", "interest_rate", "monthly_holding_costs"}
+        
+        Returns:
+            Durée P10 / P50 / P90 et dates d'achèvement, retard par rapport au planning
+            moyen, indice de criticité par tâche et surcoût de portage
+        """
+        if distribution not in DURATION_DISTRIBUTIONS:
+            raise ValueError(
+                f"Distribution inconnue: {distribution}. Valeurs acceptées: {', '.join(DURATION_DISTRIBUTIONS)}"
+            )
+        if not 1 <= n_simulations <= MAX_DURATION_SIMULATIONS:
+            raise ValueError(f"n_simulations doit être entre 1 et {MAX_DURATION_SIMULATIONS}")
+        if construction_overrun < 0:
+            raise ValueError("construction_overrun doit être positif")
+        
+        network, tasks = self._procedure_network(
+            city, procedures, links, studies_days, construction_months, construction_overrun
+        )
+        low, mode, high = (
+            np.array([task["delays"][scenario] for task in tasks], dtype=float)
+            for scenario in ("min", "avg", "max")
+        )
+        if np.any((mode < low) | (mode > high)):
+            raise ValueError("Délais incohérents : min <= avg <= max requis")
+        
+        rng = np.random.default_rng(seed)
+        durations = _sample_durations(low, mode, high, n_simulations, distribution, rng)
+        result = network.compute(durations)
+        total = result.project_duration
+        planned = float(network.compute(mode).project_duration)
+        delay = total - planned
+        
+        start_date = start_date or datetime.now()
+        percentiles = np.percentile(total, DURATION_PERCENTILES)
+        summary = {
+            f"p{p}": {
+                "duration_days": round(float(days), 1),
+                "duration_months": round(float(days) / 30, 1),
+                "completion_date": (start_date + timedelta(days=float(days))).strftime("%Y-%m-%d"),
+                "delay_days": round(float(days) - planned, 1),
+            }
+            for p, days in zip(DURATION_PERCENTILES, percentiles)
+        }
+        
+        output = {
+            "city": city,
+            "distribution": distribution,
+            "n_simulations": n_simulations,
+            "start_date": start_date.strftime("%Y-%m-%d"),
+            "planned_duration_days": planned,
+            "duration": {
+                "mean": round(float(total.mean()), 1),
+                "std": round(float(total.std()), 1),
+                "min": round(float(total.min()), 1),
+                "max": round(float(total.max()), 1),
+                "percentiles": summary,
+            },
+            "probability_late": float((delay > 0).mean()),
+            "criticality_index": {
+                task_id: float(share) for task_id, share in zip(network.ids, result.critical.mean(axis=0))
+            },
+        }
+        
+        if carry:
+            # Coût de portage journalier : intérêts de la dette + frais de détention
+            daily_cost = (
+                carry.get("debt_amount", 0) * carry.get("interest_rate", 0)
+                + carry.get("monthly_holding_costs", 0) * 12
+            ) / 365
+            extra = daily_cost * np.maximum(delay, 0)
+            output["carry"] = {
+                "daily_cost": round(daily_cost, 2),
+                "planned_cost": round(daily_cost * planned, 2),
+                "expected_extra_cost": round(float(extra.mean()), 2),
+                "percentiles": {
+                    f"p{p}": {
+                        "carry_cost": round(daily_cost * float(days), 2),
+                        "extra_cost": round(daily_cost * max(float(days) - planned, 0), 2),
+                    }
+                    for p, days in zip(DURATION_PERCENTILES, percentiles)
+                },
+            }
+        
+        return output
+    
     def estimate_full_project_duration(
         self,
         city: str,
@@ -340,7 +637,7 @@ class AdministrativeDelayService:
         construction_days = project_data.get("construction_months", 6) * 30
         
         # Phase 4: DAACT et réception (2-4 mois)
-        daact_data = self.delays_db["default_declaration_achevement"]
+        daact_data = self.reference.delay(city, ProcedureType.DAACT)
         daact_min = daact_data["min_delay"]
         daact_avg = daact_data["avg_delay"]
         daact_max = daact_data["max_delay"]
@@ -400,22 +697,18 @@ class AdministrativeDelayService:
     
     def _get_available_procedures(self) -> List[str]:
         """Liste des procédures disponibles"""
-        procedures = set()
-        for key in self.delays_db.keys():
-            if key.startswith("default_"):
-                proc = key.replace("default_", "")
-                procedures.add(proc)
-        return sorted(list(procedures))
+        return list(self.reference.procedures)
     
     def get_cities_with_data(self) -> List[str]:
         """Liste des villes avec données spécifiques"""
-        cities = set()
-        for key in self.delays_db.keys():
-            if not key.startswith("default_"):
-                city = key.split("_")[0]
-                cities.add(city)
-        return sorted(list(cities))
+        return list(self.reference.delay_cities)
 
 
 # Instance globale
 administrative_delay_service = AdministrativeDelayService()
+
+
+reference_data.register_defaults("administrative_delays", {
+    (key.split("_")[0], record["procedure"]): record
+    for key, record in DEFAULT_ADMINISTRATIVE_DELAYS.items()
+})
@@ -2,12 +2,14 @@
 Services IA pour l'analyse de documents et l'assistance métier
 """
 from typing import Optional, Dict, Any
-from openai import AsyncOpenAI
 from app.core.config import settings
+from app.core.lazy import lazy_import, lazy_instance
+
+openai = lazy_import("openai")
 
 class AIService:
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         self.model = settings.OPENAI_MODEL
     
     async def analyze_document(self, text: str, document_type: str) -> Dict[str, Any]:
@@ -117,5 +119,5 @@ Tu es spécialisé en:
         except Exception as e:
             return f"Erreur lors de la génération de la réponse: {str(e)}"
 
-# Instance globale
-ai_service = AIService()
+# Instance globale (client OpenAI construit au premier usage)
+ai_service = lazy_instance("ai_service", AIService)
@@ -0,0 +1,328 @@
+"""
+Moteur d'amortissement vectorisé (NumPy)
+Calcule toutes les colonnes d'un ou plusieurs tableaux d'amortissement en une seule passe
+"""
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union, Sequence
+import numpy as np
+
+
+ArrayLike = Union[float, int, Sequence[float], np.ndarray]
+
+AMORTIZATION_TYPES = ("classic", "in_fine", "deferred")
+
+SCHEDULE_COLUMNS = (
+    "payment",
+    "principal",
+    "interest",
+    "remaining_capital",
+    "cumulative_principal",
+    "cumulative_interest",
+)
+
+
+class LoanScheduleArrays:
+    """
+    Tableaux d'amortissement stockés en colonnes NumPy
+
+    Chaque colonne a la forme (n_prêts, n_mois_max). Les mois au-delà de la durée
+    d'un prêt sont à 0 et masqués par `active`.
+    """
+
+    def __init__(
+        self,
+        amortization_type: str,
+        loan_amounts: np.ndarray,
+        annual_rates: np.ndarray,
+        durations_months: np.ndarray,
+        deferred_months: np.ndarray,
+        deferred_interest_capitalized: bool,
+        columns: Dict[str, np.ndarray],
+        active: np.ndarray
+    ):
+        self.amortization_type = amortization_type
+        self.loan_amounts = loan_amounts
+        self.annual_rates = annual_rates
+        self.durations_months = durations_months
+        self.deferred_months = deferred_months
+        self.deferred_interest_capitalized = deferred_interest_capitalized
+        self.columns = columns
+        self.active = active
+
+    def __len__(self) -> int:
+        return self.loan_amounts.shape[0]
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def totals(self, rounded: bool = True) -> Dict[str, np.ndarray]:
+        """
+        Totaux par prêt (payé, capital, intérêts)
+
+        Args:
+            rounded: Si True, somme des montants arrondis au centime
+                     (identique à la somme des lignes du tableau)
+        """
+        values = {}
+        for column in ("payment", "principal", "interest"):
+            data = self.columns[column]
+            if rounded:
+                data = np.round(data, 2)
+            values[column] = data.sum(axis=1)
+
+        return {
+            "total_paid": values["payment"],
+            "total_principal": values["principal"],
+            "total_interest": values["interest"],
+        }
+
+    def _bounds(self, index: int, start: int, stop: Optional[int]) -> Tuple[int, int]:
+        """Borne une tranche [start, stop) de mois (0-indexés) à la durée du prêt"""
+        n_months = int(self.durations_months[index])
+        stop = n_months if stop is None else min(stop, n_months)
+        return min(max(start, 0), stop), stop
+
+    def to_rows(self, index: int = 0, start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Vue de compatibilité : liste de dicts mois par mois pour un prêt
+
+        Args:
+            index: Index du prêt dans le lot
+            start: Premier mois de la tranche (0-indexé)
+            stop: Fin de tranche exclue (défaut: fin du prêt)
+
+        Returns:
+            Lignes identiques au format historique de calculate_loan_schedule
+        """
+        n_months = int(self.durations_months[index])
+        deferred = int(self.deferred_months[index])
+        start, stop = self._bounds(index, start, stop)
+
+        rounded = {
+            column: np.round(self.columns[column][index, start:stop], 2).tolist()
+            for column in SCHEDULE_COLUMNS
+        }
+        rows = [
+            {
+                "month": month,
+                "payment": payment,
+                "principal": principal,
+                "interest": interest,
+                "remaining_capital": remaining,
+                "cumulative_principal": cum_principal,
+                "cumulative_interest": cum_interest,
+            }
+            for month, payment, principal, interest, remaining, cum_principal, cum_interest in zip(
+                range(start + 1, stop + 1),
+                rounded["payment"],
+                rounded["principal"],
+                rounded["interest"],
+                rounded["remaining_capital"],
+                rounded["cumulative_principal"],
+                rounded["cumulative_interest"],
+            )
+        ]
+
+        if self.amortization_type == "in_fine":
+            for row in rows:
+                row["note"] = "Remboursement capital" if row["month"] == n_months else "Intérêts seuls"
+
+        elif self.amortization_type == "deferred":
+            note = (
+                "Différé - Intérêts capitalisés"
+                if self.deferred_interest_capitalized
+                else "Différé - Intérêts payés"
+            )
+            for row in rows:
+                if row["month"] <= deferred:
+                    row["note"] = note
+                    row["phase"] = "DEFERRED"
+                else:
+                    row["phase"] = "AMORTIZATION"
+
+        return rows
+
+    def iter_rows(self, index: int = 0, start: int = 0, chunk_size: int = 120) -> Iterator[Dict[str, Any]]:
+        """
+        Itère sur les lignes d'un prêt par tranches (streaming sans matérialiser tout le tableau)
+
+        Args:
+            index: Index du prêt dans le lot
+            start: Premier mois (0-indexé)
+            chunk_size: Nombre de mois convertis à chaque tranche
+        """
+        _, n_months = self._bounds(index, 0, None)
+        for chunk_start in range(max(start, 0), n_months, chunk_size):
+            yield from self.to_rows(index, chunk_start, chunk_start + chunk_size)
+
+    def to_columns(self, index: int = 0, start: int = 0, stop: Optional[int] = None) -> Dict[str, List[Any]]:
+        """
+        Vue colonnaire d'un prêt : un tableau par colonne (clés non répétées)
+
+        Args:
+            index: Index du prêt dans le lot
+            start: Premier mois de la tranche (0-indexé)
+            stop: Fin de tranche exclue (défaut: fin du prêt)
+
+        Returns:
+            {"month": [...], "payment": [...], ...} (+ "phase" pour un différé)
+        """
+        start, stop = self._bounds(index, start, stop)
+        columns: Dict[str, List[Any]] = {"month": list(range(start + 1, stop + 1))}
+        for column in SCHEDULE_COLUMNS:
+            columns[column] = np.round(self.columns[column][index, start:stop], 2).tolist()
+
+        if self.amortization_type == "deferred":
+            deferred = int(self.deferred_months[index])
+            columns["phase"] = [
+                "DEFERRED" if month <= deferred else "AMORTIZATION" for month in columns["month"]
+            ]
+
+        return columns
+
+
+def _as_vector(value: ArrayLike, size: int, dtype=float) -> np.ndarray:
+    """Diffuse un scalaire ou une séquence en vecteur de taille `size`"""
+    array = np.asarray(value, dtype=dtype)
+    if array.ndim == 0:
+        return np.full(size, array, dtype=dtype)
+    return np.broadcast_to(array, (size,)).astype(dtype)
+
+
+def build_loan_schedules(
+    loan_amounts: ArrayLike,
+    annual_rates: ArrayLike,
+    years: ArrayLike,
+    amortization_type: str = "classic",
+    deferred_months: ArrayLike = 0,
+    deferred_interest_capitalized: bool = False
+) -> LoanScheduleArrays:
+    """
+    Construit un lot de tableaux d'amortissement en une passe vectorisée
+
+    Les soldes sont obtenus en forme fermée (annuité constante) et les cumuls
+    par `cumsum`, sans boucle Python sur les mois ni sur les prêts.
+
+    Args:
+        loan_amounts: Montant(s) du prêt
+        annual_rates: Taux annuel(s) (ex: 0.04 pour 4%)
+        years: Durée(s) en années
+        amortization_type: "classic", "in_fine", "deferred"
+        deferred_months: Mois de différé (pour type deferred)
+        deferred_interest_capitalized: Si True, les intérêts du différé sont capitalisés
+
+    Returns:
+        LoanScheduleArrays avec une ligne par prêt
+    """
+    amortization_type = str(amortization_type)
+    if amortization_type not in AMORTIZATION_TYPES:
+        raise ValueError(f"Type d'amortissement invalide: {amortization_type}")
+
+    size = max(np.size(loan_amounts), np.size(annual_rates), np.size(years), np.size(deferred_months))
+    principal_0 = _as_vector(loan_amounts, size)
+    annual_rate = _as_vector(annual_rates, size)
+    total_months = np.rint(_as_vector(years, size) * 12).astype(np.int64)
+
+    if amortization_type == "deferred":
+        deferred = _as_vector(deferred_months, size, dtype=np.int64)
+        if np.any(deferred <= 0):
+            raise ValueError("Le différé doit être > 0 mois pour type 'deferred'")
+        if np.any(deferred >= total_months):
+            raise ValueError("Le différé ne peut pas être >= à la durée totale")
+    else:
+        deferred = np.zeros(size, dtype=np.int64)
+
+    if np.any(total_months <= 0):
+        raise ValueError("La durée du prêt doit être > 0")
+
+    max_months = int(total_months.max())
+    k = np.arange(1, max_months + 1, dtype=float)[None, :]
+    P = principal_0[:, None]
+    r = (annual_rate / 12)[:, None]
+    n = total_months[:, None]
+    d = deferred[:, None]
+    active = k <= n
+    zero_rate = r == 0
+
+    if amortization_type == "in_fine":
+        is_last = k == n
+        interest = np.broadcast_to(P * r, active.shape).copy()
+        principal = np.where(is_last, P, 0.0)
+        payment = interest + principal
+        remaining = np.where(is_last, 0.0, np.broadcast_to(P, active.shape))
+
+    else:
+        in_deferral = k <= d
+        growth = 1 + r
+
+        # Capital à amortir après différé (capitalisé ou non)
+        if deferred_interest_capitalized:
+            P_amort = P * growth ** d
+        else:
+            P_amort = P
+        m = (n - d).astype(float)
+
+        # Annuité constante sur la durée restante
+        with np.errstate(divide="ignore", invalid="ignore"):
+            factor = growth ** m
+            annuity = np.where(
+                zero_rate,
+                P_amort / m,
+                P_amort * r * factor / (factor - 1)
+            )
+
+            # Soldes en forme fermée : B_j = P'(1+r)^j - M((1+r)^j - 1)/r
+            j = np.maximum(k - d, 0.0)
+            g_j = growth ** j
+            g_prev = growth ** np.maximum(j - 1, 0.0)
+            balance = np.where(zero_rate, P_amort - annuity * j, P_amort * g_j - annuity * (g_j - 1) / r)
+            balance_prev = np.where(
+                zero_rate,
+                P_amort - annuity * (j - 1),
+                P_amort * g_prev - annuity * (g_prev - 1) / r
+            )
+
+        amort_interest = balance_prev * r
+        amort_principal = annuity - amort_interest
+        balance = np.where(balance < 0.01, 0.0, balance)
+
+        if deferred_interest_capitalized:
+            deferral_interest = P * growth ** (k - 1) * r
+            deferral_balance = P * growth ** k
+            deferral_payment = np.zeros_like(deferral_interest)
+        else:
+            deferral_interest = np.broadcast_to(P * r, active.shape)
+            deferral_balance = np.broadcast_to(P, active.shape)
+            deferral_payment = deferral_interest
+
+        interest = np.where(in_deferral, deferral_interest, amort_interest)
+        principal = np.where(in_deferral, 0.0, amort_principal)
+        payment = np.where(in_deferral, deferral_payment, np.broadcast_to(annuity, active.shape))
+        remaining = np.where(in_deferral, deferral_balance, balance)
+
+    payment = np.where(active, payment, 0.0)
+    principal = np.where(active, principal, 0.0)
+    interest = np.where(active, interest, 0.0)
+    remaining = np.where(active, remaining, 0.0)
+
+    cumulative_principal = np.cumsum(principal, axis=1)
+    cumulative_interest = np.cumsum(interest, axis=1)
+    cumulative_principal = np.where(active, cumulative_principal, 0.0)
+    cumulative_interest = np.where(active, cumulative_interest, 0.0)
+
+    return LoanScheduleArrays(
+        amortization_type=amortization_type,
+        loan_amounts=principal_0,
+        annual_rates=annual_rate,
+        durations_months=total_months,
+        deferred_months=deferred,
+        deferred_interest_capitalized=deferred_interest_capitalized,
+        columns={
+            "payment": payment,
+            "principal": principal,
+            "interest": interest,
+            "remaining_capital": remaining,
+            "cumulative_principal": cumulative_principal,
+            "cumulative_interest": cumulative_interest,
+        },
+        active=active
+    )
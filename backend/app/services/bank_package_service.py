@@ -5,14 +5,6 @@ Combine résumé projet + financier + documents en PDF unique
 from typing import List, Optional
 import os
 from datetime import datetime
-from PyPDF2 import PdfMerger, PdfReader, PdfWriter
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import cm
-from reportlab.pdfgen import canvas
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 import io
 from sqlalchemy.orm import Session
 
@@ -35,6 +27,11 @@ class BankPackageService:
         loan_requested: float
     ) -> bytes:
         """Génère page de garde PDF"""
+        # reportlab chargé à la première génération (démarrage de l'API plus rapide)
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import cm
+        from reportlab.pdfgen import canvas
+        
         buffer = io.BytesIO()
         c = canvas.Canvas(buffer, pagesize=A4)
         width, height = A4
@@ -83,6 +80,13 @@ class BankPackageService:
         project_data: dict
     ) -> bytes:
         """Génère page résumé projet"""
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import cm
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+        from reportlab.lib import colors
+        from reportlab.lib.enums import TA_CENTER
+        
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=A4)
         story = []
@@ -181,6 +185,7 @@ class BankPackageService:
         Returns:
             Dict avec chemin PDF + métadonnées
         """
+        from PyPDF2 import PdfMerger
         
         # Récupérer projet
         project = db.query(Project).filter(Project.id == project_id).first()
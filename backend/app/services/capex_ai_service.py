@@ -1,17 +1,33 @@
 """
 Service IA pour suggestions CAPEX intelligentes
-Utilise LangChain + OpenAI + ChromaDB pour analyse historique
+Modèle via la passerelle LLM async (llm_gateway), projets historiques via l'index local (capex_index)
 """
+import asyncio
 import os
 from typing import List, Dict, Optional
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain_core.messages import HumanMessage, SystemMessage
-from langchain.chains import LLMChain
-from langchain.prompts import ChatPromptTemplate
 import json
 
 from app.services.capex_service import capex_service
+from app.services.capex_index import capex_history_index
+from app.services.llm_gateway import llm_gateway
+
+
+CAPEX_AI_MODEL = "gpt-4-turbo-preview"
+
+
+def parse_ai_json(content: str) -> Dict:
+    """
+    Réponse JSON du modèle, bloc markdown retiré si présent
+    
+    Raises:
+        json.JSONDecodeError: Réponse non JSON
+    """
+    if "```json" in content:
+        content = content.split("```json")[1].split("```")[0].strip()
+    elif "```" in content:
+        content = content.split("```")[1].split("```")[0].strip()
+    
+    return json.loads(content)
 
 
 class CAPEXAIService:
@@ -20,118 +36,30 @@ class CAPEXAIService:
     def __init__(self):
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         self.llm = None
-        self.embeddings = None
-        self.vector_store = None
+        self.history_index = capex_history_index
         
-        # Initialisation lazy : uniquement si API key présente
+        # LLM uniquement si API key présente (client créé au premier appel)
         if self.openai_api_key and self.openai_api_key.startswith("sk-"):
-            try:
-                # LLM pour génération
-                self.llm = ChatOpenAI(
-                    model="gpt-4-turbo-preview",
-                    temperature=0.3,
-                    api_key=self.openai_api_key
-                )
-                
-                # Embeddings pour RAG
-                self.embeddings = OpenAIEmbeddings(api_key=self.openai_api_key)
-                
-                # ChromaDB pour historique projets
-                self._init_vector_store()
-            except Exception as e:
-                print(f"⚠️  CAPEX AI Service: OpenAI non disponible - {str(e)}")
+            self.llm = llm_gateway
         else:
             print("⚠️  CAPEX AI Service: OPENAI_API_KEY non configurée")
     
-    def _init_vector_store(self):
-        """Initialise ChromaDB avec projets historiques"""
-        try:
-            # Chemin persistant pour ChromaDB
-            persist_directory = "./chroma_db"
-            
-            # Tentative de charger DB existante
-            self.vector_store = Chroma(
-                persist_directory=persist_directory,
-                embedding_function=self.embeddings,
-                collection_name="capex_projects"
-            )
-            
-            # Si collection vide, initialiser avec exemples
-            if self.vector_store._collection.count() == 0:
-                self._populate_initial_data()
-                
-        except Exception as e:
-            print(f"⚠️ Erreur init ChromaDB: {e}")
-            self.vector_store = None
-    
-    def _populate_initial_data(self):
-        """Peuple ChromaDB avec projets exemples (à remplacer par vraies données)"""
-        example_projects = [
-            {
-                "description": "Réhabilitation immeuble haussmannien 1200m2 Paris 17ème, 8 appartements, façade à refaire",
-                "typologie": "RESIDENTIAL",
-                "surface": 1200,
-                "capex": {
-                    "facade_ravalement_simple": {"quantity": 400, "unit": "m2", "cost": 180000},
-                    "charpente_refection": {"quantity": 200, "unit": "m2", "cost": 60000},
-                    "electricite_renovation": {"quantity": 1200, "unit": "m2", "cost": 84000},
-                    "plomberie_renovation": {"quantity": 1200, "unit": "m2", "cost": 72000},
-                    "menuiseries_double_vitrage": {"quantity": 45, "unit": "unité", "cost": 67500}
-                },
-                "total_capex": 463500,
-                "cost_per_m2": 386
-            },
-            {
-                "description": "Transformation bureaux 800m2 en logements Bordeaux centre, création 6 appartements",
-                "typologie": "CONVERSION",
-                "surface": 800,
-                "capex": {
-                    "demolition_legere": {"quantity": 200, "unit": "m2", "cost": 15000},
-                    "cloisons_creation": {"quantity": 150, "unit": "m2", "cost": 18000},
-                    "electricite_renovation": {"quantity": 800, "unit": "m2", "cost": 48000},
-                    "plomberie_creation": {"quantity": 6, "unit": "unité", "cost": 36000},
-                    "menuiseries_double_vitrage": {"quantity": 30, "unit": "unité", "cost": 45000},
-                    "isolation_thermique": {"quantity": 800, "unit": "m2", "cost": 64000}
-                },
-                "total_capex": 226000,
-                "cost_per_m2": 282
-            },
-            {
-                "description": "Construction neuve 15 logements R+3 Lyon 3ème, parking souterrain",
-                "typologie": "NEUF",
-                "surface": 1500,
-                "capex": {
-                    "terrassement": {"quantity": 500, "unit": "m3", "cost": 50000},
-                    "fondations": {"quantity": 300, "unit": "m2", "cost": 90000},
-                    "structure_beton": {"quantity": 1500, "unit": "m2", "cost": 450000},
-                    "facade_enduit": {"quantity": 600, "unit": "m2", "cost": 90000},
-                    "toiture": {"quantity": 400, "unit": "m2", "cost": 60000},
-                    "electricite_neuf": {"quantity": 1500, "unit": "m2", "cost": 120000},
-                    "plomberie_neuf": {"quantity": 1500, "unit": "m2", "cost": 90000},
-                    "ascenseur": {"quantity": 1, "unit": "unité", "cost": 80000}
-                },
-                "total_capex": 1030000,
-                "cost_per_m2": 686
-            }
-        ]
-        
-        # Insérer dans ChromaDB
-        texts = []
-        metadatas = []
+    def find_similar_projects(self, query: str, k: int = 3) -> List[Dict]:
+        """
+        Projets historiques les plus proches d'une description
         
-        for proj in example_projects:
-            text = f"{proj['description']} | Surface: {proj['surface']}m2 | Typologie: {proj['typologie']} | Coût/m2: {proj['cost_per_m2']}€"
-            texts.append(text)
-            metadatas.append({
-                "typologie": proj['typologie'],
-                "surface": proj['surface'],
-                "cost_per_m2": proj['cost_per_m2'],
-                "capex_detail": json.dumps(proj['capex'])
-            })
+        Args:
+            query: Description, typologie et surface du projet
+            k: Nombre de projets
         
-        if self.vector_store and texts:
-            self.vector_store.add_texts(texts, metadatas=metadatas)
-            print(f"✅ {len(texts)} projets exemples ajoutés à ChromaDB")
+        Returns:
+            Liste de projets (score cosinus, typologie, surface, coût/m2, détail CAPEX)
+        """
+        try:
+            return self.history_index.search(query, k=k)
+        except Exception as e:
+            print(f"⚠️ Erreur RAG: {e}")
+            return []
     
     async def suggest_capex_with_ai(
         self,
@@ -153,6 +81,11 @@ class CAPEXAIService:
             Dict avec suggestions CAPEX détaillées
         """
         
+        # === ÉTAPE 1 : RAG - Recherche projets similaires (index local, sans réseau) ===
+        similar_projects = await asyncio.to_thread(
+            self.find_similar_projects, f"{project_description} {typologie} {surface}m2"
+        )
+        
         # Vérifier si le service IA est disponible
         if not self.llm:
             return {
@@ -160,28 +93,14 @@ class CAPEXAIService:
                 "budget_estime": 0,
                 "cout_m2_estime": 0,
                 "niveau_confiance": "UNAVAILABLE",
+                "similar_projects": similar_projects,
                 "warnings": ["Service CAPEX AI non disponible - OPENAI_API_KEY non configurée"],
                 "error": "OPENAI_API_KEY_MISSING"
             }
         
-        # === ÉTAPE 1 : RAG - Recherche projets similaires ===
-        similar_projects = []
-        if self.vector_store:
-            try:
-                query = f"{project_description} {typologie} {surface}m2"
-                results = self.vector_store.similarity_search(query, k=3)
-                
-                for doc in results:
-                    similar_projects.append({
-                        "description": doc.page_content,
-                        "metadata": doc.metadata
-                    })
-            except Exception as e:
-                print(f"⚠️ Erreur RAG: {e}")
-        
         # === ÉTAPE 2 : LLM - Génération suggestions ===
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content="""Tu es un expert en CAPEX immobilier.
+        messages = [
+            {"role": "system", "content": """Tu es un expert en CAPEX immobilier.
 Analyse le projet et suggère les postes de travaux nécessaires avec quantités réalistes.
 
 Base-toi sur:
@@ -204,8 +123,8 @@ Retourne un JSON avec:
   "cout_m2_estime": 500,
   "niveau_confiance": "MEDIUM",
   "warnings": ["Attention: diagnostic amiante requis avant démolition"]
-}"""),
-            HumanMessage(content=f"""Projet à analyser:
+}"""},
+            {"role": "user", "content": f"""Projet à analyser:
 - Description: {project_description}
 - Surface: {surface} m2
 - Typologie: {typologie}
@@ -217,44 +136,42 @@ Projets similaires (historique):
 Postes CAPEX disponibles:
 {json.dumps(list(capex_service.get_all_categories().keys()), ensure_ascii=False)}
 
-Suggère les postes pertinents avec quantités.""")
-        ])
+Suggère les postes pertinents avec quantités."""}
+        ]
         
         try:
-            messages = prompt.format_messages()
-            response = self.llm.invoke(messages)
-            
-            # Parse réponse JSON
-            content = response.content
-            # Nettoyer markdown si présent
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
+            # Appel async (boucle non bloquée), réponse partagée et mise en cache par la passerelle
+            # (uniquement si elle contient un JSON exploitable)
+            content = await self.llm.complete(
+                messages, model=CAPEX_AI_MODEL, temperature=0.3, validate=parse_ai_json
+            )
             
-            ai_suggestions = json.loads(content)
+            ai_suggestions = parse_ai_json(content)
             
             # === ÉTAPE 3 : Enrichissement avec données réelles CAPEX ===
-            postes_enrichis = []
-            total_min = 0
-            total_max = 0
-            total_avg = 0
+            # Estimation de tous les postes suggérés en un seul calcul
+            postes = ai_suggestions.get("postes_suggeres", [])
+            estimation = capex_service.estimate_bulk(
+                [{
+                    "items": [{"key": poste.get("key"), "quantity": poste.get("quantity", 0)} for poste in postes],
+                    "city_tier": city_tier,
+                    "contingency_rate": 0.10
+                }],
+                detail=True
+            )["projects"][0]
             
-            for poste in ai_suggestions.get("postes_suggeres", []):
-                key = poste.get("key")
-                quantity = poste.get("quantity", 0)
-                
-                # Récupérer coûts réels
-                estimate = capex_service.get_cost_estimate(key, quantity, city_tier)
-                
-                if "error" not in estimate:
-                    postes_enrichis.append({
-                        **poste,
-                        "estimate": estimate
-                    })
-                    total_min += estimate["total_min"]
-                    total_max += estimate["total_max"]
-                    total_avg += estimate["total_avg"]
+            # items_detail suit l'ordre des postes, sans ceux non valorisés (unknown_items)
+            unknown_items = set(estimation["unknown_items"])
+            postes_enrichis = [
+                {**poste, "estimate": estimate}
+                for poste, estimate in zip(
+                    (poste for poste in postes if poste.get("key") not in unknown_items),
+                    estimation["items_detail"]
+                )
+            ]
+            total_min = estimation["base_costs"]["min"]
+            total_avg = estimation["base_costs"]["avg"]
+            total_max = estimation["base_costs"]["max"]
             
             return {
                 "success": True,
@@ -272,8 +189,8 @@ Suggère les postes pertinents avec quantités.""")
                     "total_avg": total_avg,
                     "total_max": total_max,
                     "cost_per_m2_avg": total_avg / surface if surface > 0 else 0,
-                    "contingency_10pct": total_avg * 0.10,
-                    "total_with_contingency": total_avg * 1.10
+                    "contingency_10pct": estimation["contingency"]["amount_avg"],
+                    "total_with_contingency": estimation["total_with_contingency"]["avg"]
                 },
                 "next_steps": [
                     "Affiner les quantités après visite terrain",
@@ -286,7 +203,7 @@ Suggère les postes pertinents avec quantités.""")
             return {
                 "success": False,
                 "error": f"Erreur parsing IA: {e}",
-                "raw_response": content if 'content' in locals() else "N/A"
+                "raw_response": e.doc
             }
         except Exception as e:
             return {
@@ -0,0 +1,149 @@
+"""
+Bibliothèque de courbes de décaissement CAPEX
+Chaque courbe est un générateur vectorisé de poids mensuels, enregistré par nom
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import inspect
+import numpy as np
+
+from app.core.lazy import lazy_import
+
+special = lazy_import("scipy.special")
+
+
+CurveGenerator = Callable[..., np.ndarray]
+
+# Registre nom -> générateur (months, **params) -> poids (months,)
+CURVE_GENERATORS: Dict[str, CurveGenerator] = {}
+
+
+def register_curve(name: str) -> Callable[[CurveGenerator], CurveGenerator]:
+    """
+    Enregistre un générateur de courbe
+
+    Le générateur reçoit le nombre de mois et les paramètres de la courbe, et renvoie
+    des poids positifs de longueur `months` (normalisés ensuite à 100%).
+
+    Exemple :
+        @register_curve("two_steps")
+        def two_steps(months: int, split: float = 0.5) -> np.ndarray:
+            ...
+    """
+    def decorator(generator: CurveGenerator) -> CurveGenerator:
+        CURVE_GENERATORS[name] = generator
+        return generator
+
+    return decorator
+
+
+def available_curves() -> List[Dict[str, str]]:
+    """Courbes enregistrées avec leur description (1ère ligne de docstring)"""
+    return [
+        {"curve_type": name, "description": (generator.__doc__ or "").strip().splitlines()[0]}
+        for name, generator in CURVE_GENERATORS.items()
+    ]
+
+
+def curve_weights(curve_type: str, months: int, **params: Any) -> np.ndarray:
+    """
+    Poids mensuels normalisés (somme = 1) d'une courbe enregistrée
+
+    Raises:
+        ValueError: Courbe inconnue, paramètres invalides, durée invalide ou poids incohérents
+    """
+    generator = CURVE_GENERATORS.get(curve_type)
+    if generator is None:
+        raise ValueError(
+            f"Courbe inconnue: {curve_type}. Valeurs acceptées: {', '.join(CURVE_GENERATORS)}"
+        )
+    if months < 1:
+        raise ValueError("La durée des travaux doit être d'au moins 1 mois")
+
+    signature = inspect.signature(generator)
+    try:
+        signature.bind(months, **params)
+    except TypeError:
+        accepted = list(signature.parameters)[1:]
+        unknown = sorted(set(params) - set(accepted)) or sorted(params)
+        raise ValueError(
+            f"Courbe {curve_type}: paramètres invalides {', '.join(unknown)}. "
+            f"Paramètres acceptés: {', '.join(accepted) or 'aucun'}"
+        )
+
+    try:
+        weights = np.asarray(generator(months, **params), dtype=float)
+    except (TypeError, KeyError) as e:
+        raise ValueError(f"Courbe {curve_type}: paramètre invalide ({e!r})")
+    if weights.shape != (months,):
+        raise ValueError(f"Courbe {curve_type}: {weights.size} poids pour {months} mois")
+    if np.any(weights < 0) or not np.isfinite(weights).all() or weights.sum() <= 0:
+        raise ValueError(f"Courbe {curve_type}: poids positifs et non tous nuls requis")
+
+    return weights / weights.sum()
+
+
+def _thirds(months: int, shares: Sequence[float]) -> np.ndarray:
+    """Répartition par tiers de la durée (dernier tiers = reste des mois)"""
+    third = months // 3
+    if third == 0:
+        return np.ones(months)
+    sizes = np.array([third, third, months - 2 * third])
+    return np.repeat(np.asarray(shares) / sizes, sizes)
+
+
+@register_curve("linear")
+def linear(months: int) -> np.ndarray:
+    """Linéaire : même montant chaque mois"""
+    return np.ones(months)
+
+
+@register_curve("s_curve")
+def s_curve(months: int, steepness: float = 3.0) -> np.ndarray:
+    """Courbe en S (sigmoïde) : lent au début, accélère, ralentit à la fin"""
+    if steepness <= 0:
+        raise ValueError("steepness doit être > 0")
+    # Sigmoïde évaluée aux bornes des mois : la pente règle la concentration au milieu
+    sigmoid = 1 / (1 + np.exp(-np.linspace(-steepness, steepness, months + 1)))
+    return np.diff(sigmoid)
+
+
+@register_curve("front_loaded")
+def front_loaded(months: int) -> np.ndarray:
+    """Chargé au début : 40% premier tiers, 35% second, 25% dernier"""
+    return _thirds(months, (0.40, 0.35, 0.25))
+
+
+@register_curve("back_loaded")
+def back_loaded(months: int) -> np.ndarray:
+    """Chargé en fin : 25% premier tiers, 35% second, 40% dernier"""
+    return _thirds(months, (0.25, 0.35, 0.40))
+
+
+@register_curve("beta")
+def beta_curve(months: int, alpha: float = 2.0, beta: float = 2.0) -> np.ndarray:
+    """Loi bêta : forme libre (alpha < beta : chargé au début, alpha > beta : en fin)"""
+    if alpha <= 0 or beta <= 0:
+        raise ValueError("alpha et beta doivent être > 0")
+    return np.diff(special.betainc(alpha, beta, np.linspace(0.0, 1.0, months + 1)))
+
+
+@register_curve("milestones")
+def milestone_curve(months: int, milestones: Optional[Sequence[Dict[str, Any]]] = None) -> np.ndarray:
+    """Jalons : budget_pct décaissé au mois de chaque jalon (1 = premier mois)"""
+    if not milestones:
+        raise ValueError("Au moins un jalon {month, budget_pct} est requis")
+    month = np.array([int(milestone["month"]) for milestone in milestones])
+    if np.any((month < 1) | (month > months)):
+        raise ValueError(f"Mois de jalon hors de la période de travaux (1 à {months})")
+
+    weights = np.zeros(months)
+    np.add.at(weights, month - 1, [float(milestone["budget_pct"]) for milestone in milestones])
+    return weights
+
+
+@register_curve("table")
+def table_curve(months: int, percentages: Optional[Sequence[float]] = None) -> np.ndarray:
+    """Table : pourcentage du budget saisi pour chaque mois"""
+    if percentages is None or len(percentages) != months:
+        raise ValueError(f"Table de {months} pourcentages requise")
+    return np.asarray(percentages, dtype=float)
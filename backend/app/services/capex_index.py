@@ -0,0 +1,345 @@
+"""
+Index local de similarité des projets CAPEX historiques (sans réseau)
+Vecteurs de n-grammes de caractères hachés, matrice NumPy mappée sur disque, top-k cosinus
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from numpy.lib.stride_tricks import sliding_window_view
+import json
+import os
+import re
+import threading
+import unicodedata
+import numpy as np
+
+from app.core.config import settings
+
+
+INDEX_DIMENSION = 256
+
+NGRAM_SIZES = (3, 4, 5)
+
+# Bases du hachage polynomial des n-grammes (octets UTF-8)
+_NGRAM_POWERS = {n: np.array([257 ** (n - 1 - k) for k in range(n)], dtype=np.uint64) for n in NGRAM_SIZES}
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+INITIAL_CAPACITY = 1024
+
+VECTORS_FILE = "vectors.f32"
+RECORDS_FILE = "records.jsonl"
+META_FILE = "meta.json"
+
+
+def _normalize(text: str) -> str:
+    """Minuscules ASCII, sans accents ni ponctuation"""
+    text = unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+def text_vectors(texts: Sequence[str], dimension: int = INDEX_DIMENSION) -> np.ndarray:
+    """
+    Vecteurs normalisés (un par texte) : n-grammes de caractères (3 à 5) hachés avec
+    signe dans `dimension` composantes, pondération sous-linéaire (log)
+
+    Tous les textes sont hachés en un seul passage sur leurs octets concaténés ;
+    les fenêtres à cheval sur deux textes sont écartées.
+
+    Returns:
+        Matrice (len(texts), dimension) float32
+    """
+    encoded = [f" {_normalize(text)} ".encode("ascii") for text in texts]
+    lengths = np.fromiter((len(chunk) for chunk in encoded), dtype=np.int64, count=len(encoded))
+    codes = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+    owners = np.repeat(np.arange(len(encoded), dtype=np.int64), lengths)
+
+    hashes, rows = [], []
+    for n in NGRAM_SIZES:
+        if codes.size < n:
+            continue
+        inside = owners[:1 - n or None] == owners[n - 1:]
+        hashes.append((sliding_window_view(codes, n) @ _NGRAM_POWERS[n] + np.uint64(n))[inside])
+        rows.append(owners[:1 - n or None][inside])
+    if not hashes:
+        return np.zeros((len(encoded), dimension), dtype=np.float32)
+
+    mixed = np.concatenate(hashes) * _MIX
+    buckets = ((mixed >> np.uint64(40)) % np.uint64(dimension)).astype(np.int64)
+    signs = ((mixed >> np.uint64(20)) & np.uint64(1)).astype(np.float32) * 2 - 1
+    counts = np.bincount(
+        np.concatenate(rows) * dimension + buckets, weights=signs, minlength=len(encoded) * dimension
+    ).reshape(len(encoded), dimension)
+
+    vectors = (np.sign(counts) * np.log1p(np.abs(counts))).astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+
+def text_vector(text: str, dimension: int = INDEX_DIMENSION) -> np.ndarray:
+    """Vecteur normalisé d'un texte (voir text_vectors)"""
+    return text_vectors([text], dimension)[0]
+
+
+def project_text(record: Dict[str, Any]) -> str:
+    """Texte indexé d'un projet : description, typologie, ville et postes de travaux"""
+    parts = [
+        record.get("description") or "",
+        record.get("typologie") or "",
+        record.get("city") or "",
+        " ".join(str(key).replace("_", " ") for key in (record.get("capex_detail") or {})),
+    ]
+    return " ".join(part for part in parts if part)
+
+
+def project_record(project: Any) -> Dict[str, Any]:
+    """
+    Enregistrement d'historique d'un projet libéré (sans nom ni adresse)
+
+    Args:
+        project: Project (ORM) ou objet équivalent
+    """
+    surface = project.surface or 0
+    total_capex = project.renovation_budget or 0
+    return {
+        "project_id": project.id,
+        "description": project.description or "",
+        "typologie": (project.asset_type or project.project_type or "").upper(),
+        "city": project.city or "",
+        "surface": surface,
+        "total_capex": total_capex,
+        "cost_per_m2": round(total_capex / surface, 2) if surface else None,
+        "capex_detail": project.capex_details or {},
+    }
+
+
+class CapexHistoryIndex:
+    """
+    Index de similarité persistant
+
+    Fichiers du répertoire :
+        vectors.f32   matrice (capacité x dimension) float32 mappée en mémoire
+        records.jsonl un projet par ligne (ajout seul, la dernière version d'un id l'emporte)
+        meta.json     dimension, capacité et nombre de lignes valides (écrit en dernier)
+    """
+
+    def __init__(self, directory: str, dimension: int = INDEX_DIMENSION):
+        self.directory = directory
+        self.dimension = dimension
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._vectors: Optional[np.memmap] = None
+        self._count = 0
+        self._records: List[Dict[str, Any]] = []
+        self._row_of: Dict[Any, int] = {}
+        self._typology_codes: Dict[str, int] = {}
+        self._typology_of = np.zeros(0, dtype=np.int32)
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return self._count
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._count = 0
+            # Index encore jamais écrit : rien n'est créé sur disque avant le premier ajout
+            self._vectors = np.zeros((0, self.dimension), dtype=np.float32)
+            if os.path.exists(self._path(META_FILE)):
+                with open(self._path(META_FILE)) as f:
+                    meta = json.load(f)
+                if meta["dimension"] != self.dimension:
+                    raise ValueError(
+                        f"Index {self.directory}: dimension {meta['dimension']} (attendue {self.dimension})"
+                    )
+                self._open_vectors(meta["capacity"])
+                self._count = meta["count"]
+            self._records = []
+            self._row_of = {}
+            if os.path.exists(self._path(RECORDS_FILE)):
+                with open(self._path(RECORDS_FILE), encoding="utf-8") as f:
+                    for line in f:
+                        entry = json.loads(line)
+                        if entry["row"] >= self._count:
+                            continue  # Ajout interrompu avant l'écriture de meta.json
+                        if entry["row"] == len(self._records):
+                            self._records.append(entry["record"])
+                        else:
+                            self._records[entry["row"]] = entry["record"]
+                        self._row_of[entry["record"]["project_id"]] = entry["row"]
+            self._typology_of = np.array(
+                [self._typology_code(record) for record in self._records], dtype=np.int32
+            )
+            self._loaded = True
+
+    def _typology_code(self, record: Dict[str, Any]) -> int:
+        return self._typology_codes.setdefault(record.get("typologie") or "", len(self._typology_codes))
+
+    def _open_vectors(self, capacity: int) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(VECTORS_FILE)
+        size = capacity * self.dimension * 4
+        if not os.path.exists(path) or os.path.getsize(path) < size:
+            with open(path, "ab") as f:
+                f.truncate(size)
+        self._vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+
+    def _write_meta(self) -> None:
+        tmp = self._path(META_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"dimension": self.dimension, "capacity": self._vectors.shape[0], "count": self._count}, f)
+        os.replace(tmp, self._path(META_FILE))
+
+    def add(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Ajoute ou remplace des projets (clé project_id)
+
+        Les vecteurs sont écrits dans la matrice mappée, les enregistrements ajoutés au
+        journal, puis meta.json valide les nouvelles lignes.
+
+        Returns:
+            Nombre de projets écrits
+        """
+        self._ensure_loaded()
+        records = list(records)
+        if not records:
+            return 0
+
+        with self._lock:
+            rows = []
+            new_rows: Dict[Any, int] = {}
+            for record in records:
+                project_id = record["project_id"]
+                row = self._row_of.get(project_id, new_rows.get(project_id))
+                if row is None:
+                    row = new_rows[project_id] = self._count + len(new_rows)
+                rows.append(row)
+
+            needed = max(rows) + 1
+            if needed > self._vectors.shape[0]:
+                capacity = max(self._vectors.shape[0], INITIAL_CAPACITY)
+                while capacity < needed:
+                    capacity *= 2
+                if isinstance(self._vectors, np.memmap):
+                    self._vectors.flush()
+                self._vectors = None
+                self._open_vectors(capacity)
+
+            vectors = text_vectors([project_text(record) for record in records], self.dimension)
+            self._vectors[rows] = vectors
+            self._vectors.flush()
+
+            with open(self._path(RECORDS_FILE), "a", encoding="utf-8") as f:
+                for row, record in zip(rows, records):
+                    f.write(json.dumps({"row": row, "record": record}, ensure_ascii=False, default=str) + "\n")
+
+            for row, record in zip(rows, records):
+                if row == len(self._records):
+                    self._records.append(record)
+                else:
+                    self._records[row] = record
+                self._row_of[record["project_id"]] = row
+            self._count = max(self._count, needed)
+            self._typology_of = np.resize(self._typology_of, self._count)
+            self._typology_of[rows] = [self._typology_code(record) for record in records]
+            self._write_meta()
+
+            if self._centroids is not None:
+                assignments = np.argmax(vectors @ self._centroids.T, axis=1)
+                self._assignments = np.resize(self._assignments, self._count)
+                self._assignments[rows] = assignments
+
+        return len(records)
+
+    def build_approximate(self, n_lists: Optional[int] = None, iterations: int = 10, seed: int = 0) -> int:
+        """
+        Index approché (partition par k-moyennes sphériques) pour les grands corpus
+
+        La recherche approchée ne compare la requête qu'aux projets des `nprobe`
+        partitions les plus proches. Les ajouts suivants sont affectés à leur partition.
+
+        Returns:
+            Nombre de partitions
+        """
+        self._ensure_loaded()
+        vectors = np.asarray(self._vectors[:self._count])
+        n_lists = min(n_lists or max(1, int(np.sqrt(self._count))), max(self._count, 1))
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(self._count, size=n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, vectors)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            filled = norms[:, 0] > 0
+            centroids[filled] = sums[filled] / norms[filled]
+
+        self._centroids = centroids
+        self._assignments = np.argmax(vectors @ centroids.T, axis=1)
+        return n_lists
+
+    def search(
+        self,
+        query: str,
+        k: int = 3,
+        typologie: Optional[str] = None,
+        approximate: bool = False,
+        nprobe: int = 8
+    ) -> List[Dict[str, Any]]:
+        """
+        Projets les plus proches d'une description (similarité cosinus)
+
+        Args:
+            query: Description du projet recherché
+            k: Nombre de résultats
+            typologie: Filtre optionnel sur la typologie
+            approximate: Utiliser l'index approché (si construit)
+            nprobe: Partitions explorées en mode approché
+
+        Returns:
+            [{"score": float, **projet}]
+        """
+        self._ensure_loaded()
+        if self._count == 0 or k <= 0:
+            return []
+
+        vector = text_vector(query, self.dimension)
+        if approximate and self._centroids is not None:
+            probes = np.argsort(self._centroids @ vector)[-nprobe:]
+            rows = np.flatnonzero(np.isin(self._assignments, probes))
+            scores = self._vectors[rows] @ vector
+        else:
+            rows = np.arange(self._count)
+            scores = self._vectors[:self._count] @ vector
+        if typologie:
+            # Filtre appliqué sur les scores : moins coûteux que d'extraire les lignes de la matrice
+            code = self._typology_codes.get(typologie.upper(), -1)
+            keep = self._typology_of[rows] == code
+            rows, scores = rows[keep], scores[keep]
+        if scores.size == 0:
+            return []
+
+        top = np.argpartition(-scores, min(k, scores.size) - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [{"score": round(float(scores[i]), 4), **self._records[rows[i]]} for i in top]
+
+    def stats(self) -> Dict[str, Any]:
+        """Taille et état de l'index"""
+        self._ensure_loaded()
+        return {
+            "directory": self.directory,
+            "projects": self._count,
+            "dimension": self.dimension,
+            "capacity": int(self._vectors.shape[0]),
+            "approximate_lists": 0 if self._centroids is None else int(self._centroids.shape[0]),
+        }
+
+
+# Instance globale
+capex_history_index = CapexHistoryIndex(settings.CAPEX_INDEX_DIR)
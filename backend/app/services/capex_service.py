@@ -2,10 +2,13 @@
 Service de gestion des coûts CAPEX (travaux)
 Fournit des estimations de coûts pour les différents postes de travaux
 """
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from datetime import datetime
+import numpy as np
+
+from app.services.reference_data import ReferenceSnapshot, reference_data
 
 
 class CAPEXCategory:
@@ -127,11 +130,56 @@ DEFAULT_CAPEX_COSTS = {
 }
 
 
+PRICE_LEVELS = ("min", "avg", "max")
+
+MATRIX_TIERS = (CityTier.TIER_1, CityTier.TIER_2, CityTier.TIER_3)
+
+
+class CapexPriceMatrix:
+    """
+    Matrice des prix unitaires (postes x niveaux de ville x min/avg/max)
+    
+    Construite une fois par instantané des données de référence. Un niveau sans prix
+    propre reprend le prix tier 1 avec le multiplicateur du niveau (colonne multipliers) ;
+    sans prix tier 1 non plus, la cellule reste NaN (poste inconnu à ce niveau).
+    """
+    
+    def __init__(self, snapshot: ReferenceSnapshot, tier_multiplier: Callable[[int], float]):
+        self.snapshot = snapshot
+        self.items = snapshot.capex_items
+        self.index = {item: i for i, item in enumerate(self.items)}
+        self.prices = np.full((len(self.items), len(MATRIX_TIERS), len(PRICE_LEVELS)), np.nan)
+        self.multipliers = np.ones((len(self.items), len(MATRIX_TIERS)))
+        self.units: List[str] = []
+        
+        for i, item in enumerate(self.items):
+            base = snapshot.capex_price(item, CityTier.TIER_1)
+            unit = None
+            for t, tier in enumerate(MATRIX_TIERS):
+                record = snapshot.capex_price(item, tier)
+                if record is None and base is not None:
+                    record = base
+                    self.multipliers[i, t] = tier_multiplier(tier)
+                if record is not None:
+                    self.prices[i, t] = [record[level] for level in PRICE_LEVELS]
+                    unit = unit or record["unit"]
+            self.units.append(unit)
+    
+    def tier_column(self, tier: int) -> int:
+        """Colonne d'un niveau de ville (niveau inconnu : prix tier 1 sans ajustement)"""
+        return MATRIX_TIERS.index(tier) if tier in MATRIX_TIERS else 0
+
+
 class CAPEXService:
     """Service de calcul des coûts CAPEX"""
     
     def __init__(self):
-        self.costs_db = DEFAULT_CAPEX_COSTS
+        self._matrix: Optional[CapexPriceMatrix] = None
+    
+    @property
+    def reference(self) -> ReferenceSnapshot:
+        """Données de référence courantes (table capex_costs, repli sur les valeurs intégrées)"""
+        return reference_data.snapshot
     
     def get_cost_estimate(
         self,
@@ -150,17 +198,21 @@ class CAPEXService:
         Returns:
             Dict avec min/avg/max costs
         """
-        if item_key not in self.costs_db:
+        reference = self.reference
+        
+        # Prix propres au niveau de ville, sinon prix de référence (tier 1) ajustés
+        cost_data = reference.capex_price(item_key, city_tier)
+        tier_multiplier = 1.0
+        if cost_data is None:
+            cost_data = reference.capex_price(item_key, CityTier.TIER_1)
+            tier_multiplier = self._get_tier_multiplier(city_tier)
+        
+        if cost_data is None:
             return {
                 "error": f"Poste '{item_key}' non trouvé",
-                "available_items": list(self.costs_db.keys())
+                "available_items": list(reference.capex_items)
             }
         
-        cost_data = self.costs_db[item_key]
-        
-        # Ajustement selon tier de ville
-        tier_multiplier = self._get_tier_multiplier(city_tier)
-        
         min_total = cost_data["min"] * quantity * tier_multiplier
         avg_total = cost_data["avg"] * quantity * tier_multiplier
         max_total = cost_data["max"] * quantity * tier_multiplier
@@ -182,6 +234,132 @@ class CAPEXService:
             }
         }
     
+    def price_matrix(self) -> CapexPriceMatrix:
+        """Matrice des prix de l'instantané courant (reconstruite après rechargement des données)"""
+        snapshot = self.reference
+        if self._matrix is None or self._matrix.snapshot is not snapshot:
+            self._matrix = CapexPriceMatrix(snapshot, self._get_tier_multiplier)
+        return self._matrix
+    
+    def estimate_bulk(
+        self,
+        projects: List[Dict[str, Any]],
+        city_tier: int = CityTier.TIER_1,
+        contingency_rate: float = 0.10,
+        detail: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Estimation CAPEX d'un lot de projets en un seul calcul matriciel
+        
+        Toutes les lignes du lot sont mises bout à bout : prix = matrice[poste, niveau],
+        totaux par projet par sommes pondérées (bincount), aléas appliqués par projet.
+        
+        Args:
+            projects: [{"id": "immeuble_1", "items": [{"key": str, "quantity": float}],
+                        "city_tier": 2, "contingency_rate": 0.12}]
+            city_tier: Niveau ville par défaut
+            contingency_rate: Taux d'aléas par défaut
+            detail: Inclure le détail par poste (items_detail) de chaque projet
+        
+        Returns:
+            Coûts de base, aléas et total par projet, totaux du lot
+        """
+        matrix = self.price_matrix()
+        lookup = matrix.index
+        
+        n_projects = len(projects)
+        tiers = [project.get("city_tier", city_tier) for project in projects]
+        rates = np.array([project.get("contingency_rate", contingency_rate) for project in projects], dtype=float)
+        columns = np.array([matrix.tier_column(tier) for tier in tiers], dtype=int)
+        # Poste sans prix à ce niveau de ville (ni prix tier 1 à ajuster) : inconnu, comme get_cost_estimate
+        priced = ~np.isnan(matrix.prices[:, :, 0])
+        
+        line_project, line_row, line_quantity = [], [], []
+        unknown: List[List[str]] = [[] for _ in projects]
+        for p, project in enumerate(projects):
+            for item in project.get("items", []):
+                row = lookup.get(item["key"])
+                if row is None or not priced[row, columns[p]]:
+                    unknown[p].append(item["key"])
+                    continue
+                line_project.append(p)
+                line_row.append(row)
+                line_quantity.append(item["quantity"])
+        
+        line_project = np.array(line_project, dtype=int)
+        line_row = np.array(line_row, dtype=int)
+        quantity = np.array(line_quantity, dtype=float)
+        line_column = columns[line_project]
+        
+        multipliers = matrix.multipliers[line_row, line_column]
+        prices = matrix.prices[line_row, line_column]
+        line_totals = np.round(prices * quantity[:, None] * multipliers[:, None], 2)
+        
+        base = np.stack(
+            [np.bincount(line_project, weights=line_totals[:, k], minlength=n_projects) for k in range(len(PRICE_LEVELS))],
+            axis=1
+        ).reshape(n_projects, len(PRICE_LEVELS))
+        contingency = base * rates[:, None]
+        
+        counts = np.bincount(line_project, minlength=n_projects)
+        bounds = np.concatenate([[0], np.cumsum(counts)]).tolist()
+        if detail:
+            # Listes Python construites une fois pour tout le lot, découpées par projet
+            detail_items = [matrix.items[row] for row in line_row.tolist()]
+            detail_units = [matrix.units[row] for row in line_row.tolist()]
+            detail_prices = np.round(prices * multipliers[:, None], 2).tolist()
+            detail_totals = line_totals.tolist()
+        
+        results = []
+        for p, project in enumerate(projects):
+            summary = self._capex_summary(base[p], contingency[p], float(rates[p]))
+            entry = {
+                "id": project.get("id", p),
+                "city_tier": tiers[p],
+                **summary,
+                "total_items": int(counts[p]),
+                "unknown_items": unknown[p],
+            }
+            if detail:
+                entry["items_detail"] = [
+                    {
+                        "item": detail_items[line],
+                        "unit": detail_units[line],
+                        "quantity": line_quantity[line],
+                        "city_tier": tiers[p],
+                        "unit_prices": dict(zip(PRICE_LEVELS, detail_prices[line])),
+                        "total_costs": dict(zip(PRICE_LEVELS, detail_totals[line])),
+                    }
+                    for line in range(bounds[p], bounds[p + 1])
+                ]
+            results.append(entry)
+        
+        return {
+            "n_projects": n_projects,
+            "n_items": int(line_row.size),
+            "projects": results,
+            "totals": {
+                level: round(float(value), 2)
+                for level, value in zip(PRICE_LEVELS, (base + contingency).sum(axis=0))
+            },
+        }
+    
+    def _capex_summary(self, base: np.ndarray, contingency: np.ndarray, rate: float) -> Dict[str, Any]:
+        """Coûts de base, aléas et total (min / avg / max) d'un projet"""
+        base_costs = [float(value) for value in base]
+        amounts = [float(value) for value in contingency]
+        
+        return {
+            "base_costs": {level: round(value, 2) for level, value in zip(PRICE_LEVELS, base_costs)},
+            "contingency": {
+                "rate": rate,
+                **{f"amount_{level}": round(value, 2) for level, value in zip(PRICE_LEVELS, amounts)},
+            },
+            "total_with_contingency": {
+                level: round(value + amount, 2) for level, value, amount in zip(PRICE_LEVELS, base_costs, amounts)
+            },
+        }
+    
     def calculate_project_capex(
         self,
         items: List[Dict],
@@ -199,51 +377,20 @@ class CAPEXService:
         Returns:
             Analyse CAPEX complète avec détails par poste
         """
-        estimates = []
-        total_min = 0
-        total_avg = 0
-        total_max = 0
-        
-        for item in items:
-            estimate = self.get_cost_estimate(
-                item["key"],
-                item["quantity"],
-                city_tier
-            )
-            
-            if "error" not in estimate:
-                estimates.append(estimate)
-                total_min += estimate["total_costs"]["min"]
-                total_avg += estimate["total_costs"]["avg"]
-                total_max += estimate["total_costs"]["max"]
-        
-        # Ajouter aléas
-        contingency_min = total_min * contingency_rate
-        contingency_avg = total_avg * contingency_rate
-        contingency_max = total_max * contingency_rate
+        project = self.estimate_bulk(
+            [{"items": items, "city_tier": city_tier, "contingency_rate": contingency_rate}],
+            detail=True
+        )["projects"][0]
         
         return {
             "project_capex": {
-                "base_costs": {
-                    "min": round(total_min, 2),
-                    "avg": round(total_avg, 2),
-                    "max": round(total_max, 2)
-                },
-                "contingency": {
-                    "rate": contingency_rate,
-                    "amount_min": round(contingency_min, 2),
-                    "amount_avg": round(contingency_avg, 2),
-                    "amount_max": round(contingency_max, 2)
-                },
-                "total_with_contingency": {
-                    "min": round(total_min + contingency_min, 2),
-                    "avg": round(total_avg + contingency_avg, 2),
-                    "max": round(total_max + contingency_max, 2)
-                }
+                "base_costs": project["base_costs"],
+                "contingency": project["contingency"],
+                "total_with_contingency": project["total_with_contingency"]
             },
-            "items_detail": estimates,
+            "items_detail": project["items_detail"],
             "summary": {
-                "total_items": len(estimates),
+                "total_items": project["total_items"],
                 "city_tier": city_tier,
                 "contingency_rate": contingency_rate
             }
@@ -251,15 +398,7 @@ class CAPEXService:
     
     def get_all_categories(self) -> Dict[str, List[str]]:
         """Obtenir toutes les catégories et postes disponibles"""
-        categories = {}
-        
-        for key in self.costs_db.keys():
-            category = key.split("_")[0]
-            if category not in categories:
-                categories[category] = []
-            categories[category].append(key)
-        
-        return categories
+        return {category: list(items) for category, items in self.reference.capex_categories.items()}
     
     def _get_tier_multiplier(self, tier: int) -> float:
         """Obtenir le multiplicateur de coût selon le tier"""
@@ -450,3 +589,8 @@ class CAPEXService:
 
 # Instance globale
 capex_service = CAPEXService()
+
+
+reference_data.register_defaults("capex_costs", {
+    (key, record["tier"]): record for key, record in DEFAULT_CAPEX_COSTS.items()
+})
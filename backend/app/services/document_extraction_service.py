@@ -2,10 +2,13 @@
 Service d'extraction de texte depuis documents
 """
 from typing import Optional
-import PyPDF2
-from docx import Document
 import io
 
+from app.core.lazy import lazy_import
+
+PyPDF2 = lazy_import("PyPDF2")
+docx = lazy_import("docx")
+
 class DocumentExtractionService:
     """Service pour extraire le texte des documents PDF et DOCX"""
     
@@ -44,7 +47,7 @@ class DocumentExtractionService:
         """
         try:
             docx_file = io.BytesIO(file_bytes)
-            doc = Document(docx_file)
+            doc = docx.Document(docx_file)
             
             text = ""
             for paragraph in doc.paragraphs:
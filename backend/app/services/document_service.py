@@ -9,9 +9,12 @@ import json
 from datetime import datetime
 from pathlib import Path
 import mimetypes
-import PyPDF2
-from PIL import Image
-import pytesseract
+
+from app.core.lazy import lazy_import
+
+PyPDF2 = lazy_import("PyPDF2")
+Image = lazy_import("PIL.Image")
+pytesseract = lazy_import("pytesseract")
 
 
 class DocumentType:
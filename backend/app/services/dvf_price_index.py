@@ -0,0 +1,390 @@
+"""
+Indice des prix au m² DVF par commune, type de local et période (mois, trimestre)
+
+Précalcul depuis la base DVF locale : médiane et moyenne tronquée exactes par période,
+quartiles issus d'une esquisse fusionnable (PriceSketch). Une fenêtre de N mois se lit
+en fusionnant N esquisses mensuelles, sans relire les transactions.
+
+Mise à jour incrémentale : après une ingestion, seules les périodes dont l'empreinte
+(nombre de ventes, somme des prix au m²) a changé sont réécrites.
+
+Usage (depuis backend/) :
+    python -m app.services.dvf_store ingest valeursfoncieres-2024.txt
+    python -m app.services.dvf_price_index refresh
+"""
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import math
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.market import DVFPriceIndex
+from app.services.dvf_store import DVF_TYPES, PRICE_M2_MAX, PRICE_M2_MIN, DVFStore, dvf_store, type_code
+
+
+PERIOD_TYPES = ("month", "quarter")
+
+# Part des prix écartée de chaque côté pour la moyenne tronquée
+TRIM_PROPORTION = 0.1
+
+# Lignes écrites par requête
+WRITE_BATCH = 500
+
+_KEY_COLUMNS = (
+    DVFPriceIndex.code_commune, DVFPriceIndex.type_local, DVFPriceIndex.period_type, DVFPriceIndex.period_start
+)
+
+
+class PriceSketch:
+    """
+    Esquisse de quantiles à erreur relative bornée (type DDSketch) sur les prix au m²
+
+    Seaux logarithmiques de raison GAMMA couvrant ]PRICE_M2_MIN, PRICE_M2_MAX[ : tout
+    quantile est restitué à RELATIVE_ACCURACY près. Deux esquisses se fusionnent par
+    addition des compteurs (mois -> trimestre, 24 mois -> fenêtre d'évaluation).
+    """
+
+    RELATIVE_ACCURACY = 0.01
+    GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+    _LOG_GAMMA = math.log(GAMMA)
+    OFFSET = math.floor(math.log(PRICE_M2_MIN) / _LOG_GAMMA)
+    BINS = math.ceil(math.log(PRICE_M2_MAX) / _LOG_GAMMA) - OFFSET + 1
+
+    def __init__(self, counts: Optional[np.ndarray] = None):
+        self.counts = counts if counts is not None else np.zeros(self.BINS, dtype=np.int64)
+
+    @classmethod
+    def from_prices(cls, prices: np.ndarray) -> "PriceSketch":
+        buckets = np.ceil(np.log(np.asarray(prices, dtype=float)) / cls._LOG_GAMMA).astype(np.int64) - cls.OFFSET
+        return cls(np.bincount(buckets, minlength=cls.BINS).astype(np.int64))
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "PriceSketch":
+        size = int(np.frombuffer(payload, dtype="<u4", count=1)[0])
+        buckets = np.frombuffer(payload, dtype="<u2", count=size, offset=4)
+        counts = np.zeros(cls.BINS, dtype=np.int64)
+        counts[buckets] = np.frombuffer(payload, dtype="<u4", count=size, offset=4 + 2 * size)
+        return cls(counts)
+
+    def to_bytes(self) -> bytes:
+        """Seaux non vides : (nombre, indices uint16, compteurs uint32)"""
+        buckets = np.flatnonzero(self.counts)
+        return (
+            np.array([buckets.size], dtype="<u4").tobytes()
+            + buckets.astype("<u2").tobytes()
+            + self.counts[buckets].astype("<u4").tobytes()
+        )
+
+    def merge(self, other: "PriceSketch") -> "PriceSketch":
+        self.counts = self.counts + other.counts
+        return self
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Quantile q (0-1), None si l'esquisse est vide"""
+        total = self.count
+        if total == 0:
+            return None
+        index = int(np.searchsorted(np.cumsum(self.counts), q * (total - 1), side="right"))
+        # Valeur représentative du seau ]GAMMA^(i-1), GAMMA^i]
+        return 2 * self.GAMMA ** (index + self.OFFSET) / (self.GAMMA + 1)
+
+
+def month_number(value: date) -> int:
+    """Mois depuis janvier 1970"""
+    return (value.year - 1970) * 12 + value.month - 1
+
+
+def month_date(number: int) -> date:
+    return date(1970 + number // 12, number % 12 + 1, 1)
+
+
+def period_label(period_type: str, start: date) -> str:
+    """2024-03 (mois) ou 2024-T1 (trimestre)"""
+    if period_type == "quarter":
+        return f"{start.year}-T{(start.month - 1) // 3 + 1}"
+    return f"{start.year}-{start.month:02d}"
+
+
+def period_groups(block: Dict[str, np.ndarray], period_type: str) -> Dict[str, np.ndarray]:
+    """
+    Statistiques exactes de chaque groupe (commune, type, période) d'un bloc de ventes
+
+    Le bloc est trié par (commune, type, date) : chaque groupe est une plage contiguë.
+    Médiane (rang n//2) et moyenne tronquée sont calculées sans boucle Python.
+
+    Returns:
+        Colonnes par groupe : commune, type_local, period (mois de début), start, end,
+        count, median, trimmed_mean, total ; "sorted" = prix triés dans chaque groupe
+    """
+    communes, types, prices = block["commune"], block["type_local"], block["price_m2"]
+    months = block["date"].astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    periods = months if period_type == "month" else months - months % 3
+
+    change = np.ones(prices.size, dtype=bool)
+    change[1:] = (communes[1:] != communes[:-1]) | (types[1:] != types[:-1]) | (periods[1:] != periods[:-1])
+    starts = np.flatnonzero(change)
+    ends = np.append(starts[1:], prices.size)
+    counts = ends - starts
+
+    # Tri des prix à l'intérieur de chaque groupe
+    ordered = prices[np.lexsort((prices, np.cumsum(change)))]
+    cumulative = np.concatenate(([0.0], np.cumsum(ordered)))
+    trim = (counts * TRIM_PROPORTION).astype(np.int64)
+
+    return {
+        "commune": communes[starts],
+        "type_local": types[starts],
+        "period": periods[starts],
+        "start": starts,
+        "end": ends,
+        "count": counts,
+        "median": ordered[starts + counts // 2],
+        "trimmed_mean": (cumulative[ends - trim] - cumulative[starts + trim]) / (counts - 2 * trim),
+        # Somme groupe par groupe : indépendante de la position du groupe dans le bloc
+        "total": np.add.reduceat(ordered, starts) if starts.size else np.zeros(0),
+        "sorted": ordered,
+    }
+
+
+def _row_stats(row: DVFPriceIndex) -> Dict[str, Any]:
+    return {
+        "period": period_label(row.period_type, row.period_start),
+        "period_start": row.period_start.isoformat(),
+        "count": row.count,
+        "median": round(row.median, 2),
+        "trimmed_mean": round(row.trimmed_mean, 2),
+        "p25": round(row.p25, 2),
+        "p75": round(row.p75, 2),
+    }
+
+
+class DVFPriceIndexService:
+    """Calcul incrémental et lecture de l'indice des prix au m²"""
+
+    def __init__(self, store: DVFStore):
+        self.store = store
+
+    # === Calcul ===
+
+    async def refresh(
+        self,
+        db: AsyncSession,
+        store: Optional[DVFStore] = None,
+        max_rows: int = 1_000_000
+    ) -> Dict[str, int]:
+        """
+        Met l'indice en cohérence avec la base DVF locale
+
+        Seules les périodes nouvelles ou dont l'empreinte a changé sont réécrites ;
+        celles qui n'ont plus de vente sont supprimées. Le commit reste à la charge
+        de l'appelant.
+
+        Returns:
+            {"inserted", "updated", "deleted", "unchanged"}
+        """
+        store = store or self.store
+        result = await db.execute(select(*_KEY_COLUMNS, DVFPriceIndex.fingerprint))
+        existing = {tuple(row[:4]): row[4] for row in result.all()}
+
+        counts = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+        deletes: List[Tuple] = []
+        rows: List[Dict[str, Any]] = []
+
+        for block in store.price_blocks(max_rows):
+            for period_type in PERIOD_TYPES:
+                groups = period_groups(block, period_type)
+                for i in range(groups["count"].size):
+                    count = int(groups["count"][i])
+                    key = (
+                        groups["commune"][i].decode(),
+                        DVF_TYPES[groups["type_local"][i]],
+                        period_type,
+                        month_date(int(groups["period"][i])),
+                    )
+                    fingerprint = f"{count}:{groups['total'][i]:.2f}"
+                    previous = existing.pop(key, None)
+                    if previous == fingerprint:
+                        counts["unchanged"] += 1
+                        continue
+                    if previous is None:
+                        counts["inserted"] += 1
+                    else:
+                        counts["updated"] += 1
+                        deletes.append(key)
+
+                    sketch = PriceSketch.from_prices(groups["sorted"][groups["start"][i]:groups["end"][i]])
+                    rows.append({
+                        "code_commune": key[0],
+                        "type_local": key[1],
+                        "period_type": period_type,
+                        "period_start": key[3],
+                        "count": count,
+                        "median": float(groups["median"][i]),
+                        "trimmed_mean": float(groups["trimmed_mean"][i]),
+                        "p25": sketch.quantile(0.25),
+                        "p75": sketch.quantile(0.75),
+                        "sketch": sketch.to_bytes(),
+                        "fingerprint": fingerprint,
+                    })
+                    if len(rows) >= WRITE_BATCH:
+                        await self._write(db, deletes, rows)
+                        deletes, rows = [], []
+
+        counts["deleted"] = len(existing)
+        await self._write(db, deletes + list(existing), rows)
+        return counts
+
+    async def _write(self, db: AsyncSession, deletes: List[Tuple], rows: List[Dict[str, Any]]) -> None:
+        """Suppressions (périodes modifiées ou disparues) puis insertions"""
+        for i in range(0, len(deletes), WRITE_BATCH):
+            await db.execute(delete(DVFPriceIndex).where(tuple_(*_KEY_COLUMNS).in_(deletes[i:i + WRITE_BATCH])))
+        if rows:
+            await db.execute(insert(DVFPriceIndex), rows)
+
+    # === Lecture ===
+
+    async def last_month(self, db: AsyncSession) -> Optional[date]:
+        """Dernier mois de l'indice (ancre des fenêtres, comme la base DVF)"""
+        result = await db.execute(
+            select(func.max(DVFPriceIndex.period_start)).where(DVFPriceIndex.period_type == "month")
+        )
+        return result.scalar()
+
+    async def series(
+        self,
+        db: AsyncSession,
+        commune: str,
+        type_local: str,
+        period_type: str = "month",
+        first: Optional[date] = None,
+        last: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Série chronologique des prix au m²
+
+        Args:
+            commune: Code INSEE
+            type_local: Maison, Appartement, Local commercial...
+            period_type: month ou quarter
+            first, last: Bornes sur le début de période (incluses)
+
+        Returns:
+            [{"period", "period_start", "count", "median", "trimmed_mean", "p25", "p75"}]
+        """
+        if period_type not in PERIOD_TYPES:
+            raise ValueError(f"Période inconnue: {period_type}. Valeurs acceptées: {', '.join(PERIOD_TYPES)}")
+        return [_row_stats(row) for row in await self._rows(db, commune, type_local, period_type, first, last)]
+
+    async def _rows(
+        self,
+        db: AsyncSession,
+        commune: str,
+        type_local: str,
+        period_type: str,
+        first: Optional[date],
+        last: Optional[date]
+    ) -> List[DVFPriceIndex]:
+        code = type_code(type_local)
+        if code is None:
+            return []
+        query = select(DVFPriceIndex).where(
+            DVFPriceIndex.code_commune == commune,
+            DVFPriceIndex.type_local == DVF_TYPES[code],
+            DVFPriceIndex.period_type == period_type,
+        )
+        if first:
+            query = query.where(DVFPriceIndex.period_start >= first)
+        if last:
+            query = query.where(DVFPriceIndex.period_start <= last)
+        result = await db.execute(query.order_by(DVFPriceIndex.period_start))
+        return list(result.scalars().all())
+
+    async def window_stats(
+        self,
+        db: AsyncSession,
+        commune: str,
+        type_local: str,
+        months_back: int,
+        months_end: int = 0
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Statistiques d'une fenêtre de mois calendaires, par fusion des esquisses mensuelles
+
+        Fenêtre : [dernier mois - months_back + 1, dernier mois - months_end] ; médiane et
+        quartiles à 1 % près, moyenne tronquée pondérée par le nombre de ventes.
+
+        Returns:
+            {"count", "median", "p25", "p75", "trimmed_mean", "first_month", "last_month"}
+            ou None sans vente
+        """
+        anchor = await self.last_month(db)
+        if anchor is None:
+            return None
+        last = month_number(anchor) - months_end
+        first = month_number(anchor) - months_back + 1
+        rows = await self._rows(db, commune, type_local, "month", month_date(first), month_date(last))
+        if not rows:
+            return None
+
+        sketch = PriceSketch()
+        for row in rows:
+            sketch.merge(PriceSketch.from_bytes(row.sketch))
+        count = sum(row.count for row in rows)
+        return {
+            "count": count,
+            "median": sketch.quantile(0.5),
+            "p25": sketch.quantile(0.25),
+            "p75": sketch.quantile(0.75),
+            "trimmed_mean": sum(row.trimmed_mean * row.count for row in rows) / count,
+            "first_month": month_date(first).isoformat(),
+            "last_month": month_date(last).isoformat(),
+        }
+
+    async def trend(self, db: AsyncSession, commune: str, type_local: str) -> Optional[Dict[str, Any]]:
+        """
+        12 derniers mois contre les 12 précédents, et série trimestrielle sur 2 ans
+
+        Returns:
+            {"recent", "previous" (window_stats), "quarters" (series)} ou None si une période est vide
+        """
+        recent = await self.window_stats(db, commune, type_local, 12)
+        previous = await self.window_stats(db, commune, type_local, 24, 12)
+        if recent is None or previous is None:
+            return None
+        quarters = await self.series(
+            db, commune, type_local, "quarter", first=date.fromisoformat(previous["first_month"])
+        )
+        return {"recent": recent, "previous": previous, "quarters": quarters}
+
+
+# Instance globale
+dvf_price_index = DVFPriceIndexService(dvf_store)
+
+
+async def _refresh() -> Dict[str, int]:
+    from app.core.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        counts = await dvf_price_index.refresh(db)
+        await db.commit()
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Indice des prix au m² DVF")
+    parser.add_argument("command", choices=["refresh"])
+    parser.parse_args()
+    print(json.dumps(asyncio.run(_refresh()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,21 @@
 """
 Service d'intégration DVF (Demandes de Valeurs Foncières)
-API officielle data.gouv.fr pour les prix du marché immobilier
+Indice des prix précalculé (dvf_price_index), base locale des fichiers data.gouv.fr
+(dvf_store) si la commune y figure, sinon API officielle data.gouv.fr
 """
-from typing import Dict, Any, List, Optional
-import httpx
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.lazy import lazy_import
+from app.services.dvf_price_index import DVFPriceIndexService, dvf_price_index
+from app.services.dvf_store import DVFStore, dvf_store, price_quantiles
+
+httpx = lazy_import("httpx")
+
 logger = logging.getLogger(__name__)
 
 class DVFService:
@@ -15,6 +24,13 @@ class DVFService:
     # API officielle DVF - data.gouv.fr via cquest
     BASE_URL = "https://api.cquest.org/dvf"
     
+    # Base Adresse Nationale (géocodage des biens évalués)
+    GEOCODING_URL = "https://api-adresse.data.gouv.fr/search/"
+    
+    # Évaluation par proximité : ventes retenues et minimum exploitable
+    NEARBY_COMPARABLES = 30
+    MIN_NEARBY_COMPARABLES = 5
+    
     # Codes INSEE des principales villes
     INSEE_CODES = {
         "Paris": "75056",
@@ -29,12 +45,70 @@ class DVFService:
         "Lille": "59350"
     }
     
+    def __init__(self, store: Optional[DVFStore] = None, price_index: Optional[DVFPriceIndexService] = None):
+        self.store = store if store is not None else dvf_store
+        self.price_index = price_index if price_index is not None else dvf_price_index
+    
+    def _local(self, commune: str, type_local: str) -> Optional[str]:
+        """Code INSEE si la base locale contient des ventes pour cette commune et ce type, sinon None"""
+        code_commune = self.INSEE_CODES.get(commune, commune)
+        return code_commune if self.store.covers(code_commune, type_local) else None
+    
+    async def geocode(self, address: str, commune: Optional[str] = None) -> Optional[Tuple[float, float]]:
+        """
+        Coordonnées d'une adresse via la Base Adresse Nationale
+        
+        Args:
+            address: Adresse du bien
+            commune: Nom ou code INSEE de la commune (restreint la recherche)
+        
+        Returns:
+            (latitude, longitude) ou None si l'adresse n'est pas trouvée
+        """
+        params = {"q": address, "limit": 1}
+        code_commune = self.INSEE_CODES.get(commune, commune) if commune else None
+        if code_commune and code_commune.isalnum() and len(code_commune) == 5:
+            params["citycode"] = code_commune
+        
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(self.GEOCODING_URL, params=params, timeout=10.0)
+                response.raise_for_status()
+                features = response.json().get("features", [])
+        except Exception as e:
+            logger.warning(f"Géocodage impossible ({address}): {e}")
+            return None
+        
+        if not features or features[0].get("properties", {}).get("score", 0) < 0.5:
+            return None
+        longitude, latitude = features[0]["geometry"]["coordinates"]
+        return latitude, longitude
+    
+    async def _coordinates(
+        self,
+        address: str,
+        commune: str,
+        latitude: Optional[float],
+        longitude: Optional[float]
+    ) -> Optional[Tuple[float, float]]:
+        """Point de recherche : coordonnées fournies, sinon adresse géocodée (base géolocalisée uniquement)"""
+        if not self.store.geocoded:
+            return None
+        if latitude is not None and longitude is not None:
+            return latitude, longitude
+        if address:
+            return await self.geocode(address, commune)
+        return None
+    
     async def get_comparable_sales(
         self,
         commune: str,
         type_local: str = "Maison",
         rayon_km: float = 1.0,
-        months_back: int = 24
+        months_back: int = 24,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        limit: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Récupère les ventes comparables DVF via API officielle
@@ -42,12 +116,24 @@ class DVFService:
         Args:
             commune: Nom de la commune ou code INSEE
             type_local: Maison, Appartement, Local commercial, etc.
-            rayon_km: Rayon de recherche en km (converti en mètres)
+            rayon_km: Rayon de recherche en km autour du point (base locale géolocalisée)
             months_back: Nombre de mois en arrière
+            latitude, longitude: Point de recherche ; sans point, toute la commune
+            limit: Nombre max de ventes du rayon (les plus pertinentes), None : toutes
         
         Returns:
             Liste des ventes comparables
         """
+        if latitude is not None and longitude is not None and self.store.geocoded:
+            return self.store.nearest(
+                latitude, longitude, type_local, rayon_km=rayon_km, k=limit, date_min=self.store.window(months_back)[0]
+            )
+        
+        local_commune = self._local(commune, type_local)
+        if local_commune:
+            date_min, date_max = self.store.window(months_back)
+            return self.store.transactions(local_commune, type_local, date_min, date_max)
+        
         # Convertir nom commune en code INSEE si nécessaire
         code_commune = self.INSEE_CODES.get(commune, commune)
         
@@ -81,16 +167,77 @@ class DVFService:
             logger.error(f"Erreur inattendue DVF API: {e}")
             return []
     
+    async def search_comparables(
+        self,
+        commune: str,
+        type_local: str = "Appartement",
+        months_back: int = 24,
+        limit: int = 50,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        rayon_km: float = 1.0
+    ) -> Dict[str, Any]:
+        """
+        Ventes comparables et nombre total sur la période
+        
+        Avec un point (latitude, longitude) et une base géolocalisée : ventes du rayon,
+        plus pertinentes d'abord ; sinon ventes de la commune, plus récentes d'abord.
+        
+        Returns:
+            {"comparables": List[Dict], "total_found": int, "source": "local" | "api"}
+        """
+        if latitude is not None and longitude is not None and self.store.geocoded:
+            date_min = self.store.window(months_back)[0]
+            return {
+                "comparables": self.store.nearest(
+                    latitude, longitude, type_local, rayon_km=rayon_km, k=limit, date_min=date_min
+                ),
+                "total_found": self.store.count_nearby(latitude, longitude, type_local, rayon_km, date_min),
+                "source": "local"
+            }
+        
+        local_commune = self._local(commune, type_local)
+        if local_commune:
+            date_min, date_max = self.store.window(months_back)
+            return {
+                "comparables": self.store.transactions(local_commune, type_local, date_min, date_max, limit=limit),
+                "total_found": self.store.count(local_commune, type_local, date_min, date_max),
+                "source": "local"
+            }
+        
+        comparables = await self.get_comparable_sales(
+            commune=commune,
+            type_local=type_local,
+            months_back=months_back
+        )
+        return {"comparables": comparables[:limit], "total_found": len(comparables), "source": "api"}
+    
     async def calculate_market_value(
         self,
         address: str,
         surface: float,
         commune: str,
-        type_bien: str = "appartement"
+        type_bien: str = "appartement",
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        nombre_pieces: Optional[int] = None,
+        rayon_km: float = 1.0,
+        db: Optional[AsyncSession] = None
     ) -> Dict[str, Any]:
         """
         Calcule la valeur de marché basée sur DVF
         
+        Base locale géolocalisée : ventes les plus pertinentes autour du bien (distance,
+        surface, nombre de pièces, ancienneté), point donné ou adresse géocodée.
+        À défaut (ou trop peu de ventes dans le rayon) : indice des prix de la commune
+        sur 24 mois (avec db), puis ventes de la commune.
+        
+        Args:
+            latitude, longitude: Position du bien (sinon géocodage de l'adresse)
+            nombre_pieces: Nombre de pièces principales du bien
+            rayon_km: Rayon de recherche des comparables
+            db: Session de base de données (lecture de l'indice des prix)
+        
         Returns:
             {
                 "prix_median_m2": float,
@@ -102,6 +249,21 @@ class DVFService:
                 "comparables": List[Dict]
             }
         """
+        point = await self._coordinates(address, commune, latitude, longitude)
+        if point:
+            nearby = self._nearby_market_value(point, type_bien.capitalize(), surface, nombre_pieces, rayon_km)
+            if nearby:
+                return nearby
+        
+        if db is not None:
+            indexed = await self._indexed_market_value(db, commune, type_bien.capitalize(), surface)
+            if indexed:
+                return indexed
+        
+        local_commune = self._local(commune, type_bien.capitalize())
+        if local_commune:
+            return self._local_market_value(local_commune, type_bien.capitalize(), surface)
+        
         comparables = await self.get_comparable_sales(
             commune=commune,
             type_local=type_bien.capitalize()
@@ -151,14 +313,98 @@ class DVFService:
             "comparables": self._format_comparables(comparables[:10])  # Top 10
         }
     
+    def _nearby_market_value(
+        self,
+        point: Tuple[float, float],
+        type_local: str,
+        surface: float,
+        nombre_pieces: Optional[int],
+        rayon_km: float
+    ) -> Optional[Dict[str, Any]]:
+        """Valeur de marché sur les ventes les plus pertinentes du rayon (None si trop peu de ventes)"""
+        comparables = self.store.nearest(
+            point[0], point[1], type_local, rayon_km=rayon_km, k=self.NEARBY_COMPARABLES,
+            surface=surface, pieces=nombre_pieces, date_min=self.store.window(24)[0]
+        )
+        prices = self._extract_prices_m2(comparables)
+        if len(prices) < self.MIN_NEARBY_COMPARABLES:
+            return None
+        
+        stats = price_quantiles(np.array(prices))
+        return {
+            "prix_median_m2": round(stats["median"], 2),
+            "prix_moyen_m2": round(stats["mean"], 2),
+            "estimation_basse": round(stats["p25"] * surface, 2),
+            "estimation_haute": round(stats["p75"] * surface, 2),
+            "estimation_mediane": round(stats["median"] * surface, 2),
+            "nombre_comparables": stats["count"],
+            "comparables": self._format_comparables(comparables[:10]),
+            "methode": "proximite",
+            "rayon_km": rayon_km
+        }
+    
+    async def _indexed_market_value(
+        self,
+        db: AsyncSession,
+        commune: str,
+        type_local: str,
+        surface: float
+    ) -> Optional[Dict[str, Any]]:
+        """Valeur de marché depuis l'indice des prix (24 derniers mois), None si la commune n'y figure pas"""
+        code_commune = self.INSEE_CODES.get(commune, commune)
+        stats = await self.price_index.window_stats(db, code_commune, type_local, 24)
+        if stats is None:
+            return None
+        
+        comparables = []
+        if self.store.covers(code_commune, type_local):
+            comparables = self.store.transactions(code_commune, type_local, *self.store.window(24), limit=10)
+        return {
+            "prix_median_m2": round(stats["median"], 2),
+            "prix_moyen_m2": round(stats["trimmed_mean"], 2),
+            "estimation_basse": round(stats["p25"] * surface, 2),
+            "estimation_haute": round(stats["p75"] * surface, 2),
+            "estimation_mediane": round(stats["median"] * surface, 2),
+            "nombre_comparables": stats["count"],
+            "comparables": self._format_comparables(comparables),
+            "methode": "indice",
+            "periode": {"debut": stats["first_month"], "fin": stats["last_month"]}
+        }
+    
+    def _local_market_value(self, code_commune: str, type_local: str, surface: float) -> Dict[str, Any]:
+        """Valeur de marché sur les 24 derniers mois de la base locale (statistiques vectorisées)"""
+        date_min, date_max = self.store.window(24)
+        stats = self.store.price_stats(code_commune, type_local, date_min, date_max)
+        
+        if stats is None:
+            return {
+                "error": "Données DVF insuffisantes",
+                "nombre_comparables": self.store.count(code_commune, type_local, date_min, date_max)
+            }
+        
+        comparables = self.store.transactions(code_commune, type_local, date_min, date_max, limit=10)
+        return {
+            "prix_median_m2": round(stats["median"], 2),
+            "prix_moyen_m2": round(stats["mean"], 2),
+            "estimation_basse": round(stats["p25"] * surface, 2),
+            "estimation_haute": round(stats["p75"] * surface, 2),
+            "estimation_mediane": round(stats["median"] * surface, 2),
+            "nombre_comparables": stats["count"],
+            "comparables": self._format_comparables(comparables)
+        }
+    
     async def analyze_market_trend(
         self,
         commune: str,
-        type_bien: str = "appartement"
+        type_bien: str = "appartement",
+        db: Optional[AsyncSession] = None
     ) -> Dict[str, Any]:
         """
         Analyse la tendance du marché
         
+        Avec db et une commune présente dans l'indice des prix : médianes des 12 derniers
+        mois calendaires contre les 12 précédents, et série trimestrielle.
+        
         Returns:
             {
                 "trend": "hausse" | "baisse" | "stable",
@@ -167,6 +413,22 @@ class DVFService:
                 "prix_median_12m": float
             }
         """
+        if db is not None:
+            indexed = await self.price_index.trend(db, self.INSEE_CODES.get(commune, commune), type_bien.capitalize())
+            if indexed:
+                result = self._trend_result(indexed["recent"]["median"], indexed["previous"]["median"])
+                result["serie_trimestrielle"] = indexed["quarters"]
+                return result
+        
+        local_commune = self._local(commune, type_bien.capitalize())
+        if local_commune:
+            # Périodes réelles : 12 derniers mois contre les 12 mois précédents
+            recent_stats = self.store.price_stats(local_commune, type_bien.capitalize(), *self.store.window(12))
+            old_stats = self.store.price_stats(local_commune, type_bien.capitalize(), *self.store.window(24, 12))
+            if recent_stats is None or old_stats is None:
+                return {"error": "Données insuffisantes pour analyse tendance"}
+            return self._trend_result(recent_stats["mean"], old_stats["mean"])
+        
         # Données 12 derniers mois
         recent = await self.get_comparable_sales(
             commune=commune,
@@ -190,6 +452,10 @@ class DVFService:
         prix_recent = sum(recent_prices) / len(recent_prices)
         prix_old = sum(old_prices) / len(old_prices)
         
+        return self._trend_result(prix_recent, prix_old)
+    
+    def _trend_result(self, prix_recent: float, prix_old: float) -> Dict[str, Any]:
+        """Tendance à partir des prix moyens au m² des deux périodes"""
         evolution = ((prix_recent - prix_old) / prix_old) * 100
         
         if evolution > 3:
@@ -223,13 +489,15 @@ class DVFService:
         for comp in comparables:
             formatted.append({
                 "date_mutation": comp.get("date_mutation"),
-                "adresse": f"{comp.get('numero_voie', '')} {comp.get('type_voie', '')} {comp.get('voie', '')}",
+                "adresse": comp.get("adresse") or f"{comp.get('numero_voie', '')} {comp.get('type_voie', '')} {comp.get('voie', '')}",
                 "prix": comp.get("valeur_fonciere"),
                 "surface": comp.get("surface_reelle_bati"),
                 "prix_m2": round(comp.get("valeur_fonciere", 0) / comp.get("surface_reelle_bati", 1), 2) if comp.get("surface_reelle_bati") else 0,
                 "type": comp.get("type_local"),
                 "nombre_pieces": comp.get("nombre_pieces_principales")
             })
+            if "distance_km" in comp:
+                formatted[-1]["distance_km"] = comp["distance_km"]
         return formatted
     
     def _interpret_trend(self, trend: str, evolution: float) -> str:
@@ -250,11 +518,15 @@ class MarketAnalysisService:
     
     async def full_market_analysis(
         self,
-        project_data: Dict[str, Any]
+        project_data: Dict[str, Any],
+        db: Optional[AsyncSession] = None
     ) -> Dict[str, Any]:
         """
         Analyse complète du marché pour un projet
         
+        Args:
+            db: Session de base de données (indice des prix précalculé)
+        
         Returns:
             Rapport d'analyse avec prix, tendances et recommandations
         """
@@ -267,13 +539,19 @@ class MarketAnalysisService:
             address=project_data.get("address", ""),
             surface=surface,
             commune=commune,
-            type_bien=type_bien
+            type_bien=type_bien,
+            latitude=project_data.get("latitude"),
+            longitude=project_data.get("longitude"),
+            nombre_pieces=project_data.get("nombre_pieces"),
+            rayon_km=project_data.get("rayon_km") or 1.0,
+            db=db
         )
         
         # Tendance marché
         trend = await self.dvf_service.analyze_market_trend(
             commune=commune,
-            type_bien=type_bien
+            type_bien=type_bien,
+            db=db
         )
         
         # Analyse de compétitivité
@@ -0,0 +1,787 @@
+"""
+Base DVF locale (Demandes de Valeurs Foncières) alimentée par les fichiers annuels data.gouv.fr
+Stockage en colonnes NumPy mappées en mémoire, triées par (commune, type de local, date)
+
+Ingestion en flux : les CSV sont lus par blocs et répartis par département sur disque,
+puis chaque département est trié et ajouté aux colonnes finales. La mémoire utilisée
+est bornée par la taille d'un bloc et du plus gros département, pas par celle du fichier.
+
+Recherche géographique (fichiers geo-dvf) : un arbre k-d par type de local sur les
+ventes géolocalisées, construit au premier appel pour chaque version de la base.
+
+Usage (depuis backend/) :
+    python -m app.services.dvf_store ingest valeursfoncieres-2023.txt valeursfoncieres-2024.txt
+    python -m app.services.dvf_store status
+"""
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import json
+import os
+import shutil
+import threading
+import unicodedata
+import numpy as np
+
+from app.core.config import settings
+from app.core.lazy import lazy_import
+
+pd = lazy_import("pandas")
+spatial = lazy_import("scipy.spatial")
+
+
+# Libellés DVF de type_local (code = position)
+DVF_TYPES = ("Maison", "Appartement", "Dépendance", "Local industriel. commercial ou assimilé")
+
+_TYPE_PREFIXES = {"mais": 0, "appa": 1, "depe": 2, "loca": 3}
+
+# Colonnes stockées : nom -> dtype (coordonnées en float32, précision ~0,1 m)
+COLUMNS = {
+    "commune": "S5",
+    "type_local": "u1",
+    "date": "i4",  # Jours depuis le 1970-01-01
+    "valeur_fonciere": "f8",
+    "surface_reelle_bati": "f8",
+    "nombre_pieces_principales": "i2",
+    "latitude": "f4",
+    "longitude": "f4",
+}
+
+# Champ normalisé -> en-têtes possibles (fichier brut « valeursfoncieres-AAAA.txt » ou geo-dvf)
+SOURCE_FIELDS = {
+    "date_mutation": ("date_mutation", "Date mutation"),
+    "nature_mutation": ("nature_mutation", "Nature mutation"),
+    "valeur_fonciere": ("valeur_fonciere", "Valeur fonciere"),
+    "code_departement": ("code_departement", "Code departement"),
+    "code_commune": ("code_commune", "Code commune"),
+    "type_local": ("type_local", "Type local"),
+    "surface_reelle_bati": ("surface_reelle_bati", "Surface reelle bati"),
+    "nombre_pieces_principales": ("nombre_pieces_principales", "Nombre pieces principales"),
+    "numero_voie": ("adresse_numero", "No voie"),
+    "type_voie": ("Type de voie",),
+    "voie": ("adresse_nom_voie", "Voie"),
+    "latitude": ("latitude",),
+    "longitude": ("longitude",),
+}
+
+REQUIRED_FIELDS = ("date_mutation", "nature_mutation", "valeur_fonciere", "code_commune", "type_local")
+
+# Champs convertis en nombres par le lecteur CSV (virgule décimale dans les fichiers bruts)
+NUMERIC_FIELDS = ("valeur_fonciere", "surface_reelle_bati", "nombre_pieces_principales", "latitude", "longitude")
+
+# Prix au m² retenus pour les statistiques (filtre des aberrations)
+PRICE_M2_MIN = 500
+PRICE_M2_MAX = 50000
+
+_EPOCH = date(1970, 1, 1)
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Pertinence des comparables géographiques : exp(-pénalités) x 0,5^(ancienneté / demi-vie)
+SURFACE_TOLERANCE = 0.25  # |ln(surface / surface cible)| ; 0,25 ≈ ±28 % de surface -> pertinence / e
+PIECES_TOLERANCE = 1.0  # Écart en nombre de pièces principales
+HALF_LIFE_DAYS = 365  # Poids d'une vente divisé par 2 chaque année
+
+
+def type_code(type_local: str) -> Optional[int]:
+    """Code du type de local (Maison, Appartement, Dépendance, Local commercial...)"""
+    normalized = unicodedata.normalize("NFKD", type_local or "").encode("ascii", "ignore").decode().lower()
+    return _TYPE_PREFIXES.get(normalized.strip()[:4])
+
+
+def day_number(value: date) -> int:
+    """Date -> jours depuis le 1970-01-01"""
+    if isinstance(value, datetime):
+        value = value.date()
+    return (value - _EPOCH).days
+
+
+def day_date(number: int) -> date:
+    return _EPOCH + timedelta(days=int(number))
+
+
+def earth_xyz(latitude: Any, longitude: Any) -> np.ndarray:
+    """
+    Coordonnées cartésiennes géocentriques (km), une ligne par point
+
+    La distance euclidienne entre deux points est la corde, qui se confond avec la
+    distance au sol à l'échelle d'une recherche de comparables.
+    """
+    latitude = np.radians(np.asarray(latitude, dtype=float))
+    longitude = np.radians(np.asarray(longitude, dtype=float))
+    cos_latitude = np.cos(latitude)
+    return EARTH_RADIUS_KM * np.column_stack((
+        np.atleast_1d(cos_latitude * np.cos(longitude)),
+        np.atleast_1d(cos_latitude * np.sin(longitude)),
+        np.atleast_1d(np.sin(latitude)),
+    ))
+
+
+def _chord_km(distance_km: float) -> float:
+    return 2 * EARTH_RADIUS_KM * np.sin(distance_km / (2 * EARTH_RADIUS_KM))
+
+
+def _ground_km(chord_km: np.ndarray) -> np.ndarray:
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord_km / (2 * EARTH_RADIUS_KM), 1.0))
+
+
+def price_quantiles(prices: np.ndarray) -> Dict[str, float]:
+    """Médiane, moyenne, 1er et 3e quartiles (rang n//2, n//4, 3n//4 comme l'analyse par API)"""
+    ordered = np.sort(prices)
+    n = ordered.size
+    return {
+        "count": int(n),
+        "median": float(ordered[n // 2]),
+        "mean": float(ordered.mean()),
+        "p25": float(ordered[n // 4]),
+        "p75": float(ordered[3 * n // 4]),
+    }
+
+
+def _read_header(path: str) -> Tuple[str, List[str]]:
+    with open(path, encoding="utf-8-sig") as f:
+        header = f.readline().rstrip("\r\n")
+    separator = "|" if header.count("|") > header.count(",") else ","
+    return separator, header.split(separator)
+
+
+def _parse_chunk(frame: Any) -> Optional[Dict[str, Any]]:
+    """
+    Bloc CSV -> colonnes typées des ventes exploitables
+
+    Les colonnes numériques sont déjà converties par le lecteur CSV. Dates et types de local
+    ne prennent que quelques centaines de valeurs distinctes : elles sont converties une fois
+    par valeur (factorize) plutôt qu'une fois par ligne.
+
+    Garde les lignes « Vente » avec un type de local connu, une date et une valeur.
+    """
+    frame = frame[frame["nature_mutation"] == "Vente"]
+
+    codes, labels = pd.factorize(frame["type_local"])
+    label_types = np.array([type_code(label) for label in labels] + [None], dtype=float)
+    types = label_types[codes]  # code -1 (valeur absente) -> dernier élément, None
+
+    codes, labels = pd.factorize(frame["date_mutation"])
+    dayfirst = any("/" in label for label in labels[:10])
+    label_days = pd.to_datetime(
+        pd.Series(labels), format="%d/%m/%Y" if dayfirst else "%Y-%m-%d", errors="coerce"
+    )
+    label_days = np.append(((label_days - pd.Timestamp(_EPOCH)).dt.days).to_numpy(dtype=float), np.nan)
+    days = label_days[codes]
+
+    code = frame["code_commune"]
+    if "code_departement" in frame:
+        # Fichier brut : « 75 » + « 56 » -> 75056, « 2A » + « 4 » -> 2A004, « 971 » + « 101 » -> 97101
+        departement = frame["code_departement"].str.zfill(2).str[:2]
+        code = code.where(code.str.len() >= 5, departement + code.str.zfill(3))
+    communes = code.to_numpy(dtype="U6")
+    valeur = frame["valeur_fonciere"].to_numpy(dtype=float)
+
+    keep = ~np.isnan(types) & ~np.isnan(days) & (valeur > 0) & (np.char.str_len(communes) == 5)
+    if not keep.any():
+        return None
+    kept = frame[keep]
+
+    address = pd.Series("", index=kept.index)
+    for field in ("numero_voie", "type_voie", "voie"):
+        if field in kept:
+            address = address + " " + kept[field]
+    address = address.str.split().str.join(" ")
+
+    def number(field: str, dtype: str, missing: float = np.nan) -> np.ndarray:
+        if field not in kept:
+            return np.full(len(kept), missing, dtype=dtype)
+        return kept[field].fillna(missing).to_numpy(dtype=dtype)
+
+    return {
+        "commune": communes[keep].astype("S5"),
+        "type_local": types[keep].astype("u1"),
+        "date": days[keep].astype("i4"),
+        "valeur_fonciere": valeur[keep],
+        "surface_reelle_bati": number("surface_reelle_bati", "f8"),
+        "nombre_pieces_principales": number("nombre_pieces_principales", "i2", -1),
+        "latitude": number("latitude", "f4"),
+        "longitude": number("longitude", "f4"),
+        "adresse": address.tolist(),
+    }
+
+
+class DVFStore:
+    """
+    Transactions DVF locales
+
+    Répertoire :
+        CURRENT            identifiant de la version active (remplacé atomiquement)
+        builds/<id>/       colonnes <nom>.bin, adresses (adresse.bin + adresse_offsets.bin),
+                           index des clés (commune, type) -> lignes, meta.json
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._build: Optional[str] = None
+        self._meta: Dict[str, Any] = {}
+        self._columns: Dict[str, np.ndarray] = {}
+        self._keys: Dict[Tuple[bytes, int], Tuple[int, int]] = {}
+        # Type de local -> (arbre k-d des ventes géolocalisées, lignes correspondantes)
+        self._trees: Dict[int, Tuple[Any, np.ndarray]] = {}
+
+    # === Lecture ===
+
+    def _current_build(self) -> Optional[str]:
+        path = os.path.join(self.directory, "CURRENT")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return f.read().strip() or None
+
+    def _ensure_open(self) -> bool:
+        """Ouvre (ou rouvre après ingestion) la version active ; False si la base est vide"""
+        build = self._current_build()
+        if build is None:
+            return False
+        if build == self._build:
+            return True
+
+        with self._lock:
+            if build == self._build:
+                return True
+            path = os.path.join(self.directory, "builds", build)
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+            rows = meta["rows"]
+
+            def mapped(name: str, dtype: str, count: int) -> np.ndarray:
+                if count == 0:
+                    return np.zeros(0, dtype=dtype)
+                return np.memmap(os.path.join(path, f"{name}.bin"), dtype=dtype, mode="r", shape=(count,))
+
+            columns = {name: mapped(name, dtype, rows) for name, dtype in COLUMNS.items()}
+            columns["adresse_offsets"] = mapped("adresse_offsets", "i8", rows + 1)
+            columns["adresse"] = mapped("adresse", "u1", meta["address_bytes"])
+
+            keys = np.load(os.path.join(path, "keys.npy"))
+            self._keys = {
+                (commune, int(code)): (int(start), int(end))
+                for commune, code, start, end in zip(keys["commune"], keys["type_local"], keys["start"], keys["end"])
+            }
+            self._columns = columns
+            self._meta = meta
+            self._trees = {}
+            self._build = build
+        return True
+
+    def covers(self, commune: str, type_local: str) -> bool:
+        """Des ventes sont-elles stockées pour cette commune et ce type de local ?"""
+        code = type_code(type_local)
+        return code is not None and self._ensure_open() and (commune.encode(), code) in self._keys
+
+    @property
+    def last_date(self) -> Optional[date]:
+        """Date de la mutation la plus récente"""
+        if not self._ensure_open() or self._meta["rows"] == 0:
+            return None
+        return date.fromisoformat(self._meta["date_max"])
+
+    def reference_date(self) -> date:
+        """
+        Date d'ancrage des fenêtres « N derniers mois »
+
+        Les fichiers DVF sont publiés avec plusieurs mois de retard : les fenêtres partent
+        de la dernière mutation connue plutôt que d'aujourd'hui.
+        """
+        last = self.last_date
+        today = date.today()
+        return min(today, last) if last else today
+
+    def window(self, months_back: int, months_end: int = 0) -> Tuple[date, date]:
+        """
+        Période [référence - months_back, référence - months_end] (mois de 30 jours)
+
+        Avec months_end > 0, la veille de la borne de fin : window(24, 12) et window(12)
+        sont contiguës sans jour commun.
+        """
+        reference = self.reference_date()
+        end = reference - timedelta(days=months_end * 30 + (1 if months_end else 0))
+        return reference - timedelta(days=months_back * 30), end
+
+    def _rows(self, commune: str, type_local: str, date_min: Optional[date], date_max: Optional[date]) -> slice:
+        code = type_code(type_local)
+        if code is None or not self._ensure_open():
+            return slice(0, 0)
+        bounds = self._keys.get((commune.encode(), code))
+        if bounds is None:
+            return slice(0, 0)
+
+        start, end = bounds
+        dates = self._columns["date"][start:end]
+        low = start + int(np.searchsorted(dates, day_number(date_min), "left")) if date_min else start
+        high = start + int(np.searchsorted(dates, day_number(date_max), "right")) if date_max else end
+        return slice(low, max(low, high))
+
+    def prices_m2(
+        self,
+        commune: str,
+        type_local: str,
+        date_min: Optional[date] = None,
+        date_max: Optional[date] = None
+    ) -> np.ndarray:
+        """Prix au m² des ventes de la période (aberrations filtrées)"""
+        rows = self._rows(commune, type_local, date_min, date_max)
+        surface = self._columns["surface_reelle_bati"][rows] if rows.stop > rows.start else np.zeros(0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            prices = self._columns["valeur_fonciere"][rows] / surface if surface.size else np.zeros(0)
+        return prices[(surface > 0) & (prices > PRICE_M2_MIN) & (prices < PRICE_M2_MAX)]
+
+    def price_stats(
+        self,
+        commune: str,
+        type_local: str,
+        date_min: Optional[date] = None,
+        date_max: Optional[date] = None
+    ) -> Optional[Dict[str, float]]:
+        """
+        Statistiques des prix au m² de la période
+
+        Returns:
+            {"count", "median", "mean", "p25", "p75"} ou None sans vente exploitable
+        """
+        prices = self.prices_m2(commune, type_local, date_min, date_max)
+        return price_quantiles(prices) if prices.size else None
+
+    def transactions(
+        self,
+        commune: str,
+        type_local: str,
+        date_min: Optional[date] = None,
+        date_max: Optional[date] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Ventes de la période, plus récentes d'abord (champs de l'API DVF)
+
+        Args:
+            limit: Nombre max de ventes renvoyées
+        """
+        rows = self._rows(commune, type_local, date_min, date_max)
+        if rows.stop == rows.start:
+            return []
+        # Lignes triées par date croissante : on lit la fin de la plage puis on l'inverse
+        first = rows.start if limit is None else max(rows.start, rows.stop - limit)
+        offsets = self._columns["adresse_offsets"][first:rows.stop + 1]
+        heap = bytes(self._columns["adresse"][offsets[0]:offsets[-1]])
+        bounds = (offsets - offsets[0]).tolist()
+        addresses = [heap[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(len(bounds) - 1)]
+        return self._records(np.arange(first, rows.stop)[::-1], addresses[::-1])
+
+    def _records(self, indices: np.ndarray, addresses: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Lignes -> ventes au format de l'API DVF"""
+        columns = self._columns
+        if addresses is None:
+            offsets, heap = columns["adresse_offsets"], columns["adresse"]
+            addresses = [
+                bytes(heap[start:end]).decode("utf-8")
+                for start, end in zip(offsets[indices].tolist(), offsets[indices + 1].tolist())
+            ]
+
+        def column(name: str) -> List[Any]:
+            return columns[name][indices].tolist()
+
+        return [
+            {
+                "date_mutation": day_date(day).isoformat(),
+                "nature_mutation": "Vente",
+                "code_commune": commune.decode(),
+                "type_local": DVF_TYPES[code],
+                "valeur_fonciere": valeur,
+                "surface_reelle_bati": surface if surface == surface else None,
+                "nombre_pieces_principales": piece if piece >= 0 else None,
+                "adresse": address,
+                "latitude": round(latitude, 6) if latitude == latitude else None,
+                "longitude": round(longitude, 6) if longitude == longitude else None,
+            }
+            for day, commune, code, valeur, surface, piece, address, latitude, longitude in zip(
+                column("date"), column("commune"), column("type_local"), column("valeur_fonciere"),
+                column("surface_reelle_bati"), column("nombre_pieces_principales"), addresses,
+                column("latitude"), column("longitude")
+            )
+        ]
+
+    def count(
+        self,
+        commune: str,
+        type_local: str,
+        date_min: Optional[date] = None,
+        date_max: Optional[date] = None
+    ) -> int:
+        """Nombre de ventes de la période"""
+        rows = self._rows(commune, type_local, date_min, date_max)
+        return rows.stop - rows.start
+
+    @property
+    def geocoded(self) -> bool:
+        """Des ventes géolocalisées (fichiers geo-dvf) sont-elles stockées ?"""
+        return self._ensure_open() and self._meta.get("geocoded_rows", 0) > 0
+
+    def _spatial_index(self, code: int) -> Tuple[Any, np.ndarray]:
+        """
+        Arbre k-d des ventes géolocalisées d'un type de local (construit au premier appel)
+
+        Returns:
+            (cKDTree ou None si aucune vente géolocalisée, lignes de la base)
+        """
+        trees = self._trees
+        entry = trees.get(code)
+        if entry is None:
+            with self._lock:
+                entry = trees.get(code)
+                if entry is None:
+                    latitude = self._columns["latitude"]
+                    rows = np.flatnonzero((self._columns["type_local"] == code) & ~np.isnan(latitude))
+                    tree = None
+                    if rows.size:
+                        points = earth_xyz(latitude[rows], self._columns["longitude"][rows])
+                        tree = spatial.cKDTree(points, balanced_tree=False, compact_nodes=False)
+                    entry = trees[code] = (tree, rows)
+        return entry
+
+    def warm_up(self) -> int:
+        """
+        Construit les arbres k-d de tous les types de local (tâche de fond au démarrage)
+
+        Returns:
+            Nombre de ventes géolocalisées indexées
+        """
+        if not self.geocoded:
+            return 0
+        return sum(self._spatial_index(code)[1].size for code in range(len(DVF_TYPES)))
+
+    def _in_radius(
+        self,
+        latitude: float,
+        longitude: float,
+        type_local: str,
+        rayon_km: float,
+        date_min: Optional[date],
+        date_max: Optional[date],
+        with_surface: bool = False
+    ) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """(lignes, dates, distances en km) des ventes du rayon sur la période, None si aucune"""
+        code = type_code(type_local)
+        if code is None or not self._ensure_open():
+            return None
+        tree, rows = self._spatial_index(code)
+        if tree is None:
+            return None
+
+        point = earth_xyz(latitude, longitude)[0]
+        positions = np.asarray(tree.query_ball_point(point, _chord_km(rayon_km)), dtype=np.int64)
+        indices = rows[positions]
+
+        dates = self._columns["date"][indices]
+        keep = np.ones(indices.size, dtype=bool)
+        if date_min:
+            keep &= dates >= day_number(date_min)
+        if date_max:
+            keep &= dates <= day_number(date_max)
+        if with_surface:
+            keep &= self._columns["surface_reelle_bati"][indices] > 0
+        positions, indices, dates = positions[keep], indices[keep], dates[keep]
+        if positions.size == 0:
+            return None
+
+        return indices, dates, _ground_km(np.linalg.norm(tree.data[positions] - point, axis=1))
+
+    def count_nearby(
+        self,
+        latitude: float,
+        longitude: float,
+        type_local: str,
+        rayon_km: float = 1.0,
+        date_min: Optional[date] = None,
+        date_max: Optional[date] = None
+    ) -> int:
+        """Nombre de ventes dans le rayon sur la période (sans construire les ventes)"""
+        found = self._in_radius(latitude, longitude, type_local, rayon_km, date_min, date_max)
+        return 0 if found is None else int(found[0].size)
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        type_local: str,
+        rayon_km: float = 1.0,
+        k: Optional[int] = 20,
+        surface: Optional[float] = None,
+        pieces: Optional[int] = None,
+        date_min: Optional[date] = None,
+        date_max: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Ventes les plus pertinentes dans un rayon autour d'un point
+
+        Pertinence = exp(-(distance / rayon
+                           + |ln(surface / surface cible)| / SURFACE_TOLERANCE
+                           + |pièces - pièces cible| / PIECES_TOLERANCE)) x 0,5^(ancienneté / HALF_LIFE_DAYS)
+        Sans surface ou nombre de pièces cible, le critère est ignoré ; avec une surface
+        cible, les ventes sans surface bâtie sont écartées.
+
+        Args:
+            rayon_km: Rayon de recherche
+            k: Nombre max de ventes renvoyées (None : toutes celles du rayon)
+            surface: Surface du bien évalué (m²)
+            pieces: Nombre de pièces principales du bien évalué
+
+        Returns:
+            Ventes (format de transactions()) avec "distance_km" et "pertinence",
+            par pertinence décroissante
+        """
+        found = self._in_radius(latitude, longitude, type_local, rayon_km, date_min, date_max, bool(surface))
+        if found is None:
+            return []
+        indices, dates, distances = found
+
+        penalty = distances / rayon_km
+        if surface:
+            penalty += np.abs(np.log(self._columns["surface_reelle_bati"][indices] / surface)) / SURFACE_TOLERANCE
+        if pieces is not None:
+            room_counts = self._columns["nombre_pieces_principales"][indices]
+            # Nombre de pièces inconnu : compté comme une pièce d'écart
+            penalty += np.where(room_counts >= 0, np.abs(room_counts - pieces), 1) / PIECES_TOLERANCE
+        reference = day_number(date_max or self.reference_date())
+        relevance = np.exp(-penalty) * 0.5 ** ((reference - dates) / HALF_LIFE_DAYS)
+
+        if k is not None and k < relevance.size:
+            order = np.argpartition(-relevance, k - 1)[:k]
+            order = order[np.argsort(-relevance[order], kind="stable")]
+        else:
+            order = np.argsort(-relevance, kind="stable")
+
+        records = self._records(indices[order])
+        for record, distance, score in zip(records, distances[order].tolist(), relevance[order].tolist()):
+            record["distance_km"] = round(distance, 3)
+            record["pertinence"] = round(score, 4)
+        return records
+
+    def price_blocks(self, max_rows: int = 1_000_000) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Ventes à prix au m² valide, par blocs de communes entières (ordre de la base)
+
+        Args:
+            max_rows: Taille visée d'un bloc (une commune n'est jamais coupée)
+
+        Yields:
+            {"commune", "type_local", "date", "price_m2"} triés par (commune, type, date)
+        """
+        if not self._ensure_open() or self._meta["rows"] == 0:
+            return
+        ranges = sorted((start, end, commune) for (commune, _), (start, end) in self._keys.items())
+
+        bounds, block_start, previous = [], 0, None
+        for start, end, commune in ranges:
+            if commune != previous and start - block_start >= max_rows:
+                bounds.append((block_start, start))
+                block_start = start
+            previous = commune
+        bounds.append((block_start, ranges[-1][1]))
+
+        columns = self._columns
+        for start, end in bounds:
+            surface = columns["surface_reelle_bati"][start:end]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                prices = columns["valeur_fonciere"][start:end] / surface
+            valid = (surface > 0) & (prices > PRICE_M2_MIN) & (prices < PRICE_M2_MAX)
+            yield {
+                "commune": columns["commune"][start:end][valid],
+                "type_local": columns["type_local"][start:end][valid],
+                "date": columns["date"][start:end][valid],
+                "price_m2": prices[valid],
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        """Version active, nombre de ventes, période couverte et fichiers sources"""
+        if not self._ensure_open():
+            return {"available": False, "directory": self.directory, "rows": 0}
+        return {"available": True, "directory": self.directory, "build": self._build, **self._meta}
+
+    # === Ingestion ===
+
+    def ingest(self, paths: Iterable[str], chunk_rows: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Construit une nouvelle version de la base depuis des fichiers DVF (remplace la précédente)
+
+        Les fichiers annuels sont révisés à chaque publication : la base est reconstruite
+        à partir de l'ensemble des fichiers fournis plutôt que complétée.
+
+        Args:
+            paths: Fichiers CSV (séparateur | ou ,), format brut data.gouv.fr ou geo-dvf
+            chunk_rows: Lignes lues par bloc
+
+        Returns:
+            Statistiques de la nouvelle version
+        """
+        chunk_rows = chunk_rows or settings.DVF_INGEST_CHUNK_ROWS
+        paths = list(paths)
+        build = datetime.now().strftime("%Y%m%d%H%M%S%f")
+        build_dir = os.path.join(self.directory, "builds", build)
+        spill_dir = os.path.join(build_dir, "spill")
+        os.makedirs(spill_dir)
+
+        read_rows = 0
+        for path in paths:
+            read_rows += self._spill_file(path, spill_dir, chunk_rows)
+
+        meta = self._merge_spills(spill_dir, build_dir)
+        shutil.rmtree(spill_dir)
+        meta.update({
+            "sources": [os.path.basename(path) for path in paths],
+            "rows_read": read_rows,
+            "built_at": datetime.now().isoformat(timespec="seconds"),
+        })
+        with open(os.path.join(build_dir, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+        # Bascule atomique, puis suppression des versions précédentes
+        pointer = os.path.join(self.directory, "CURRENT")
+        with open(pointer + ".tmp", "w") as f:
+            f.write(build)
+        os.replace(pointer + ".tmp", pointer)
+        for previous in os.listdir(os.path.join(self.directory, "builds")):
+            if previous != build:
+                shutil.rmtree(os.path.join(self.directory, "builds", previous), ignore_errors=True)
+
+        self._ensure_open()
+        return self.stats()
+
+    def _spill_file(self, path: str, spill_dir: str, chunk_rows: int) -> int:
+        """Lit un fichier par blocs et ajoute chaque vente au fichier de son département"""
+        separator, header = _read_header(path)
+        usecols, renames = [], {}
+        for field, aliases in SOURCE_FIELDS.items():
+            column = next((alias for alias in aliases if alias in header), None)
+            if column is not None:
+                usecols.append(column)
+                renames[column] = field
+        missing = [field for field in REQUIRED_FIELDS if field not in renames.values()]
+        if missing:
+            raise ValueError(f"{os.path.basename(path)}: colonnes DVF manquantes ({', '.join(missing)})")
+
+        read_rows = 0
+        dtypes = {column: "float64" if field in NUMERIC_FIELDS else str for column, field in renames.items()}
+        reader = pd.read_csv(
+            path, sep=separator, usecols=usecols, dtype=dtypes, keep_default_na=False, na_values={
+                column: [""] for column, field in renames.items() if field in NUMERIC_FIELDS
+            },
+            decimal="," if separator == "|" else ".", chunksize=chunk_rows, encoding="utf-8-sig",
+        )
+        for frame in reader:
+            read_rows += len(frame)
+            parsed = _parse_chunk(frame.rename(columns=renames))
+            if parsed is None:
+                continue
+
+            communes = parsed["commune"]
+            departements = np.where(
+                np.char.startswith(communes, b"97"), communes.astype("S3"), communes.astype("S2")
+            )
+            # Regroupement du bloc par département (tri stable : ordre des lignes conservé)
+            order = np.argsort(departements, kind="stable")
+            groups, starts = np.unique(departements[order], return_index=True)
+            ends = np.append(starts[1:], order.size)
+            columns = {name: parsed[name][order] for name in COLUMNS}
+            addresses = [parsed["adresse"][i] for i in order.tolist()]
+
+            for departement, start, end in zip(groups, starts.tolist(), ends.tolist()):
+                target = os.path.join(spill_dir, departement.decode())
+                os.makedirs(target, exist_ok=True)
+                for name, dtype in COLUMNS.items():
+                    with open(os.path.join(target, f"{name}.bin"), "ab") as f:
+                        columns[name][start:end].astype(dtype).tofile(f)
+                with open(os.path.join(target, "adresse.txt"), "a", encoding="utf-8") as f:
+                    f.write("".join(address + "\n" for address in addresses[start:end]))
+        return read_rows
+
+    def _merge_spills(self, spill_dir: str, build_dir: str) -> Dict[str, Any]:
+        """Trie chaque département et l'ajoute aux colonnes finales ; construit l'index des clés"""
+        outputs = {name: open(os.path.join(build_dir, f"{name}.bin"), "wb") for name in COLUMNS}
+        address_file = open(os.path.join(build_dir, "adresse.bin"), "wb")
+        offsets_file = open(os.path.join(build_dir, "adresse_offsets.bin"), "wb")
+        np.zeros(1, dtype="i8").tofile(offsets_file)
+
+        keys, rows, address_bytes, geocoded_rows = [], 0, 0, 0
+        date_min, date_max = None, None
+        try:
+            for departement in sorted(os.listdir(spill_dir)):
+                source = os.path.join(spill_dir, departement)
+                columns = {
+                    name: np.fromfile(os.path.join(source, f"{name}.bin"), dtype=dtype)
+                    for name, dtype in COLUMNS.items()
+                }
+                with open(os.path.join(source, "adresse.txt"), encoding="utf-8") as f:
+                    addresses = f.read().split("\n")[:-1]
+
+                order = np.lexsort((columns["date"], columns["type_local"], columns["commune"]))
+                for name, output in outputs.items():
+                    columns[name][order].tofile(output)
+
+                encoded = [addresses[i].encode("utf-8") for i in order.tolist()]
+                lengths = np.fromiter((len(chunk) for chunk in encoded), dtype="i8", count=len(encoded))
+                address_file.write(b"".join(encoded))
+                (address_bytes + np.cumsum(lengths)).tofile(offsets_file)
+                address_bytes += int(lengths.sum())
+
+                # Limites des groupes (commune, type) dans l'ordre trié
+                communes, types = columns["commune"][order], columns["type_local"][order]
+                change = np.flatnonzero((communes[1:] != communes[:-1]) | (types[1:] != types[:-1])) + 1
+                starts = np.concatenate(([0], change))
+                ends = np.concatenate((change, [order.size]))
+                keys.extend(
+                    (communes[s], types[s], rows + s, rows + e) for s, e in zip(starts.tolist(), ends.tolist())
+                )
+
+                rows += order.size
+                geocoded_rows += int(np.count_nonzero(~np.isnan(columns["latitude"])))
+                dates = columns["date"]
+                date_min = min(date_min, int(dates.min())) if date_min is not None else int(dates.min())
+                date_max = max(date_max, int(dates.max())) if date_max is not None else int(dates.max())
+        finally:
+            for output in outputs.values():
+                output.close()
+            address_file.close()
+            offsets_file.close()
+
+        np.save(
+            os.path.join(build_dir, "keys.npy"),
+            np.array(keys, dtype=[("commune", "S5"), ("type_local", "u1"), ("start", "i8"), ("end", "i8")])
+        )
+        return {
+            "rows": rows,
+            "keys": len(keys),
+            "geocoded_rows": geocoded_rows,
+            "address_bytes": address_bytes,
+            "date_min": day_date(date_min).isoformat() if date_min is not None else None,
+            "date_max": day_date(date_max).isoformat() if date_max is not None else None,
+        }
+
+
+# Instance globale
+dvf_store = DVFStore(settings.DVF_STORE_DIR)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Base DVF locale")
+    parser.add_argument("command", choices=["ingest", "status"])
+    parser.add_argument("paths", nargs="*", help="Fichiers DVF annuels (ingest)")
+    parser.add_argument("--chunk-rows", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        if not args.paths:
+            parser.error("ingest : au moins un fichier DVF")
+        print(json.dumps(dvf_store.ingest(args.paths, args.chunk_rows), indent=2))
+    else:
+        print(json.dumps(dvf_store.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,6 @@
 Service pour récupérer le taux Euribor en temps réel depuis des sources publiques.
 L'Euribor 1M est le principal taux de référence pour les prêts immobiliers en Europe.
 """
-import requests
 from datetime import datetime, timedelta
 from typing import Dict, Optional
 import logging
@@ -2,10 +2,13 @@
 Service de génération de Business Plan Excel
 """
 from typing import Dict, Any, Optional
-import xlsxwriter
 from io import BytesIO
 from datetime import datetime
 
+from app.core.lazy import lazy_import
+
+xlsxwriter = lazy_import("xlsxwriter")
+
 class ExcelService:
     
     def generate_business_plan_excel(
@@ -100,6 +103,129 @@ class ExcelService:
         
         return output.getvalue()  # Retourne bytes au lieu de BytesIO
     
+    def generate_investor_allocation_excel(
+        self,
+        allocation: Dict[str, Any],
+        fund_name: str = "Fonds"
+    ) -> bytes:
+        """
+        Exporte une allocation multi-investisseurs (InvestorAllocationService.allocate)
+        
+        Onglets : Synthèse, Investisseurs, Classes et Flux (si include_flows)
+        
+        Args:
+            allocation: Résultat de investor_allocation_service.allocate
+            fund_name: Nom du fonds (titre)
+        
+        Returns:
+            bytes du fichier Excel
+        """
+        
+        output = BytesIO()
+        workbook = xlsxwriter.Workbook(output, {'in_memory': True, 'nan_inf_to_errors': True})
+        
+        workbook.set_properties({
+            'title': 'Allocation investisseurs',
+            'subject': fund_name,
+            'author': 'REFY AI',
+            'company': 'REFY AI',
+            'created': datetime.now()
+        })
+        
+        header_format = workbook.add_format({
+            'bold': True,
+            'bg_color': '#0284c7',
+            'font_color': 'white',
+            'align': 'center',
+            'valign': 'vcenter',
+            'border': 1
+        })
+        title_format = workbook.add_format({
+            'bold': True,
+            'font_size': 14,
+            'bg_color': '#e0f2fe',
+            'border': 1
+        })
+        currency_format = workbook.add_format({'num_format': '#,##0.00 €'})
+        percent_format = workbook.add_format({'num_format': '0.00%'})
+        multiple_format = workbook.add_format({'num_format': '0.00"x"'})
+        
+        # Onglet 1: Synthèse
+        worksheet = workbook.add_worksheet('Synthèse')
+        worksheet.set_column('A:A', 30)
+        worksheet.set_column('B:B', 22)
+        worksheet.merge_range(0, 0, 0, 1, 'ALLOCATION INVESTISSEURS - ' + fund_name, title_format)
+        
+        summary = [
+            ('Investisseurs', allocation['n_investors'], None),
+            ('Capital appelé', allocation['totals']['called'], currency_format),
+            ('Frais de gestion', allocation['totals']['fees'], currency_format),
+            ('Distributions du fonds', allocation['totals']['distributed'], currency_format),
+            ('Distributions nettes LP', allocation['totals']['lp_distributed'], currency_format),
+            ('Promote GP', allocation['GP']['promote'], currency_format),
+        ]
+        for row, (label, value, cell_format) in enumerate(summary, start=2):
+            worksheet.write(row, 0, label, header_format)
+            worksheet.write(row, 1, value, cell_format)
+        
+        # Onglet 2: Investisseurs (une ligne par compte de capital)
+        columns = [
+            ('Investisseur', 'id', None),
+            ('Classe', 'class', None),
+            ('Engagement', 'commitment', currency_format),
+            ('Apports', 'contributed', currency_format),
+            ('Frais', 'fees', currency_format),
+            ('Non appelé', 'unfunded', currency_format),
+            ('Distributions brutes', 'gross_distributions', currency_format),
+            ('Promote', 'promote', currency_format),
+            ('Distributions nettes', 'distributed', currency_format),
+            ('TRI', 'irr', percent_format),
+            ('Multiple', 'multiple', multiple_format),
+        ]
+        worksheet = workbook.add_worksheet('Investisseurs')
+        worksheet.set_column(0, len(columns) - 1, 18)
+        worksheet.freeze_panes(1, 1)
+        for col, (label, _, _) in enumerate(columns):
+            worksheet.write(0, col, label, header_format)
+        for row, account in enumerate(allocation['investors'], start=1):
+            for col, (_, key, cell_format) in enumerate(columns):
+                value = account.get(key)
+                if value is None:
+                    worksheet.write_blank(row, col, None)
+                else:
+                    worksheet.write(row, col, value, cell_format)
+        
+        # Onglet 3: Classes
+        worksheet = workbook.add_worksheet('Classes')
+        worksheet.set_column(0, 5, 20)
+        for col, label in enumerate(['Classe', 'Investisseurs', 'Engagement', 'Apports + frais', 'Distributions', 'Promote']):
+            worksheet.write(0, col, label, header_format)
+        for row, (name, totals) in enumerate(allocation['classes'].items(), start=1):
+            worksheet.write(row, 0, name)
+            worksheet.write(row, 1, totals['investors'])
+            worksheet.write(row, 2, totals['commitment'], currency_format)
+            worksheet.write(row, 3, totals['paid_in'], currency_format)
+            worksheet.write(row, 4, totals['distributed'], currency_format)
+            worksheet.write(row, 5, totals['promote'], currency_format)
+        
+        # Onglet 4: Flux nets (investisseurs x dates)
+        flows = allocation.get('flows')
+        if flows:
+            worksheet = workbook.add_worksheet('Flux')
+            worksheet.set_column(0, 0, 18)
+            worksheet.freeze_panes(1, 1)
+            worksheet.write(0, 0, 'Investisseur', header_format)
+            for col, flow_date in enumerate(flows['dates'], start=1):
+                worksheet.write(0, col, flow_date, header_format)
+            for row, (account, values) in enumerate(zip(allocation['investors'], flows['net']), start=1):
+                worksheet.write(row, 0, account['id'])
+                worksheet.write_row(row, 1, values, currency_format)
+        
+        workbook.close()
+        output.seek(0)
+        
+        return output.getvalue()
+    
     def _create_summary_sheet(self, workbook, project_data, financial_data, header_format, title_format):
         """Crée l'onglet de synthèse (Inputs)"""
         worksheet = workbook.add_worksheet('Inputs')
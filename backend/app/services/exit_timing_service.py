@@ -0,0 +1,178 @@
+"""
+Service de choix de la date de sortie
+Évalue une revente à chaque mois du business plan (TRI, multiple, profit) en une passe vectorisée
+"""
+from typing import Dict, Any, Optional
+import numpy as np
+
+from app.services.amortization_engine import build_loan_schedules
+from app.services.irr_solver import irr_batch
+
+
+MAX_HORIZON_MONTHS = 600
+
+EXIT_METHODS = ("exit_yield", "appreciation")
+
+
+class ExitTimingService:
+    """Service de courbe de sortie (TRI et multiple par mois de revente)"""
+
+    def exit_values(
+        self,
+        base: Dict[str, Any],
+        months: np.ndarray,
+        exit_yield: Optional[float] = None,
+        appreciation_rate: float = 0.0,
+        rent_growth: float = 0.0
+    ) -> np.ndarray:
+        """
+        Valeur de sortie pour chaque mois de revente
+
+        - exit_yield : loyer annuel au mois de sortie / taux de sortie
+        - sinon : (prix d'achat + travaux) revalorisés de appreciation_rate par an
+
+        Args:
+            base: Paramètres de calculate_full_analysis
+            months: Mois de sortie (1..H)
+            exit_yield: Taux de capitalisation à la sortie
+            appreciation_rate: Revalorisation annuelle du bien
+            rent_growth: Indexation annuelle des loyers
+
+        Returns:
+            Valeurs de sortie brutes (avant frais de vente)
+        """
+        years = months / 12
+        if exit_yield is not None:
+            if exit_yield <= 0:
+                raise ValueError("exit_yield doit être > 0")
+            annual_rent = base.get("monthly_rent", 0) * 12 * (1 + rent_growth) ** years
+            return annual_rent / exit_yield
+
+        if appreciation_rate <= -1:
+            raise ValueError("appreciation_rate doit être > -100%")
+        value = base["purchase_price"] + base["renovation_budget"]
+        return value * (1 + appreciation_rate) ** years
+
+    def calculate_exit_curve(
+        self,
+        base: Dict[str, Any],
+        horizon_months: Optional[int] = None,
+        exit_yield: Optional[float] = None,
+        appreciation_rate: float = 0.0,
+        rent_growth: float = 0.0,
+        selling_costs: float = 0.0,
+        amortization_type: str = "classic",
+        min_hold_months: int = 1,
+        deferred_months: int = 0,
+        deferred_interest_capitalized: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Courbe TRI / multiple / profit pour une revente à chaque mois
+
+        Les flux sont mensuels : apport au mois 0, puis loyers - échéances ; au mois
+        de sortie s'ajoute la valeur de sortie nette des frais et du capital restant dû
+        (tableau d'amortissement). Les H scénarios forment une matrice (H, H+1)
+        résolue en un seul appel au solveur TRI.
+
+        Args:
+            base: Paramètres de calculate_full_analysis
+            horizon_months: Dernier mois de sortie testé (défaut: durée du prêt)
+            exit_yield: Taux de sortie (sinon revalorisation appreciation_rate)
+            appreciation_rate: Revalorisation annuelle du bien
+            rent_growth: Indexation annuelle des loyers
+            selling_costs: Frais de vente (% de la valeur de sortie)
+            amortization_type: Type de prêt ("classic", "in_fine", "deferred")
+            min_hold_months: Durée de détention minimale pour l'optimum
+            deferred_months: Mois de différé (pour type deferred)
+            deferred_interest_capitalized: Si True, les intérêts du différé sont capitalisés
+
+        Returns:
+            Courbe colonnaire (un tableau par indicateur) et mois optimal
+        """
+        horizon = int(horizon_months or base["loan_duration"] * 12)
+        if not 1 <= horizon <= MAX_HORIZON_MONTHS:
+            raise ValueError(f"horizon_months doit être entre 1 et {MAX_HORIZON_MONTHS}")
+        if not 1 <= min_hold_months <= horizon:
+            raise ValueError("min_hold_months doit être entre 1 et l'horizon")
+        if not 0 <= selling_costs < 1:
+            raise ValueError("selling_costs doit être entre 0 et 1 (exclu)")
+
+        total_cost = base["purchase_price"] + base["renovation_budget"] + base["notary_fees"]
+        equity = total_cost - base["loan_amount"]
+        months = np.arange(1, horizon + 1)
+
+        # Échéances et capital restant dû, complétés à 0 au-delà du terme du prêt
+        payments = np.zeros(horizon)
+        remaining_debt = np.zeros(horizon)
+        if base["loan_amount"] > 0:
+            schedule = build_loan_schedules(
+                base["loan_amount"], base["interest_rate"], base["loan_duration"], amortization_type,
+                deferred_months, deferred_interest_capitalized
+            )
+            n_loan = min(int(schedule.durations_months[0]), horizon)
+            payments[:n_loan] = schedule["payment"][0, :n_loan]
+            remaining_debt[:n_loan] = schedule["remaining_capital"][0, :n_loan]
+
+        # Flux d'exploitation mensuels
+        rent = 0.0 if base.get("project_type", "rental") != "rental" else base.get("monthly_rent", 0)
+        rents = rent * (1 + rent_growth) ** ((months - 1) // 12)
+        operating = rents - payments
+
+        exit_value = self.exit_values(base, months, exit_yield, appreciation_rate, rent_growth)
+        net_proceeds = exit_value * (1 - selling_costs) - remaining_debt
+
+        # Matrice (sortie au mois m) x (mois 0..H) : flux jusqu'à m, produit de cession en m
+        held = months[:, None] >= months[None, :]
+        flows = np.zeros((horizon, horizon + 1))
+        flows[:, 0] = -equity
+        flows[:, 1:] = np.where(held, operating[None, :], 0.0)
+        flows[np.arange(horizon), months] += net_proceeds
+
+        result = irr_batch(flows, guess=0.01)
+        with np.errstate(over="ignore", invalid="ignore"):
+            tri = (1 + result.rates) ** 12 - 1
+
+        cumulative_operating = np.cumsum(operating)
+        profit = cumulative_operating + net_proceeds - equity
+        with np.errstate(divide="ignore", invalid="ignore"):
+            equity_multiple = np.where(equity > 0, (profit + equity) / equity, np.nan)
+
+        # Optimum : TRI maximal parmi les sorties résolues au-delà de la détention minimale
+        eligible = result.converged & (months >= min_hold_months)
+        optimal = None
+        if eligible.any():
+            index = int(np.argmax(np.where(eligible, tri, -np.inf)))
+            optimal = {
+                "month": int(months[index]),
+                "years": round(months[index] / 12, 2),
+                "tri": float(tri[index]),
+                "equity_multiple": None if np.isnan(equity_multiple[index]) else float(equity_multiple[index]),
+                "profit": round(float(profit[index]), 2),
+                "exit_value": round(float(exit_value[index]), 2),
+            }
+
+        best_profit = int(np.argmax(profit))
+
+        return {
+            "horizon_months": horizon,
+            "method": "exit_yield" if exit_yield is not None else "appreciation",
+            "equity": equity,
+            "curve": {
+                "month": months.tolist(),
+                "exit_value": np.round(exit_value, 2).tolist(),
+                "remaining_debt": np.round(remaining_debt, 2).tolist(),
+                "net_proceeds": np.round(net_proceeds, 2).tolist(),
+                "profit": np.round(profit, 2).tolist(),
+                "equity_multiple": np.where(
+                    np.isnan(equity_multiple), None, np.round(equity_multiple, 4)
+                ).tolist(),
+                "tri": np.where(result.converged, tri, None).tolist(),
+                "tri_status": result.status.tolist(),
+            },
+            "optimal": optimal,
+            "max_profit_month": int(months[best_profit]),
+        }
+
+
+# Instance globale
+exit_timing_service = ExitTimingService()
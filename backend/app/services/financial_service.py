@@ -1,11 +1,19 @@
 """
 Service de calculs financiers immobiliers
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional
 from enum import Enum
 from datetime import datetime
+import json
 import numpy as np
-from scipy.optimize import newton
+
+from app.core.memoize import memoize
+from app.services.amortization_engine import build_loan_schedules, LoanScheduleArrays
+from app.services.irr_solver import irr_batch, npv_batch, xirr_batch, IRRResult
+
+
+# Formats de sortie de calculate_loan_schedule ("ndjson" : voir stream_loan_schedule)
+LOAN_SCHEDULE_FORMATS = ("rows", "columnar")
 
 
 class AmortizationType(str, Enum):
@@ -35,20 +43,109 @@ class FinancialService:
             periods: Nombre de périodes
         
         Returns:
-            TRI en pourcentage
+            TRI en pourcentage (0.0 si pas de solution, voir calculate_tri_detailed)
         """
         
-        def npv(rate):
-            """Calcule la VAN pour un taux donné"""
-            return -initial_investment + sum(
-                cf / (1 + rate) ** (i + 1) for i, cf in enumerate(cash_flows)
-            )
+        result = self.calculate_tri_detailed(initial_investment, cash_flows)
+        return result["tri"] if result["converged"] else 0.0
+    
+    def calculate_tri_detailed(
+        self,
+        initial_investment: float,
+        cash_flows: list[float]
+    ) -> Dict[str, Any]:
+        """
+        Calcule le TRI avec son statut de convergence
         
-        try:
-            tri = newton(npv, 0.1)  # On commence avec 10% comme estimation
-            return tri
-        except:
-            return 0.0
+        Args:
+            initial_investment: Investissement initial
+            cash_flows: Flux de trésorerie par période
+        
+        Returns:
+            Dict avec tri, converged, status, iterations
+        """
+        
+        return irr_batch([[-initial_investment, *cash_flows]]).to_list()[0]
+    
+    def calculate_tri_batch(
+        self,
+        cash_flows: List[List[float]],
+        guess: float = 0.1
+    ) -> IRRResult:
+        """
+        Calcule le TRI de plusieurs vecteurs de flux en une passe
+        
+        Args:
+            cash_flows: Vecteurs de flux (flux t0 en première colonne)
+            guess: Taux de référence si plusieurs racines
+        
+        Returns:
+            IRRResult (taux et statut par vecteur)
+        """
+        
+        return irr_batch(cash_flows, guess=guess)
+    
+    def calculate_xirr(
+        self,
+        dates: List[Any],
+        amounts: List[float],
+        guess: float = 0.1
+    ) -> Dict[str, Any]:
+        """
+        Calcule le TRI daté (XIRR) d'une série de flux
+        
+        Args:
+            dates: Dates des flux (date, datetime ou ISO)
+            amounts: Montants (négatifs = décaissements)
+            guess: Taux de référence si plusieurs racines
+        
+        Returns:
+            Dict avec tri (annuel), converged, status, iterations
+        """
+        
+        return xirr_batch([dates], [amounts], guess=guess).to_list()[0]
+    
+    def calculate_xirr_batch(
+        self,
+        dates: List[List[Any]],
+        amounts: List[List[float]],
+        guess: float = 0.1
+    ) -> IRRResult:
+        """
+        Calcule le XIRR de plusieurs séries datées en une passe
+        
+        Returns:
+            IRRResult (taux annuels et statut par série)
+        """
+        
+        return xirr_batch(dates, amounts, guess=guess)
+    
+    def calculate_cashflows_xirr(
+        self,
+        cashflows: List[Dict[str, Any]],
+        initial_investment: float = 0,
+        amount_key: str = "net_cashflow"
+    ) -> Dict[str, Any]:
+        """
+        XIRR des cashflows mensuels de generate_cashflows
+        
+        Args:
+            cashflows: Sortie de generate_cashflows (clés date et net_cashflow)
+            initial_investment: Apport décaissé à la date du 1er flux
+            amount_key: Clé du montant
+        
+        Returns:
+            Dict avec tri (annuel), converged, status, iterations
+        """
+        
+        if not cashflows:
+            raise ValueError("Aucun cashflow")
+        
+        dates = [flow["date"] for flow in cashflows]
+        amounts = [flow[amount_key] for flow in cashflows]
+        amounts[0] -= initial_investment
+        
+        return self.calculate_xirr(dates, amounts)
     
     def calculate_van(
         self,
@@ -68,11 +165,7 @@ class FinancialService:
             VAN
         """
         
-        van = -initial_investment
-        for i, cf in enumerate(cash_flows):
-            van += cf / ((1 + discount_rate) ** (i + 1))
-        
-        return van
+        return float(npv_batch([[-initial_investment, *cash_flows]], discount_rate)[0])
     
     def calculate_ltv(
         self,
@@ -169,6 +262,42 @@ class FinancialService:
         
         return monthly_payment
     
+    def _loan_schedule_header(
+        self,
+        arrays: LoanScheduleArrays,
+        loan_amount: float,
+        annual_rate: float,
+        years: int,
+        amortization_type: str,
+        deferred_months: int,
+        deferred_interest_capitalized: bool
+    ) -> Dict[str, Any]:
+        """En-tête et synthèse d'un tableau d'amortissement (sans les lignes)"""
+        totals = arrays.totals()
+        total_paid = float(totals["total_paid"][0])
+        total_interest = float(totals["total_interest"][0])
+        total_principal = float(totals["total_principal"][0])
+        
+        return {
+            "success": True,
+            "loan_amount": loan_amount,
+            "annual_rate": annual_rate,
+            "annual_rate_pct": f"{annual_rate * 100:.2f}%",
+            "duration_years": years,
+            "duration_months": int(arrays.durations_months[0]),
+            "amortization_type": amortization_type,
+            "deferred_months": deferred_months if amortization_type == "deferred" else 0,
+            "deferred_interest_capitalized": deferred_interest_capitalized if amortization_type == "deferred" else False,
+            "summary": {
+                "total_paid": round(total_paid, 2),
+                "total_principal": round(total_principal, 2),
+                "total_interest": round(total_interest, 2),
+                "cost_of_credit": round(total_interest, 2),
+                "cost_of_credit_pct": f"{(total_interest / loan_amount) * 100:.2f}%"
+            },
+            "total_interest": round(total_interest, 2)
+        }
+    
     def calculate_loan_schedule(
         self,
         loan_amount: float,
@@ -176,7 +305,10 @@ class FinancialService:
         years: int,
         amortization_type: str = "classic",
         deferred_months: int = 0,
-        deferred_interest_capitalized: bool = False
+        deferred_interest_capitalized: bool = False,
+        schedule_format: str = "rows",
+        cursor: Optional[int] = None,
+        limit: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Génère un tableau d'amortissement complet selon le type choisi
@@ -188,172 +320,132 @@ class FinancialService:
             amortization_type: "classic", "in_fine", "deferred"
             deferred_months: Nombre de mois de différé (pour type deferred)
             deferred_interest_capitalized: Si True, les intérêts du différé sont capitalisés
+            schedule_format: "rows" (liste de dicts) ou "columnar" (un tableau par colonne)
+            cursor: Nombre de mois déjà lus (pagination, défaut 0)
+            limit: Nombre maximal de mois retournés (défaut: tout le tableau)
         
         Returns:
             Tableau d'amortissement détaillé mois par mois
         """
         
-        monthly_rate = annual_rate / 12
-        total_months = years * 12
-        schedule = []
-        
-        if amortization_type == "classic":
-            # === AMORTISSEMENT CLASSIQUE (Mensualités constantes) ===
-            monthly_payment = self.calculate_monthly_payment(loan_amount, annual_rate, years)
-            remaining_capital = loan_amount
-            
-            for month in range(1, total_months + 1):
-                # Intérêts du mois
-                interest = remaining_capital * monthly_rate
-                
-                # Capital remboursé ce mois
-                principal = monthly_payment - interest
-                
-                # Capital restant
-                remaining_capital -= principal
-                
-                # Éviter les arrondis négatifs en fin de prêt
-                if remaining_capital < 0.01:
-                    remaining_capital = 0
-                
-                schedule.append({
-                    "month": month,
-                    "payment": round(monthly_payment, 2),
-                    "principal": round(principal, 2),
-                    "interest": round(interest, 2),
-                    "remaining_capital": round(remaining_capital, 2),
-                    "cumulative_principal": round(loan_amount - remaining_capital, 2),
-                    "cumulative_interest": round(sum(s["interest"] for s in schedule) + interest, 2)
-                })
+        if schedule_format not in LOAN_SCHEDULE_FORMATS:
+            raise ValueError(
+                f"Format inconnu: {schedule_format}. Valeurs acceptées: {', '.join(LOAN_SCHEDULE_FORMATS)}"
+            )
         
-        elif amortization_type == "in_fine":
-            # === IN-FINE (Capital remboursé en une fois à la fin) ===
-            monthly_interest = loan_amount * monthly_rate
-            
-            for month in range(1, total_months + 1):
-                is_last_month = (month == total_months)
-                
-                # Mensualité = intérêts seuls (sauf dernier mois)
-                payment = monthly_interest
-                principal = 0
-                
-                if is_last_month:
-                    # Dernier mois : remboursement du capital + intérêts
-                    principal = loan_amount
-                    payment = monthly_interest + loan_amount
-                
-                remaining_capital = 0 if is_last_month else loan_amount
-                
-                schedule.append({
-                    "month": month,
-                    "payment": round(payment, 2),
-                    "principal": round(principal, 2),
-                    "interest": round(monthly_interest, 2),
-                    "remaining_capital": round(remaining_capital, 2),
-                    "cumulative_principal": round(principal, 2),
-                    "cumulative_interest": round(monthly_interest * month, 2),
-                    "note": "Remboursement capital" if is_last_month else "Intérêts seuls"
-                })
+        arrays = build_loan_schedules(
+            loan_amounts=loan_amount,
+            annual_rates=annual_rate,
+            years=years,
+            amortization_type=amortization_type,
+            deferred_months=deferred_months,
+            deferred_interest_capitalized=deferred_interest_capitalized
+        )
+        result = self._loan_schedule_header(
+            arrays, loan_amount, annual_rate, years,
+            amortization_type, deferred_months, deferred_interest_capitalized
+        )
+        total_months = result["duration_months"]
         
-        elif amortization_type == "deferred":
-            # === DIFFÉRÉ D'AMORTISSEMENT (Pendant travaux) ===
-            if deferred_months <= 0:
-                raise ValueError("Le différé doit être > 0 mois pour type 'deferred'")
-            
-            if deferred_months >= total_months:
-                raise ValueError("Le différé ne peut pas être >= à la durée totale")
-            
-            # Phase 1 : Différé (intérêts seuls ou capitalisés)
-            deferred_interest_total = 0
-            adjusted_loan_amount = loan_amount
-            
-            for month in range(1, deferred_months + 1):
-                monthly_interest = adjusted_loan_amount * monthly_rate
-                
-                if deferred_interest_capitalized:
-                    # Intérêts capitalisés : ajoutés au capital
-                    adjusted_loan_amount += monthly_interest
-                    payment = 0
-                    note = "Différé - Intérêts capitalisés"
-                else:
-                    # Intérêts payés chaque mois
-                    payment = monthly_interest
-                    note = "Différé - Intérêts payés"
-                
-                deferred_interest_total += monthly_interest
-                
-                schedule.append({
-                    "month": month,
-                    "payment": round(payment, 2),
-                    "principal": 0,
-                    "interest": round(monthly_interest, 2),
-                    "remaining_capital": round(adjusted_loan_amount, 2),
-                    "cumulative_principal": 0,
-                    "cumulative_interest": round(deferred_interest_total, 2),
-                    "note": note,
-                    "phase": "DEFERRED"
-                })
-            
-            # Phase 2 : Amortissement normal sur le reste de la durée
-            remaining_months = total_months - deferred_months
-            monthly_payment = self.calculate_monthly_payment(
-                adjusted_loan_amount,
-                annual_rate,
-                remaining_months / 12
-            )
-            
-            remaining_capital = adjusted_loan_amount
-            
-            for month in range(deferred_months + 1, total_months + 1):
-                interest = remaining_capital * monthly_rate
-                principal = monthly_payment - interest
-                remaining_capital -= principal
-                
-                if remaining_capital < 0.01:
-                    remaining_capital = 0
-                
-                schedule.append({
-                    "month": month,
-                    "payment": round(monthly_payment, 2),
-                    "principal": round(principal, 2),
-                    "interest": round(interest, 2),
-                    "remaining_capital": round(remaining_capital, 2),
-                    "cumulative_principal": round(adjusted_loan_amount - remaining_capital, 2),
-                    "cumulative_interest": round(deferred_interest_total + sum(
-                        s["interest"] for s in schedule if s["month"] > deferred_months
-                    ) + interest, 2),
-                    "phase": "AMORTIZATION"
-                })
+        start = cursor or 0
+        if start > total_months:
+            raise ValueError(f"cursor hors limites (0 à {total_months})")
+        stop = total_months if limit is None else min(start + limit, total_months)
         
+        if schedule_format == "columnar":
+            result["schedule_format"] = "columnar"
+            result["schedule"] = arrays.to_columns(0, start, stop)
         else:
-            raise ValueError(f"Type d'amortissement invalide: {amortization_type}")
+            # Vue de compatibilité (liste de dicts mois par mois)
+            result["schedule"] = arrays.to_rows(0, start, stop)
+        
+        if cursor is not None or limit is not None:
+            result["pagination"] = {
+                "cursor": start,
+                "limit": limit,
+                "returned": stop - start,
+                "total_rows": total_months,
+                "next_cursor": stop if stop < total_months else None,
+            }
+        
+        return result
+    
+    def stream_loan_schedule(
+        self,
+        loan_amount: float,
+        annual_rate: float,
+        years: int,
+        amortization_type: str = "classic",
+        deferred_months: int = 0,
+        deferred_interest_capitalized: bool = False,
+        cursor: Optional[int] = None,
+        chunk_size: int = 120
+    ) -> Iterator[str]:
+        """
+        Tableau d'amortissement en NDJSON (une ligne JSON par mois)
         
-        # Calculs de synthèse
-        total_paid = sum(s["payment"] for s in schedule)
-        total_interest = sum(s["interest"] for s in schedule)
-        total_principal = sum(s["principal"] for s in schedule)
+        La 1ère ligne contient l'en-tête et la synthèse ; les lignes suivantes
+        sont converties par tranches de chunk_size mois.
         
-        return {
-            "success": True,
-            "loan_amount": loan_amount,
-            "annual_rate": annual_rate,
-            "annual_rate_pct": f"{annual_rate * 100:.2f}%",
-            "duration_years": years,
-            "duration_months": total_months,
-            "amortization_type": amortization_type,
-            "deferred_months": deferred_months if amortization_type == "deferred" else 0,
-            "deferred_interest_capitalized": deferred_interest_capitalized if amortization_type == "deferred" else False,
-            "summary": {
-                "total_paid": round(total_paid, 2),
-                "total_principal": round(total_principal, 2),
-                "total_interest": round(total_interest, 2),
-                "cost_of_credit": round(total_interest, 2),
-                "cost_of_credit_pct": f"{(total_interest / loan_amount) * 100:.2f}%"
-            },
-            "schedule": schedule,
-            "total_interest": round(total_interest, 2)
-        }
+        Returns:
+            Itérateur de lignes JSON terminées par un saut de ligne
+        """
+        
+        arrays = build_loan_schedules(
+            loan_amounts=loan_amount,
+            annual_rates=annual_rate,
+            years=years,
+            amortization_type=amortization_type,
+            deferred_months=deferred_months,
+            deferred_interest_capitalized=deferred_interest_capitalized
+        )
+        header = self._loan_schedule_header(
+            arrays, loan_amount, annual_rate, years,
+            amortization_type, deferred_months, deferred_interest_capitalized
+        )
+        header.pop("success")
+        
+        def lines() -> Iterator[str]:
+            yield json.dumps({"type": "header", **header}) + "\n"
+            for row in arrays.iter_rows(0, cursor or 0, chunk_size):
+                yield json.dumps(row) + "\n"
+        
+        return lines()
+    
+    def calculate_loan_schedules_batch(
+        self,
+        loan_amounts: List[float],
+        annual_rates: List[float],
+        years: List[int],
+        amortization_type: str = "classic",
+        deferred_months: List[int] = 0,
+        deferred_interest_capitalized: bool = False
+    ) -> LoanScheduleArrays:
+        """
+        Génère un lot de tableaux d'amortissement en une seule passe vectorisée
+        
+        Args:
+            loan_amounts: Montants des prêts
+            annual_rates: Taux annuels (scalaire ou un par prêt)
+            years: Durées en années (scalaire ou une par prêt)
+            amortization_type: "classic", "in_fine", "deferred"
+            deferred_months: Mois de différé (scalaire ou un par prêt)
+            deferred_interest_capitalized: Si True, les intérêts du différé sont capitalisés
+        
+        Returns:
+            LoanScheduleArrays (colonnes NumPy n_prêts x n_mois)
+        """
+        
+        return build_loan_schedules(
+            loan_amounts=loan_amounts,
+            annual_rates=annual_rates,
+            years=years,
+            amortization_type=amortization_type,
+            deferred_months=deferred_months,
+            deferred_interest_capitalized=deferred_interest_capitalized
+        )
     
+    @memoize("financial.compare_amortization_types")
     def compare_amortization_types(
         self,
         loan_amount: float,
@@ -368,58 +460,51 @@ class FinancialService:
             Comparaison des coûts et cash-flows selon chaque type
         """
         
+        if deferred_months >= years * 12:
+            raise ValueError("Le différé ne peut pas être >= à la durée totale")
+        
         results = {}
         
         # Classic
-        classic = self.calculate_loan_schedule(
-            loan_amount, annual_rate, years, "classic"
-        )
+        classic = build_loan_schedules(loan_amount, annual_rate, years, "classic")
+        classic_totals = classic.totals()
         results["classic"] = {
             "type": "Amortissement Classique",
-            "monthly_payment": classic["schedule"][0]["payment"],
-            "total_cost": classic["summary"]["total_paid"],
-            "total_interest": classic["summary"]["total_interest"]
+            "monthly_payment": round(float(classic["payment"][0, 0]), 2),
+            "total_cost": round(float(classic_totals["total_paid"][0]), 2),
+            "total_interest": round(float(classic_totals["total_interest"][0]), 2)
         }
         
         # In-Fine
-        in_fine = self.calculate_loan_schedule(
-            loan_amount, annual_rate, years, "in_fine"
-        )
+        in_fine = build_loan_schedules(loan_amount, annual_rate, years, "in_fine")
+        in_fine_totals = in_fine.totals()
+        last_month = int(in_fine.durations_months[0]) - 1
         results["in_fine"] = {
             "type": "In-Fine",
-            "monthly_payment_during": in_fine["schedule"][0]["payment"],
-            "final_payment": in_fine["schedule"][-1]["payment"],
-            "total_cost": in_fine["summary"]["total_paid"],
-            "total_interest": in_fine["summary"]["total_interest"]
+            "monthly_payment_during": round(float(in_fine["payment"][0, 0]), 2),
+            "final_payment": round(float(in_fine["payment"][0, last_month]), 2),
+            "total_cost": round(float(in_fine_totals["total_paid"][0]), 2),
+            "total_interest": round(float(in_fine_totals["total_interest"][0]), 2)
         }
         
-        # Deferred (intérêts capitalisés)
-        deferred_cap = self.calculate_loan_schedule(
-            loan_amount, annual_rate, years, "deferred",
-            deferred_months=deferred_months,
-            deferred_interest_capitalized=True
-        )
-        results["deferred_capitalized"] = {
-            "type": f"Différé {deferred_months} mois (intérêts capitalisés)",
-            "monthly_payment_deferred": 0,
-            "monthly_payment_after": deferred_cap["schedule"][deferred_months]["payment"],
-            "total_cost": deferred_cap["summary"]["total_paid"],
-            "total_interest": deferred_cap["summary"]["total_interest"]
-        }
-        
-        # Deferred (intérêts payés)
-        deferred_paid = self.calculate_loan_schedule(
-            loan_amount, annual_rate, years, "deferred",
-            deferred_months=deferred_months,
-            deferred_interest_capitalized=False
-        )
-        results["deferred_paid"] = {
-            "type": f"Différé {deferred_months} mois (intérêts payés)",
-            "monthly_payment_deferred": deferred_paid["schedule"][0]["payment"],
-            "monthly_payment_after": deferred_paid["schedule"][deferred_months]["payment"],
-            "total_cost": deferred_paid["summary"]["total_paid"],
-            "total_interest": deferred_paid["summary"]["total_interest"]
-        }
+        # Deferred : intérêts capitalisés puis payés
+        for key, capitalized, label in (
+            ("deferred_capitalized", True, "intérêts capitalisés"),
+            ("deferred_paid", False, "intérêts payés"),
+        ):
+            deferred = build_loan_schedules(
+                loan_amount, annual_rate, years, "deferred",
+                deferred_months=deferred_months,
+                deferred_interest_capitalized=capitalized
+            )
+            deferred_totals = deferred.totals()
+            results[key] = {
+                "type": f"Différé {deferred_months} mois ({label})",
+                "monthly_payment_deferred": round(float(deferred["payment"][0, 0]), 2),
+                "monthly_payment_after": round(float(deferred["payment"][0, deferred_months]), 2),
+                "total_cost": round(float(deferred_totals["total_paid"][0]), 2),
+                "total_interest": round(float(deferred_totals["total_interest"][0]), 2)
+            }
         
         # Recommandation
         cheapest = min(results.items(), key=lambda x: x[1]["total_cost"])
@@ -459,6 +544,7 @@ class FinancialService:
         
         return gain / initial_investment
     
+    @memoize("financial.calculate_full_analysis")
     def calculate_full_analysis(
         self,
         purchase_price: float,
@@ -507,7 +593,8 @@ class FinancialService:
             cash_flows = [resale_price - total_cost]
         
         # Calculs
-        tri = self.calculate_tri(equity, cash_flows, loan_duration)
+        tri_result = self.calculate_tri_detailed(equity, cash_flows)
+        tri = tri_result["tri"] if tri_result["converged"] else 0.0
         van = self.calculate_van(equity, cash_flows)
         ltv = self.calculate_ltv(loan_amount, purchase_price)
         ltc = self.calculate_ltc(loan_amount, total_cost)
@@ -529,6 +616,8 @@ class FinancialService:
             "annual_debt_service": annual_debt_service,
             "annual_rent": annual_rent,
             "tri": tri,
+            "tri_converged": tri_result["converged"],
+            "tri_status": tri_result["status"],
             "van": van,
             "ltv": ltv,
             "ltc": ltc,
@@ -542,6 +631,107 @@ class FinancialService:
             "loan_duration": loan_duration,
         }
     
+    def calculate_full_analysis_batch(
+        self,
+        purchase_price,
+        renovation_budget,
+        notary_fees,
+        loan_amount,
+        interest_rate,
+        loan_duration: int,
+        monthly_rent=0,
+        resale_price=0,
+        project_type: str = "rental"
+    ) -> Dict[str, np.ndarray]:
+        """
+        Version vectorisée de calculate_full_analysis
+        
+        Les entrées numériques sont des scalaires ou des tableaux NumPy diffusables
+        (broadcasting) ; chaque élément correspond à un scénario. La durée du prêt
+        et le type de projet sont communs à tous les scénarios.
+        
+        Returns:
+            Dictionnaire d'indicateurs, un tableau par indicateur (même forme que les entrées)
+        """
+        
+        (purchase_price, renovation_budget, notary_fees, loan_amount,
+         interest_rate, monthly_rent, resale_price) = np.broadcast_arrays(
+            *(np.asarray(value, dtype=float) for value in (
+                purchase_price, renovation_budget, notary_fees, loan_amount,
+                interest_rate, monthly_rent, resale_price
+            ))
+        )
+        shape = purchase_price.shape
+        
+        # Coûts totaux
+        total_cost = purchase_price + renovation_budget + notary_fees
+        equity = total_cost - loan_amount
+        
+        # Mensualité (annuité constante, cas taux nul inclus)
+        monthly_rate = interest_rate / 12
+        n_payments = loan_duration * 12
+        with np.errstate(divide="ignore", invalid="ignore"):
+            factor = (1 + monthly_rate) ** n_payments
+            monthly_payment = np.where(
+                monthly_rate == 0,
+                loan_amount / n_payments,
+                loan_amount * monthly_rate * factor / (factor - 1)
+            )
+        annual_debt_service = monthly_payment * 12
+        
+        # Revenus annuels (locatif)
+        annual_rent = monthly_rent * 12 if project_type == "rental" else np.zeros(shape)
+        
+        # Matrice des cash-flows (colonne 0 = apport)
+        if project_type == "rental":
+            annual_cash_flow = annual_rent - annual_debt_service
+            cash_flows = np.repeat(annual_cash_flow[..., None], loan_duration, axis=-1)
+            cash_flows[..., -1] += np.where(resale_price > 0, resale_price - loan_amount, 0.0)
+        else:
+            cash_flows = (resale_price - total_cost)[..., None]
+        
+        flat_flows = np.concatenate(
+            [-equity.reshape(-1, 1), cash_flows.reshape(-1, cash_flows.shape[-1])],
+            axis=1
+        )
+        tri_result = irr_batch(flat_flows)
+        tri_converged = tri_result.converged.reshape(shape)
+        tri = np.where(tri_converged, tri_result.rates.reshape(shape), 0.0)
+        van = npv_batch(flat_flows, 0.08).reshape(shape)
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ltv = np.where(purchase_price == 0, 0.0, loan_amount / purchase_price)
+            ltc = np.where(total_cost == 0, 0.0, loan_amount / total_cost)
+            dscr = np.where(
+                (annual_rent > 0) & (annual_debt_service != 0),
+                annual_rent / annual_debt_service,
+                0.0
+            )
+            
+            # ROI
+            if project_type == "rental":
+                total_gain = cash_flows.sum(axis=-1)
+            else:
+                total_gain = resale_price - total_cost
+            roi = np.where(equity == 0, 0.0, total_gain / equity)
+        
+        return {
+            "total_cost": total_cost,
+            "equity": equity,
+            "monthly_payment": monthly_payment,
+            "annual_debt_service": annual_debt_service,
+            "annual_rent": annual_rent,
+            "tri": tri,
+            "tri_converged": tri_converged,
+            "tri_status": tri_result.status.reshape(shape),
+            "van": van,
+            "ltv": ltv,
+            "ltc": ltc,
+            "dscr": dscr,
+            "roi": roi,
+            "cash_flows": cash_flows,
+        }
+    
     def calculate_technical_score(
         self,
         has_construction_permit: bool = True,
@@ -5,6 +5,8 @@ et calcul DSCR pour projets Core.
 from typing import Dict, Optional
 from enum import Enum
 
+from app.core.memoize import memoize
+
 
 class AmortizationType(str, Enum):
     """Types d'amortissement de prêt"""
@@ -53,6 +55,7 @@ def calculate_equity_required(purchase_price: float, ltv: float) -> float:
     return purchase_price - financing
 
 
+@memoize("financing.calculate_dscr")
 def calculate_dscr(noi: float, annual_debt_service: float) -> Dict:
     """
     Calcul du DSCR (Debt Service Coverage Ratio)
@@ -104,6 +107,7 @@ def calculate_dscr(noi: float, annual_debt_service: float) -> Dict:
     }
 
 
+@memoize("financing.calculate_annual_debt_service")
 def calculate_annual_debt_service(
     loan_amount: float,
     annual_interest_rate: float,
@@ -167,6 +171,7 @@ def calculate_annual_debt_service(
     }
 
 
+@memoize("financing.get_recommended_ltv")
 def get_recommended_ltv(strategy: StrategyType, asset_quality: str = "standard") -> Dict:
     """
     Recommandation LTV selon stratégie et qualité de l'actif
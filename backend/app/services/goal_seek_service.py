@@ -0,0 +1,286 @@
+"""
+Service de recherche d'objectif (goal-seek)
+Prix d'achat maximal, loyer minimal... pour atteindre des cibles de TRI / VAN / DSCR / LTV
+"""
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+
+from app.services.financial_service import financial_service
+
+
+# Variable résolue -> objectif par défaut
+SOLVABLE_VARIABLES = {
+    "purchase_price": "max",
+    "loan_amount": "max",
+    "monthly_rent": "min",
+    "resale_price": "min",
+}
+
+# Indicateurs contraignables ("tri_min", "dscr_min", "ltv_max", ...)
+CONSTRAINT_METRICS = ("tri", "van", "dscr", "ltv", "ltc", "roi")
+
+# Borne haute de recherche par défaut = multiple de la valeur de base
+DEFAULT_SEARCH_MULTIPLIER = 5.0
+
+MAX_ITERATIONS = 200
+
+
+def parse_constraints(constraints: Dict[str, float]) -> List[Tuple[str, str, float]]:
+    """
+    Convertit {"tri_min": 0.12, "ltv_max": 0.8} en [(metric, sens, cible)]
+
+    Raises:
+        ValueError: Contrainte inconnue ou vide
+    """
+    if not constraints:
+        raise ValueError("Au moins une contrainte est requise (ex: tri_min, dscr_min, ltv_max)")
+
+    parsed = []
+    for key, target in constraints.items():
+        metric, _, sense = key.rpartition("_")
+        if metric not in CONSTRAINT_METRICS or sense not in ("min", "max"):
+            raise ValueError(
+                f"Contrainte inconnue: {key}. Format attendu: <indicateur>_min ou <indicateur>_max "
+                f"avec indicateur parmi {', '.join(CONSTRAINT_METRICS)}"
+            )
+        parsed.append((metric, sense, float(target)))
+    return parsed
+
+
+class GoalSeekService:
+    """Service de résolution inverse sur le modèle financier"""
+
+    def _metrics(
+        self,
+        params: Dict[str, np.ndarray],
+        loan_duration: int,
+        project_type: str
+    ) -> Dict[str, np.ndarray]:
+        """
+        Évalue le modèle en rendant les indicateurs monotones aux bornes
+
+        Un TRI sans solution vaut -inf/+inf selon le signe des flux ; LTV/LTC
+        valent +inf pour un dénominateur nul (au lieu de 0).
+        """
+        results = financial_service.calculate_full_analysis_batch(
+            **params, loan_duration=loan_duration, project_type=project_type
+        )
+        has_loan = np.asarray(params["loan_amount"]) > 0
+        results["ltv"] = np.where((np.asarray(params["purchase_price"]) == 0) & has_loan, np.inf, results["ltv"])
+        results["ltc"] = np.where((results["total_cost"] == 0) & has_loan, np.inf, results["ltc"])
+        net = results["cash_flows"].sum(axis=-1) - results["equity"]
+        unsolved_tri = np.where(net < 0, -np.inf, np.inf)
+        results["tri"] = np.where(results["tri_converged"], results["tri"], unsolved_tri)
+        return results
+
+    def _solve_group(
+        self,
+        deals: List[Dict[str, Any]],
+        variable: str,
+        constraints: List[Tuple[str, str, float]],
+        objective: str,
+        bounds: Optional[Tuple[float, float]],
+        tolerance: float
+    ) -> List[Dict[str, Any]]:
+        """
+        Bissection vectorisée pour des affaires de même durée et type
+
+        Chaque (affaire, contrainte) est une ligne de la matrice (n_affaires, n_contraintes) ;
+        toutes les lignes avancent ensemble à chaque itération (un seul appel au modèle).
+        """
+        loan_duration = int(deals[0]["loan_duration"])
+        project_type = deals[0].get("project_type", "rental")
+        n_deals, n_constraints = len(deals), len(constraints)
+
+        params = {
+            name: np.array([float(deal.get(name, 0)) for deal in deals])[:, None]
+            for name in (
+                "purchase_price", "renovation_budget", "notary_fees", "loan_amount",
+                "interest_rate", "monthly_rent", "resale_price"
+            )
+        }
+
+        base_values = params[variable][:, 0]
+        if bounds is not None:
+            low = np.full(n_deals, float(bounds[0]))
+            high = np.full(n_deals, float(bounds[1]))
+        else:
+            low = np.zeros(n_deals)
+            high = np.maximum(base_values * DEFAULT_SEARCH_MULTIPLIER, 1.0)
+        if np.any(high <= low):
+            raise ValueError("Bornes de recherche invalides: max doit être > min")
+
+        metric_names = [metric for metric, _, _ in constraints]
+        signs = np.array([1.0 if sense == "min" else -1.0 for _, sense, _ in constraints])
+        targets = np.array([target for _, _, target in constraints])
+
+        def slack(values: np.ndarray) -> np.ndarray:
+            """Marge de chaque contrainte (>= 0 = respectée), forme (n_affaires, n_contraintes)"""
+            results = self._metrics({**params, variable: values}, loan_duration, project_type)
+            stacked = np.stack(
+                [np.broadcast_to(results[metric], values.shape)[:, j] for j, metric in enumerate(metric_names)],
+                axis=1
+            )
+            with np.errstate(invalid="ignore"):
+                margin = signs * (stacked - targets)
+            return np.where(np.isnan(margin), -np.inf, margin)
+
+        lo = np.repeat(low[:, None], n_constraints, axis=1)
+        hi = np.repeat(high[:, None], n_constraints, axis=1)
+        slack_lo = slack(lo)
+        slack_hi = slack(hi)
+        ok_lo = slack_lo >= 0
+        ok_hi = slack_hi >= 0
+
+        # Bissection sur les contraintes qui changent d'état dans l'intervalle
+        crossing = ok_lo != ok_hi
+        a, b = lo.copy(), hi.copy()
+        iterations = 0
+        while iterations < MAX_ITERATIONS and np.any(crossing & (b - a > tolerance)):
+            mid = (a + b) / 2
+            ok_mid = slack(mid) >= 0
+            same_as_lo = ok_mid == ok_lo
+            a = np.where(crossing & same_as_lo, mid, a)
+            b = np.where(crossing & ~same_as_lo, mid, b)
+            iterations += 1
+
+        # Intervalle admissible par contrainte (hypothèse : indicateur monotone en la variable)
+        feasible_low = np.where(crossing & ok_hi, b, lo)
+        feasible_high = np.where(crossing & ok_lo, a, hi)
+        never = ~ok_lo & ~ok_hi
+        feasible_low = np.where(never, np.inf, feasible_low)
+        feasible_high = np.where(never, -np.inf, feasible_high)
+
+        lower = feasible_low.max(axis=1)
+        upper = feasible_high.min(axis=1)
+        feasible = lower <= upper
+        lower = np.minimum(lower, upper)
+        # Arrondi au centime du côté admissible
+        solution = np.floor(upper * 100) / 100 if objective == "max" else np.ceil(lower * 100) / 100
+
+        # Contrainte limitante : celle dont la borne fixe la solution
+        if objective == "max":
+            binding = crossing & ok_lo & (feasible_high == upper[:, None])
+        else:
+            binding = crossing & ok_hi & (feasible_low == lower[:, None])
+
+        final = self._metrics(
+            {**params, variable: np.where(feasible, solution, base_values)[:, None]},
+            loan_duration,
+            project_type
+        )
+
+        results = []
+        for i in range(n_deals):
+            bound_details = {}
+            for j, (metric, sense, _) in enumerate(constraints):
+                key = f"{metric}_{sense}"
+                if never[i, j]:
+                    bound_details[key] = {"type": "infeasible", "value": None}
+                elif crossing[i, j]:
+                    kind = "lower" if ok_hi[i, j] else "upper"
+                    value = feasible_low[i, j] if kind == "lower" else feasible_high[i, j]
+                    bound_details[key] = {"type": kind, "value": float(value)}
+                else:
+                    bound_details[key] = {"type": "none", "value": None}
+
+            results.append({
+                "variable": variable,
+                "objective": objective,
+                "feasible": bool(feasible[i]),
+                "value": float(solution[i]) if feasible[i] else None,
+                "base_value": float(base_values[i]),
+                "binding_constraint": next(
+                    (f"{metric}_{sense}" for j, (metric, sense, _) in enumerate(constraints)
+                     if feasible[i] and binding[i, j]),
+                    None
+                ),
+                "search_range": [float(low[i]), float(high[i])],
+                "constraints": bound_details,
+                "metrics": {
+                    metric: (
+                        float(np.ravel(final[metric])[i])
+                        if feasible[i] and np.isfinite(np.ravel(final[metric])[i]) else None
+                    )
+                    for metric in CONSTRAINT_METRICS
+                },
+            })
+
+        return results
+
+    def solve_batch(
+        self,
+        deals: List[Dict[str, Any]],
+        variable: str,
+        constraints: Dict[str, float],
+        objective: Optional[str] = None,
+        bounds: Optional[Tuple[float, float]] = None,
+        tolerance: float = 1.0
+    ) -> List[Dict[str, Any]]:
+        """
+        Résout la même question sur plusieurs affaires (bissection vectorisée)
+
+        Args:
+            deals: Paramètres de calculate_full_analysis pour chaque affaire
+            variable: purchase_price, loan_amount, monthly_rent, resale_price
+            constraints: Cibles {"tri_min": 0.12, "dscr_min": 1.25, "ltv_max": 0.8}
+            objective: "max" ou "min" (défaut selon la variable)
+            bounds: Intervalle de recherche (défaut: 0 à 5x la valeur de base)
+            tolerance: Précision sur la variable (en €)
+
+        Returns:
+            Un résultat par affaire, dans l'ordre d'entrée
+        """
+        if variable not in SOLVABLE_VARIABLES:
+            raise ValueError(
+                f"Variable non résoluble: {variable}. Valeurs acceptées: {', '.join(SOLVABLE_VARIABLES)}"
+            )
+        objective = objective or SOLVABLE_VARIABLES[variable]
+        if objective not in ("max", "min"):
+            raise ValueError("objective doit être 'max' ou 'min'")
+        if tolerance <= 0:
+            raise ValueError("tolerance doit être > 0")
+        if not deals:
+            return []
+
+        parsed = parse_constraints(constraints)
+
+        # Regroupement par durée de prêt et type de projet (forme commune des flux)
+        groups: Dict[Tuple[int, str], List[int]] = {}
+        for index, deal in enumerate(deals):
+            key = (int(deal["loan_duration"]), deal.get("project_type", "rental"))
+            groups.setdefault(key, []).append(index)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(deals)
+        for indexes in groups.values():
+            solved = self._solve_group(
+                [deals[i] for i in indexes], variable, parsed, objective, bounds, tolerance
+            )
+            for index, result in zip(indexes, solved):
+                results[index] = result
+
+        return results
+
+    def solve(
+        self,
+        base: Dict[str, Any],
+        variable: str,
+        constraints: Dict[str, float],
+        objective: Optional[str] = None,
+        bounds: Optional[Tuple[float, float]] = None,
+        tolerance: float = 1.0
+    ) -> Dict[str, Any]:
+        """
+        Résout une variable pour une affaire
+
+        Exemple : prix d'achat maximal pour TRI >= 12% et DSCR >= 1.25
+            solve(base, "purchase_price", {"tri_min": 0.12, "dscr_min": 1.25})
+
+        Returns:
+            Valeur trouvée, contrainte limitante et indicateurs à la solution
+        """
+        return self.solve_batch([base], variable, constraints, objective, bounds, tolerance)[0]
+
+
+# Instance globale
+goal_seek_service = GoalSeekService()
@@ -4,9 +4,12 @@ Basé sur Euribor + marge selon profil de risque
 """
 from typing import Dict, Any
 from datetime import datetime
-import httpx
 import logging
 
+from app.core.lazy import lazy_import
+
+httpx = lazy_import("httpx")
+
 logger = logging.getLogger(__name__)
 
 class InterestRateService:
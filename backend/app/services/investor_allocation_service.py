@@ -0,0 +1,221 @@
+"""
+Service d'allocation multi-investisseurs (comptes de capital par LP)
+Appels, frais et distributions répartis en matrices investisseurs x dates, waterfall par classe
+"""
+from typing import Dict, Any, List, Optional
+import time
+import numpy as np
+
+from app.services.irr_solver import xirr_batch
+from app.services.waterfall_engine import DEFAULT_TIERS, as_event_matrices, run_waterfall
+
+
+# Termes surchargeables par classe de parts ou side letter
+TERM_KEYS = ("preferred_return", "tiers", "catch_up", "management_fee")
+
+MAX_INVESTORS = 2000
+
+
+class InvestorAllocationService:
+    """Service de comptes de capital et de waterfall par investisseur"""
+
+    def investor_terms(
+        self,
+        investor: Dict[str, Any],
+        fund_terms: Dict[str, Any],
+        classes: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Termes effectifs d'un investisseur : fonds < classe < side letter
+
+        Une classe absente de `classes` suit les termes du fonds.
+
+        Raises:
+            ValueError: Terme non surchargeable dans une side letter
+        """
+        class_name = investor.get("class")
+        side_letter = investor.get("side_letter") or {}
+        unknown = set(side_letter) - set(TERM_KEYS)
+        if unknown:
+            raise ValueError(
+                f"Investisseur {investor['id']}: termes non surchargeables {', '.join(sorted(unknown))}"
+            )
+
+        return {**fund_terms, **classes.get(class_name, {}), **side_letter}
+
+    def allocate(
+        self,
+        investors: List[Dict[str, Any]],
+        capital_calls: List[Dict[str, Any]],
+        distributions: List[Dict[str, Any]],
+        preferred_return: float = 0.08,
+        tiers: Optional[List[Dict[str, Any]]] = None,
+        catch_up: Optional[Dict[str, float]] = None,
+        management_fee: float = 0.0,
+        classes: Optional[Dict[str, Dict[str, Any]]] = None,
+        include_flows: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Répartit appels et distributions du fonds entre investisseurs
+
+        1. Appels : au prorata des engagements des investisseurs entrés à la date d'appel
+        2. Frais de gestion : taux annuel x engagement x durée courue depuis l'entrée (par classe)
+        3. Distributions : au prorata des comptes de capital (apports cumulés)
+        4. Waterfall européen par investisseur, une matrice (investisseurs x dates) par jeu de termes
+
+        Args:
+            investors: [{"id": "LP1", "commitment": 5e6, "commitment_date": "2024-01-01",
+                         "class": "A", "side_letter": {"tiers": [...]}}]
+            capital_calls: Appels du fonds [{"date", "amount"}]
+            distributions: Distributions du fonds [{"date", "amount"}]
+            preferred_return, tiers, catch_up, management_fee: Termes par défaut du fonds
+            classes: Surcharges par classe {"A": {"management_fee": 0.01, "tiers": [...]}}
+            include_flows: Ajoute la matrice des flux nets (investisseurs x dates)
+
+        Returns:
+            Comptes par investisseur (apports, frais, distributions, promote, TRI, multiples),
+            totaux par classe et pour le GP
+        """
+        if not investors:
+            raise ValueError("Au moins un investisseur est requis")
+        if len(investors) > MAX_INVESTORS:
+            raise ValueError(f"Maximum {MAX_INVESTORS} investisseurs")
+        ids = [str(investor["id"]) for investor in investors]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Identifiants d'investisseurs en double")
+
+        start = time.perf_counter()
+        classes = classes or {}
+        fund_terms = {
+            "preferred_return": preferred_return,
+            "tiers": tiers or DEFAULT_TIERS,
+            "catch_up": catch_up,
+            "management_fee": management_fee,
+        }
+        terms = [self.investor_terms(investor, fund_terms, classes) for investor in investors]
+
+        # Grille de dates commune (appels, distributions, entrées des investisseurs)
+        entries = [
+            {"date": investor["commitment_date"], "amount": 0.0}
+            for investor in investors if investor.get("commitment_date")
+        ]
+        dates, _, calls, fund_distributions = as_event_matrices(capital_calls + entries, distributions)
+        calls, fund_distributions = calls.sum(axis=0), fund_distributions.sum(axis=0)
+        times = (dates - dates[0]).astype(float) / 365.0
+
+        commitments = np.array([float(investor["commitment"]) for investor in investors])
+        if np.any(commitments <= 0):
+            raise ValueError("Les engagements doivent être > 0")
+        entry_dates = np.array(
+            [str(investor.get("commitment_date") or dates[0])[:10] for investor in investors],
+            dtype="datetime64[D]"
+        )
+
+        # 1. Appels au prorata des engagements des investisseurs présents
+        eligible = entry_dates[:, None] <= dates[None, :]
+        weights = commitments[:, None] * eligible
+        present = weights.sum(axis=0)
+        if np.any((calls > 0) & (present == 0)):
+            raise ValueError("Appel de fonds avant l'entrée de tout investisseur")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            call_shares = np.where(present > 0, weights / present, 0.0)
+        contributions = call_shares * calls
+
+        # 2. Frais de gestion sur engagement, courus depuis max(date précédente, entrée)
+        fee_rates = np.array([float(term.get("management_fee") or 0.0) for term in terms])
+        previous = np.concatenate([dates[:1], dates[:-1]])
+        accrual_start = np.maximum(previous[None, :], entry_dates[:, None])
+        accrued_years = np.clip((dates[None, :] - accrual_start).astype(float), 0, None) / 365.0
+        fees = fee_rates[:, None] * commitments[:, None] * accrued_years
+
+        # 3. Distributions au prorata des comptes de capital
+        capital = np.cumsum(contributions, axis=1)
+        total_capital = capital.sum(axis=0)
+        if np.any((fund_distributions > 0) & (total_capital == 0)):
+            raise ValueError("Distribution avant tout appel de fonds")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            capital_shares = np.where(total_capital > 0, capital / total_capital, 0.0)
+        gross = capital_shares * fund_distributions
+
+        # 4. Waterfall : une passe vectorisée par jeu de termes distinct
+        promote = np.zeros_like(gross)
+        pref_balance = np.zeros_like(gross)
+        groups: Dict[str, List[int]] = {}
+        for index, term in enumerate(terms):
+            key = repr((term["preferred_return"], term["tiers"], term["catch_up"]))
+            groups.setdefault(key, []).append(index)
+
+        for indexes in groups.values():
+            term = terms[indexes[0]]
+            result = run_waterfall(
+                times, contributions[indexes], gross[indexes],
+                term["preferred_return"], term["tiers"], term["catch_up"]
+            )
+            promote[indexes] = result.promote
+            pref_balance[indexes] = result.pref_balance
+
+        net = gross - promote
+        flows = net - contributions - fees
+        rates = xirr_batch([dates] * len(investors), flows)
+
+        paid_in = contributions.sum(axis=1) + fees.sum(axis=1)
+        distributed = net.sum(axis=1)
+        irr = rates.to_list()
+
+        accounts = []
+        for i, investor in enumerate(investors):
+            accounts.append({
+                "id": ids[i],
+                "class": investor.get("class"),
+                "commitment": float(commitments[i]),
+                "contributed": float(contributions[i].sum()),
+                "fees": float(fees[i].sum()),
+                "paid_in": float(paid_in[i]),
+                "unfunded": float(commitments[i] - contributions[i].sum()),
+                "gross_distributions": float(gross[i].sum()),
+                "promote": float(promote[i].sum()),
+                "distributed": float(distributed[i]),
+                "pref_balance": float(pref_balance[i, -1]),
+                "irr": irr[i]["tri"],
+                "irr_status": irr[i]["status"],
+                "multiple": float(distributed[i] / paid_in[i]) if paid_in[i] > 0 else None,
+            })
+
+        by_class: Dict[str, Dict[str, float]] = {}
+        for account in accounts:
+            totals = by_class.setdefault(account["class"] or "default", {
+                "investors": 0, "commitment": 0.0, "paid_in": 0.0, "distributed": 0.0, "promote": 0.0,
+            })
+            totals["investors"] += 1
+            for key in ("commitment", "paid_in", "distributed", "promote"):
+                totals[key] += account[key]
+
+        result = {
+            "n_investors": len(investors),
+            "n_dates": int(dates.size),
+            "totals": {
+                "called": float(calls.sum()),
+                "fees": float(fees.sum()),
+                "distributed": float(fund_distributions.sum()),
+                "lp_distributed": float(distributed.sum()),
+            },
+            "GP": {
+                "promote": float(promote.sum()),
+                "fees": float(fees.sum()),
+            },
+            "classes": by_class,
+            "investors": accounts,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+
+        if include_flows:
+            result["flows"] = {
+                "dates": [str(d) for d in dates],
+                "net": np.round(flows, 2).tolist(),
+            }
+
+        return result
+
+
+# Instance globale
+investor_allocation_service = InvestorAllocationService()
@@ -0,0 +1,332 @@
+"""
+Solveur TRI / VAN vectorisé (NumPy)
+Calcule le TRI de milliers de vecteurs de flux en une passe, avec statut de convergence par vecteur
+"""
+from typing import Dict, Any, List, Union, Sequence
+import numpy as np
+
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+# Statuts de convergence
+STATUS_CONVERGED = "converged"
+STATUS_NO_SIGN_CHANGE = "no_sign_change"
+STATUS_MAX_ITERATIONS = "max_iterations"
+STATUS_INVALID = "invalid_input"
+
+# Grille de taux pour l'encadrement initial (taux > -100%)
+BRACKET_GRID = np.array([
+    -0.99, -0.95, -0.9, -0.8, -0.7, -0.6, -0.5, -0.4, -0.3, -0.2, -0.15, -0.1, -0.05,
+    0.0, 0.02, 0.05, 0.08, 0.1, 0.12, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5, 0.75,
+    1.0, 1.5, 2.0, 3.0, 5.0, 10.0
+])
+
+
+class IRRResult:
+    """
+    Résultat d'un calcul de TRI en lot
+
+    `rates` contient NaN pour les vecteurs sans solution (voir `status`).
+    """
+
+    def __init__(self, rates: np.ndarray, status: np.ndarray, iterations: np.ndarray):
+        self.rates = rates
+        self.status = status
+        self.iterations = iterations
+
+    def __len__(self) -> int:
+        return self.rates.shape[0]
+
+    @property
+    def converged(self) -> np.ndarray:
+        return self.status == STATUS_CONVERGED
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Vue JSON : un dict par vecteur (TRI None si non convergé)"""
+        return [
+            {
+                "tri": float(rate) if status == STATUS_CONVERGED else None,
+                "converged": bool(status == STATUS_CONVERGED),
+                "status": str(status),
+                "iterations": int(iterations),
+            }
+            for rate, status, iterations in zip(self.rates, self.status, self.iterations)
+        ]
+
+
+def as_cash_flow_matrix(cash_flows: Union[ArrayLike, Sequence[Sequence[float]]]) -> np.ndarray:
+    """
+    Convertit des flux en matrice (n_vecteurs, n_périodes), colonne 0 = t0
+
+    Les vecteurs de longueurs différentes sont complétés par des 0 en fin de
+    série (sans effet sur le TRI ni la VAN).
+    """
+    if isinstance(cash_flows, np.ndarray):
+        matrix = cash_flows.astype(float)
+    else:
+        rows = list(cash_flows)
+        if rows and np.ndim(rows[0]) == 0:
+            rows = [rows]
+        width = max((len(row) for row in rows), default=0)
+        matrix = np.zeros((len(rows), width))
+        for i, row in enumerate(rows):
+            matrix[i, :len(row)] = row
+
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    return matrix
+
+
+def discount_factors(rates: ArrayLike, n_periods: int) -> np.ndarray:
+    """
+    Matrice des facteurs d'actualisation (1 + r)^-t
+
+    Args:
+        rates: Taux (scalaire ou vecteur de taille k)
+        n_periods: Nombre de colonnes (t = 0 .. n_periods - 1)
+
+    Returns:
+        Matrice (k, n_periods)
+    """
+    rates = np.atleast_1d(np.asarray(rates, dtype=float))
+    t = np.arange(n_periods, dtype=float)
+    return (1.0 + rates[:, None]) ** -t[None, :]
+
+
+def npv_batch(cash_flows, rates: ArrayLike) -> np.ndarray:
+    """
+    VAN de chaque vecteur de flux (colonne 0 = t0, non actualisée)
+
+    Args:
+        cash_flows: Matrice (n, T) ou liste de vecteurs
+        rates: Taux unique ou un taux par vecteur
+
+    Returns:
+        Vecteur des VAN (n,)
+    """
+    matrix = as_cash_flow_matrix(cash_flows)
+    rates = np.asarray(rates, dtype=float)
+
+    if rates.ndim == 0:
+        return matrix @ discount_factors(rates, matrix.shape[1])[0]
+
+    return np.einsum("ij,ij->i", matrix, discount_factors(rates, matrix.shape[1]))
+
+
+def _npv_and_derivative(matrix: np.ndarray, rates: np.ndarray, times: np.ndarray):
+    """VAN et dérivée dVAN/dr pour un taux par ligne (temps (T,) ou (n, T))"""
+    times = np.broadcast_to(times, matrix.shape)
+    factors = (1.0 + rates[:, None]) ** -times
+    npv = np.einsum("ij,ij->i", matrix, factors)
+    derivative = -np.einsum("ij,ij->i", matrix * times, factors) / (1.0 + rates)
+    return npv, derivative
+
+
+def _grid_npv(matrix: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """VAN de chaque ligne pour chaque taux de BRACKET_GRID, forme (n, n_grille)"""
+    with np.errstate(over="ignore", invalid="ignore"):
+        if times.ndim == 1:
+            return matrix @ ((1.0 + BRACKET_GRID[:, None]) ** -times[None, :]).T
+        return np.stack(
+            [np.einsum("ij,ij->i", matrix, (1.0 + rate) ** -times) for rate in BRACKET_GRID],
+            axis=1
+        )
+
+
+def _solve_rates(
+    matrix: np.ndarray,
+    times: np.ndarray,
+    invalid: np.ndarray,
+    guess: float,
+    tol: float,
+    max_iterations: int
+) -> IRRResult:
+    """
+    Racine de VAN(r) = sum(flux * (1 + r)^-temps) pour chaque ligne
+
+    1. VAN sur une grille de taux pour trouver un intervalle avec changement
+       de signe, le plus proche de `guess`.
+    2. Itérations de Newton sur toutes les lignes actives ; un pas qui sort de
+       l'intervalle est remplacé par une bissection, ce qui garantit la convergence.
+    """
+    n_rows = matrix.shape[0]
+    rates = np.full(n_rows, np.nan)
+    status = np.full(n_rows, STATUS_NO_SIGN_CHANGE, dtype=object)
+    iterations = np.zeros(n_rows, dtype=np.int64)
+
+    if n_rows == 0:
+        return IRRResult(rates, status, iterations)
+
+    status[invalid] = STATUS_INVALID
+
+    # === ÉTAPE 1 : Encadrement sur grille ===
+    grid_npv = _grid_npv(matrix, times)
+    scale = np.maximum(np.abs(matrix).sum(axis=1), 1e-300)
+    exact = np.abs(grid_npv) <= tol * scale[:, None]
+    sign_change = np.sign(grid_npv[:, :-1]) * np.sign(grid_npv[:, 1:]) < 0
+
+    midpoints = (BRACKET_GRID[:-1] + BRACKET_GRID[1:]) / 2
+    distance = np.where(sign_change, np.abs(midpoints - guess)[None, :], np.inf)
+    exact_distance = np.where(exact, np.abs(BRACKET_GRID - guess)[None, :], np.inf)
+
+    has_bracket = np.isfinite(distance.min(axis=1)) & ~invalid
+    has_exact = np.isfinite(exact_distance.min(axis=1)) & ~invalid
+    use_exact = has_exact & (~has_bracket | (exact_distance.min(axis=1) <= distance.min(axis=1)))
+
+    rates[use_exact] = BRACKET_GRID[np.argmin(exact_distance[use_exact], axis=1)]
+    status[use_exact] = STATUS_CONVERGED
+
+    solve = has_bracket & ~use_exact
+    rows = np.flatnonzero(solve)
+    if rows.size == 0:
+        return IRRResult(rates, status, iterations)
+
+    interval = np.argmin(distance[rows], axis=1)
+    lo = BRACKET_GRID[interval]
+    hi = BRACKET_GRID[interval + 1]
+    f_lo = grid_npv[rows, interval]
+    sub = matrix[rows]
+    sub_times = times if times.ndim == 1 else times[rows]
+    sub_scale = scale[rows]
+    x = (lo + hi) / 2
+
+    # === ÉTAPE 2 : Newton + bissection (rtsafe) sur les lignes actives ===
+    active = np.ones(rows.size, dtype=bool)
+    done_iterations = np.zeros(rows.size, dtype=np.int64)
+
+    for iteration in range(1, max_iterations + 1):
+        idx = np.flatnonzero(active)
+        if idx.size == 0:
+            break
+
+        f, df = _npv_and_derivative(
+            sub[idx], x[idx], sub_times if sub_times.ndim == 1 else sub_times[idx]
+        )
+
+        # Resserrer l'intervalle autour de la racine
+        same_side = np.sign(f) == np.sign(f_lo[idx])
+        lo[idx] = np.where(same_side, x[idx], lo[idx])
+        f_lo[idx] = np.where(same_side, f, f_lo[idx])
+        hi[idx] = np.where(same_side, hi[idx], x[idx])
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton_x = x[idx] - f / df
+        bisect_x = (lo[idx] + hi[idx]) / 2
+        out_of_bracket = ~np.isfinite(newton_x) | (newton_x <= lo[idx]) | (newton_x >= hi[idx])
+        new_x = np.where(out_of_bracket, bisect_x, newton_x)
+
+        # Racine atteinte : on conserve le taux courant
+        on_root = np.abs(f) <= tol * sub_scale[idx]
+        new_x = np.where(on_root, x[idx], new_x)
+
+        step = np.abs(new_x - x[idx])
+        x[idx] = new_x
+        done_iterations[idx] = iteration
+
+        finished = on_root | (step <= tol * (1 + np.abs(new_x))) | (hi[idx] - lo[idx] <= tol)
+        active[idx[finished]] = False
+
+    rates[rows] = x
+    iterations[rows] = done_iterations
+    status[rows] = np.where(active, STATUS_MAX_ITERATIONS, STATUS_CONVERGED)
+
+    return IRRResult(rates, status, iterations)
+
+
+def irr_batch(
+    cash_flows,
+    guess: float = 0.1,
+    tol: float = 1e-10,
+    max_iterations: int = 100
+) -> IRRResult:
+    """
+    TRI vectorisé : encadrement sur grille puis Newton protégé par bissection
+
+    Args:
+        cash_flows: Matrice (n, T) ou liste de vecteurs, colonne 0 = t0
+        guess: Taux de référence pour choisir entre plusieurs racines
+        tol: Tolérance sur le taux
+        max_iterations: Nombre maximal d'itérations
+
+    Returns:
+        IRRResult (taux par période, statut et itérations par vecteur)
+    """
+    matrix = as_cash_flow_matrix(cash_flows)
+    invalid = ~np.all(np.isfinite(matrix), axis=1) | (matrix.shape[1] < 2)
+    matrix = np.where(np.isfinite(matrix), matrix, 0.0)
+    times = np.arange(matrix.shape[1], dtype=float)
+
+    return _solve_rates(matrix, times, invalid, guess, tol, max_iterations)
+
+
+def as_dated_matrices(dates, amounts):
+    """
+    Aligne des séries (dates, montants) de longueurs différentes
+
+    Les séries sont complétées par des montants nuls (masqués, sans effet sur
+    la VAN) ; les temps sont en années (jours / 365) depuis la 1ère date de la série.
+
+    Args:
+        dates: Liste de séries de dates (date, datetime, str ISO ou datetime64)
+        amounts: Liste de séries de montants (mêmes longueurs)
+
+    Returns:
+        (montants (n, T), temps (n, T), masque (n, T))
+    """
+    if len(dates) != len(amounts):
+        raise ValueError("dates et amounts doivent contenir le même nombre de séries")
+
+    width = max((len(series) for series in amounts), default=0)
+    matrix = np.zeros((len(amounts), width))
+    days = np.zeros((len(amounts), width))
+    mask = np.zeros((len(amounts), width), dtype=bool)
+
+    for i, (series_dates, series_amounts) in enumerate(zip(dates, amounts)):
+        if len(series_dates) != len(series_amounts):
+            raise ValueError(f"Série {i}: autant de dates que de montants requis")
+        if not len(series_dates):
+            continue
+        day_numbers = np.array(series_dates, dtype="datetime64[D]").astype(np.int64)
+        matrix[i, :len(series_amounts)] = series_amounts
+        days[i, :len(series_dates)] = day_numbers - day_numbers.min()
+        mask[i, :len(series_dates)] = True
+
+    return matrix, days / 365.0, mask
+
+
+def xnpv_batch(dates, amounts, rate: float) -> np.ndarray:
+    """
+    VAN datée (convention XNPV : actualisation en jours / 365)
+
+    Returns:
+        Vecteur des VAN (n,)
+    """
+    matrix, times, _ = as_dated_matrices(dates, amounts)
+    return np.einsum("ij,ij->i", matrix, (1.0 + rate) ** -times)
+
+
+def xirr_batch(
+    dates,
+    amounts,
+    guess: float = 0.1,
+    tol: float = 1e-10,
+    max_iterations: int = 100
+) -> IRRResult:
+    """
+    TRI daté (XIRR) de plusieurs séries en une passe, par remplissage et masquage
+
+    Args:
+        dates: Liste de séries de dates
+        amounts: Liste de séries de montants
+        guess: Taux annuel de référence si plusieurs racines
+        tol: Tolérance sur le taux
+        max_iterations: Nombre maximal d'itérations
+
+    Returns:
+        IRRResult (taux annuels, statut et itérations par série)
+    """
+    matrix, times, mask = as_dated_matrices(dates, amounts)
+    invalid = ~np.all(np.isfinite(matrix), axis=1) | (mask.sum(axis=1) < 2)
+    matrix = np.where(np.isfinite(matrix) & mask, matrix, 0.0)
+
+    return _solve_rates(matrix, times, invalid, guess, tol, max_iterations)
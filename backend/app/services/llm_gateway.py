@@ -0,0 +1,263 @@
+"""
+Passerelle LLM asynchrone (API compatible OpenAI)
+Appels natifs async, concurrence bornée par sémaphore, fusion des requêtes identiques
+en cours et cache persistant des réponses (SQLite, clé = empreinte prompt + modèle, TTL)
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import weakref
+
+from app.core.config import settings
+from app.core.memoize import canonical_key
+
+logger = logging.getLogger(__name__)
+
+
+Messages = List[Dict[str, str]]
+
+
+class LLMResponseCache:
+    """
+    Cache persistant des réponses LLM (fichier SQLite local)
+
+    Une entrée expirée est supprimée à la lecture ; purge_expired() nettoie le reste.
+    """
+
+    def __init__(self, path: str, ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses ("
+                "key TEXT PRIMARY KEY, model TEXT, content TEXT, created_at REAL, expires_at REAL)"
+            )
+            self._connection.commit()
+        return self._connection
+
+    def get(self, key: str) -> Optional[str]:
+        """Réponse en cache, None si absente ou expirée"""
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT content, expires_at FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] <= time.time():
+                db.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                db.commit()
+                return None
+            return row[0]
+
+    def set(self, key: str, model: str, content: str) -> None:
+        now = time.time()
+        expires_at = now + self.ttl_seconds if self.ttl_seconds is not None else None
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, model, content, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, content, now, expires_at)
+            )
+            db.commit()
+
+    def purge_expired(self) -> int:
+        """
+        Supprime les entrées expirées
+
+        Returns:
+            Nombre d'entrées supprimées
+        """
+        with self._lock:
+            db = self._db()
+            removed = db.execute(
+                "DELETE FROM llm_responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            ).rowcount
+            db.commit()
+            return removed
+
+    def clear(self) -> int:
+        with self._lock:
+            db = self._db()
+            removed = db.execute("DELETE FROM llm_responses").rowcount
+            db.commit()
+            return removed
+
+    def size(self) -> int:
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class LLMGateway:
+    """
+    Point d'accès unique aux modèles de chat
+
+    Une requête passe par : cache persistant -> requête identique déjà en cours
+    (résultat partagé) -> sémaphore -> appel async au modèle -> validation -> écriture
+    du cache. Les erreurs et les réponses refusées par la validation ne sont jamais
+    mises en cache.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Any],
+        model: str,
+        cache: Optional[LLMResponseCache] = None,
+        max_concurrency: int = 4,
+        timeout: Optional[float] = None
+    ):
+        self._client_factory = client_factory
+        self.model = model
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        # Client, sémaphore et requêtes en cours propres à chaque boucle d'événements
+        # (les connexions HTTP d'un client async ne passent pas d'une boucle à l'autre)
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple]" = weakref.WeakKeyDictionary()
+        self._stats = {"requests": 0, "cache_hits": 0, "coalesced": 0, "model_calls": 0, "errors": 0, "invalid": 0}
+
+    def _loop_state(self) -> Tuple[Any, asyncio.Semaphore, Dict[str, asyncio.Task]]:
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            state = self._loops[loop] = (self._client_factory(), asyncio.Semaphore(self.max_concurrency), {})
+        return state
+
+    @staticmethod
+    def request_key(model: str, messages: Messages, temperature: float) -> str:
+        """Empreinte SHA-256 du modèle, des messages et de la température"""
+        return canonical_key("llm.chat", {"model": model, "messages": messages, "temperature": temperature})
+
+    async def complete(
+        self,
+        messages: Messages,
+        model: Optional[str] = None,
+        temperature: float = 0.3,
+        use_cache: bool = True,
+        validate: Optional[Callable[[str], Any]] = None
+    ) -> str:
+        """
+        Réponse du modèle à une conversation
+
+        Args:
+            messages: [{"role": "system" | "user" | "assistant", "content": ...}]
+            model: Modèle (défaut : celui de la passerelle)
+            temperature: Température d'échantillonnage
+            use_cache: False pour forcer un nouvel appel (la réponse remplace l'entrée du cache)
+            validate: Contrôle du contenu (ex: json.loads), qui lève une exception si la
+                réponse est inexploitable : elle n'est alors ni mise en cache ni servie
+                depuis le cache
+
+        Returns:
+            Contenu texte de la réponse
+        """
+        model = model or self.model
+        key = self.request_key(model, messages, temperature)
+        self._stats["requests"] += 1
+
+        if use_cache and self.cache is not None:
+            content = await asyncio.to_thread(self.cache.get, key)
+            if content is not None and self._is_valid(content, validate):
+                self._stats["cache_hits"] += 1
+                return content
+
+        client, semaphore, in_flight = self._loop_state()
+        task = in_flight.get(key)
+        if task is None:
+            task = in_flight[key] = asyncio.ensure_future(
+                self._call(client, semaphore, key, model, messages, temperature, validate)
+            )
+            task.add_done_callback(lambda _: in_flight.pop(key, None))
+        else:
+            self._stats["coalesced"] += 1
+
+        # shield : l'annulation d'un appelant n'interrompt pas l'appel partagé
+        return await asyncio.shield(task)
+
+    async def _call(
+        self,
+        client: Any,
+        semaphore: asyncio.Semaphore,
+        key: str,
+        model: str,
+        messages: Messages,
+        temperature: float,
+        validate: Optional[Callable[[str], Any]] = None
+    ) -> str:
+        async with semaphore:
+            self._stats["model_calls"] += 1
+            try:
+                response = await asyncio.wait_for(
+                    client.chat.completions.create(model=model, messages=messages, temperature=temperature),
+                    timeout=self.timeout
+                )
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.warning(f"Appel LLM en échec ({model}): {e}")
+                raise
+
+        content = response.choices[0].message.content or ""
+        if validate is not None:
+            try:
+                validate(content)
+            except Exception as e:
+                self._stats["invalid"] += 1
+                logger.warning(f"Réponse LLM invalide, non mise en cache ({model}): {e}")
+                raise
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.set, key, model, content)
+        return content
+
+    @staticmethod
+    def _is_valid(content: str, validate: Optional[Callable[[str], Any]]) -> bool:
+        if validate is None:
+            return True
+        try:
+            validate(content)
+        except Exception:
+            return False
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs d'appels, taux de succès du cache et appels en cours"""
+        requests = self._stats["requests"]
+        return {
+            **self._stats,
+            "cache_hit_rate": round(self._stats["cache_hits"] / requests, 4) if requests else 0.0,
+            "in_flight": sum(len(state[2]) for state in self._loops.values()),
+            "max_concurrency": self.max_concurrency,
+            "cache_size": self.cache.size() if self.cache is not None else 0,
+        }
+
+
+def _openai_client():
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL)
+
+
+# Instance globale
+llm_gateway = LLMGateway(
+    client_factory=_openai_client,
+    model=settings.OPENAI_MODEL,
+    cache=LLMResponseCache(settings.LLM_CACHE_PATH, ttl_seconds=settings.LLM_CACHE_TTL_SECONDS),
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    timeout=settings.LLM_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,249 @@
+"""
+Service de simulation Monte Carlo sur l'analyse financière
+Tire N scénarios (loyer, revente, taux, dépassement CAPEX, vacance) et les évalue en une passe vectorisée
+"""
+from typing import Dict, Any, Optional
+import time
+import numpy as np
+
+from app.services.financial_service import financial_service
+from app.services.irr_solver import STATUS_NO_SIGN_CHANGE, npv_batch
+
+
+SUPPORTED_DISTRIBUTIONS = ("fixed", "normal", "uniform", "triangular", "lognormal")
+
+SIMULATED_VARIABLES = ("monthly_rent", "resale_price", "interest_rate", "capex_overrun", "vacancy_rate")
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+DEFAULT_THRESHOLDS = {
+    "dscr_min": 1.2,
+    "tri_min": 0.08,
+}
+
+MAX_SIMULATIONS = 100_000
+
+
+class MonteCarloService:
+    """Service de simulation Monte Carlo (TRI / VAN / DSCR / ROI)"""
+
+    def default_distributions(self, base: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Distributions par défaut centrées sur le scénario de base
+
+        - Loyer : normale ±10%
+        - Revente : normale ±15%
+        - Taux : normale ±0.5 pt
+        - Dépassement CAPEX : triangulaire 0% / 5% / 25%
+        - Vacance : uniforme 0% - 10%
+        """
+        return {
+            "monthly_rent": {
+                "distribution": "normal",
+                "mean": base.get("monthly_rent", 0),
+                "std": base.get("monthly_rent", 0) * 0.10,
+            },
+            "resale_price": {
+                "distribution": "normal",
+                "mean": base.get("resale_price", 0),
+                "std": base.get("resale_price", 0) * 0.15,
+            },
+            "interest_rate": {
+                "distribution": "normal",
+                "mean": base["interest_rate"],
+                "std": 0.005,
+            },
+            "capex_overrun": {"distribution": "triangular", "low": 0.0, "mode": 0.05, "high": 0.25},
+            "vacancy_rate": {"distribution": "uniform", "low": 0.0, "high": 0.10},
+        }
+
+    def sample(
+        self,
+        spec: Dict[str, Any],
+        n_simulations: int,
+        rng: np.random.Generator
+    ) -> np.ndarray:
+        """
+        Tire n valeurs selon une distribution
+
+        Args:
+            spec: {"distribution": "normal", "mean": ..., "std": ...}
+                  {"distribution": "uniform", "low": ..., "high": ...}
+                  {"distribution": "triangular", "low": ..., "mode": ..., "high": ...}
+                  {"distribution": "lognormal", "mean": ..., "std": ...} (moments de la loi)
+                  {"distribution": "fixed", "value": ...}
+            n_simulations: Nombre de tirages
+            rng: Générateur NumPy
+
+        Returns:
+            Tableau de n_simulations valeurs
+        """
+        distribution = spec.get("distribution", "normal")
+
+        if distribution == "fixed":
+            return np.full(n_simulations, float(spec["value"]))
+
+        if distribution == "normal":
+            return rng.normal(spec["mean"], max(spec.get("std", 0.0), 0.0), n_simulations)
+
+        if distribution == "uniform":
+            if spec["high"] < spec["low"]:
+                raise ValueError("Distribution uniforme: high doit être >= low")
+            return rng.uniform(spec["low"], spec["high"], n_simulations)
+
+        if distribution == "triangular":
+            if not spec["low"] <= spec["mode"] <= spec["high"]:
+                raise ValueError("Distribution triangulaire: low <= mode <= high requis")
+            if spec["low"] == spec["high"]:
+                return np.full(n_simulations, float(spec["low"]))
+            return rng.triangular(spec["low"], spec["mode"], spec["high"], n_simulations)
+
+        if distribution == "lognormal":
+            mean, std = spec["mean"], spec.get("std", 0.0)
+            if mean <= 0:
+                raise ValueError("Distribution lognormale: la moyenne doit être > 0")
+            sigma2 = np.log(1 + (std / mean) ** 2)
+            return rng.lognormal(np.log(mean) - sigma2 / 2, np.sqrt(sigma2), n_simulations)
+
+        raise ValueError(
+            f"Distribution inconnue: {distribution}. Valeurs acceptées: {', '.join(SUPPORTED_DISTRIBUTIONS)}"
+        )
+
+    def _summarize(self, values: np.ndarray, bins: int) -> Dict[str, Any]:
+        """Statistiques, percentiles et histogramme d'un indicateur"""
+        if values.size == 0:
+            return {"count": 0}
+
+        percentiles = np.percentile(values, PERCENTILES)
+        counts, edges = np.histogram(values, bins=bins)
+
+        return {
+            "count": int(values.size),
+            "mean": float(values.mean()),
+            "std": float(values.std()),
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, percentiles)},
+            "histogram": {
+                "bin_edges": edges.tolist(),
+                "counts": counts.tolist(),
+            },
+        }
+
+    def run_simulation(
+        self,
+        base: Dict[str, Any],
+        distributions: Optional[Dict[str, Dict[str, Any]]] = None,
+        n_simulations: int = 10_000,
+        seed: Optional[int] = None,
+        thresholds: Optional[Dict[str, float]] = None,
+        histogram_bins: int = 20
+    ) -> Dict[str, Any]:
+        """
+        Simulation Monte Carlo de calculate_full_analysis
+
+        Args:
+            base: Paramètres de calculate_full_analysis (scénario central)
+            distributions: Distributions par variable (remplacent les défauts) :
+                           monthly_rent, resale_price, interest_rate,
+                           capex_overrun (% du budget travaux), vacancy_rate (% du loyer)
+            n_simulations: Nombre de scénarios (max 100 000)
+            seed: Graine pour des résultats reproductibles
+            thresholds: Seuils {"dscr_min": 1.2, "tri_min": 0.08}
+            histogram_bins: Nombre de classes des histogrammes
+
+        Returns:
+            Percentiles, histogrammes et probabilités de franchissement de seuils
+        """
+        if not 1 <= n_simulations <= MAX_SIMULATIONS:
+            raise ValueError(f"n_simulations doit être entre 1 et {MAX_SIMULATIONS}")
+
+        unknown = set(distributions or {}) - set(SIMULATED_VARIABLES)
+        if unknown:
+            raise ValueError(
+                f"Variables non simulables: {', '.join(sorted(unknown))}. "
+                f"Valeurs acceptées: {', '.join(SIMULATED_VARIABLES)}"
+            )
+
+        start = time.perf_counter()
+        specs = {**self.default_distributions(base), **(distributions or {})}
+        thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+        rng = np.random.default_rng(seed)
+
+        # Tirages (ordre fixe pour la reproductibilité)
+        draws = {name: self.sample(specs[name], n_simulations, rng) for name in SIMULATED_VARIABLES}
+        draws["monthly_rent"] = np.maximum(draws["monthly_rent"], 0.0)
+        draws["resale_price"] = np.maximum(draws["resale_price"], 0.0)
+        draws["interest_rate"] = np.maximum(draws["interest_rate"], 0.0)
+        draws["capex_overrun"] = np.maximum(draws["capex_overrun"], -1.0)
+        draws["vacancy_rate"] = np.clip(draws["vacancy_rate"], 0.0, 1.0)
+
+        results = financial_service.calculate_full_analysis_batch(
+            purchase_price=base["purchase_price"],
+            renovation_budget=base["renovation_budget"] * (1 + draws["capex_overrun"]),
+            notary_fees=base["notary_fees"],
+            loan_amount=base["loan_amount"],
+            interest_rate=draws["interest_rate"],
+            loan_duration=base["loan_duration"],
+            monthly_rent=draws["monthly_rent"] * (1 - draws["vacancy_rate"]),
+            resale_price=draws["resale_price"],
+            project_type=base.get("project_type", "rental")
+        )
+
+        # Perte totale (aucun flux positif après l'apport) : pas de changement de signe,
+        # TRI = -100 %. Les autres scénarios non résolus sont exclus des statistiques du TRI
+        # et classés par rapport au seuil selon le signe de leur VAN au taux tri_min.
+        converged = results["tri_converged"]
+        total_loss = (results["tri_status"] == STATUS_NO_SIGN_CHANGE) & np.all(results["cash_flows"] <= 0, axis=-1)
+        resolved = converged | total_loss
+        tri = np.where(total_loss, -1.0, results["tri"])[resolved]
+        unresolved = ~resolved
+        unresolved_below_min = 0
+        if unresolved.any():
+            equity = np.broadcast_to(results["equity"], unresolved.shape)[unresolved]
+            flows = np.concatenate([-equity[:, None], results["cash_flows"][unresolved]], axis=-1)
+            unresolved_below_min = int((npv_batch(flows, thresholds["tri_min"]) < 0).sum())
+        dscr = results["dscr"]
+        has_debt = results["annual_debt_service"] > 0
+
+        probabilities = {
+            "dscr_below_min": float((dscr[has_debt] < thresholds["dscr_min"]).mean()) if has_debt.any() else 0.0,
+            # Sur l'ensemble des scénarios, non résolus compris (VAN < 0 au taux tri_min)
+            "tri_below_min": float(((tri < thresholds["tri_min"]).sum() + unresolved_below_min) / n_simulations),
+            "van_negative": float((results["van"] < 0).mean()),
+            "capital_loss": float((results["roi"] < 0).mean()),
+        }
+
+        return {
+            "n_simulations": n_simulations,
+            "seed": seed,
+            "thresholds": thresholds,
+            "distributions": specs,
+            "tri_convergence_rate": float(converged.mean()),
+            "tri_outcomes": {
+                "converged": int(converged.sum()),
+                "total_loss": int(total_loss.sum()),
+                "unresolved": int(unresolved.sum()),
+                "unresolved_below_min": unresolved_below_min,
+            },
+            "metrics": {
+                # Scénarios convergés et pertes totales (à -100 %), hors non résolus
+                "tri": self._summarize(tri, histogram_bins),
+                "van": self._summarize(results["van"], histogram_bins),
+                "dscr": self._summarize(dscr, histogram_bins),
+                "roi": self._summarize(results["roi"], histogram_bins),
+            },
+            "probabilities": probabilities,
+            "inputs": {
+                name: {
+                    f"p{p}": float(v)
+                    for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))
+                }
+                for name, values in draws.items()
+            },
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+
+
+# Instance globale
+monte_carlo_service = MonteCarloService()
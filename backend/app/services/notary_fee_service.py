@@ -6,6 +6,8 @@ from typing import Dict, Any, Optional
 from enum import Enum
 import logging
 
+from app.core.memoize import memoize
+
 logger = logging.getLogger(__name__)
 
 
@@ -38,6 +40,7 @@ class NotaryFeeService:
     # Seuils
     AGE_THRESHOLD_YEARS = 5  # Limite pour régime réduit
     
+    @memoize("notary.calculate_notary_fees")
     def calculate_notary_fees(
         self,
         purchase_price: float,
@@ -211,6 +214,7 @@ class NotaryFeeService:
             "frais_divers": 500  # Forfait
         }
     
+    @memoize("notary.compare_profiles")
     def compare_profiles(
         self,
         purchase_price: float,
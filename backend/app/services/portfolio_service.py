@@ -0,0 +1,306 @@
+"""
+Service portefeuille : flux mensuels par projet et agrégats fonds
+Les flux sont stockés dans project_cashflows (project_id, month) et agrégés par GROUP BY
+"""
+from typing import Dict, Any, List, Optional
+from datetime import date, datetime
+import logging
+import numpy as np
+from sqlalchemy import select, delete, insert, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.project import Project
+from app.models.timeline import ProjectTimeline
+from app.models.cashflow import ProjectCashflow
+from app.services.amortization_engine import build_loan_schedules
+from app.services.irr_solver import xirr_batch
+from app.services.timeline_service import DEFAULT_HOLD_YEARS, index_to_month, month_index, timeline_service
+
+logger = logging.getLogger(__name__)
+
+
+CASHFLOW_COLUMNS = ("acquisition", "capex", "revenue", "debt_drawdown", "debt_service", "sale", "net")
+
+# Durée des travaux par défaut si le projet n'a pas de timeline
+DEFAULT_CONSTRUCTION_MONTHS = 12
+
+
+class PortfolioService:
+    """Service d'agrégation des flux projet au niveau fonds"""
+
+    def build_project_cashflows(
+        self,
+        project: Project,
+        timeline: Optional[ProjectTimeline] = None
+    ) -> Dict[str, Any]:
+        """
+        Construit les flux mensuels d'un projet sur son calendrier
+
+        Sources :
+        - Échéancier de la timeline (études, permis, travaux, VEFA, loyers, revente) :
+          registre stocké s'il est à jour, sinon même calcul (hypothèses par défaut
+          sans timeline)
+        - Projet : prix et frais d'acquisition, financement
+        - Échéancier de dette : moteur d'amortissement vectorisé
+
+        Args:
+            project: Projet
+            timeline: Timeline du projet (optionnelle, hypothèses par défaut sinon)
+
+        Returns:
+            {"start": date, "months": n, "columns": {colonne: np.ndarray}}
+        """
+        if timeline is not None:
+            timeline_data, financial_data = timeline_service.schedule_data(timeline, project)
+            if not (timeline_data["project_start_date"] or timeline_data["study_phase_start"]):
+                timeline_data["project_start_date"] = project.created_at or datetime.now()
+        else:
+            timeline_data = self._default_timeline_data(project)
+            financial_data = timeline_service.financial_data(project, timeline_data)
+
+        if timeline is not None and timeline_service.is_schedule_current(
+            timeline.cashflow_schedule, timeline_data, financial_data
+        ):
+            schedule = timeline.cashflow_schedule
+        else:
+            schedule = timeline_service.generate_cashflow_schedule(timeline_data, financial_data)
+
+        start = month_index(date.fromisoformat(schedule["start"]))
+        n_months = schedule["months"]
+        acquisition_month = month_index(date.fromisoformat(schedule["project_start"])) - start
+        # Sans sortie (VEFA) : dernier mois de l'échéancier
+        exit_month = (
+            month_index(date.fromisoformat(schedule["exit"])) - start if schedule["exit"] else n_months - 1
+        )
+
+        ledger = {name: np.array(values, dtype=float) for name, values in schedule["columns"].items()}
+        columns = {name: np.zeros(n_months) for name in CASHFLOW_COLUMNS}
+        columns["capex"] = ledger["outflows"]
+        columns["revenue"] = ledger["vefa"] + ledger["rent"]
+        columns["sale"] = ledger["sale"]
+
+        columns["acquisition"][acquisition_month] = (
+            (project.acquisition_price or project.purchase_price or 0)
+            + (project.notary_fees or 0)
+            + (project.due_diligence_cost or 0)
+        )
+
+        # Dette : tirage à l'acquisition, mensualités, remboursement du capital restant à la sortie
+        loan_amount = project.financing_amount or 0
+        if loan_amount > 0:
+            loan_years = project.loan_duration or project.bp_duration or DEFAULT_HOLD_YEARS
+            loan = build_loan_schedules(loan_amount, project.interest_rate or 0, loan_years)
+            payments = loan["payment"][0]
+            remaining = loan["remaining_capital"][0]
+            columns["debt_drawdown"][acquisition_month] = loan_amount
+            paid_months = max(min(payments.size, exit_month - acquisition_month), 0)
+            first = acquisition_month + 1
+            columns["debt_service"][first:first + paid_months] += payments[:paid_months]
+            outstanding = remaining[paid_months - 1] if paid_months > 0 else loan_amount
+            columns["debt_service"][exit_month] += outstanding
+
+        columns["net"] = (
+            columns["revenue"] + columns["sale"] + columns["debt_drawdown"]
+            - columns["acquisition"] - columns["capex"] - columns["debt_service"]
+        )
+
+        return {
+            "start": index_to_month(start),
+            "months": n_months,
+            "has_timeline": timeline is not None,
+            "columns": columns,
+        }
+
+    def _default_timeline_data(self, project: Project) -> Dict[str, Any]:
+        """Projet sans timeline : travaux linéaires dès le démarrage, location à leur achèvement"""
+        start = month_index(project.created_at or datetime.now())
+        construction_end = index_to_month(start + DEFAULT_CONSTRUCTION_MONTHS)
+        return {
+            "project_start_date": index_to_month(start),
+            "construction_phase_start": index_to_month(start),
+            "construction_phase_end": construction_end,
+            "construction_budget": project.renovation_budget or 0,
+            "capex_curve_type": "linear",
+            "rental_start_date": construction_end,
+        }
+
+    def project_xirr(
+        self,
+        project: Project,
+        timeline: Optional[ProjectTimeline] = None
+    ) -> Dict[str, Any]:
+        """
+        XIRR d'un projet sur ses flux mensuels datés
+
+        Returns:
+            Dict avec tri (annuel), converged, status, iterations
+        """
+        ledger = self.build_project_cashflows(project, timeline)
+        start = month_index(ledger["start"])
+        months = [index_to_month(start + offset) for offset in range(ledger["months"])]
+
+        return xirr_batch([months], [ledger["columns"]["net"].tolist()]).to_list()[0]
+
+    def compute_fund_metrics(
+        self,
+        months: List[date],
+        net: np.ndarray,
+        as_of: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """
+        Indicateurs fonds à partir des flux nets mensuels agrégés
+
+        - TRI fonds : XIRR des flux datés (1er de chaque mois)
+        - DPI : distributions / appels à date
+        - TVPI : (distributions + flux nets futurs projetés) / appels à date
+        - Besoin d'equity max : creux du cumul des flux nets
+
+        Args:
+            months: Mois (triés) des flux agrégés
+            net: Flux nets correspondants
+            as_of: Date d'arrêté (défaut : dernier mois, projection complète)
+
+        Returns:
+            Dict d'indicateurs
+        """
+        net = np.asarray(net, dtype=float)
+        if net.size == 0:
+            return {
+                "fund_irr": None, "irr_status": "no_cashflows", "tvpi": None, "dpi": None,
+                "paid_in": 0.0, "distributed": 0.0, "residual_value": 0.0, "peak_equity": 0.0,
+            }
+
+        # Calendrier contigu
+        indexes = np.array([month_index(month) for month in months])
+        offsets = indexes - indexes.min()
+        series = np.zeros(offsets.max() + 1)
+        np.add.at(series, offsets, net)
+
+        cutoff = offsets.max() if as_of is None else month_index(as_of) - indexes.min()
+        realized = np.arange(series.size) <= cutoff
+
+        paid_in = float(-series[realized & (series < 0)].sum())
+        distributed = float(series[realized & (series > 0)].sum())
+        residual_value = float(max(series[~realized].sum(), 0.0))
+        peak_equity = float(max(-np.cumsum(series).min(), 0.0))
+
+        irr = xirr_batch([list(months)], [net.tolist()])
+        converged = bool(irr.converged[0])
+
+        return {
+            "fund_irr": float(irr.rates[0]) if converged else None,
+            "irr_status": str(irr.status[0]),
+            "tvpi": (distributed + residual_value) / paid_in if paid_in > 0 else None,
+            "dpi": distributed / paid_in if paid_in > 0 else None,
+            "paid_in": paid_in,
+            "distributed": distributed,
+            "residual_value": residual_value,
+            "peak_equity": peak_equity,
+        }
+
+    async def refresh_project_cashflows(self, db: AsyncSession, project_id: int) -> int:
+        """
+        Recalcule et remplace les lignes d'un seul projet
+
+        Args:
+            db: Session
+            project_id: ID du projet
+
+        Returns:
+            Nombre de mois écrits
+        """
+        project = (await db.execute(select(Project).where(Project.id == project_id))).scalar_one_or_none()
+        if project is None:
+            raise ValueError(f"Projet {project_id} introuvable")
+
+        timeline = (await db.execute(
+            select(ProjectTimeline).where(ProjectTimeline.project_id == project_id)
+        )).scalar_one_or_none()
+
+        ledger = self.build_project_cashflows(project, timeline)
+        start = month_index(ledger["start"])
+        columns = {name: values.tolist() for name, values in ledger["columns"].items()}
+        rows = [
+            {
+                "project_id": project_id,
+                "month": index_to_month(start + offset),
+                **{name: columns[name][offset] for name in CASHFLOW_COLUMNS},
+            }
+            for offset in range(ledger["months"])
+        ]
+
+        await db.execute(delete(ProjectCashflow).where(ProjectCashflow.project_id == project_id))
+        if rows:
+            await db.execute(insert(ProjectCashflow), rows)
+        await db.flush()
+
+        logger.info(f"Flux portefeuille recalculés pour le projet {project_id} ({len(rows)} mois)")
+        return len(rows)
+
+    async def refresh_user_projects(self, db: AsyncSession, user_id: int) -> Dict[int, int]:
+        """Recalcule les flux de tous les projets d'un utilisateur"""
+        project_ids = (await db.execute(
+            select(Project.id).where(Project.user_id == user_id)
+        )).scalars().all()
+
+        return {project_id: await self.refresh_project_cashflows(db, project_id) for project_id in project_ids}
+
+    async def aggregate_cashflows(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        project_ids: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Flux fonds mensuels : un GROUP BY month sur project_cashflows
+
+        Returns:
+            Format colonnes {"month": [...], "net": [...], ...}
+        """
+        query = (
+            select(
+                ProjectCashflow.month,
+                *(func.sum(getattr(ProjectCashflow, name)).label(name) for name in CASHFLOW_COLUMNS),
+                func.count(func.distinct(ProjectCashflow.project_id)).label("project_count"),
+            )
+            .join(Project, Project.id == ProjectCashflow.project_id)
+            .where(Project.user_id == user_id)
+            .group_by(ProjectCashflow.month)
+            .order_by(ProjectCashflow.month)
+        )
+        if project_ids:
+            query = query.where(ProjectCashflow.project_id.in_(project_ids))
+
+        rows = (await db.execute(query)).all()
+
+        series = {"month": [row.month for row in rows]}
+        for name in CASHFLOW_COLUMNS:
+            series[name] = [float(getattr(row, name) or 0) for row in rows]
+        series["project_count"] = [row.project_count for row in rows]
+        return series
+
+    async def get_portfolio_summary(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        project_ids: Optional[List[int]] = None,
+        as_of: Optional[date] = None
+    ) -> Dict[str, Any]:
+        """
+        Synthèse portefeuille : flux agrégés + TRI fonds, TVPI/DPI, besoin d'equity max
+        """
+        series = await self.aggregate_cashflows(db, user_id, project_ids)
+        metrics = self.compute_fund_metrics(series["month"], np.array(series["net"]), as_of)
+
+        return {
+            "metrics": metrics,
+            "cashflows": {
+                **series,
+                "month": [month.isoformat() for month in series["month"]],
+                "cumulative_net": np.cumsum(series["net"]).tolist(),
+            },
+        }
+
+
+# Instance globale
+portfolio_service = PortfolioService()
@@ -198,6 +198,21 @@ class PrivacyShieldService:
         shield.is_released = True
         await db.commit()
     
+    async def _index_released_projects(
+        self,
+        db: AsyncSession,
+        project_ids: List[int]
+    ) -> int:
+        """Ajoute les projets libérés à l'index local des projets CAPEX historiques"""
+        if not project_ids:
+            return 0
+        
+        from app.models.project import Project
+        from app.services.capex_index import capex_history_index, project_record
+        
+        result = await db.execute(select(Project).where(Project.id.in_(project_ids)))
+        return capex_history_index.add(project_record(project) for project in result.scalars().all())
+    
     def _anonymize_address(self, address: str) -> str:
         """Anonymise une adresse en gardant seulement la ville"""
         # Extraire la ville (simplification)
@@ -237,8 +252,13 @@ class PrivacyShieldService:
             await self._release_project_data(db, shield)
             released_count += 1
         
+        indexed_count = await self._index_released_projects(
+            db, [s.project_id for s in shields_to_release]
+        )
+        
         return {
             "released_count": released_count,
+            "indexed_count": indexed_count,
             "released_project_ids": [s.project_id for s in shields_to_release],
             "timestamp": now.isoformat(),
             "message": f"{released_count} projets libérés pour apprentissage IA"
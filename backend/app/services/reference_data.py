@@ -0,0 +1,246 @@
+"""
+Données de référence (délais administratifs, prix CAPEX, zones PLU) en mémoire
+Tables chargées dans des index immuables (ville, procédure), (poste, niveau), (ville, zone),
+rechargés sans redémarrage dès que le compteur de version d'un jeu change
+"""
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+import asyncio
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.reference import AdministrativeDelay, CapexCost, PluZone, ReferenceDataVersion
+
+logger = logging.getLogger(__name__)
+
+
+DATASETS = ("administrative_delays", "capex_costs", "plu_zones")
+
+# Ville des valeurs nationales (repli quand la ville n'a pas de donnée propre)
+DEFAULT_CITY = "default"
+
+Index = Mapping[Tuple[Any, Any], Mapping[str, Any]]
+
+
+def _frozen(record: Dict[str, Any]) -> Mapping[str, Any]:
+    return MappingProxyType(dict(record))
+
+
+def delay_record(row: AdministrativeDelay) -> Tuple[Tuple[str, str], Mapping[str, Any]]:
+    """Ligne administrative_delays -> ((ville, procédure), délais)"""
+    avg_delay = row.avg_delay_days
+    return (row.city, row.procedure_type), _frozen({
+        "procedure": row.procedure_type,
+        "avg_delay": avg_delay,
+        "min_delay": row.min_delay_days if row.min_delay_days is not None else avg_delay,
+        "max_delay": row.max_delay_days if row.max_delay_days is not None else avg_delay,
+        "complexity_factor": row.complexity_factor if row.complexity_factor is not None else 1.0,
+        "description": row.source or f"Délai moyen {row.procedure_type} ({row.city})",
+    })
+
+
+def capex_record(row: CapexCost) -> Tuple[Tuple[str, int], Mapping[str, Any]]:
+    """Ligne capex_costs -> ((poste, niveau de ville), prix unitaires)"""
+    item = f"{row.category}_{row.subcategory}" if row.subcategory else row.category
+    return (item, row.city_tier), _frozen({
+        "unit": row.unit,
+        "min": row.min_price,
+        "avg": row.avg_price,
+        "max": row.max_price,
+        "tier": row.city_tier,
+        "description": row.description,
+    })
+
+
+def plu_record(row: PluZone) -> Tuple[Tuple[str, str], Mapping[str, Any]]:
+    """Ligne plu_zones -> ((ville, zone), règles de la zone)"""
+    return (row.city, row.zone_name), _frozen({
+        "city": row.city,
+        "zone_name": row.zone_name,
+        "zone_type": row.zone_type,
+        "is_constructible": row.is_constructible,
+        "max_height": row.max_height,
+        "cos": row.cos,
+        "ces": row.ces,
+        "constraints": tuple(row.constraints or ()),
+        "permitted_uses": tuple(row.permitted_uses or ()),
+        "document_url": row.document_url,
+    })
+
+
+DATASET_SOURCES: Dict[str, Tuple[Any, Callable[[Any], Tuple[Tuple[Any, Any], Mapping[str, Any]]]]] = {
+    "administrative_delays": (AdministrativeDelay, delay_record),
+    "capex_costs": (CapexCost, capex_record),
+    "plu_zones": (PluZone, plu_record),
+}
+
+
+class ReferenceSnapshot:
+    """
+    État figé des jeux de référence
+
+    Toutes les recherches sont des accès dictionnaire ; les listes dérivées (villes,
+    procédures, postes par catégorie) sont calculées une fois à la construction.
+    Un instantané n'est jamais modifié : un rechargement en construit un nouveau.
+    """
+
+    def __init__(
+        self,
+        delays: Dict[Tuple[str, str], Mapping[str, Any]],
+        capex: Dict[Tuple[str, int], Mapping[str, Any]],
+        plu: Dict[Tuple[str, str], Mapping[str, Any]],
+        versions: Optional[Dict[str, int]] = None
+    ):
+        self.delays: Index = MappingProxyType(dict(delays))
+        self.capex: Index = MappingProxyType(dict(capex))
+        self.plu: Index = MappingProxyType(dict(plu))
+        self.versions: Mapping[str, int] = MappingProxyType(dict(versions or {}))
+
+        self.delay_cities = tuple(sorted({city for city, _ in self.delays if city != DEFAULT_CITY}))
+        self.procedures = tuple(sorted({procedure for city, procedure in self.delays if city == DEFAULT_CITY}))
+
+        self.capex_items = tuple(dict.fromkeys(item for item, _ in self.capex))
+        categories: Dict[str, List[str]] = {}
+        for item in self.capex_items:
+            categories.setdefault(item.split("_")[0], []).append(item)
+        self.capex_categories: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {category: tuple(items) for category, items in categories.items()}
+        )
+
+        zones: Dict[str, List[str]] = {}
+        for city, zone in self.plu:
+            zones.setdefault(city, []).append(zone)
+        self.plu_cities: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {city: tuple(sorted(names)) for city, names in zones.items()}
+        )
+
+    def delay(self, city: str, procedure: str) -> Optional[Mapping[str, Any]]:
+        """Délais de la procédure dans la ville, à défaut valeur nationale"""
+        return self.delays.get((city, procedure)) or self.delays.get((DEFAULT_CITY, procedure))
+
+    def capex_price(self, item: str, tier: int) -> Optional[Mapping[str, Any]]:
+        """Prix unitaires d'un poste pour un niveau de ville (sans repli)"""
+        return self.capex.get((item, tier))
+
+    def plu_zone(self, city: str, zone: str) -> Optional[Mapping[str, Any]]:
+        """Règles d'une zone PLU"""
+        return self.plu.get((city, zone))
+
+    def replace(self, indexes: Dict[str, Dict], versions: Dict[str, int]) -> "ReferenceSnapshot":
+        """Nouvel instantané : jeux rechargés remplacés, les autres conservés"""
+        return ReferenceSnapshot(
+            indexes.get("administrative_delays", self.delays),
+            indexes.get("capex_costs", self.capex),
+            indexes.get("plu_zones", self.plu),
+            {**self.versions, **versions},
+        )
+
+
+class ReferenceDataCache:
+    """Cache des données de référence, rafraîchi par compteur de version"""
+
+    def __init__(self):
+        self._defaults: Dict[str, Dict] = {dataset: {} for dataset in DATASETS}
+        self._snapshot = ReferenceSnapshot({}, {}, {})
+        self._lock = asyncio.Lock()
+
+    @property
+    def snapshot(self) -> ReferenceSnapshot:
+        """Instantané courant (à lire une fois par calcul pour rester cohérent)"""
+        return self._snapshot
+
+    def register_defaults(self, dataset: str, index: Dict[Tuple[Any, Any], Dict[str, Any]]) -> None:
+        """
+        Valeurs intégrées d'un jeu, utilisées en repli des lignes de la base
+
+        Args:
+            dataset: administrative_delays, capex_costs ou plu_zones
+            index: {(clé 1, clé 2): enregistrement}
+        """
+        if dataset not in DATASETS:
+            raise ValueError(f"Jeu de référence inconnu: {dataset}. Valeurs acceptées: {', '.join(DATASETS)}")
+        self._defaults[dataset] = {key: _frozen(record) for key, record in index.items()}
+        current = {
+            "administrative_delays": self._snapshot.delays,
+            "capex_costs": self._snapshot.capex,
+            "plu_zones": self._snapshot.plu,
+        }[dataset]
+        # Les lignes déjà chargées depuis la base restent prioritaires
+        self._snapshot = self._snapshot.replace({dataset: {**self._defaults[dataset], **current}}, {})
+
+    def _index(self, dataset: str, rows: Iterable[Any]) -> Dict[Tuple[Any, Any], Mapping[str, Any]]:
+        """Lignes de la table indexées, fusionnées sur les valeurs intégrées"""
+        model, to_record = DATASET_SOURCES[dataset]
+        index = dict(self._defaults[dataset])
+        index.update(to_record(row) for row in rows)
+        return index
+
+    async def versions(self, db: AsyncSession) -> Dict[str, int]:
+        """Compteurs de version en base"""
+        result = await db.execute(select(ReferenceDataVersion.dataset, ReferenceDataVersion.version))
+        return {dataset: version for dataset, version in result.all()}
+
+    async def refresh(self, db: AsyncSession) -> List[str]:
+        """
+        Recharge les jeux dont la version a changé
+
+        L'instantané n'est remplacé qu'une fois tous les jeux modifiés lus : les
+        lecteurs voient l'ancien état complet ou le nouveau, jamais un mélange.
+
+        Returns:
+            Jeux rechargés
+        """
+        async with self._lock:
+            versions = await self.versions(db)
+            changed = [
+                dataset for dataset in DATASETS
+                if dataset in versions and versions[dataset] != self._snapshot.versions.get(dataset)
+            ]
+            if not changed:
+                return []
+
+            indexes = {}
+            for dataset in changed:
+                model = DATASET_SOURCES[dataset][0]
+                rows = (await db.execute(select(model))).scalars().all()
+                indexes[dataset] = self._index(dataset, rows)
+
+            self._snapshot = self._snapshot.replace(indexes, {dataset: versions[dataset] for dataset in changed})
+            logger.info("Données de référence rechargées: %s", ", ".join(changed))
+            return changed
+
+    async def bump_version(self, db: AsyncSession, dataset: str) -> int:
+        """
+        Incrémente le compteur d'un jeu après modification de ses lignes
+
+        Le commit reste à la charge de l'appelant (même transaction que les données).
+        """
+        if dataset not in DATASETS:
+            raise ValueError(f"Jeu de référence inconnu: {dataset}. Valeurs acceptées: {', '.join(DATASETS)}")
+        row = await db.get(ReferenceDataVersion, dataset)
+        if row is None:
+            row = ReferenceDataVersion(dataset=dataset, version=0)
+            db.add(row)
+        row.version = (row.version or 0) + 1
+        await db.flush()
+        return row.version
+
+    async def watch(self, session_factory: Callable[[], Any], interval: Optional[float] = None) -> None:
+        """Boucle de rafraîchissement (tâche de fond) ; en cas d'erreur l'instantané courant est conservé"""
+        interval = interval or settings.REFERENCE_DATA_REFRESH_SECONDS
+        while True:
+            try:
+                async with session_factory() as db:
+                    await self.refresh(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Rafraîchissement des données de référence impossible: {e}")
+            await asyncio.sleep(interval)
+
+
+# Instance globale
+reference_data = ReferenceDataCache()
@@ -0,0 +1,332 @@
+"""
+Moteur d'ordonnancement par chemin critique (NumPy)
+Tâches et liens FS / SS / FF avec décalage ; passes avant / arrière vectorisées par niveau topologique
+"""
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import numpy as np
+
+
+LINK_TYPES = ("FS", "SS", "FF")
+
+# Tolérance (jours) pour qualifier une tâche de critique
+CRITICAL_TOLERANCE = 1e-9
+
+
+def _group(edges: np.ndarray, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Trie des liens par tâche clé pour les réductions segmentées (reduceat)
+
+    Returns:
+        (liens triés, tâches distinctes, début de chaque segment)
+    """
+    edges = edges[np.argsort(keys[edges], kind="stable")]
+    unique, starts = np.unique(keys[edges], return_index=True)
+    return edges, unique, starts
+
+
+class ScheduleArrays:
+    """
+    Dates au plus tôt / au plus tard d'un réseau de tâches, en jours depuis le début
+
+    Chaque tableau a la forme (n_tâches,) ou (n_scénarios, n_tâches) si les durées
+    sont fournies par scénario.
+    """
+
+    def __init__(
+        self,
+        durations: np.ndarray,
+        early_start: np.ndarray,
+        late_start: np.ndarray,
+        free_float: np.ndarray
+    ):
+        self.durations = durations
+        self.early_start = early_start
+        self.late_start = late_start
+        self.free_float = free_float
+
+    @property
+    def early_finish(self) -> np.ndarray:
+        return self.early_start + self.durations
+
+    @property
+    def late_finish(self) -> np.ndarray:
+        return self.late_start + self.durations
+
+    @property
+    def total_float(self) -> np.ndarray:
+        return self.late_start - self.early_start
+
+    @property
+    def critical(self) -> np.ndarray:
+        return self.total_float <= CRITICAL_TOLERANCE
+
+    @property
+    def project_duration(self) -> np.ndarray:
+        return self.early_finish.max(axis=-1)
+
+
+class ScheduleNetwork:
+    """
+    Réseau de tâches (graphe orienté acyclique) et ses passes de calcul
+
+    Contrainte d'un lien pred -> succ de type t et décalage `lag` (jours) :
+        début(succ) >= début(pred) + a_t x durée(pred) - b_t x durée(succ) + lag
+    avec (a, b) = (1, 0) pour FS (fin -> début), (0, 0) pour SS (début -> début),
+    (1, 1) pour FF (fin -> fin).
+
+    Le tri topologique et le découpage des liens par niveau sont faits une fois ; chaque
+    passe traite un niveau à la fois par réductions segmentées (reduceat), toutes tâches
+    (et tous scénarios) du niveau ensemble.
+    """
+
+    def __init__(self, tasks: Sequence[Dict[str, Any]], links: Sequence[Dict[str, Any]] = ()):
+        """
+        Args:
+            tasks: [{"id": "pc", "duration": 90, "phase": "permit", "name": "Permis de construire"}]
+            links: [{"from": "studies", "to": "pc", "type": "FS", "lag": 0}]
+
+        Raises:
+            ValueError: Identifiant en double ou inconnu, type de lien inconnu,
+                        durée négative ou cycle
+        """
+        if not tasks:
+            raise ValueError("Au moins une tâche est requise")
+        self.tasks = [dict(task) for task in tasks]
+        self.ids = [str(task["id"]) for task in tasks]
+        self.index = {task_id: i for i, task_id in enumerate(self.ids)}
+        if len(self.index) != len(self.ids):
+            raise ValueError("Identifiants de tâches en double")
+
+        self.durations = np.array([float(task["duration"]) for task in tasks])
+        if np.any(self.durations < 0):
+            raise ValueError("Les durées doivent être positives")
+
+        self.links = [dict(link) for link in links]
+        pred, succ, a, b, lag = [], [], [], [], []
+        for link in links:
+            kind = str(link.get("type", "FS")).upper()
+            if kind not in LINK_TYPES:
+                raise ValueError(f"Type de lien inconnu: {kind}. Valeurs acceptées: {', '.join(LINK_TYPES)}")
+            for end in ("from", "to"):
+                if str(link[end]) not in self.index:
+                    raise ValueError(f"Tâche inconnue dans un lien: {link[end]}")
+            pred.append(self.index[str(link["from"])])
+            succ.append(self.index[str(link["to"])])
+            a.append(0.0 if kind == "SS" else 1.0)
+            b.append(1.0 if kind == "FF" else 0.0)
+            lag.append(float(link.get("lag", 0)))
+
+        self.pred = np.array(pred, dtype=int)
+        self.succ = np.array(succ, dtype=int)
+        self.a = np.array(a)
+        self.b = np.array(b)
+        self.lag = np.array(lag)
+
+        self.level = self._levels()
+        self.n_levels = int(self.level.max()) + 1
+        # Liens regroupés par niveau du successeur (passe avant) et du prédécesseur (passe arrière)
+        self._in_edges = [
+            _group(np.flatnonzero(self.level[self.succ] == lvl), self.succ) for lvl in range(self.n_levels)
+        ]
+        self._out_edges = [
+            _group(np.flatnonzero(self.level[self.pred] == lvl), self.pred) for lvl in range(self.n_levels)
+        ]
+        self._all_out_edges = _group(np.arange(self.pred.size), self.pred)
+        self._nodes = [np.flatnonzero(self.level == lvl) for lvl in range(self.n_levels)]
+
+        self._result: Optional[ScheduleArrays] = None
+
+    def _levels(self) -> np.ndarray:
+        """Niveau topologique (plus long chemin en nombre de liens), tri de Kahn"""
+        n = len(self.ids)
+        indegree = np.bincount(self.succ, minlength=n)
+        order = np.argsort(self.pred, kind="stable")
+        starts = np.searchsorted(self.pred[order], np.arange(n + 1))
+
+        level = np.zeros(n, dtype=int)
+        queue = list(np.flatnonzero(indegree == 0))
+        visited = 0
+        while queue:
+            node = queue.pop()
+            visited += 1
+            for edge in order[starts[node]:starts[node + 1]]:
+                target = self.succ[edge]
+                level[target] = max(level[target], level[node] + 1)
+                indegree[target] -= 1
+                if indegree[target] == 0:
+                    queue.append(target)
+
+        if visited != n:
+            raise ValueError("Le réseau de tâches contient un cycle")
+        return level
+
+    def _offsets(self, durations: np.ndarray, edges: np.ndarray) -> np.ndarray:
+        """Écart minimal début(succ) - début(pred) de chaque lien"""
+        return (
+            self.a[edges] * durations[..., self.pred[edges]]
+            - self.b[edges] * durations[..., self.succ[edges]]
+            + self.lag[edges]
+        )
+
+    def _forward(self, durations: np.ndarray, early_start: np.ndarray, from_level: int = 0) -> None:
+        """Passe avant (dates au plus tôt) sur les niveaux >= from_level"""
+        for lvl in range(from_level, self.n_levels):
+            early_start[..., self._nodes[lvl]] = 0.0
+            edges, targets, starts = self._in_edges[lvl]
+            if edges.size:
+                candidates = early_start[..., self.pred[edges]] + self._offsets(durations, edges)
+                early_start[..., targets] = np.maximum(
+                    early_start[..., targets], np.maximum.reduceat(candidates, starts, axis=-1)
+                )
+
+    def _backward(
+        self,
+        durations: np.ndarray,
+        late_start: np.ndarray,
+        finish: np.ndarray,
+        to_level: Optional[int] = None
+    ) -> None:
+        """Passe arrière (dates au plus tard) sur les niveaux <= to_level"""
+        top = self.n_levels - 1 if to_level is None else to_level
+        for lvl in range(top, -1, -1):
+            nodes = self._nodes[lvl]
+            late_start[..., nodes] = finish[..., None] - durations[..., nodes]
+            edges, sources, starts = self._out_edges[lvl]
+            if edges.size:
+                candidates = late_start[..., self.succ[edges]] - self._offsets(durations, edges)
+                late_start[..., sources] = np.minimum(
+                    late_start[..., sources], np.minimum.reduceat(candidates, starts, axis=-1)
+                )
+
+    def _free_float(self, durations: np.ndarray, early_start: np.ndarray, finish: np.ndarray) -> np.ndarray:
+        """Marge libre : retard possible sans décaler aucun successeur ni la fin du projet"""
+        free = finish[..., None] - (early_start + durations)
+        edges, sources, starts = self._all_out_edges
+        if edges.size:
+            slack = (
+                early_start[..., self.succ[edges]] - early_start[..., self.pred[edges]]
+                - self._offsets(durations, edges)
+            )
+            free[..., sources] = np.minimum(free[..., sources], np.minimum.reduceat(slack, starts, axis=-1))
+        return free
+
+    def compute(self, durations: Optional[np.ndarray] = None) -> ScheduleArrays:
+        """
+        Passes avant et arrière complètes
+
+        Args:
+            durations: Durées (n_tâches,) ou par scénario (n_scénarios, n_tâches) ;
+                       défaut : durées du réseau (résultat conservé pour update_duration)
+
+        Returns:
+            ScheduleArrays
+        """
+        keep = durations is None
+        durations = self.durations if keep else np.asarray(durations, dtype=float)
+        if durations.shape[-1] != len(self.ids):
+            raise ValueError(f"{durations.shape[-1]} durées pour {len(self.ids)} tâches")
+        if np.any(durations < 0):
+            raise ValueError("Les durées doivent être positives")
+
+        early_start = np.zeros(durations.shape)
+        self._forward(durations, early_start)
+        finish = (early_start + durations).max(axis=-1)
+        late_start = np.zeros(durations.shape)
+        self._backward(durations, late_start, finish)
+
+        result = ScheduleArrays(durations, early_start, late_start, self._free_float(durations, early_start, finish))
+        if keep:
+            self._result = result
+        return result
+
+    def update_duration(self, task_id: str, duration: float) -> ScheduleArrays:
+        """
+        Modifie la durée d'une tâche et recalcule de façon incrémentale
+
+        Passe avant à partir du niveau de la tâche ; passe arrière limitée aux niveaux
+        inférieurs ou égaux si la fin du projet ne bouge pas (complète sinon).
+        """
+        if str(task_id) not in self.index:
+            raise ValueError(f"Tâche inconnue: {task_id}")
+        if duration < 0:
+            raise ValueError("Les durées doivent être positives")
+        if self._result is None:
+            self.compute()
+
+        i = self.index[str(task_id)]
+        lvl = int(self.level[i])
+        previous = self._result
+        self.durations = self.durations.copy()
+        self.durations[i] = float(duration)
+        self.tasks[i]["duration"] = float(duration)
+
+        early_start = previous.early_start.copy()
+        self._forward(self.durations, early_start, from_level=lvl)
+        finish = (early_start + self.durations).max(axis=-1)
+
+        late_start = previous.late_start.copy()
+        if np.isclose(finish, previous.project_duration):
+            self._backward(self.durations, late_start, finish, to_level=lvl)
+        else:
+            self._backward(self.durations, late_start, finish)
+
+        self._result = ScheduleArrays(
+            self.durations, early_start, late_start, self._free_float(self.durations, early_start, finish)
+        )
+        return self._result
+
+    @property
+    def result(self) -> ScheduleArrays:
+        """Dernier résultat calculé sur les durées du réseau"""
+        return self._result if self._result is not None else self.compute()
+
+    def critical_path(self, result: Optional[ScheduleArrays] = None) -> List[str]:
+        """Tâches critiques (marge totale nulle) triées par date de début au plus tôt"""
+        result = result or self.result
+        critical = np.flatnonzero(result.critical)
+        order = np.lexsort((result.early_finish[critical], result.early_start[critical]))
+        return [self.ids[i] for i in critical[order]]
+
+    def to_rows(self, result: Optional[ScheduleArrays] = None) -> List[Dict[str, Any]]:
+        """Une ligne par tâche (résultat à un seul scénario)"""
+        result = result or self.result
+        columns = {
+            "duration": result.durations,
+            "early_start": result.early_start,
+            "early_finish": result.early_finish,
+            "late_start": result.late_start,
+            "late_finish": result.late_finish,
+            "total_float": result.total_float,
+            "free_float": result.free_float,
+        }
+        values = {name: np.round(column, 4).tolist() for name, column in columns.items()}
+        critical = result.critical.tolist()
+
+        return [
+            {
+                "id": task_id,
+                "name": self.tasks[i].get("name", task_id),
+                "phase": self.tasks[i].get("phase"),
+                **{name: values[name][i] for name in columns},
+                "critical": critical[i],
+            }
+            for i, task_id in enumerate(self.ids)
+        ]
+
+    def phase_bounds(self, result: Optional[ScheduleArrays] = None) -> Dict[str, Tuple[float, float]]:
+        """Début au plus tôt et fin au plus tôt de chaque phase (tâches portant "phase")"""
+        result = result or self.result
+        bounds: Dict[str, Tuple[float, float]] = {}
+        for i, task in enumerate(self.tasks):
+            phase = task.get("phase")
+            if not phase:
+                continue
+            start, finish = float(result.early_start[i]), float(result.early_finish[i])
+            if phase in bounds:
+                start, finish = min(start, bounds[phase][0]), max(finish, bounds[phase][1])
+            bounds[phase] = (start, finish)
+        return bounds
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Réseau sérialisable (stockage JSON)"""
+        return {"tasks": self.tasks, "links": self.links}
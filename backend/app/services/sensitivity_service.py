@@ -0,0 +1,211 @@
+"""
+Service d'analyse de sensibilité (grille 2D et tornado)
+Toutes les combinaisons sont évaluées en une passe via calculate_full_analysis_batch
+"""
+from typing import Dict, Any, List, Optional
+import numpy as np
+
+from app.services.financial_service import financial_service
+
+
+# Variables balayables (paramètres de calculate_full_analysis + taux de sortie)
+SENSITIVITY_VARIABLES = (
+    "purchase_price",
+    "renovation_budget",
+    "notary_fees",
+    "loan_amount",
+    "interest_rate",
+    "monthly_rent",
+    "resale_price",
+    "exit_yield",
+)
+
+DEFAULT_TORNADO_VARIABLES = (
+    "purchase_price",
+    "renovation_budget",
+    "monthly_rent",
+    "resale_price",
+    "interest_rate",
+)
+
+GRID_METRICS = ("tri", "van", "roi", "dscr")
+
+MAX_STEPS = 200
+
+
+class SensitivityService:
+    """Service de sensibilité TRI / VAN / ROI / DSCR"""
+
+    def base_value(self, base: Dict[str, Any], name: str) -> float:
+        """
+        Valeur de référence d'une variable
+
+        Le taux de sortie (exit_yield) est déduit du loyer annuel et du prix de revente.
+        """
+        if name not in SENSITIVITY_VARIABLES:
+            raise ValueError(
+                f"Variable inconnue: {name}. Valeurs acceptées: {', '.join(SENSITIVITY_VARIABLES)}"
+            )
+        if name == "exit_yield":
+            if not base.get("resale_price"):
+                raise ValueError("exit_yield nécessite un prix de revente > 0 dans le scénario de base")
+            return base.get("monthly_rent", 0) * 12 / base["resale_price"]
+        return float(base[name])
+
+    def _evaluate(self, base: Dict[str, Any], overrides: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Évalue le modèle sur des entrées surchargées (tableaux diffusables)
+
+        Un taux de sortie surchargé fixe le prix de revente : revente = loyer annuel / taux.
+        """
+        for name in overrides:
+            if name not in SENSITIVITY_VARIABLES:
+                raise ValueError(
+                    f"Variable inconnue: {name}. Valeurs acceptées: {', '.join(SENSITIVITY_VARIABLES)}"
+                )
+        if "exit_yield" in overrides and "resale_price" in overrides:
+            raise ValueError("exit_yield et resale_price ne peuvent pas varier ensemble")
+
+        params = {
+            "purchase_price": base["purchase_price"],
+            "renovation_budget": base["renovation_budget"],
+            "notary_fees": base["notary_fees"],
+            "loan_amount": base["loan_amount"],
+            "interest_rate": base["interest_rate"],
+            "monthly_rent": base.get("monthly_rent", 0),
+            "resale_price": base.get("resale_price", 0),
+        }
+        params.update({name: value for name, value in overrides.items() if name != "exit_yield"})
+
+        if "exit_yield" in overrides:
+            exit_yield = np.asarray(overrides["exit_yield"], dtype=float)
+            if np.any(exit_yield <= 0):
+                raise ValueError("exit_yield doit être > 0")
+            params["resale_price"] = np.asarray(params["monthly_rent"], dtype=float) * 12 / exit_yield
+
+        return financial_service.calculate_full_analysis_batch(
+            **params,
+            loan_duration=base["loan_duration"],
+            project_type=base.get("project_type", "rental")
+        )
+
+    def sweep_values(self, variable: Dict[str, Any]) -> np.ndarray:
+        """
+        Valeurs balayées pour une variable {"name", "min", "max", "steps"}
+        """
+        steps = int(variable.get("steps", 11))
+        if not 2 <= steps <= MAX_STEPS:
+            raise ValueError(f"steps doit être entre 2 et {MAX_STEPS}")
+        if variable["max"] < variable["min"]:
+            raise ValueError(f"{variable['name']}: max doit être >= min")
+        return np.linspace(variable["min"], variable["max"], steps)
+
+    def calculate_grid(
+        self,
+        base: Dict[str, Any],
+        variables: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Grille de sensibilité sur une ou deux variables
+
+        Args:
+            base: Paramètres de calculate_full_analysis (scénario central)
+            variables: 1 ou 2 variables [{"name": "purchase_price", "min": ..., "max": ..., "steps": 21}]
+
+        Returns:
+            Valeurs balayées et matrices TRI / VAN / ROI / DSCR (lignes = 1ère variable)
+        """
+        if not 1 <= len(variables) <= 2:
+            raise ValueError("La grille accepte une ou deux variables")
+        if len(variables) == 2 and variables[0]["name"] == variables[1]["name"]:
+            raise ValueError("Les deux variables doivent être différentes")
+
+        axes = [self.sweep_values(variable) for variable in variables]
+        overrides = {variables[0]["name"]: axes[0][:, None]}
+        if len(axes) == 2:
+            overrides[variables[1]["name"]] = axes[1][None, :]
+
+        results = self._evaluate(base, overrides)
+        shape = (axes[0].size, axes[1].size if len(axes) == 2 else 1)
+
+        metrics = {
+            metric: np.broadcast_to(results[metric], shape).tolist()
+            for metric in GRID_METRICS
+        }
+        converged = np.broadcast_to(results["tri_converged"], shape)
+        metrics["tri"] = np.where(converged, np.broadcast_to(results["tri"], shape), None).tolist()
+
+        if len(axes) == 1:
+            metrics = {metric: [row[0] for row in values] for metric, values in metrics.items()}
+
+        return {
+            "rows": {"name": variables[0]["name"], "values": axes[0].tolist()},
+            "columns": (
+                {"name": variables[1]["name"], "values": axes[1].tolist()}
+                if len(axes) == 2 else None
+            ),
+            "metrics": metrics,
+            "tri_converged_ratio": float(converged.mean()),
+        }
+
+    def calculate_tornado(
+        self,
+        base: Dict[str, Any],
+        variation: float = 0.10,
+        variables: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Tornado : écart de TRI pour une variation ±X% de chaque variable
+
+        Args:
+            base: Paramètres de calculate_full_analysis
+            variation: Variation relative (0.10 = ±10%)
+            variables: Variables testées (défaut: prix, travaux, loyer, revente, taux)
+
+        Returns:
+            Barres triées par amplitude décroissante
+        """
+        if not 0 < variation < 1:
+            raise ValueError("variation doit être entre 0 et 1 (exclus)")
+
+        variables = list(variables or DEFAULT_TORNADO_VARIABLES)
+        base_values = np.array([self.base_value(base, name) for name in variables])
+
+        # Scénario 0 = base, puis (bas, haut) pour chaque variable
+        n_scenarios = 1 + 2 * len(variables)
+        overrides = {}
+        for i, name in enumerate(variables):
+            values = np.full(n_scenarios, base_values[i])
+            values[1 + 2 * i] = base_values[i] * (1 - variation)
+            values[2 + 2 * i] = base_values[i] * (1 + variation)
+            overrides[name] = values
+
+        results = self._evaluate(base, overrides)
+        tri = np.where(results["tri_converged"], results["tri"], np.nan)
+        base_tri = tri[0]
+
+        bars = []
+        for i, name in enumerate(variables):
+            tri_low, tri_high = tri[1 + 2 * i], tri[2 + 2 * i]
+            swing = abs(tri_high - tri_low)
+            bars.append({
+                "variable": name,
+                "base_value": float(base_values[i]),
+                "low_value": float(base_values[i] * (1 - variation)),
+                "high_value": float(base_values[i] * (1 + variation)),
+                "tri_low": None if np.isnan(tri_low) else float(tri_low),
+                "tri_high": None if np.isnan(tri_high) else float(tri_high),
+                "swing": None if np.isnan(swing) else float(swing),
+            })
+
+        bars.sort(key=lambda bar: -1 if bar["swing"] is None else bar["swing"], reverse=True)
+
+        return {
+            "variation": variation,
+            "base_tri": None if np.isnan(base_tri) else float(base_tri),
+            "bars": bars,
+        }
+
+
+# Instance globale
+sensitivity_service = SensitivityService()
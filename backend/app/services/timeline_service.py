@@ -3,16 +3,80 @@ Service de gestion de la timeline des projets
 Calcule les phases, la trésorerie et les flux de trésorerie
 """
 from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
 from dateutil.relativedelta import relativedelta
 import logging
+import numpy as np
+
+from app.core.memoize import canonical_key
+from app.services.capex_curves import curve_weights
+from app.services.schedule_engine import ScheduleNetwork
 
 logger = logging.getLogger(__name__)
 
 
+# Version du format stocké dans ProjectTimeline.cashflow_schedule
+SCHEDULE_VERSION = 3
+
+SCHEDULE_COLUMNS = (
+    "studies", "permit", "construction", "vefa", "rent", "sale",
+    "outflows", "inflows", "net", "cumulative",
+)
+
+# Champs de la timeline dont dépend l'échéancier (toute autre modification ne le recalcule pas)
+SCHEDULE_TIMELINE_FIELDS = (
+    "project_start_date", "project_end_date",
+    "study_phase_start", "study_phase_end", "study_phase_budget",
+    "permit_phase_start", "permit_fees",
+    "construction_phase_start", "construction_phase_end", "construction_budget",
+    "capex_curve_type", "capex_curve_params",
+    "commercialization_phase_start", "commercialization_type", "vefa_reservations_schedule",
+    "rental_start_date", "resale_date",
+)
+
+# Données financières du projet utilisées par l'échéancier
+SCHEDULE_FINANCIAL_FIELDS = (
+    "annual_rent", "occupancy_rate", "rent_free_months", "sale_price", "resale_price", "hold_months",
+)
+
+# Durée de détention par défaut (sans date de sortie ni durée BP)
+DEFAULT_HOLD_YEARS = 5
+
+# Phase de tâche -> préfixe des colonnes ProjectTimeline
+PHASE_FIELD_PREFIXES = {
+    "studies": "study",
+    "permit": "permit",
+    "construction": "construction",
+    "commercialization": "commercialization",
+}
+
+DAYS_PER_MONTH = 365.25 / 12
+
+# Réseaux de tâches gardés en mémoire (recalcul incrémental d'une durée)
+SCHEDULE_NETWORK_CACHE_SIZE = 256
+
+RENTAL_TYPES = ("RENTAL", "MIXED")
+
+
+def month_index(value: Optional[datetime]) -> Optional[int]:
+    """Index absolu d'un mois (année * 12 + mois - 1)"""
+    if value is None:
+        return None
+    return value.year * 12 + value.month - 1
+
+
+def index_to_month(index: int) -> date:
+    """Inverse de month_index : 1er jour du mois"""
+    return date(index // 12, index % 12 + 1, 1)
+
+
 class TimelineService:
     """Service de calcul et gestion des timelines projet"""
     
+    def __init__(self):
+        self._networks: "OrderedDict[int, tuple]" = OrderedDict()
+    
     def calculate_project_duration(
         self,
         study_months: int,
@@ -60,6 +124,39 @@ class TimelineService:
             "execution_mode": execution_mode
         }
     
+    def phase_network(
+        self,
+        study_months: int,
+        permit_months: int,
+        construction_months: int,
+        commercialization_months: int,
+        execution_mode: str = "sequential"
+    ) -> ScheduleNetwork:
+        """
+        Réseau des 4 phases standard (durées en mois)
+        
+        Enchaînement fin -> début ; en mode "parallel", la commercialisation démarre
+        à mi-travaux (lien début -> début décalé de la moitié des travaux).
+        """
+        phases = (
+            ("studies", study_months), ("permit", permit_months),
+            ("construction", construction_months), ("commercialization", commercialization_months),
+        )
+        links = [
+            {"from": "studies", "to": "permit", "type": "FS"},
+            {"from": "permit", "to": "construction", "type": "FS"},
+        ]
+        if execution_mode == "parallel":
+            links.append({
+                "from": "construction", "to": "commercialization", "type": "SS", "lag": construction_months // 2
+            })
+        else:
+            links.append({"from": "construction", "to": "commercialization", "type": "FS"})
+        
+        return ScheduleNetwork(
+            [{"id": phase, "duration": months, "phase": phase} for phase, months in phases], links
+        )
+    
     def generate_phase_dates(
         self,
         start_date: datetime,
@@ -75,51 +172,131 @@ class TimelineService:
         Returns:
             Dict avec start/end pour chaque phase
         """
-        current_date = start_date
-        
-        phases = {}
+        network = self.phase_network(
+            study_months, permit_months, construction_months, commercialization_months, execution_mode
+        )
         
-        # Phase Études
-        phases["studies"] = {
-            "start": current_date,
-            "end": current_date + relativedelta(months=study_months)
+        return {
+            phase: {
+                "start": start_date + relativedelta(months=int(start)),
+                "end": start_date + relativedelta(months=int(finish))
+            }
+            for phase, (start, finish) in network.phase_bounds().items()
         }
-        current_date = phases["studies"]["end"]
+    
+    def schedule_network(self, project_id: int, network_data: Dict[str, Any]) -> ScheduleNetwork:
+        """
+        Réseau de tâches d'un projet, conservé en mémoire pour les recalculs incrémentaux
         
-        # Phase Permis
-        phases["permit"] = {
-            "start": current_date,
-            "end": current_date + relativedelta(months=permit_months)
-        }
-        current_date = phases["permit"]["end"]
+        Le réseau en cache est réutilisé tant que sa définition stockée n'a pas changé.
+        """
+        key = canonical_key("timeline.schedule_network", network_data)
+        cached = self._networks.get(project_id)
+        if cached is not None and cached[0] == key:
+            self._networks.move_to_end(project_id)
+            return cached[1]
         
-        # Phase Travaux
-        phases["construction"] = {
-            "start": current_date,
-            "end": current_date + relativedelta(months=construction_months)
-        }
+        network = ScheduleNetwork(network_data["tasks"], network_data.get("links", []))
+        network.compute()
+        self._networks[project_id] = (key, network)
+        if len(self._networks) > SCHEDULE_NETWORK_CACHE_SIZE:
+            self._networks.popitem(last=False)
+        return network
+    
+    def discard_network(self, project_id: int) -> None:
+        """
+        Retire le réseau d'un projet du cache
         
-        # Phase Commercialisation
-        if execution_mode == "parallel":
-            # Commence à mi-travaux
-            comm_start = phases["construction"]["start"] + relativedelta(
-                months=construction_months // 2
-            )
-        else:
-            comm_start = phases["construction"]["end"]
+        À appeler quand une requête échoue après une mise à jour incrémentale : le réseau
+        en cache, modifié sur place, ne correspond plus à la définition stockée.
+        """
+        self._networks.pop(project_id, None)
+    
+    def apply_schedule(
+        self,
+        timeline: Any,
+        network: ScheduleNetwork,
+        start_date: datetime
+    ) -> Dict[str, Any]:
+        """
+        Reporte un ordonnancement (durées en jours) sur une ProjectTimeline
         
-        phases["commercialization"] = {
-            "start": comm_start,
-            "end": comm_start + relativedelta(months=commercialization_months)
+        Les dates de chaque phase sont l'enveloppe (début au plus tôt, fin au plus tôt)
+        des tâches qui portent ce nom de phase ; le réseau est stocké dans
+        timeline.schedule_network et mis en cache pour les mises à jour suivantes.
+        
+        Returns:
+            Tâches (dates, marges, criticité), chemin critique et durée
+        """
+        result = network.result
+        bounds = network.phase_bounds(result)
+        for phase, prefix in PHASE_FIELD_PREFIXES.items():
+            if phase in bounds:
+                setattr(timeline, f"{prefix}_phase_start", start_date + timedelta(days=bounds[phase][0]))
+                setattr(timeline, f"{prefix}_phase_end", start_date + timedelta(days=bounds[phase][1]))
+        
+        duration_days = float(result.project_duration)
+        timeline.project_start_date = start_date
+        timeline.project_end_date = start_date + timedelta(days=duration_days)
+        timeline.total_duration_months = int(round(duration_days / DAYS_PER_MONTH))
+        
+        network_data = {"start_date": start_date.isoformat(), **network.to_dict()}
+        timeline.schedule_network = network_data
+        self._networks[timeline.project_id] = (canonical_key("timeline.schedule_network", network_data), network)
+        
+        return {
+            "start_date": start_date.date().isoformat(),
+            "end_date": timeline.project_end_date.date().isoformat(),
+            "duration_days": duration_days,
+            "duration_months": timeline.total_duration_months,
+            "critical_path": network.critical_path(result),
+            "phases": {
+                phase: {
+                    "start": (start_date + timedelta(days=start)).date().isoformat(),
+                    "end": (start_date + timedelta(days=finish)).date().isoformat(),
+                }
+                for phase, (start, finish) in bounds.items()
+            },
+            "tasks": self.schedule_rows(network, start_date),
         }
+    
+    def rescale_phases(self, network: ScheduleNetwork, phase_months: Dict[str, float]) -> None:
+        """
+        Reporte de nouvelles durées de phase (mois) sur les tâches d'un réseau
+        
+        Phase d'une seule tâche : nouvelle durée ; phase de plusieurs tâches : durées
+        mises à l'échelle de la nouvelle durée de la phase. Recalcul incrémental.
         
-        return phases
+        Raises:
+            ValueError: Phase absente du réseau
+        """
+        bounds = network.phase_bounds()
+        for phase, months in phase_months.items():
+            if phase not in bounds:
+                raise ValueError(
+                    f"Phase absente de l'ordonnancement: {phase}. Modifier le réseau via /schedule"
+                )
+            days = months * DAYS_PER_MONTH
+            task_ids = [task["id"] for task in network.tasks if task.get("phase") == phase]
+            span = bounds[phase][1] - bounds[phase][0]
+            for task_id in task_ids:
+                current = network.durations[network.index[str(task_id)]]
+                network.update_duration(task_id, days if len(task_ids) == 1 or span <= 0 else current * days / span)
+    
+    def schedule_rows(self, network: ScheduleNetwork, start_date: datetime) -> List[Dict[str, Any]]:
+        """Tâches du réseau avec leurs dates calendaires au plus tôt"""
+        rows = network.to_rows()
+        for row in rows:
+            row["start_date"] = (start_date + timedelta(days=row["early_start"])).date().isoformat()
+            row["end_date"] = (start_date + timedelta(days=row["early_finish"])).date().isoformat()
+        return rows
     
     def calculate_capex_curve(
         self,
         total_capex: float,
         construction_months: int,
-        curve_type: str = "s_curve"
+        curve_type: str = "s_curve",
+        **curve_params: Any
     ) -> List[Dict[str, Any]]:
         """
         Calcule la courbe de décaissement CAPEX mensuelle
@@ -127,115 +304,303 @@ class TimelineService:
         Args:
             total_capex: Budget total travaux
             construction_months: Durée travaux en mois
-            curve_type: Type de courbe (linear, s_curve, front_loaded, back_loaded)
+            curve_type: Courbe enregistrée dans capex_curves (linear, s_curve, front_loaded,
+                        back_loaded, beta, milestones, table, ...)
+            **curve_params: Paramètres de la courbe (steepness, alpha/beta, milestones, percentages)
         
         Returns:
             Liste de décaissements mensuels
         """
-        curve = []
-        
-        if curve_type == "linear":
-            # Linéaire : même montant chaque mois
-            monthly_capex = total_capex / construction_months
-            for month in range(construction_months):
-                curve.append({
-                    "month": month + 1,
-                    "amount": monthly_capex,
-                    "cumulative": monthly_capex * (month + 1),
-                    "pct_complete": ((month + 1) / construction_months) * 100
-                })
-        
-        elif curve_type == "s_curve":
-            # Courbe en S : lent au début, accélère, ralentit à la fin
-            # Distribution typique : 10-15-20-25-20-10 pour 6 mois
-            import numpy as np
-            
-            # Fonction sigmoïde pour courbe en S
-            x = np.linspace(-3, 3, construction_months)
-            sigmoid = 1 / (1 + np.exp(-x))
-            
-            # Normaliser pour que la somme = total_capex
-            weights = np.diff(sigmoid, prepend=0)
-            weights = weights / weights.sum()
-            
-            cumulative = 0
-            for month, weight in enumerate(weights):
-                amount = total_capex * weight
-                cumulative += amount
-                curve.append({
-                    "month": month + 1,
-                    "amount": round(amount, 2),
-                    "cumulative": round(cumulative, 2),
-                    "pct_complete": round((cumulative / total_capex) * 100, 1)
-                })
-        
-        elif curve_type == "front_loaded":
-            # Chargé au début : 40% premier tiers, 35% second, 25% dernier
-            third = construction_months // 3
-            
-            for month in range(construction_months):
-                if month < third:
-                    pct = 0.40 / third
-                elif month < 2 * third:
-                    pct = 0.35 / third
-                else:
-                    pct = 0.25 / (construction_months - 2 * third)
-                
-                amount = total_capex * pct
-                cumulative = sum(c["amount"] for c in curve) + amount
-                
-                curve.append({
-                    "month": month + 1,
-                    "amount": round(amount, 2),
-                    "cumulative": round(cumulative, 2),
-                    "pct_complete": round((cumulative / total_capex) * 100, 1)
-                })
-        
-        elif curve_type == "back_loaded":
-            # Chargé en fin : 25% premier tiers, 35% second, 40% dernier
-            third = construction_months // 3
-            
-            for month in range(construction_months):
-                if month < third:
-                    pct = 0.25 / third
-                elif month < 2 * third:
-                    pct = 0.35 / third
-                else:
-                    pct = 0.40 / (construction_months - 2 * third)
-                
-                amount = total_capex * pct
-                cumulative = sum(c["amount"] for c in curve) + amount
-                
-                curve.append({
-                    "month": month + 1,
-                    "amount": round(amount, 2),
-                    "cumulative": round(cumulative, 2),
-                    "pct_complete": round((cumulative / total_capex) * 100, 1)
-                })
-        
-        return curve
+        weights = curve_weights(curve_type, construction_months, **curve_params)
+        amounts = np.round(total_capex * weights, 2)
+        # Écart d'arrondi reporté sur le dernier mois : le cumul final égale le budget
+        amounts[-1] = round(total_capex - amounts[:-1].sum(), 2)
+        cumulative = np.cumsum(amounts)
+        pct_complete = np.round(cumulative / total_capex * 100, 1) if total_capex else np.zeros_like(amounts)
+        
+        return [
+            {"month": month, "amount": amount, "cumulative": cumulated, "pct_complete": pct}
+            for month, amount, cumulated, pct in zip(
+                range(1, construction_months + 1),
+                amounts.tolist(),
+                np.round(cumulative, 2).tolist(),
+                pct_complete.tolist(),
+            )
+        ]
+    
+    def schedule_inputs(
+        self,
+        timeline_data: Dict[str, Any],
+        financial_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Entrées normalisées de l'échéancier (dates ramenées au mois)
+        
+        Deux jeux d'entrées qui produisent le même échéancier ont la même empreinte,
+        quel que soit le fuseau horaire ou le jour des dates.
+        """
+        inputs = {}
+        for field in SCHEDULE_TIMELINE_FIELDS:
+            value = timeline_data.get(field)
+            if isinstance(value, (datetime, date)):
+                value = month_index(value)
+            inputs[field] = value
+        for field in SCHEDULE_FINANCIAL_FIELDS:
+            inputs[field] = financial_data.get(field)
+        return inputs
+    
+    def schedule_hash(
+        self,
+        timeline_data: Dict[str, Any],
+        financial_data: Dict[str, Any]
+    ) -> str:
+        """Empreinte SHA-256 des entrées de l'échéancier"""
+        return canonical_key(
+            f"timeline.cashflow_schedule.v{SCHEDULE_VERSION}",
+            self.schedule_inputs(timeline_data, financial_data)
+        )
+    
+    def is_schedule_current(
+        self,
+        schedule: Optional[Dict[str, Any]],
+        timeline_data: Dict[str, Any],
+        financial_data: Dict[str, Any]
+    ) -> bool:
+        """Vrai si l'échéancier stocké correspond aux entrées actuelles"""
+        return bool(
+            schedule
+            and schedule.get("version") == SCHEDULE_VERSION
+            and schedule.get("inputs_hash") == self.schedule_hash(timeline_data, financial_data)
+        )
     
     def generate_cashflow_schedule(
         self,
         timeline_data: Dict[str, Any],
         financial_data: Dict[str, Any]
-    ) -> List[Dict[str, Any]]:
+    ) -> Dict[str, Any]:
         """
         Génère le planning de trésorerie mensuel complet
         
+        Registre NumPy indexé par mois (un tableau par poste) :
+        - Sorties : budget études (linéaire sur la phase), taxes d'urbanisme (au dépôt),
+          CAPEX travaux selon la courbe de décaissement
+        - Entrées : réservations VEFA, loyers à partir de la mise en location,
+          prix de revente à la date de sortie
+        
+        Sortie : date de revente, sinon début de projet + durée de détention, sinon fin
+        de projet (hors VEFA, vendue par les réservations). Loyers à partir de la mise en
+        location, ou de la commercialisation pour une location (type non renseigné inclus).
+        
         Args:
-            timeline_data: Données de timeline (phases, dates)
-            financial_data: Données financières (budgets, loyers)
+            timeline_data: Champs de ProjectTimeline (phases, dates, budgets, courbe,
+                           vefa_reservations_schedule [{month, pct_sold, cash_in}] où month
+                           est le mois de commercialisation, 1 = premier mois)
+            financial_data: annual_rent, occupancy_rate (%), rent_free_months,
+                            sale_price (prix de vente VEFA total), resale_price,
+                            hold_months (durée de détention depuis le début de projet)
+        
+        Returns:
+            Registre compact stockable en JSON : début (premier mois portant un flux,
+            éventuellement antérieur au début de projet), nombre de mois, colonnes
+            arrondies au centime, totaux et empreinte des entrées
+        """
+        inputs = self.schedule_inputs(timeline_data, financial_data)
+        project_start = inputs["project_start_date"] or inputs["study_phase_start"]
+        if project_start is None:
+            raise ValueError("Date de début de projet requise")
+        
+        commercialization_type = (inputs["commercialization_type"] or "").upper()
+        commercialization_start = inputs["commercialization_phase_start"]
+        construction_start = inputs["construction_phase_start"]
+        construction_months = (
+            max(inputs["construction_phase_end"] - construction_start, 1)
+            if construction_start is not None and inputs["construction_phase_end"] is not None else 0
+        )
+        
+        # Réservations VEFA : (mois absolu, encaissement)
+        reservations = []
+        if commercialization_start is not None:
+            sale_price = financial_data.get("sale_price") or 0
+            for reservation in inputs["vefa_reservations_schedule"] or []:
+                cash_in = reservation.get("cash_in")
+                if cash_in is None:
+                    pct_sold = reservation.get("pct_sold") or 0
+                    cash_in = sale_price * (pct_sold / 100 if pct_sold > 1 else pct_sold)
+                reservations.append((commercialization_start + int(reservation["month"]) - 1, float(cash_in)))
+        
+        # Sortie : date de revente, durée de détention, ou fin de projet
+        exit_month = inputs["resale_date"]
+        if exit_month is None and commercialization_type != "VEFA":
+            exit_month = (
+                project_start + int(inputs["hold_months"]) if inputs["hold_months"]
+                else inputs["project_end_date"]
+            )
+        
+        # Le registre couvre toutes les phases, y compris celles antérieures au début de projet
+        candidates = [
+            project_start, inputs["project_end_date"], exit_month,
+            construction_start + construction_months - 1 if construction_months else None,
+            inputs["study_phase_end"], inputs["permit_phase_start"],
+        ] + [month for month, _ in reservations]
+        candidates = [month for month in candidates if month is not None]
+        end = max(candidates)
+        start = min(candidates + [
+            month for month in (
+                inputs["study_phase_start"], construction_start, inputs["rental_start_date"]
+            ) if month is not None
+        ])
+        n_months = end - start + 1
+        
+        columns = {name: np.zeros(n_months) for name in SCHEDULE_COLUMNS}
+        
+        def spread(column: str, month: int, amounts: np.ndarray) -> None:
+            offset = month - start
+            first, last = max(offset, 0), min(offset + amounts.size, n_months)
+            if first < last:
+                columns[column][first:last] += amounts[first - offset:last - offset]
+        
+        # Sorties
+        study_budget = inputs["study_phase_budget"] or 0
+        if study_budget and inputs["study_phase_start"] is not None:
+            study_start = inputs["study_phase_start"]
+            study_months = max((inputs["study_phase_end"] or study_start + 1) - study_start, 1)
+            spread("studies", study_start, np.full(study_months, study_budget / study_months))
+        
+        if inputs["permit_fees"] and inputs["permit_phase_start"] is not None:
+            spread("permit", inputs["permit_phase_start"], np.array([float(inputs["permit_fees"])]))
+        
+        construction_budget = inputs["construction_budget"] or 0
+        if construction_budget and construction_months:
+            curve = self.calculate_capex_curve(
+                construction_budget, construction_months, inputs["capex_curve_type"] or "s_curve",
+                **(inputs["capex_curve_params"] or {})
+            )
+            spread("construction", construction_start, np.array([point["amount"] for point in curve], dtype=float))
+        
+        # Entrées
+        for month, cash_in in reservations:
+            spread("vefa", month, np.array([cash_in]))
+        
+        annual_rent = inputs["annual_rent"] or 0
+        rent_start = inputs["rental_start_date"]
+        if rent_start is None and (not commercialization_type or commercialization_type in RENTAL_TYPES):
+            rent_start = commercialization_start
+        if annual_rent and rent_start is not None:
+            occupancy = inputs["occupancy_rate"] if inputs["occupancy_rate"] is not None else 100
+            occupancy = occupancy / 100 if occupancy > 1 else occupancy
+            rent_start += inputs["rent_free_months"] or 0
+            rent_end = exit_month if exit_month is not None else end + 1
+            if rent_end > rent_start:
+                spread("rent", rent_start, np.full(rent_end - rent_start, annual_rent / 12 * occupancy))
+        
+        resale_price = inputs["resale_price"] or 0
+        if resale_price and exit_month is not None:
+            spread("sale", exit_month, np.array([float(resale_price)]))
+        
+        columns["outflows"] = columns["studies"] + columns["permit"] + columns["construction"]
+        columns["inflows"] = columns["vefa"] + columns["rent"] + columns["sale"]
+        columns["net"] = columns["inflows"] - columns["outflows"]
+        columns["cumulative"] = np.cumsum(columns["net"])
+        
+        cumulative = columns["cumulative"]
+        positive = np.flatnonzero((cumulative >= 0) & (np.arange(n_months) >= int(np.argmin(cumulative))))
+        
+        return {
+            "version": SCHEDULE_VERSION,
+            "inputs_hash": self.schedule_hash(timeline_data, financial_data),
+            "start": index_to_month(start).isoformat(),
+            "months": n_months,
+            "project_start": index_to_month(project_start).isoformat(),
+            "exit": index_to_month(exit_month).isoformat() if exit_month is not None else None,
+            "construction": {
+                "offset": construction_start - start if construction_months else None,
+                "months": construction_months,
+                "curve_type": inputs["capex_curve_type"] or "s_curve",
+            },
+            "columns": {name: np.round(values, 2).tolist() for name, values in columns.items()},
+            "totals": {
+                name: round(float(columns[name].sum()), 2)
+                for name in SCHEDULE_COLUMNS if name != "cumulative"
+            },
+            "peak_funding": round(float(max(-cumulative.min(), 0.0)), 2),
+            "breakeven_month": (
+                index_to_month(start + int(positive[0])).isoformat()
+                if cumulative.min() < 0 and positive.size else None
+            ),
+        }
+    
+    def schedule_data(self, timeline: Any, project: Optional[Any] = None) -> tuple:
+        """
+        Extrait (timeline_data, financial_data) d'une ProjectTimeline et de son projet
+        
+        Returns:
+            Tuple de deux dicts utilisables par generate_cashflow_schedule
+        """
+        timeline_data = {field: getattr(timeline, field, None) for field in SCHEDULE_TIMELINE_FIELDS}
+        return timeline_data, self.financial_data(project, timeline_data)
+    
+    def financial_data(self, project: Optional[Any], timeline_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Données financières de l'échéancier tirées du projet
+        
+        Durée de détention : durée BP, ou défaut si la timeline n'a ni revente ni fin de projet.
+        """
+        if project is None:
+            return {}
+        hold_years = project.bp_duration
+        if not hold_years and not (timeline_data.get("resale_date") or timeline_data.get("project_end_date")):
+            hold_years = DEFAULT_HOLD_YEARS
+        return {
+            "annual_rent": project.current_rent or project.market_rent or 0,
+            "occupancy_rate": project.occupancy_rate,
+            "rent_free_months": project.rent_free_months or 0,
+            "sale_price": project.estimated_value or 0,
+            "resale_price": project.estimated_value or 0,
+            "hold_months": int(hold_years * 12) if hold_years else None,
+        }
+    
+    def refresh_cashflow_schedule(self, timeline: Any, project: Optional[Any] = None) -> bool:
+        """
+        Recalcule ProjectTimeline.cashflow_schedule seulement si une entrée a changé
+        
+        Returns:
+            True si l'échéancier a été recalculé
+        """
+        timeline_data, financial_data = self.schedule_data(timeline, project)
+        if self.is_schedule_current(timeline.cashflow_schedule, timeline_data, financial_data):
+            return False
+        
+        timeline.cashflow_schedule = self.generate_cashflow_schedule(timeline_data, financial_data)
+        logger.info(f"Échéancier de trésorerie recalculé pour le projet {timeline.project_id}")
+        return True
+    
+    def schedule_capex_curve(self, schedule: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Courbe de décaissement travaux lue dans un échéancier stocké (sans recalcul)
         
         Returns:
-            Planning mensuel avec sorties et entrées
+            Même format que calculate_capex_curve, avec la date de chaque mois
         """
-        cashflow = []
+        construction = schedule["construction"]
+        if not construction["months"]:
+            return []
         
-        # TODO: Implémenter la logique complète de génération de cash-flow
-        # en fonction des phases, CAPEX curve, loyers, VEFA, etc.
+        offset = construction["offset"]
+        amounts = np.array(schedule["columns"]["construction"][offset:offset + construction["months"]])
+        cumulative = np.cumsum(amounts)
+        total = cumulative[-1] if cumulative.size and cumulative[-1] else 1.0
+        first_month = month_index(date.fromisoformat(schedule["start"])) + offset
         
-        return cashflow
+        return [
+            {
+                "month": i + 1,
+                "date": index_to_month(first_month + i).isoformat(),
+                "amount": float(amount),
+                "cumulative": round(float(cumulated), 2),
+                "pct_complete": round(float(cumulated / total) * 100, 1),
+            }
+            for i, (amount, cumulated) in enumerate(zip(amounts, cumulative))
+        ]
 
 
 # Instance globale
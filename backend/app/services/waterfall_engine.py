@@ -0,0 +1,275 @@
+"""
+Moteur de waterfall en séries temporelles (NumPy)
+Distribue chaque flux daté selon des paliers de TRI réels (actualisation au taux de chaque hurdle)
+"""
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import numpy as np
+
+
+WATERFALL_STYLES = ("european", "american")
+
+STEP_CAPITAL = "return_of_capital"
+STEP_PREFERRED = "preferred_return"
+STEP_CATCH_UP = "catch_up"
+
+DEFAULT_TIERS = [{"hurdle_irr": None, "gp_share": 0.20}]
+
+
+class WaterfallArrays:
+    """
+    Distribution d'un ou plusieurs deals, stockée en tableaux
+
+    Les montants sont de forme (n_deals, n_dates) ; `step_amounts` est de forme
+    (n_étapes, n_deals, n_dates) et `step_gp_shares` donne la part GP de chaque étape.
+    """
+
+    def __init__(
+        self,
+        times: np.ndarray,
+        contributions: np.ndarray,
+        distributions: np.ndarray,
+        steps: List[str],
+        step_gp_shares: np.ndarray,
+        step_amounts: np.ndarray,
+        pref_balance: np.ndarray
+    ):
+        self.times = times
+        self.contributions = contributions
+        self.distributions = distributions
+        self.steps = steps
+        self.step_gp_shares = step_gp_shares
+        self.step_amounts = step_amounts
+        self.pref_balance = pref_balance
+
+    @property
+    def promote(self) -> np.ndarray:
+        """Promote GP par deal et par date"""
+        return np.einsum("s,sdt->dt", self.step_gp_shares, self.step_amounts)
+
+    @property
+    def investor(self) -> np.ndarray:
+        """Distributions aux investisseurs (LP + co-investissement GP) par deal et par date"""
+        return self.distributions - self.promote
+
+    def step_totals(self) -> List[Dict[str, Any]]:
+        """Montant distribué par étape (total, investisseurs, GP)"""
+        totals = self.step_amounts.sum(axis=(1, 2))
+        return [
+            {
+                "step": step,
+                "gp_share": float(gp_share),
+                "amount": float(total),
+                "investor_amount": float(total * (1 - gp_share)),
+                "gp_amount": float(total * gp_share),
+            }
+            for step, gp_share, total in zip(self.steps, self.step_gp_shares, totals)
+        ]
+
+
+def validate_structure(
+    preferred_return: float,
+    tiers: Sequence[Dict[str, Any]],
+    catch_up: Optional[Dict[str, float]] = None
+) -> None:
+    """
+    Vérifie la cohérence des paliers
+
+    Raises:
+        ValueError: Paliers non croissants, parts hors [0, 1[ ou catch-up incohérent
+    """
+    if not tiers:
+        raise ValueError("Au moins un palier de partage est requis")
+    if preferred_return <= -1:
+        raise ValueError("preferred_return doit être > -100%")
+
+    previous = preferred_return
+    for i, tier in enumerate(tiers):
+        if not 0 <= tier["gp_share"] < 1:
+            raise ValueError(f"Palier {i + 1}: gp_share doit être entre 0 et 1 (exclu)")
+        hurdle = tier.get("hurdle_irr")
+        if hurdle is None and i < len(tiers) - 1:
+            raise ValueError("Seul le dernier palier peut être sans hurdle")
+        if hurdle is not None:
+            if hurdle <= previous:
+                raise ValueError("Les hurdles doivent être strictement croissants (au-delà du rendement préférentiel)")
+            previous = hurdle
+
+    if catch_up:
+        rate, target = catch_up.get("rate", 1.0), catch_up["target_share"]
+        if not 0 < target < 1 or not 0 < rate <= 1:
+            raise ValueError("catch_up: rate dans ]0, 1] et target_share dans ]0, 1[ requis")
+        if rate <= target:
+            raise ValueError("catch_up: rate doit être > target_share")
+
+
+def run_waterfall(
+    times: np.ndarray,
+    contributions: np.ndarray,
+    distributions: np.ndarray,
+    preferred_return: float = 0.08,
+    tiers: Optional[Sequence[Dict[str, Any]]] = None,
+    catch_up: Optional[Dict[str, float]] = None
+) -> WaterfallArrays:
+    """
+    Distribue les flux de chaque deal : capital, rendement préférentiel, catch-up, paliers
+
+    Un hurdle de TRI h est atteint quand la valeur actualisée au taux h des distributions
+    investisseurs couvre celle des apports. Les apports actualisés sont cumulés pour toutes
+    les dates et tous les hurdles en une passe (cumsum sur (deals, hurdles, dates)) ; seules
+    les dates de distribution sont parcourues, chaque étape étant vectorisée sur les deals.
+
+    Args:
+        times: Temps en années depuis la 1ère date (n_dates,)
+        contributions: Apports investisseurs >= 0 (n_deals, n_dates)
+        distributions: Flux distribuables >= 0 (n_deals, n_dates)
+        preferred_return: Rendement préférentiel (TRI, ex: 0.08)
+        tiers: Paliers [{"hurdle_irr": 0.12, "gp_share": 0.20}, {"hurdle_irr": None, "gp_share": 0.30}]
+               gp_share s'applique jusqu'à ce que le TRI investisseur atteigne hurdle_irr ;
+               le dernier palier reçoit le solde
+        catch_up: {"rate": 1.0, "target_share": 0.20} — part des flux au GP jusqu'à ce que son
+                  promote atteigne target_share du profit cumulé
+
+    Returns:
+        WaterfallArrays
+    """
+    tiers = list(tiers or DEFAULT_TIERS)
+    validate_structure(preferred_return, tiers, catch_up)
+
+    times = np.asarray(times, dtype=float)
+    contributions = np.atleast_2d(np.asarray(contributions, dtype=float))
+    distributions = np.atleast_2d(np.asarray(distributions, dtype=float))
+    if contributions.shape != distributions.shape or contributions.shape[1] != times.size:
+        raise ValueError("contributions et distributions doivent avoir la forme (n_deals, n_dates)")
+    if np.any(contributions < 0) or np.any(distributions < 0):
+        raise ValueError("Les apports et distributions doivent être positifs")
+
+    # Plan de distribution : (nom, part GP, index du hurdle ou None)
+    hurdles = [preferred_return]
+    plan: List[Tuple[str, float, Optional[int]]] = [(STEP_CAPITAL, 0.0, None), (STEP_PREFERRED, 0.0, 0)]
+    if catch_up:
+        plan.append((STEP_CATCH_UP, float(catch_up.get("rate", 1.0)), None))
+    for i, tier in enumerate(tiers):
+        hurdle_index = None
+        if tier.get("hurdle_irr") is not None and i < len(tiers) - 1:
+            hurdles.append(tier["hurdle_irr"])
+            hurdle_index = len(hurdles) - 1
+        plan.append((f"tier_{i + 1}", float(tier["gp_share"]), hurdle_index))
+
+    n_deals, n_dates = contributions.shape
+    discount = (1 + np.asarray(hurdles))[:, None] ** -times[None, :]  # (hurdles, dates)
+    contributed_pv = np.cumsum(contributions[:, None, :] * discount[None], axis=2)
+    contributed = np.cumsum(contributions, axis=1)
+
+    step_amounts = np.zeros((len(plan), n_deals, n_dates))
+    investor_pv = np.zeros((n_deals, len(hurdles)))
+    investor_total = np.zeros(n_deals)
+    promote_total = np.zeros(n_deals)
+    target_ratio = catch_up["target_share"] / (1 - catch_up["target_share"]) if catch_up else 0.0
+
+    for j in np.flatnonzero(distributions.any(axis=0)):
+        remaining = distributions[:, j].copy()
+        factors = discount[:, j]
+
+        for step, (name, gp_share, hurdle_index) in enumerate(plan):
+            if remaining.max() <= 1e-9:
+                break
+            if name == STEP_CAPITAL:
+                amount = np.minimum(remaining, np.maximum(contributed[:, j] - investor_total, 0.0))
+            elif name == STEP_CATCH_UP:
+                profit = investor_total - contributed[:, j]
+                needed = (target_ratio * profit - promote_total) / (gp_share - target_ratio * (1 - gp_share))
+                amount = np.clip(needed, 0.0, remaining)
+            elif hurdle_index is None:
+                amount = remaining.copy()
+            else:
+                # Montant qui porte le TRI investisseur au hurdle, compte tenu de la part GP
+                deficit = (contributed_pv[:, hurdle_index, j] - investor_pv[:, hurdle_index]) / factors[hurdle_index]
+                amount = np.minimum(remaining, np.maximum(deficit, 0.0) / (1 - gp_share))
+
+            investor_amount = amount * (1 - gp_share)
+            step_amounts[step, :, j] = amount
+            investor_pv += investor_amount[:, None] * factors[None, :]
+            investor_total += investor_amount
+            promote_total += amount * gp_share
+            remaining -= amount
+
+    step_gp_shares = np.array([gp_share for _, gp_share, _ in plan])
+    investor = distributions - np.einsum("s,sdt->dt", step_gp_shares, step_amounts)
+
+    # Solde du rendement préférentiel (capital + pref non servis), valorisé à chaque date
+    pref_discount = discount[0]
+    outstanding_pv = contributed_pv[:, 0, :] - np.cumsum(investor * pref_discount, axis=1)
+    pref_balance = np.maximum(outstanding_pv / pref_discount, 0.0)
+
+    return WaterfallArrays(
+        times=times,
+        contributions=contributions,
+        distributions=distributions,
+        steps=[name for name, _, _ in plan],
+        step_gp_shares=step_gp_shares,
+        step_amounts=step_amounts,
+        pref_balance=pref_balance,
+    )
+
+
+def as_event_matrices(
+    contributions: Sequence[Dict[str, Any]],
+    distributions: Sequence[Dict[str, Any]]
+) -> Tuple[np.ndarray, List[str], np.ndarray, np.ndarray]:
+    """
+    Place des flux datés {"date", "amount", "deal"} sur une grille commune
+
+    Returns:
+        (dates datetime64[D] (n_dates,), deals, apports (n_deals, n_dates), distributions (n_deals, n_dates))
+    """
+    events = [(flow, 0) for flow in contributions] + [(flow, 1) for flow in distributions]
+    if not events:
+        raise ValueError("Aucun flux")
+
+    all_dates = np.array([str(flow["date"])[:10] for flow, _ in events], dtype="datetime64[D]")
+    dates, date_index = np.unique(all_dates, return_inverse=True)
+    deal_keys = [str(flow.get("deal") or "fund") for flow, _ in events]
+    deals = sorted(set(deal_keys))
+    deal_index = np.array([deals.index(key) for key in deal_keys])
+
+    matrices = np.zeros((2, len(deals), dates.size))
+    kinds = np.array([kind for _, kind in events])
+    amounts = np.array([float(flow["amount"]) for flow, _ in events])
+    np.add.at(matrices, (kinds, deal_index, date_index), amounts)
+
+    return dates, deals, matrices[0], matrices[1]
+
+
+def promote_payout(
+    profits: np.ndarray,
+    thresholds: np.ndarray,
+    gp_shares: np.ndarray
+) -> np.ndarray:
+    """
+    Promote GP en forme fermée d'un waterfall sans dates (profit cumulé par palier)
+
+    La part GP est linéaire par morceaux en profit : entre deux points de bascule
+    consécutifs, elle croît de gp_share x profit. On évalue donc
+    somme_k gp_share_k x clip(profit - bas_k, 0, haut_k - bas_k) par diffusion NumPy,
+    sans reconstruire le waterfall pour chaque point.
+
+    Args:
+        profits: Profits à distribuer, diffusables contre les paliers (..., n_profits)
+        thresholds: Points de bascule en profit (..., n_paliers - 1), croissants
+        gp_shares: Part GP de chaque palier (..., n_paliers)
+
+    Returns:
+        Promote GP de même forme que la diffusion de `profits`
+    """
+    profits = np.asarray(profits, dtype=float)
+    thresholds = np.asarray(thresholds, dtype=float)
+    gp_shares = np.asarray(gp_shares, dtype=float)
+
+    zero = np.zeros(thresholds.shape[:-1] + (1,))
+    lower = np.concatenate([zero, thresholds], axis=-1)
+    upper = np.concatenate([thresholds, np.full_like(zero, np.inf)], axis=-1)
+    width = upper - lower
+
+    # (..., n_profits, n_paliers) : profit servi dans chaque palier
+    served = np.clip(profits[..., None] - lower[..., None, :], 0.0, width[..., None, :])
+    return (served * np.broadcast_to(gp_shares, width.shape)[..., None, :]).sum(axis=-1)
@@ -5,8 +5,21 @@ Pour la distribution de profits entre LP (Limited Partners) et GP (General Partn
 from typing import Dict, Any, List, Optional
 import logging
 
+import numpy as np
+
+from app.core.memoize import memoize
+from app.services.irr_solver import xirr_batch
+from app.services.waterfall_engine import (
+    WATERFALL_STYLES,
+    as_event_matrices,
+    promote_payout,
+    run_waterfall,
+)
+
 logger = logging.getLogger(__name__)
 
+PROMOTE_SURFACE_PARAMETERS = ("hurdle_rate", "promote_share")
+
 
 class WaterfallService:
     """
@@ -22,6 +35,7 @@ class WaterfallService:
     - > Hurdle : 80% LP / 20% GP (Promote)
     """
     
+    @memoize("waterfall.calculate_waterfall_simple")
     def calculate_waterfall_simple(
         self,
         lp_contrib: float,
@@ -201,6 +215,7 @@ class WaterfallService:
         
         return result
     
+    @memoize("waterfall.calculate_waterfall_advanced")
     def calculate_waterfall_advanced(
         self,
         total_profit: float,
@@ -234,7 +249,7 @@ class WaterfallService:
         # Trier les paliers par seuil croissant
         sorted_tiers = sorted(tiers, key=lambda x: x["threshold_irr"])
         
-        # Calcul IRR réalisé
+        # Approximation sans dates (multiple - 1) ; TRI réel : calculate_waterfall_timeseries
         total_distributed = equity_invested + total_profit
         actual_irr = (total_distributed / equity_invested) - 1
         
@@ -320,6 +335,124 @@ class WaterfallService:
             }
         }
     
+    @memoize("waterfall.calculate_waterfall_timeseries")
+    def calculate_waterfall_timeseries(
+        self,
+        contributions: List[Dict[str, Any]],
+        distributions: List[Dict[str, Any]],
+        preferred_return: float = 0.08,
+        tiers: Optional[List[Dict[str, Any]]] = None,
+        catch_up: Optional[Dict[str, float]] = None,
+        style: str = "european",
+        gp_commitment_pct: float = 0.0,
+        clawback: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Waterfall daté : hurdles sur le TRI réel, catch-up, paliers, clawback
+        
+        - european : waterfall unique sur l'ensemble du fonds (capital + pref de tous
+          les deals avant tout promote)
+        - american : waterfall deal par deal (promote perçu plus tôt) ; avec clawback,
+          le GP restitue en fin de fonds l'excédent par rapport au calcul européen
+        
+        Args:
+            contributions: Apports [{"date": "2024-01-15", "amount": 1000000, "deal": "A"}]
+            distributions: Flux distribuables [{"date": ..., "amount": ..., "deal": "A"}]
+            preferred_return: Rendement préférentiel (TRI)
+            tiers: Paliers [{"hurdle_irr": 0.12, "gp_share": 0.20}, {"hurdle_irr": None, "gp_share": 0.30}]
+            catch_up: {"rate": 1.0, "target_share": 0.20} (optionnel)
+            style: "european" ou "american"
+            gp_commitment_pct: Part du capital apportée par le GP (pari passu)
+            clawback: Restitution du promote excédentaire (american)
+        
+        Returns:
+            Totaux LP / GP, TRI et multiples, détail par étape et échéancier par date
+        """
+        if style not in WATERFALL_STYLES:
+            raise ValueError(f"Style inconnu: {style}. Valeurs acceptées: {', '.join(WATERFALL_STYLES)}")
+        if not 0 <= gp_commitment_pct < 1:
+            raise ValueError("gp_commitment_pct doit être entre 0 et 1 (exclu)")
+        
+        dates, deals, contrib, distrib = as_event_matrices(contributions, distributions)
+        times = (dates - dates[0]).astype(float) / 365.0
+        
+        fund = run_waterfall(
+            times, contrib.sum(axis=0), distrib.sum(axis=0), preferred_return, tiers, catch_up
+        )
+        european_promote = fund.promote.sum(axis=0)
+        
+        if style == "american":
+            by_deal = run_waterfall(times, contrib, distrib, preferred_return, tiers, catch_up)
+            promote = by_deal.promote.sum(axis=0)
+            steps = by_deal.step_totals()
+            pref_balance = by_deal.pref_balance.sum(axis=0)
+            deal_promote = by_deal.promote.sum(axis=1)
+        else:
+            promote = european_promote
+            steps = fund.step_totals()
+            pref_balance = fund.pref_balance[0]
+            deal_promote = None
+        
+        # Clawback : restitution en fin de fonds de l'excédent de promote
+        clawback_amount = 0.0
+        if style == "american" and clawback:
+            clawback_amount = max(float(promote.sum() - european_promote.sum()), 0.0)
+        promote = promote.copy()
+        promote[-1] -= clawback_amount
+        
+        total_contrib = contrib.sum(axis=0)
+        investor = distrib.sum(axis=0) - promote
+        lp_share = 1 - gp_commitment_pct
+        lp_flows = lp_share * (investor - total_contrib)
+        gp_flows = gp_commitment_pct * (investor - total_contrib) + promote
+        
+        rates = xirr_batch([dates, dates], [lp_flows, gp_flows])
+        
+        def multiple(paid_in: float, distributed: float) -> Optional[float]:
+            return distributed / paid_in if paid_in > 0 else None
+        
+        lp_paid_in = float(total_contrib.sum() * lp_share)
+        gp_paid_in = float(total_contrib.sum() * gp_commitment_pct)
+        lp_distributed = float(investor.sum() * lp_share)
+        gp_distributed = float(investor.sum() * gp_commitment_pct + promote.sum())
+        
+        return {
+            "style": style,
+            "preferred_return": preferred_return,
+            "total_contributed": float(total_contrib.sum()),
+            "total_distributed": float(distrib.sum()),
+            "LP": {
+                "paid_in": lp_paid_in,
+                "distributed": lp_distributed,
+                "profit": lp_distributed - lp_paid_in,
+                "irr": rates.to_list()[0]["tri"],
+                "multiple": multiple(lp_paid_in, lp_distributed),
+            },
+            "GP": {
+                "paid_in": gp_paid_in,
+                "distributed": gp_distributed,
+                "promote": float(promote.sum()),
+                "irr": rates.to_list()[1]["tri"] if gp_paid_in > 0 else None,
+                "multiple": multiple(gp_paid_in, gp_distributed),
+            },
+            "clawback": clawback_amount,
+            "european_promote": float(european_promote.sum()),
+            "deals": (
+                {deal: float(amount) for deal, amount in zip(deals, deal_promote)}
+                if deal_promote is not None else None
+            ),
+            "steps": steps,
+            "timeline": {
+                "date": [str(d) for d in dates],
+                "contributions": total_contrib.tolist(),
+                "distributions": distrib.sum(axis=0).tolist(),
+                "investor": investor.tolist(),
+                "gp_promote": promote.tolist(),
+                "pref_balance": np.round(pref_balance, 2).tolist(),
+            },
+        }
+    
+    @memoize("waterfall.calculate_promote_sensitivity")
     def calculate_promote_sensitivity(
         self,
         equity_invested: float,
@@ -330,30 +463,96 @@ class WaterfallService:
         """
         Analyse de sensibilité : impact du profit sur la distribution
         
+        Même partage que calculate_waterfall_simple (100% LP jusqu'au hurdle, promote
+        au-delà), évalué en forme fermée sur tous les profits à la fois.
+        
         Utile pour visualiser l'effet du promote selon différents scénarios
         """
+        if equity_invested <= 0:
+            raise ValueError("Le capital investi doit être positif")
         
-        results = []
+        profits = np.asarray(profit_range, dtype=float)
+        if np.any(profits < 0):
+            raise ValueError("Le profit total ne peut pas être négatif")
         
-        for profit in profit_range:
-            waterfall = self.calculate_waterfall_simple(
-                lp_contrib=equity_invested,
-                gp_investment=0,
-                profit=profit,
-                hurdle_rate=hurdle_rate,
-                gp_share_above_hurdle=promote_share
+        hurdle_profit = equity_invested * hurdle_rate
+        gp_promote = promote_payout(profits, [hurdle_profit], [0.0, promote_share])
+        lp_total = equity_invested + profits - gp_promote
+        
+        return [
+            {
+                "profit": float(profit),
+                "irr": float(profit / equity_invested),
+                "lp_total": float(lp),
+                "gp_total": float(gp),
+                "gp_promote": float(gp),
+                "scenario": "BELOW_HURDLE" if profit <= hurdle_profit else "ABOVE_HURDLE"
+            }
+            for profit, lp, gp in zip(profits, lp_total, gp_promote)
+        ]
+    
+    @memoize("waterfall.calculate_promote_surface")
+    def calculate_promote_surface(
+        self,
+        equity_invested: float,
+        profit_range: List[float],
+        parameter: str,
+        values: List[float],
+        hurdle_rate: float = 0.10,
+        promote_share: float = 0.20
+    ) -> Dict[str, Any]:
+        """
+        Surface de sensibilité 2D du promote : profit x hurdle ou profit x part de promote
+        
+        Les points de bascule sont calculés une fois par valeur du paramètre, puis
+        toute la grille est évaluée par diffusion (waterfall_engine.promote_payout).
+        
+        Args:
+            equity_invested: Capital investi
+            profit_range: Profits à distribuer (colonnes)
+            parameter: "hurdle_rate" ou "promote_share" (lignes)
+            values: Valeurs du paramètre
+            hurdle_rate: Hurdle fixe si parameter = "promote_share"
+            promote_share: Part GP fixe si parameter = "hurdle_rate"
+        
+        Returns:
+            Matrices (n_values x n_profits) : promote GP, total LP, rendement LP
+        """
+        if parameter not in PROMOTE_SURFACE_PARAMETERS:
+            raise ValueError(
+                f"Paramètre inconnu: {parameter}. Valeurs acceptées: {', '.join(PROMOTE_SURFACE_PARAMETERS)}"
             )
-            
-            results.append({
-                "profit": profit,
-                "irr": waterfall["actual_irr"],
-                "lp_total": waterfall["distribution"]["LP"]["total"],
-                "gp_total": waterfall["distribution"]["GP"]["total"],
-                "gp_promote": waterfall["distribution"]["GP"].get("promote", 0),
-                "scenario": waterfall["distribution"]["scenario"]
-            })
-        
-        return results
+        if equity_invested <= 0:
+            raise ValueError("Le capital investi doit être positif")
+        
+        profits = np.asarray(profit_range, dtype=float)
+        axis_values = np.asarray(values, dtype=float)
+        if np.any(profits < 0):
+            raise ValueError("Le profit total ne peut pas être négatif")
+        
+        if parameter == "hurdle_rate":
+            hurdles = axis_values
+            shares = np.full_like(axis_values, promote_share)
+        else:
+            hurdles = np.full_like(axis_values, hurdle_rate)
+            shares = axis_values
+        if np.any((shares < 0) | (shares > 1)):
+            raise ValueError("La part de promote doit être entre 0 et 1")
+        
+        breakpoints = equity_invested * hurdles
+        gp_shares = np.stack([np.zeros_like(shares), shares], axis=-1)
+        gp_promote = promote_payout(profits[None, :], breakpoints[:, None], gp_shares)
+        lp_total = equity_invested + profits[None, :] - gp_promote
+        
+        return {
+            "parameter": parameter,
+            "values": axis_values.tolist(),
+            "profits": profits.tolist(),
+            "breakpoints": breakpoints.tolist(),
+            "gp_promote": gp_promote.tolist(),
+            "lp_total": lp_total.tolist(),
+            "lp_return": (lp_total / equity_invested - 1).tolist(),
+        }
 
 
 # Instance globale
@@ -0,0 +1,86 @@
+"""
+Benchmark : index local des projets CAPEX historiques
+
+Mesure l'indexation en lot et la latence d'une recherche top-k (exacte, approchée,
+filtrée par typologie) sur des corpus synthétiques de tailles croissantes.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_capex_index
+"""
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.capex_index import CapexHistoryIndex
+
+
+WORDS = [
+    "réhabilitation", "immeuble", "haussmannien", "bureaux", "logements", "façade", "toiture",
+    "construction", "neuve", "parking", "transformation", "commerce", "isolation", "ascenseur",
+    "appartements", "entrepôt", "hôtel", "Paris", "Lyon", "Bordeaux", "Lille", "Nantes",
+]
+
+TYPOLOGIES = ["NEUF", "RENOVATION", "CONVERSION"]
+
+QUERY = "réhabilitation d'un immeuble haussmannien, façade et toiture à reprendre"
+
+
+def generate_records(n_projects: int, seed: int = 42):
+    """Descriptions de 6 à 14 mots tirés au hasard"""
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "project_id": i,
+            "description": " ".join(rng.choice(WORDS, int(rng.integers(6, 15)))),
+            "typologie": TYPOLOGIES[i % len(TYPOLOGIES)],
+            "surface": float(rng.uniform(200, 5000)),
+        }
+        for i in range(n_projects)
+    ]
+
+
+def median_ms(search, repeat: int = 20) -> float:
+    search()  # Pages de la matrice chargées
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        search()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def run(sizes=(1_000, 10_000, 100_000)) -> None:
+    print(
+        f"{'projets':>8} | {'indexation (s)':>14} | {'exacte (ms)':>11} | "
+        f"{'filtrée (ms)':>12} | {'approchée (ms)':>14} | {'rappel@1':>8}"
+    )
+
+    for size in sizes:
+        records = generate_records(size)
+        with tempfile.TemporaryDirectory() as directory:
+            index = CapexHistoryIndex(directory)
+
+            start = time.perf_counter()
+            index.add(records)
+            add_time = time.perf_counter() - start
+
+            exact = median_ms(lambda: index.search(QUERY, k=5))
+            filtered = median_ms(lambda: index.search(QUERY, k=5, typologie="RENOVATION"))
+            index.build_approximate()
+            approximate = median_ms(lambda: index.search(QUERY, k=5, approximate=True))
+
+            queries = [records[i]["description"] for i in range(0, size, max(1, size // 100))]
+            recall = np.mean([
+                index.search(q, k=1, approximate=True)[0]["score"] >= index.search(q, k=1)[0]["score"]
+                for q in queries
+            ])
+
+        print(
+            f"{size:>8} | {add_time:>14.2f} | {exact:>11.2f} | "
+            f"{filtered:>12.2f} | {approximate:>14.2f} | {recall:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    run()
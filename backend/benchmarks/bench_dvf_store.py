@@ -0,0 +1,170 @@
+"""
+Benchmark : base DVF locale
+
+Génère un fichier brut synthétique au format data.gouv.fr (séparateur |), mesure
+l'ingestion (durée, pic mémoire) puis la latence des requêtes du service DVF.
+Avec --geo : fichier geo-dvf (coordonnées) et recherche des comparables par rayon.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_dvf_store
+    python -m benchmarks.bench_dvf_store 3000000
+    python -m benchmarks.bench_dvf_store --geo 3000000
+"""
+import asyncio
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.services.dvf_service import DVFService
+from app.services.dvf_store import DVFStore, DVF_TYPES
+
+
+GEO_HEADER = (
+    "id_mutation,date_mutation,nature_mutation,valeur_fonciere,adresse_numero,adresse_nom_voie,"
+    "code_commune,nom_commune,code_departement,type_local,surface_reelle_bati,nombre_pieces_principales,"
+    "longitude,latitude"
+)
+
+PARIS = (48.8566, 2.3522)
+
+
+HEADER = (
+    "Identifiant de document|Date mutation|Nature mutation|Valeur fonciere|No voie|B/T/Q|Type de voie|"
+    "Code voie|Voie|Code postal|Commune|Code departement|Code commune|Code type local|Type local|"
+    "Surface reelle bati|Nombre pieces principales"
+)
+
+
+def write_raw_file(path: str, n_rows: int, seed: int = 42, block: int = 200_000) -> None:
+    """Ventes réparties sur 95 départements x 300 communes, 2023-2024"""
+    rng = np.random.default_rng(seed)
+    start = date(2023, 1, 1)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(HEADER + "\n")
+        for offset in range(0, n_rows, block):
+            n = min(block, n_rows - offset)
+            departements = rng.integers(1, 96, n)
+            communes = rng.integers(1, 300, n)
+            # Paris surreprésenté, comme dans les fichiers réels
+            paris = rng.random(n) < 0.05
+            departements[paris], communes[paris] = 75, 56
+            days = rng.integers(0, 730, n)
+            types = rng.integers(0, 4, n)
+            surfaces = rng.integers(15, 200, n)
+            prices = surfaces * rng.uniform(1500, 12000, n)
+            lines = [
+                f"|{(start + timedelta(days=int(d))).strftime('%d/%m/%Y')}|Vente|{p:.2f}".replace(".", ",")
+                + f"|{i % 120}||RUE|0001|DES LILAS|00000|VILLE|{dep:02d}|{com}|1|{DVF_TYPES[t]}|{s}|{s // 20}"
+                for i, d, p, dep, com, t, s in zip(
+                    range(offset, offset + n), days.tolist(), prices.tolist(), departements.tolist(),
+                    communes.tolist(), types.tolist(), surfaces.tolist()
+                )
+            ]
+            f.write("\n".join(lines) + "\n")
+
+
+def write_geo_file(path: str, n_rows: int, seed: int = 42, block: int = 200_000) -> None:
+    """Ventes géolocalisées sur la métropole, 20 % dans un rayon de 10 km autour de Paris"""
+    rng = np.random.default_rng(seed)
+    start = date(2023, 1, 1)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(GEO_HEADER + "\n")
+        for offset in range(0, n_rows, block):
+            n = min(block, n_rows - offset)
+            latitudes = rng.uniform(43.0, 50.5, n)
+            longitudes = rng.uniform(-1.5, 7.5, n)
+            paris = rng.random(n) < 0.2
+            latitudes[paris] = PARIS[0] + rng.normal(0, 0.045, paris.sum())
+            longitudes[paris] = PARIS[1] + rng.normal(0, 0.07, paris.sum())
+            days = rng.integers(0, 730, n)
+            types = rng.integers(0, 2, n)
+            surfaces = rng.integers(15, 200, n)
+            prices = surfaces * rng.uniform(1500, 12000, n)
+            lines = [
+                f"{i},{(start + timedelta(days=d)).isoformat()},Vente,{p:.0f},{i % 120},RUE DES LILAS,"
+                f"{'75056' if is_paris else '33063'},X,75,{DVF_TYPES[t]},{s},{s // 20},{lon:.6f},{lat:.6f}"
+                for i, d, p, t, s, lat, lon, is_paris in zip(
+                    range(offset, offset + n), days.tolist(), prices.tolist(), types.tolist(),
+                    surfaces.tolist(), latitudes.tolist(), longitudes.tolist(), paris.tolist()
+                )
+            ]
+            f.write("\n".join(lines) + "\n")
+
+
+def run_geo(n_rows: int = 1_000_000) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "geo-dvf.csv")
+        write_geo_file(source, n_rows)
+        store = DVFStore(os.path.join(directory, "dvf"))
+
+        start = time.perf_counter()
+        store.ingest([source])
+        print(f"geo-dvf : {n_rows} ventes, ingestion {time.perf_counter() - start:.1f} s")
+
+        start = time.perf_counter()
+        store.nearest(*PARIS, "Appartement", rayon_km=1.0, k=1)
+        print(f"Construction de l'arbre k-d (1er appel) : {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        service = DVFService(store)
+        print(f"{'requête (Paris centre)':<40} {'ventes du rayon':>15} {'ms':>8}")
+        for rayon_km in (0.5, 1.0, 2.0):
+            in_radius = store.count_nearby(*PARIS, "Appartement", rayon_km=rayon_km)
+            timing = median_ms(lambda: store.nearest(
+                *PARIS, "Appartement", rayon_km=rayon_km, k=30, surface=60, pieces=3, date_min=date(2023, 1, 1)
+            ))
+            print(f"{f'30 plus pertinentes, rayon {rayon_km} km':<40} {in_radius:>15} {timing:>8.2f}")
+        timing = median_ms(lambda: asyncio.run(
+            service.calculate_market_value("", 60, "Paris", latitude=PARIS[0], longitude=PARIS[1], nombre_pieces=3)
+        ))
+        print(f"{'valeur de marché par proximité':<40} {'':>15} {timing:>8.2f}")
+
+
+def median_ms(call, repeat: int = 20) -> float:
+    call()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def run(n_rows: int = 1_000_000) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "valeursfoncieres.txt")
+        write_raw_file(source, n_rows)
+        size_mb = os.path.getsize(source) / 1e6
+
+        store = DVFStore(os.path.join(directory, "dvf"))
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        start = time.perf_counter()
+        stats = store.ingest([source])
+        ingest_time = time.perf_counter() - start
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        print(f"Fichier : {n_rows} lignes, {size_mb:.0f} Mo")
+        print(f"Ingestion : {ingest_time:.1f} s, {stats['rows']} ventes, pic RSS {rss_after:.0f} Mo "
+              f"(avant : {rss_before:.0f} Mo)")
+
+        service = DVFService(store)
+        paris = store.count("75056", "Appartement")
+        print(f"Paris, appartements : {paris} ventes")
+        print(f"{'requête':<32} {'ms':>8}")
+        for label, call in [
+            ("valeur de marché (Paris)", lambda: asyncio.run(service.calculate_market_value("", 60, "Paris"))),
+            ("tendance (Paris)", lambda: asyncio.run(service.analyze_market_trend("Paris"))),
+            ("50 comparables (Paris)", lambda: asyncio.run(service.search_comparables("Paris"))),
+            ("statistiques (petite commune)", lambda: store.price_stats("33120", "Maison")),
+        ]:
+            print(f"{label:<32} {median_ms(call):>8.2f}")
+
+
+if __name__ == "__main__":
+    arguments = [argument for argument in sys.argv[1:] if argument != "--geo"]
+    size = int(arguments[0]) if arguments else 1_000_000
+    run_geo(size) if "--geo" in sys.argv else run(size)
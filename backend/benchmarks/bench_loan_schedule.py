@@ -0,0 +1,83 @@
+"""
+Benchmark : tableau d'amortissement boucle Python vs moteur NumPy vectorisé
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_loan_schedule
+"""
+import time
+from typing import Callable
+
+import numpy as np
+
+from app.services.amortization_engine import build_loan_schedules
+
+
+def legacy_classic_schedule(loan_amount: float, annual_rate: float, years: int) -> list:
+    """Implémentation historique (boucle mois par mois, cumul d'intérêts en O(n²))"""
+    monthly_rate = annual_rate / 12
+    total_months = years * 12
+    monthly_payment = loan_amount * (
+        monthly_rate * (1 + monthly_rate) ** total_months
+    ) / ((1 + monthly_rate) ** total_months - 1)
+    remaining_capital = loan_amount
+    schedule = []
+
+    for month in range(1, total_months + 1):
+        interest = remaining_capital * monthly_rate
+        principal = monthly_payment - interest
+        remaining_capital -= principal
+        if remaining_capital < 0.01:
+            remaining_capital = 0
+        schedule.append({
+            "month": month,
+            "payment": round(monthly_payment, 2),
+            "principal": round(principal, 2),
+            "interest": round(interest, 2),
+            "remaining_capital": round(remaining_capital, 2),
+            "cumulative_principal": round(loan_amount - remaining_capital, 2),
+            "cumulative_interest": round(sum(s["interest"] for s in schedule) + interest, 2)
+        })
+
+    return schedule
+
+
+def _best_of(func: Callable[[], object], repeat: int = 5) -> float:
+    """Meilleur temps sur `repeat` exécutions (secondes)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(batch_sizes=(1, 10, 1000), years: int = 25) -> None:
+    rng = np.random.default_rng(42)
+    print(f"Prêts classiques {years} ans ({years * 12} lignes par tableau)")
+    print(f"{'lot':>6} | {'boucle (ms)':>12} | {'numpy (ms)':>11} | {'numpy+dicts (ms)':>16} | {'gain':>7}")
+
+    for size in batch_sizes:
+        amounts = rng.uniform(100_000, 2_000_000, size)
+        rates = rng.uniform(0.02, 0.06, size)
+        repeat = 1 if size >= 1000 else 5
+
+        legacy = _best_of(
+            lambda: [legacy_classic_schedule(a, r, years) for a, r in zip(amounts, rates)],
+            repeat
+        )
+        vectorized = _best_of(lambda: build_loan_schedules(amounts, rates, years), repeat)
+
+        def with_rows():
+            arrays = build_loan_schedules(amounts, rates, years)
+            return [arrays.to_rows(i) for i in range(size)]
+
+        rows = _best_of(with_rows, repeat)
+
+        print(
+            f"{size:>6} | {legacy * 1000:>12.2f} | {vectorized * 1000:>11.2f} | "
+            f"{rows * 1000:>16.2f} | {legacy / vectorized:>6.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    run()
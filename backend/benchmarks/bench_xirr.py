@@ -0,0 +1,90 @@
+"""
+Benchmark : XIRR scalaire (boucle Python + brentq) vs XIRR vectorisé (NumPy)
+
+Mesure la précision (écart max sur le taux) et le débit (séries / seconde)
+sur des projets à flux mensuels de durées différentes.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_xirr
+"""
+import time
+from datetime import date, timedelta
+from typing import List, Optional
+
+import numpy as np
+from scipy.optimize import brentq
+
+from app.services.irr_solver import xirr_batch, BRACKET_GRID
+
+
+def reference_xirr(dates: List[date], amounts: List[float]) -> Optional[float]:
+    """XIRR scalaire de référence : XNPV en Python pur, racine par brentq"""
+    first = min(dates)
+    years = [(d - first).days / 365.0 for d in dates]
+
+    def xnpv(rate: float) -> float:
+        return sum(amount / (1 + rate) ** t for amount, t in zip(amounts, years))
+
+    values = [xnpv(rate) for rate in BRACKET_GRID]
+    brackets = [
+        (BRACKET_GRID[i], BRACKET_GRID[i + 1])
+        for i in range(len(BRACKET_GRID) - 1)
+        if values[i] * values[i + 1] < 0
+    ]
+    if not brackets:
+        return None
+    low, high = min(brackets, key=lambda b: abs((b[0] + b[1]) / 2 - 0.1))
+    return brentq(xnpv, low, high, xtol=1e-12)
+
+
+def generate_projects(n_projects: int, seed: int = 42):
+    """Projets : acquisition, CAPEX phasé, loyers mensuels, sortie en cours d'année"""
+    rng = np.random.default_rng(seed)
+    all_dates, all_amounts = [], []
+
+    for _ in range(n_projects):
+        start = date(2024, 1, 1) + timedelta(days=int(rng.integers(0, 730)))
+        months = int(rng.integers(24, 121))
+        price = rng.uniform(5e5, 5e6)
+        capex = price * rng.uniform(0.05, 0.4)
+        works = int(rng.integers(3, 19))
+
+        dates = [start + timedelta(days=int(30.44 * m)) for m in range(months + 1)]
+        amounts = np.zeros(months + 1)
+        amounts[0] = -price
+        amounts[1:works + 1] -= capex / works
+        amounts[works + 1:] += price * rng.uniform(0.003, 0.006)
+        amounts[-1] += (price + capex) * rng.uniform(0.9, 1.5)
+
+        all_dates.append(dates)
+        all_amounts.append(amounts.tolist())
+
+    return all_dates, all_amounts
+
+
+def run(sizes=(10, 100, 1000)) -> None:
+    print(f"{'séries':>7} | {'scalaire (ms)':>13} | {'vectorisé (ms)':>14} | {'gain':>6} | {'écart max':>10}")
+
+    for size in sizes:
+        dates, amounts = generate_projects(size)
+
+        start = time.perf_counter()
+        reference = [reference_xirr(d, a) for d, a in zip(dates, amounts)]
+        scalar_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = xirr_batch(dates, amounts)
+        vector_time = time.perf_counter() - start
+
+        solved = np.array([r is not None for r in reference])
+        assert np.array_equal(solved, result.converged), "Statuts de convergence différents"
+        error = np.max(np.abs(np.array([r for r in reference if r is not None]) - result.rates[solved]))
+
+        print(
+            f"{size:>7} | {scalar_time * 1000:>13.1f} | {vector_time * 1000:>14.1f} | "
+            f"{scalar_time / vector_time:>5.0f}x | {error:>10.2e}"
+        )
+
+
+if __name__ == "__main__":
+    run()
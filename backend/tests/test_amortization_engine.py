@@ -0,0 +1,149 @@
+"""
+Tests du moteur d'amortissement vectorisé
+"""
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.amortization_engine import build_loan_schedules
+from app.services.financial_service import financial_service, AmortizationType
+
+
+class TestAmortizationEngine:
+    """Tests moteur NumPy (lots de tableaux)"""
+
+    def test_batch_shape_and_padding(self):
+        """Lot de prêts de durées différentes : colonnes (n_prêts, n_mois_max)"""
+        arrays = build_loan_schedules([100000, 200000], [0.04, 0.03], [10, 20])
+
+        assert len(arrays) == 2
+        assert arrays["payment"].shape == (2, 240)
+        # Au-delà de la durée du 1er prêt, tout est à 0
+        assert np.all(arrays["payment"][0, 120:] == 0)
+        assert arrays["remaining_capital"][0, 119] == 0
+        assert arrays["remaining_capital"][1, 239] == 0
+
+    def test_batch_matches_single_schedule(self):
+        """Chaque ligne du lot est identique au calcul unitaire"""
+        amounts = [150000, 300000, 500000]
+        rates = [0.035, 0.04, 0.05]
+        arrays = build_loan_schedules(amounts, rates, 25)
+        totals = arrays.totals()
+
+        for i, (amount, rate) in enumerate(zip(amounts, rates)):
+            single = financial_service.calculate_loan_schedule(amount, rate, 25)
+            assert arrays.to_rows(i) == single["schedule"]
+            assert round(float(totals["total_interest"][i]), 2) == single["total_interest"]
+
+    def test_cumulative_columns(self):
+        """Les cumuls sont des sommes cumulées des colonnes mensuelles"""
+        arrays = build_loan_schedules(
+            250000, 0.04, 20,
+            amortization_type="deferred",
+            deferred_months=12,
+            deferred_interest_capitalized=True
+        )
+
+        assert np.allclose(arrays["cumulative_interest"][0], np.cumsum(arrays["interest"][0]))
+        assert np.allclose(arrays["cumulative_principal"][0], np.cumsum(arrays["principal"][0]))
+        # Capital remboursé = capital initial + intérêts capitalisés
+        capitalized = 250000 * (1 + 0.04 / 12) ** 12
+        assert arrays["cumulative_principal"][0, -1] == pytest.approx(capitalized, abs=0.01)
+
+    def test_zero_rate(self):
+        """Taux nul : mensualité = capital / durée"""
+        arrays = build_loan_schedules(120000, 0.0, 10)
+
+        assert np.allclose(arrays["payment"][0], 1000)
+        assert float(arrays.totals()["total_interest"][0]) == 0
+
+    def test_in_fine_rows(self):
+        """Vue de compatibilité In-Fine (notes)"""
+        result = financial_service.calculate_loan_schedule(
+            100000, 0.04, 5, amortization_type=AmortizationType.IN_FINE
+        )
+
+        assert result["schedule"][0]["note"] == "Intérêts seuls"
+        assert result["schedule"][-1]["note"] == "Remboursement capital"
+        assert result["schedule"][-1]["principal"] == 100000
+
+    def test_invalid_deferral(self):
+        """Différé >= durée refusé"""
+        with pytest.raises(ValueError):
+            build_loan_schedules(100000, 0.04, 2, amortization_type="deferred", deferred_months=24)
+
+
+class TestLoanScheduleFormats:
+    """Tests formats colonnaire, pagination et NDJSON"""
+
+    def test_columnar_matches_rows(self):
+        """Le format colonnaire contient les mêmes valeurs que les lignes"""
+        rows = financial_service.calculate_loan_schedule(200000, 0.035, 20)["schedule"]
+        columns = financial_service.calculate_loan_schedule(
+            200000, 0.035, 20, schedule_format="columnar"
+        )["schedule"]
+
+        assert columns["month"] == [row["month"] for row in rows]
+        assert columns["payment"] == [row["payment"] for row in rows]
+        assert columns["remaining_capital"] == [row["remaining_capital"] for row in rows]
+
+    def test_cursor_pagination_covers_schedule(self):
+        """Les pages successives reconstituent le tableau complet"""
+        full = financial_service.calculate_loan_schedule(
+            150000, 0.04, 3, amortization_type="deferred", deferred_months=6
+        )["schedule"]
+
+        pages, cursor = [], 0
+        while cursor is not None:
+            page = financial_service.calculate_loan_schedule(
+                150000, 0.04, 3, amortization_type="deferred", deferred_months=6,
+                cursor=cursor, limit=10
+            )
+            pages.extend(page["schedule"])
+            cursor = page["pagination"]["next_cursor"]
+
+        assert pages == full
+        assert page["pagination"]["total_rows"] == 36
+
+    def test_invalid_format_and_cursor(self):
+        """Format inconnu ou curseur au-delà du tableau refusés"""
+        with pytest.raises(ValueError):
+            financial_service.calculate_loan_schedule(100000, 0.04, 5, schedule_format="xml")
+        with pytest.raises(ValueError):
+            financial_service.calculate_loan_schedule(100000, 0.04, 5, cursor=61)
+
+    def test_iter_rows_in_chunks(self):
+        """Itération par tranches identique à to_rows"""
+        arrays = build_loan_schedules(100000, 0.04, 5, amortization_type="in_fine")
+
+        assert list(arrays.iter_rows(0, chunk_size=7)) == arrays.to_rows(0)
+
+    def test_ndjson_endpoint(self):
+        """POST /financial/loan/schedule au format NDJSON"""
+        client = TestClient(app)
+        response = client.post("/api/financial/loan/schedule", json={
+            "loan_amount": 100000, "annual_rate": 0.04, "years": 2, "format": "ndjson"
+        })
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[0]["type"] == "header"
+        assert lines[0]["duration_months"] == 24
+        assert [line["month"] for line in lines[1:]] == list(range(1, 25))
+
+    def test_columnar_endpoint_paginated(self):
+        """POST /financial/loan/schedule colonnaire paginé"""
+        client = TestClient(app)
+        response = client.post("/api/financial/loan/schedule", json={
+            "loan_amount": 100000, "annual_rate": 0.04, "years": 2,
+            "format": "columnar", "cursor": 12, "limit": 6
+        })
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["schedule"]["month"] == list(range(13, 19))
+        assert data["pagination"]["next_cursor"] == 18
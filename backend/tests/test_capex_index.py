@@ -0,0 +1,215 @@
+"""
+Tests de l'index local des projets CAPEX historiques (similarité, persistance, libérations)
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.core.database import Base
+from app.models.project import Project
+from app.models.user import User
+from app.services import capex_index
+from app.services.capex_ai_service import capex_ai_service
+from app.services.capex_index import CapexHistoryIndex, INITIAL_CAPACITY, text_vector, text_vectors
+from app.services.privacy_shield_service import PrivacyShieldStatus, privacy_shield_service
+
+
+HISTORY = [
+    {
+        "project_id": 1,
+        "description": "Réhabilitation immeuble haussmannien 1200m2 Paris 17ème, 8 appartements, façade à refaire",
+        "typologie": "RENOVATION",
+        "city": "Paris",
+        "surface": 1200,
+        "total_capex": 463500,
+        "cost_per_m2": 386,
+        "capex_detail": {"facade_ravalement_simple": 180000, "electricite_renovation": 84000},
+    },
+    {
+        "project_id": 2,
+        "description": "Transformation bureaux 800m2 en logements Bordeaux centre, création 6 appartements",
+        "typologie": "CONVERSION",
+        "city": "Bordeaux",
+        "surface": 800,
+        "total_capex": 226000,
+        "cost_per_m2": 282,
+        "capex_detail": {"cloisons_creation": 18000, "plomberie_creation": 36000},
+    },
+    {
+        "project_id": 3,
+        "description": "Construction neuve 15 logements R+3 Lyon 3ème, parking souterrain",
+        "typologie": "NEUF",
+        "city": "Lyon",
+        "surface": 1500,
+        "total_capex": 1030000,
+        "cost_per_m2": 686,
+        "capex_detail": {"structure_beton": 450000, "ascenseur": 80000},
+    },
+    {
+        "project_id": 4,
+        "description": "Entrepôt logistique 5000m2, reprise toiture et dallage industriel",
+        "typologie": "RENOVATION",
+        "city": "Lille",
+        "surface": 5000,
+        "total_capex": 900000,
+        "cost_per_m2": 180,
+        "capex_detail": {"toiture": 400000},
+    },
+]
+
+
+class TestTextVectors:
+    """Tests du hachage des n-grammes"""
+
+    def test_batch_matches_single_and_is_normalized(self):
+        """Même vecteur en lot ou seul, norme 1, accents ignorés"""
+        texts = ["Façade à ravaler", "Toiture", ""]
+        batch = text_vectors(texts)
+
+        assert batch.shape == (3, 256)
+        np.testing.assert_allclose(batch[0], text_vector(texts[0]), atol=1e-6)
+        np.testing.assert_allclose(np.linalg.norm(batch[:2], axis=1), 1.0, atol=1e-6)
+        assert not batch[2].any()
+        np.testing.assert_allclose(text_vector("FACADE a ravaler"), batch[0], atol=1e-6)
+
+
+class TestCapexHistoryIndex:
+    """Tests de la recherche et du stockage"""
+
+    @pytest.fixture
+    def index(self, tmp_path):
+        index = CapexHistoryIndex(str(tmp_path / "index"))
+        index.add(HISTORY)
+        return index
+
+    def test_nearest_project(self, index):
+        """Le projet de même nature ressort en premier, scores décroissants"""
+        results = index.search("transformer un plateau de bureaux en logements à Bordeaux", k=3)
+
+        assert results[0]["project_id"] == 2
+        assert results[0]["capex_detail"] == {"cloisons_creation": 18000, "plomberie_creation": 36000}
+        assert [r["score"] for r in results] == sorted((r["score"] for r in results), reverse=True)
+        assert index.search("réhabilitation immeuble haussmannien, façade", k=1)[0]["project_id"] == 1
+
+    def test_typology_filter(self, index):
+        """Seuls les projets de la typologie demandée"""
+        results = index.search("toiture", k=5, typologie="renovation")
+
+        assert {r["project_id"] for r in results} == {1, 4}
+        assert results[0]["project_id"] == 4
+        assert index.search("toiture", typologie="HOTEL") == []
+
+    def test_persistence_and_upsert(self, index, tmp_path):
+        """Réouverture depuis le disque ; une mise à jour remplace le projet sans nouvelle ligne"""
+        index.add([{**HISTORY[3], "description": "Hôtel 40 chambres, rénovation complète", "typologie": "HOTEL"}])
+        assert len(index) == 4
+
+        reopened = CapexHistoryIndex(str(tmp_path / "index"))
+        assert len(reopened) == 4
+        assert reopened.search("rénovation hôtel chambres", k=1)[0]["project_id"] == 4
+        assert reopened.search("entrepôt", typologie="HOTEL")[0]["project_id"] == 4
+        np.testing.assert_allclose(
+            reopened.search("bureaux en logements", k=2)[0]["score"],
+            index.search("bureaux en logements", k=2)[0]["score"]
+        )
+
+    def test_empty_index_writes_nothing(self, tmp_path):
+        """Recherche sur un index vide : aucun fichier créé"""
+        index = CapexHistoryIndex(str(tmp_path / "empty"))
+
+        assert index.search("immeuble") == []
+        assert not (tmp_path / "empty").exists()
+
+    def test_growth_and_approximate_search(self, tmp_path):
+        """Capacité doublée au-delà de la taille initiale ; l'index approché retrouve le texte exact"""
+        rng = np.random.default_rng(0)
+        words = ["immeuble", "bureaux", "logements", "façade", "toiture", "parking", "commerce", "hôtel", "isolation"]
+        records = [
+            {"project_id": i, "description": " ".join(rng.choice(words, 6)) + f" lot {i}", "typologie": "RENOVATION"}
+            for i in range(INITIAL_CAPACITY + 500)
+        ]
+        index = CapexHistoryIndex(str(tmp_path / "large"))
+        index.add(records)
+
+        assert index.stats()["capacity"] == 2 * INITIAL_CAPACITY
+        assert index.build_approximate(n_lists=16) == 16
+        query = records[700]["description"]
+        assert index.search(query, k=1, approximate=True)[0]["project_id"] == 700
+
+        # Ajout après construction : affecté à une partition
+        index.add([{"project_id": "new", "description": "chai viticole pierre de taille", "typologie": "CONVERSION"}])
+        assert index.search("chai viticole pierre de taille", k=1, approximate=True)[0]["project_id"] == "new"
+
+
+class TestHistoryIntegration:
+    """Tests des libérations Privacy Shield et de l'API"""
+
+    @pytest.fixture
+    def history_index(self, tmp_path, monkeypatch):
+        index = CapexHistoryIndex(str(tmp_path / "index"))
+        monkeypatch.setattr(capex_index, "capex_history_index", index)
+        monkeypatch.setattr(capex_ai_service, "history_index", index)
+        return index
+
+    def test_release_indexes_projects(self, history_index):
+        """Seuls les projets dont la protection a expiré sont indexés, sans nom ni adresse"""
+        engine = create_async_engine(
+            "sqlite+aiosqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        async def run():
+            async with engine.begin() as conn:
+                await conn.run_sync(
+                    Base.metadata.create_all,
+                    tables=[User.__table__, Project.__table__, PrivacyShieldStatus.__table__]
+                )
+            async with async_session() as session:
+                session.add(User(id=1, email="fund@example.com", hashed_password="x"))
+                session.add_all([
+                    Project(
+                        id=1, user_id=1, name="Opération Monceau", address="12 rue de Monceau, Paris",
+                        description="Réhabilitation lourde immeuble de bureaux", city="Paris",
+                        asset_type="office", surface=2000, renovation_budget=1_600_000,
+                        capex_details={"facade_ravalement_simple": 250000},
+                    ),
+                    Project(id=2, user_id=1, name="Projet en cours", description="Hôtel", city="Nice"),
+                    PrivacyShieldStatus(project_id=1, release_date=datetime.utcnow() - timedelta(days=1)),
+                    PrivacyShieldStatus(project_id=2, release_date=datetime.utcnow() + timedelta(days=30)),
+                ])
+                await session.commit()
+            async with async_session() as session:
+                return await privacy_shield_service.check_and_release_expired(session)
+
+        result = asyncio.run(run())
+        asyncio.run(engine.dispose())
+
+        assert result["indexed_count"] == 1
+        [project] = history_index.search("bureaux à réhabiliter", k=5)
+        assert project["project_id"] == 1
+        assert project["typologie"] == "OFFICE"
+        assert project["cost_per_m2"] == 800
+        assert "name" not in project and "address" not in project
+
+    def test_similar_projects_endpoint_and_fallback(self, history_index):
+        """Recherche disponible sans clé OpenAI"""
+        history_index.add(HISTORY)
+        client = TestClient(app)
+
+        response = client.post("/api/capex/similar-projects", json={
+            "project_description": "construction neuve de logements avec parking",
+            "k": 2,
+        })
+        assert response.status_code == 200
+        assert response.json()["projects"][0]["project_id"] == 3
+
+        if capex_ai_service.llm is None:
+            result = asyncio.run(capex_ai_service.suggest_capex_with_ai("Bureaux en logements", 800, "CONVERSION"))
+            assert result["similar_projects"][0]["project_id"] == 2
@@ -1,8 +1,13 @@
 """
 Tests unitaires pour le service CAPEX
 """
+import numpy as np
 import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
 from app.services.capex_service import CAPEXService, CityTier
+from app.services.reference_data import ReferenceSnapshot
 
 
 @pytest.fixture
@@ -211,5 +216,93 @@ def test_security_costs(capex_service):
     assert result["project_capex"]["base_costs"]["avg"] > 0
 
 
+def test_bulk_matches_project_estimate(capex_service):
+    """Lot de projets : mêmes montants que calculate_project_capex projet par projet"""
+    projects = [
+        {"id": "A", "items": [{"key": "facade_ravalement_simple", "quantity": 250}, {"key": "toiture_isolation", "quantity": 120}]},
+        {"id": "B", "items": [{"key": "plomberie_salle_bain", "quantity": 8}], "city_tier": CityTier.TIER_3, "contingency_rate": 0.15},
+        {"id": "C", "items": []},
+    ]
+    result = capex_service.estimate_bulk(projects, city_tier=CityTier.TIER_2)
+
+    for project in result["projects"][:2]:
+        source = next(p for p in projects if p["id"] == project["id"])
+        single = capex_service.calculate_project_capex(
+            source["items"], source.get("city_tier", CityTier.TIER_2), source.get("contingency_rate", 0.10)
+        )
+        assert project["total_with_contingency"] == single["project_capex"]["total_with_contingency"]
+        assert project["contingency"] == single["project_capex"]["contingency"]
+    assert result["projects"][2]["base_costs"]["avg"] == 0
+    assert result["totals"]["avg"] == pytest.approx(
+        sum(project["total_with_contingency"]["avg"] for project in result["projects"]), abs=0.05
+    )
+    assert "items_detail" not in result["projects"][0]
+
+
+def test_bulk_detail_and_unknown_items(capex_service):
+    """Détail par poste sur demande, postes inconnus signalés"""
+    result = capex_service.estimate_bulk(
+        [{"items": [{"key": "cloisons_placo", "quantity": 40}, {"key": "inconnu", "quantity": 1}]}],
+        detail=True,
+    )
+    project = result["projects"][0]
+
+    assert project["unknown_items"] == ["inconnu"]
+    assert project["items_detail"] == [capex_service.get_cost_estimate("cloisons_placo", 40)]
+
+
+def test_bulk_item_without_price_at_tier(capex_service, monkeypatch):
+    """Poste tarifé seulement en tier 2 : inconnu en tier 1, comme get_cost_estimate"""
+    record = {"min": 80.0, "avg": 100.0, "max": 120.0, "unit": "m2"}
+    snapshot = ReferenceSnapshot({}, {("cloisons_placo", 1): record, ("lucarne_creation", 2): record}, {})
+    monkeypatch.setattr(CAPEXService, "reference", property(lambda self: snapshot))
+    items = [{"key": "cloisons_placo", "quantity": 10}, {"key": "lucarne_creation", "quantity": 2}]
+
+    result = capex_service.estimate_bulk([{"items": items}, {"items": items, "city_tier": CityTier.TIER_2}])
+    tier_1, tier_2 = result["projects"]
+
+    assert "error" in capex_service.get_cost_estimate("lucarne_creation", 2, CityTier.TIER_1)
+    assert tier_1["unknown_items"] == ["lucarne_creation"]
+    assert tier_1["base_costs"]["avg"] == 1000
+    assert tier_2["unknown_items"] == []
+    assert not np.isnan(result["totals"]["avg"])
+
+
+def test_bulk_portfolio_batch(capex_service):
+    """300 immeubles x 120 postes en un appel"""
+    rng = np.random.default_rng(4)
+    keys = list(capex_service.price_matrix().items)
+    projects = [
+        {
+            "id": i,
+            "city_tier": int(rng.integers(1, 4)),
+            "items": [{"key": keys[k], "quantity": float(q)} for k, q in zip(rng.integers(0, len(keys), 120), rng.uniform(1, 300, 120))],
+        }
+        for i in range(300)
+    ]
+    result = capex_service.estimate_bulk(projects)
+
+    assert result["n_items"] == 300 * 120
+    assert result["projects"][17]["base_costs"] == capex_service.calculate_project_capex(
+        projects[17]["items"], projects[17]["city_tier"]
+    )["project_capex"]["base_costs"]
+
+
+def test_bulk_endpoint():
+    """POST /capex/bulk"""
+    response = TestClient(app).post("/api/capex/bulk", json={
+        "projects": [
+            {"id": "A", "items": [{"key": "facade_ravalement_simple", "quantity": 100}]},
+            {"id": "B", "items": [{"key": "facade_ravalement_simple", "quantity": 100}], "city_tier": 3},
+        ],
+        "detail": True,
+    })
+
+    assert response.status_code == 200
+    projects = response.json()["projects"]
+    assert projects[1]["base_costs"]["avg"] == pytest.approx(projects[0]["base_costs"]["avg"] * 0.70)
+    assert len(projects[0]["items_detail"]) == 1
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,222 @@
+"""
+Tests de l'indice des prix au m² DVF (esquisse de quantiles, calcul incrémental, lecture)
+"""
+import asyncio
+from datetime import date
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.core.database import Base, get_db
+from app.models.market import DVFPriceIndex
+from app.services.dvf_price_index import DVFPriceIndexService, PriceSketch, period_groups
+from app.services.dvf_service import DVFService
+from app.services.dvf_store import DVFStore
+
+
+HEADER = (
+    "Date mutation|Nature mutation|Valeur fonciere|No voie|Type de voie|Voie|Code departement|"
+    "Code commune|Type local|Surface reelle bati|Nombre pieces principales"
+)
+
+
+def sale(day, valeur, commune, surface=50):
+    return "|".join([
+        day.strftime("%d/%m/%Y"), "Vente", f"{valeur:.2f}".replace(".", ","), "1", "RUE", "DES TESTS",
+        commune[:2], commune[2:], "Appartement", str(surface), "2",
+    ])
+
+
+def monthly_sales(commune, first_month, months, price_m2, growth=0.0, per_month=4):
+    """per_month ventes le 5, 10, 15... de chaque mois ; prix au m² en hausse de growth par mois"""
+    lines = []
+    for m in range(months):
+        year, month = divmod(first_month.month - 1 + m, 12)
+        for j in range(per_month):
+            day = date(first_month.year + year, month + 1, 5 * (j + 1))
+            lines.append(sale(day, price_m2 * (1 + growth) ** m * (1 + 0.01 * j) * 50, commune))
+    return lines
+
+
+def ingest(directory, path, lines):
+    path.write_text(HEADER + "\n" + "\n".join(lines) + "\n", encoding="utf-8")
+    store = DVFStore(str(directory))
+    store.ingest([str(path)])
+    return store
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Paris : 24 mois (2023-2024), +1 %/mois ; Bordeaux : 6 mois de 2024"""
+    lines = monthly_sales("75056", date(2023, 1, 1), 24, 8000, growth=0.01)
+    lines += monthly_sales("33063", date(2024, 7, 1), 6, 4500)
+    return ingest(tmp_path / "dvf", tmp_path / "valeursfoncieres.txt", lines)
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=[DVFPriceIndex.__table__])
+
+    asyncio.run(setup())
+    yield async_session
+    asyncio.run(engine.dispose())
+
+
+def run(session_factory, operation):
+    async def wrapper():
+        async with session_factory() as session:
+            result = await operation(session)
+            await session.commit()
+            return result
+    return asyncio.run(wrapper())
+
+
+class TestPriceSketch:
+    """Tests de l'esquisse de quantiles"""
+
+    def test_relative_accuracy(self):
+        prices = np.random.default_rng(7).lognormal(np.log(5000), 0.5, 20_000).clip(501, 49_999)
+        sketch = PriceSketch.from_prices(prices)
+
+        for q in (0.1, 0.25, 0.5, 0.75, 0.9):
+            exact = np.quantile(prices, q, method="lower")
+            assert abs(sketch.quantile(q) - exact) / exact <= PriceSketch.RELATIVE_ACCURACY * 1.01
+
+    def test_merge_and_serialization(self):
+        """Fusion = esquisse de l'union ; sérialisation sans perte"""
+        a, b = np.array([1000.0, 2000.0, 3000.0]), np.array([2500.0, 9000.0])
+        merged = PriceSketch.from_prices(a).merge(PriceSketch.from_prices(b))
+
+        assert np.array_equal(merged.counts, PriceSketch.from_prices(np.concatenate([a, b])).counts)
+        restored = PriceSketch.from_bytes(merged.to_bytes())
+        assert np.array_equal(restored.counts, merged.counts)
+        assert restored.count == 5
+        assert PriceSketch().quantile(0.5) is None
+
+
+class TestPeriodGroups:
+    """Tests des statistiques vectorisées par période"""
+
+    def test_matches_direct_computation(self, store):
+        [block] = list(store.price_blocks())
+        groups = period_groups(block, "quarter")
+
+        assert groups["count"].sum() == block["price_m2"].size
+        paris_2023_t1 = store.prices_m2("75056", "Appartement", date(2023, 1, 1), date(2023, 3, 31))
+        i = int(np.flatnonzero((groups["commune"] == b"75056") & (groups["period"] == (2023 - 1970) * 12))[0])
+        ordered = np.sort(paris_2023_t1)
+        assert groups["count"][i] == 12
+        assert groups["median"][i] == ordered[6]
+        assert groups["trimmed_mean"][i] == pytest.approx(ordered[1:11].mean())
+
+    def test_blocks_keep_communes_whole(self, store):
+        blocks = list(store.price_blocks(max_rows=10))
+
+        assert len(blocks) == 2
+        assert [set(block["commune"].tolist()) for block in blocks] == [{b"33063"}, {b"75056"}]
+
+
+class TestRefresh:
+    """Tests de la mise à jour incrémentale"""
+
+    def test_initial_and_unchanged(self, store, session_factory):
+        index = DVFPriceIndexService(store)
+
+        first = run(session_factory, index.refresh)
+        # Paris : 24 mois + 8 trimestres ; Bordeaux : 6 mois + 2 trimestres
+        assert first == {"inserted": 40, "updated": 0, "deleted": 0, "unchanged": 0}
+        assert run(session_factory, index.refresh) == {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 40}
+
+    def test_only_changed_periods_rewritten(self, store, session_factory, tmp_path):
+        """Révision d'un mois, nouveau mois, commune retirée"""
+        index = DVFPriceIndexService(store)
+        run(session_factory, index.refresh)
+
+        lines = monthly_sales("75056", date(2023, 1, 1), 25, 8000, growth=0.01)
+        lines[0] = sale(date(2023, 1, 5), 9000 * 50, "75056")
+        ingest(tmp_path / "dvf", tmp_path / "valeursfoncieres-2025.txt", lines)
+
+        counts = run(session_factory, index.refresh)
+        # Janvier 2023 et 2023-T1 révisés ; janvier 2025 et 2025-T1 créés ; Bordeaux supprimé
+        assert counts == {"inserted": 2, "updated": 2, "deleted": 8, "unchanged": 30}
+
+        series = run(session_factory, lambda db: index.series(db, "75056", "Appartement", "month"))
+        assert len(series) == 25
+        # Janvier 2023 : 9 000, 8 080, 8 160, 8 240 €/m² -> médiane de rang n//2
+        assert (series[0]["period"], series[0]["median"]) == ("2023-01", pytest.approx(8240))
+        assert run(session_factory, lambda db: index.series(db, "33063", "Appartement")) == []
+
+
+class TestReadIndex:
+    """Tests de lecture (fenêtres, tendance, évaluation, API)"""
+
+    @pytest.fixture
+    def indexed(self, store, session_factory):
+        index = DVFPriceIndexService(store)
+        run(session_factory, index.refresh)
+        return index
+
+    def test_window_matches_transactions(self, indexed, store, session_factory):
+        """Fenêtre de 12 mois calendaires : quartiles à 1 % près des valeurs exactes"""
+        stats = run(session_factory, lambda db: indexed.window_stats(db, "75056", "Appartement", 12))
+        exact = store.price_stats("75056", "Appartement", date(2024, 1, 1), date(2024, 12, 31))
+
+        assert stats["count"] == exact["count"] == 48
+        assert (stats["first_month"], stats["last_month"]) == ("2024-01-01", "2024-12-01")
+        for key in ("median", "p25", "p75"):
+            assert stats[key] == pytest.approx(exact[key], rel=0.011)
+
+    def test_trend_reads_series(self, indexed, store, session_factory):
+        service = DVFService(store, indexed)
+        trend = run(session_factory, lambda db: service.analyze_market_trend("Paris", db=db))
+
+        # +1 %/mois : médianes à 12 mois d'écart, 1,01^12 - 1 ≈ 12,7 %
+        assert trend["trend"] == "hausse"
+        assert trend["evolution_12m"] == pytest.approx(12.7, abs=2.5)
+        assert [point["period"] for point in trend["serie_trimestrielle"]] == [
+            f"{year}-T{quarter}" for year in (2023, 2024) for quarter in (1, 2, 3, 4)
+        ]
+
+    def test_valuation_reads_index(self, indexed, store, session_factory):
+        service = DVFService(store, indexed)
+        valuation = run(session_factory, lambda db: service.calculate_market_value("", 50, "Paris", db=db))
+
+        assert valuation["methode"] == "indice"
+        assert valuation["nombre_comparables"] == 96
+        assert valuation["estimation_basse"] < valuation["estimation_mediane"] < valuation["estimation_haute"]
+        assert len(valuation["comparables"]) == 10
+
+    def test_without_session(self, indexed, store):
+        """Sans session : calcul exact sur la base locale, comme avant"""
+        valuation = asyncio.run(DVFService(store, indexed).calculate_market_value("", 50, "Paris"))
+
+        assert "methode" not in valuation
+        assert valuation["nombre_comparables"] == 96
+
+    def test_endpoints(self, indexed, session_factory, monkeypatch):
+        async def override_get_db():
+            async with session_factory() as session:
+                yield session
+                await session.commit()
+
+        monkeypatch.setattr("app.api.market.dvf_price_index", indexed)
+        app.dependency_overrides[get_db] = override_get_db
+        try:
+            client = TestClient(app)
+            response = client.get("/api/market/price-index/Paris", params={"period_type": "quarter"})
+            assert response.status_code == 200
+            assert len(response.json()["series"]) == 8
+            assert client.get("/api/market/price-index/Paris", params={"period_type": "year"}).status_code == 400
+            assert client.post("/api/market/dvf/price-index/refresh").json()["unchanged"] == 40
+        finally:
+            app.dependency_overrides.pop(get_db, None)
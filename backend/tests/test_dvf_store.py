@@ -0,0 +1,336 @@
+"""
+Tests de la base DVF locale (ingestion des fichiers data.gouv.fr, requêtes, repli sur l'API)
+"""
+import asyncio
+import os
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app.services.dvf_service import DVFService
+from app.services.dvf_store import DVFStore, day_number, type_code
+
+
+RAW_HEADER = (
+    "Identifiant de document|Date mutation|Nature mutation|Valeur fonciere|No voie|B/T/Q|Type de voie|"
+    "Code voie|Voie|Code postal|Commune|Code departement|Code commune|Code type local|Type local|"
+    "Surface reelle bati|Nombre pieces principales"
+)
+
+GEO_HEADER = (
+    "id_mutation,date_mutation,nature_mutation,valeur_fonciere,adresse_numero,adresse_nom_voie,"
+    "code_commune,nom_commune,code_departement,type_local,surface_reelle_bati,nombre_pieces_principales,"
+    "longitude,latitude"
+)
+
+LAST_SALE = date(2024, 12, 20)
+
+
+def raw_line(day, nature, valeur, voie, departement, commune, type_local, surface, pieces):
+    return "|".join([
+        "", day.strftime("%d/%m/%Y"), nature, f"{valeur:.2f}".replace(".", ","), "12", "", "RUE",
+        "1234", voie, "75001", "VILLE", departement, commune, "2", type_local, str(surface), str(pieces),
+    ])
+
+
+def write_raw(path, lines):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(RAW_HEADER + "\n" + "\n".join(lines) + "\n")
+
+
+def paris_sales():
+    """Appartements parisiens : 9 000 €/m² sur les 12 derniers mois (360 jours), 8 000 €/m² avant"""
+    lines = []
+    for i in range(40):
+        day = LAST_SALE - timedelta(days=i * 18)
+        price_m2 = 9000 if i <= 20 else 8000
+        surface = 40 + i
+        lines.append(raw_line(day, "Vente", price_m2 * surface + i, f"DE RIVOLI {i}", "75", "56",
+                              "Appartement", surface, 2))
+    return lines
+
+
+@pytest.fixture
+def store(tmp_path):
+    source = tmp_path / "valeursfoncieres-2024.txt"
+    write_raw(source, paris_sales() + [
+        # Hors vente, type inconnu, valeur absente : ignorées
+        raw_line(LAST_SALE, "Echange", 500000, "X", "75", "56", "Appartement", 50, 2),
+        raw_line(LAST_SALE, "Vente", 300000, "X", "75", "56", "", 0, 0),
+        "|".join(["", "01/02/2024", "Vente", "", "", "", "", "", "X", "", "", "75", "56", "", "Appartement", "50", "2"]),
+        # Corse et outre-mer
+        raw_line(date(2024, 6, 1), "Vente", 250000, "DU PORT", "2A", "4", "Maison", 100, 4),
+        raw_line(date(2024, 7, 1), "Vente", 180000, "DES PALMIERS", "971", "101", "Local industriel. commercial ou assimilé", 90, 0),
+    ])
+    dvf = DVFStore(str(tmp_path / "dvf"))
+    dvf.ingest([str(source)], chunk_rows=7)
+    return dvf
+
+
+class TestIngest:
+    """Tests de l'ingestion"""
+
+    def test_raw_file(self, store):
+        """Ventes retenues, codes INSEE reconstitués, tri par date décroissante"""
+        stats = store.stats()
+
+        assert stats["available"] is True
+        assert stats["rows"] == 42
+        assert stats["rows_read"] == 45
+        assert stats["date_max"] == LAST_SALE.isoformat()
+        assert store.covers("2A004", "Maison")
+        assert store.covers("97101", "Local commercial")
+        assert not store.covers("75056", "Maison")
+
+        sales = store.transactions("75056", "Appartement", limit=3)
+        assert [sale["date_mutation"] for sale in sales] == [
+            LAST_SALE.isoformat(), (LAST_SALE - timedelta(days=18)).isoformat(), (LAST_SALE - timedelta(days=36)).isoformat()
+        ]
+        assert sales[0]["adresse"] == "12 RUE DE RIVOLI 0"
+        assert sales[0]["valeur_fonciere"] == 9000 * 40
+        assert sales[0]["nombre_pieces_principales"] == 2
+        assert sales[0]["latitude"] is None
+
+    def test_geo_dvf_file(self, tmp_path):
+        """Format geo-dvf (séparateur virgule, dates ISO, coordonnées)"""
+        source = tmp_path / "geo-dvf-2024.csv"
+        source.write_text(
+            GEO_HEADER + "\n"
+            "2024-1,2024-03-15,Vente,320000,8,RUE DU LAC,69381,Lyon 1er,69,Appartement,64,3,4.8357,45.7640\n"
+            "2024-2,2024-03-16,Vente,12000,,RUE DU LAC,69381,Lyon 1er,69,Dépendance,,,4.8357,45.7640\n",
+            encoding="utf-8"
+        )
+        dvf = DVFStore(str(tmp_path / "dvf"))
+        dvf.ingest([str(source)])
+
+        [sale] = dvf.transactions("69381", "appartement")
+        assert sale["adresse"] == "8 RUE DU LAC"
+        assert sale["latitude"] == pytest.approx(45.764, abs=1e-5)
+        assert sale["longitude"] == pytest.approx(4.8357, abs=1e-5)
+        assert dvf.transactions("69381", "Dépendance")[0]["surface_reelle_bati"] is None
+
+    def test_reingest_switches_build(self, store, tmp_path):
+        """Nouvelle version active, précédente supprimée, lecteur existant rechargé"""
+        assert store.count("75056", "Appartement") == 40
+        source = tmp_path / "valeursfoncieres-2025.txt"
+        write_raw(source, [raw_line(date(2025, 3, 1), "Vente", 400000, "X", "33", "63", "Maison", 100, 5)])
+
+        DVFStore(store.directory).ingest([str(source)])
+
+        assert os.listdir(os.path.join(store.directory, "builds")) == [store.stats()["build"]]
+        assert store.count("75056", "Appartement") == 0
+        assert store.count("33063", "Maison") == 1
+
+    def test_missing_columns(self, tmp_path):
+        source = tmp_path / "autre.csv"
+        source.write_text("a,b,c\n1,2,3\n")
+
+        with pytest.raises(ValueError, match="colonnes DVF manquantes"):
+            DVFStore(str(tmp_path / "dvf")).ingest([str(source)])
+
+
+class TestQueries:
+    """Tests des requêtes"""
+
+    def test_date_range(self, store):
+        since = LAST_SALE - timedelta(days=18 * 10)
+
+        assert store.count("75056", "Appartement", date_min=since) == 11
+        assert store.count("75056", "Appartement", date_max=since) == 30
+        assert store.count("75056", "Appartement", date_min=LAST_SALE + timedelta(days=1)) == 0
+        assert store.count("13055", "Appartement") == 0
+
+    def test_window_anchored_on_last_sale(self, store):
+        """Fichiers publiés avec retard : fenêtres ancrées sur la dernière mutation"""
+        assert store.reference_date() == LAST_SALE
+        assert store.window(12) == (LAST_SALE - timedelta(days=360), LAST_SALE)
+        assert store.window(24, 12)[1] == LAST_SALE - timedelta(days=361)
+
+    def test_type_code(self):
+        assert type_code("Appartement") == type_code("appartement") == 1
+        assert type_code("Dependance") == type_code("Dépendance") == 2
+        assert type_code("Terrain") is None
+        assert day_number(date(1970, 1, 2)) == 1
+
+
+class TestDVFServiceLocal:
+    """Tests du service DVF sur la base locale"""
+
+    def test_market_value_matches_api_computation(self, store, tmp_path):
+        """Même résultat que le calcul historique sur les mêmes ventes"""
+        local = asyncio.run(DVFService(store).calculate_market_value("", 50, "Paris"))
+
+        remote_service = DVFService(DVFStore(str(tmp_path / "vide")))
+        sales = store.transactions("75056", "Appartement", *store.window(24))
+        with patch.object(remote_service, "get_comparable_sales", return_value=sales):
+            remote = asyncio.run(remote_service.calculate_market_value("", 50, "Paris"))
+
+        assert local == remote
+        assert local["nombre_comparables"] == 40
+        assert local["comparables"][0]["adresse"] == "12 RUE DE RIVOLI 0"
+
+    def test_trend(self, store):
+        """12 derniers mois contre les 12 mois précédents"""
+        trend = asyncio.run(DVFService(store).analyze_market_trend("75056"))
+
+        assert trend["trend"] == "hausse"
+        assert trend["evolution_12m"] == pytest.approx(12.5, abs=0.1)
+
+    def test_search_comparables(self, store):
+        result = asyncio.run(DVFService(store).search_comparables("Paris", "Appartement", limit=5))
+
+        assert result["source"] == "local"
+        assert result["total_found"] == 40
+        assert len(result["comparables"]) == 5
+
+    def test_fallback_to_api(self, tmp_path):
+        """Commune absente de la base locale : appel de l'API"""
+        service = DVFService(DVFStore(str(tmp_path / "vide")))
+
+        with patch("app.services.dvf_service.httpx.AsyncClient") as client:
+            client.return_value.__aenter__.return_value.get.side_effect = RuntimeError("hors ligne")
+            result = asyncio.run(service.search_comparables("Paris"))
+
+        assert result == {"comparables": [], "total_found": 0, "source": "api"}
+        assert client.called
+        assert service.store.stats()["available"] is False
+
+
+CENTER = (48.8566, 2.3522)  # Hôtel de Ville
+KM_LATITUDE = 1 / 111.195  # Degrés de latitude pour 1 km
+
+
+def geo_line(i, day, valeur, commune, type_local, surface, pieces, latitude, longitude):
+    return (
+        f"2024-{i},{day.isoformat()},Vente,{valeur},{i},RUE TEST,{commune},Paris,75,{type_local},"
+        f"{surface},{pieces},{longitude},{latitude}"
+    )
+
+
+@pytest.fixture
+def geo_store(tmp_path):
+    """
+    Appartements parisiens géolocalisés : 12 000 €/m² à moins de 500 m du centre,
+    6 000 €/m² entre 2 et 3 km (autre arrondissement, même code commune 75056)
+    """
+    lines = []
+    for i in range(30):
+        distance = 0.1 + 0.013 * i if i < 15 else 2 + 0.06 * (i - 15)
+        price_m2 = 12000 if i < 15 else 6000
+        surface = 50 + (i % 5) * 10
+        lines.append(geo_line(
+            i, LAST_SALE - timedelta(days=10 * i), price_m2 * surface, "75056", "Appartement",
+            surface, 2 + i % 3, CENTER[0] + distance * KM_LATITUDE, CENTER[1]
+        ))
+    source = tmp_path / "geo-dvf-75.csv"
+    source.write_text(GEO_HEADER + "\n" + "\n".join(lines) + "\n", encoding="utf-8")
+    dvf = DVFStore(str(tmp_path / "dvf_geo"))
+    dvf.ingest([str(source)])
+    return dvf
+
+
+class TestNearest:
+    """Tests de la recherche géographique"""
+
+    def test_radius_and_distance(self, geo_store):
+        """Seules les ventes du rayon, distances au sol exactes"""
+        sales = geo_store.nearest(*CENTER, "Appartement", rayon_km=1.0, k=None)
+
+        assert len(sales) == 15
+        assert max(sale["distance_km"] for sale in sales) < 0.5
+        nearest_first = geo_store.nearest(*CENTER, "Appartement", rayon_km=1.0, k=1)[0]
+        assert nearest_first["distance_km"] == pytest.approx(0.1, abs=1e-3)
+        assert len(geo_store.nearest(*CENTER, "Appartement", rayon_km=3.0, k=None)) == 30
+        assert geo_store.nearest(*CENTER, "Maison", rayon_km=3.0) == []
+        assert geo_store.count_nearby(*CENTER, "Appartement", rayon_km=1.0) == 15
+        assert geo_store.count_nearby(*CENTER, "Maison", rayon_km=3.0) == 0
+
+    def test_ranking(self, geo_store):
+        """Surface et nombre de pièces proches de la cible d'abord, pertinence décroissante"""
+        sales = geo_store.nearest(*CENTER, "Appartement", rayon_km=1.0, k=5, surface=90, pieces=3)
+        scores = [sale["pertinence"] for sale in sales]
+
+        assert scores == sorted(scores, reverse=True)
+        assert sales[0]["surface_reelle_bati"] == 90
+        assert sales[0]["nombre_pieces_principales"] == 3
+
+    def test_time_decay(self, geo_store):
+        """Un an de plus entre la vente et la date de référence divise sa pertinence par 2"""
+        recent = geo_store.nearest(*CENTER, "Appartement", rayon_km=1.0, k=None)
+        by_date = {sale["date_mutation"]: sale["pertinence"] for sale in recent}
+        last = geo_store.nearest(*CENTER, "Appartement", rayon_km=1.0, k=None,
+                                 date_max=LAST_SALE + timedelta(days=365))
+        assert {sale["date_mutation"]: sale["pertinence"] for sale in last}[LAST_SALE.isoformat()] == pytest.approx(
+            by_date[LAST_SALE.isoformat()] / 2, rel=1e-3
+        )
+
+    def test_date_window(self, geo_store):
+        since = LAST_SALE - timedelta(days=45)
+
+        sales = geo_store.nearest(*CENTER, "Appartement", rayon_km=5.0, k=None, date_min=since)
+        assert len(sales) == 5
+
+    def test_warm_up(self, geo_store, store):
+        """Arbres construits à l'avance ; rien à faire sans coordonnées"""
+        assert geo_store.warm_up() == 30
+        assert geo_store._trees[1][0].n == 30
+        assert store.warm_up() == 0
+
+
+class TestDVFServiceNearby:
+    """Tests de l'évaluation par proximité"""
+
+    def test_market_value_uses_radius(self, geo_store):
+        """Même code commune, mais seules les ventes proches du bien comptent"""
+        service = DVFService(geo_store)
+        nearby = asyncio.run(service.calculate_market_value("", 70, "Paris", latitude=CENTER[0], longitude=CENTER[1]))
+        commune = asyncio.run(service.calculate_market_value("", 70, "Paris"))
+
+        assert nearby["methode"] == "proximite"
+        assert nearby["prix_median_m2"] == 12000
+        assert nearby["nombre_comparables"] == 15
+        assert nearby["comparables"][0]["distance_km"] < 0.5
+        assert "methode" not in commune
+        assert commune["nombre_comparables"] == 30
+
+    def test_address_geocoded(self, geo_store):
+        service = DVFService(geo_store)
+
+        with patch.object(service, "geocode", return_value=CENTER) as geocode:
+            result = asyncio.run(service.calculate_market_value("1 place de l'Hôtel de Ville", 70, "Paris"))
+
+        geocode.assert_called_once_with("1 place de l'Hôtel de Ville", "Paris")
+        assert result["methode"] == "proximite"
+
+    def test_too_few_nearby_sales(self, geo_store):
+        """Moins de MIN_NEARBY_COMPARABLES ventes dans le rayon : évaluation sur la commune"""
+        far = (CENTER[0] + 10 * KM_LATITUDE, CENTER[1])
+        result = asyncio.run(DVFService(geo_store).calculate_market_value(
+            "", 70, "Paris", latitude=far[0], longitude=far[1]
+        ))
+
+        assert "methode" not in result
+        assert result["nombre_comparables"] == 30
+
+    def test_store_without_coordinates(self, store):
+        """Fichiers bruts sans coordonnées : pas de géocodage, évaluation sur la commune"""
+        service = DVFService(store)
+
+        with patch.object(service, "geocode") as geocode:
+            result = asyncio.run(service.calculate_market_value("12 rue de Rivoli", 50, "Paris"))
+
+        geocode.assert_not_called()
+        assert result["nombre_comparables"] == 40
+
+    def test_search_comparables_in_radius(self, geo_store):
+        """Seules les ventes renvoyées sont construites ; total compté sur le rayon"""
+        with patch.object(geo_store, "_records", wraps=geo_store._records) as records:
+            result = asyncio.run(DVFService(geo_store).search_comparables(
+                "Paris", latitude=CENTER[0], longitude=CENTER[1], rayon_km=1.0, limit=5
+            ))
+
+        assert records.call_count == 1
+        assert len(records.call_args.args[0]) == 5
+        assert result["total_found"] == 15
+        assert [sale["distance_km"] < 0.5 for sale in result["comparables"]] == [True] * 5
@@ -0,0 +1,123 @@
+"""
+Tests de la courbe de sortie (TRI par mois de revente)
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.amortization_engine import build_loan_schedules
+from app.services.exit_timing_service import exit_timing_service
+from app.services.financial_service import financial_service
+
+
+BASE = {
+    "purchase_price": 300000,
+    "renovation_budget": 30000,
+    "notary_fees": 24000,
+    "loan_amount": 250000,
+    "interest_rate": 0.04,
+    "loan_duration": 30,
+    "monthly_rent": 1500,
+    "resale_price": 0,
+    "project_type": "rental",
+}
+
+
+class TestExitTiming:
+    """Tests courbe de sortie"""
+
+    def test_thirty_year_horizon(self):
+        """360 sorties candidates évaluées en une passe"""
+        result = exit_timing_service.calculate_exit_curve(BASE, appreciation_rate=0.03, selling_costs=0.05)
+
+        assert result["horizon_months"] == 360
+        assert len(result["curve"]["tri"]) == 360
+        assert result["optimal"]["month"] in result["curve"]["month"]
+        converged = [tri for tri in result["curve"]["tri"] if tri is not None]
+        assert result["optimal"]["tri"] == pytest.approx(max(converged))
+
+    def test_matches_scalar_calculation(self):
+        """Une sortie au mois 60 = TRI mensuel des flux reconstitués à la main"""
+        result = exit_timing_service.calculate_exit_curve(BASE, appreciation_rate=0.02, selling_costs=0.05)
+        schedule = build_loan_schedules(250000, 0.04, 30)
+        payment = float(schedule["payment"][0, 0])
+        remaining = float(schedule["remaining_capital"][0, 59])
+
+        exit_value = 330000 * 1.02 ** 5
+        flows = [1500 - payment] * 60
+        flows[-1] += exit_value * 0.95 - remaining
+        monthly = financial_service.calculate_tri(354000 - 250000, flows)
+
+        assert result["curve"]["remaining_debt"][59] == pytest.approx(remaining, abs=0.01)
+        assert result["curve"]["tri"][59] == pytest.approx((1 + monthly) ** 12 - 1, abs=1e-8)
+        assert result["curve"]["profit"][59] == pytest.approx(sum(flows) - 104000, abs=0.01)
+
+    def test_exit_yield_uses_indexed_rent(self):
+        """Valeur de sortie = loyer annuel indexé / taux de sortie"""
+        result = exit_timing_service.calculate_exit_curve(
+            BASE, horizon_months=120, exit_yield=0.05, rent_growth=0.02
+        )
+
+        assert result["method"] == "exit_yield"
+        assert result["curve"]["exit_value"][119] == pytest.approx(1500 * 12 * 1.02 ** 10 / 0.05, abs=0.01)
+
+    def test_min_hold_months(self):
+        """L'optimum respecte la durée de détention minimale"""
+        result = exit_timing_service.calculate_exit_curve(
+            BASE, exit_yield=0.05, min_hold_months=24
+        )
+
+        assert result["optimal"]["month"] >= 24
+
+    def test_horizon_beyond_loan_term(self):
+        """Au-delà du terme du prêt, plus d'échéance ni de dette"""
+        base = {**BASE, "loan_duration": 5}
+        result = exit_timing_service.calculate_exit_curve(base, horizon_months=84, appreciation_rate=0.01)
+
+        assert result["curve"]["remaining_debt"][59] == pytest.approx(0, abs=0.01)
+        assert result["curve"]["remaining_debt"][83] == 0
+
+    def test_deferred_loan(self):
+        """Prêt à différé : intérêts seuls pendant le différé, puis amortissement"""
+        result = exit_timing_service.calculate_exit_curve(
+            BASE, horizon_months=60, appreciation_rate=0.02,
+            amortization_type="deferred", deferred_months=12
+        )
+        schedule = build_loan_schedules(250000, 0.04, 30, "deferred", 12)
+        curve = result["curve"]
+
+        assert curve["remaining_debt"][:12] == pytest.approx([250000] * 12)
+        assert curve["remaining_debt"][30] == pytest.approx(schedule["remaining_capital"][0, 30])
+        assert result["optimal"] is not None
+
+    def test_invalid_parameters(self):
+        """Paramètres hors bornes refusés"""
+        with pytest.raises(ValueError):
+            exit_timing_service.calculate_exit_curve(BASE, horizon_months=1000)
+        with pytest.raises(ValueError):
+            exit_timing_service.calculate_exit_curve(BASE, selling_costs=1.5)
+        with pytest.raises(ValueError):
+            exit_timing_service.calculate_exit_curve(BASE, exit_yield=0)
+
+    def test_endpoint(self):
+        """POST /financial/exit-timing"""
+        client = TestClient(app)
+        response = client.post("/api/financial/exit-timing", json={
+            "base": BASE,
+            "horizon_months": 120,
+            "appreciation_rate": 0.03,
+        })
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["success"] is True
+        assert len(data["curve"]["month"]) == 120
+        assert data["optimal"] is not None
+
+        response = client.post("/api/financial/exit-timing", json={
+            "base": BASE, "horizon_months": 60, "amortization_type": "deferred", "deferred_months": 12,
+        })
+        assert response.status_code == 200
+        assert client.post("/api/financial/exit-timing", json={
+            "base": BASE, "amortization_type": "deferred",
+        }).status_code == 400
@@ -0,0 +1,107 @@
+"""
+Tests du goal-seek (prix maximal / loyer minimal)
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.financial_service import financial_service
+from app.services.goal_seek_service import goal_seek_service
+
+
+BASE = {
+    "purchase_price": 200000,
+    "renovation_budget": 20000,
+    "notary_fees": 15000,
+    "loan_amount": 180000,
+    "interest_rate": 0.04,
+    "loan_duration": 20,
+    "monthly_rent": 1400,
+    "resale_price": 300000,
+    "project_type": "rental",
+}
+
+
+class TestGoalSeek:
+    """Tests résolution unitaire"""
+
+    def test_max_purchase_price_for_target_tri(self):
+        """Prix maximal : TRI cible atteint, dépassé d'un euro au-delà"""
+        result = goal_seek_service.solve(BASE, "purchase_price", {"tri_min": 0.08, "dscr_min": 1.25})
+
+        assert result["feasible"] is True
+        assert result["binding_constraint"] == "tri_min"
+        at_value = financial_service.calculate_full_analysis(**{**BASE, "purchase_price": result["value"]})
+        above = financial_service.calculate_full_analysis(**{**BASE, "purchase_price": result["value"] + 2})
+        assert at_value["tri"] >= 0.08
+        assert above["tri"] < 0.08
+
+    def test_min_rent_takes_most_restrictive_constraint(self):
+        """Loyer minimal = max des bornes basses (TRI et DSCR)"""
+        result = goal_seek_service.solve(BASE, "monthly_rent", {"tri_min": 0.12, "dscr_min": 1.25})
+        bounds = result["constraints"]
+
+        assert result["objective"] == "min"
+        assert bounds["tri_min"]["type"] == "lower"
+        assert bounds["dscr_min"]["type"] == "lower"
+        assert result["value"] == pytest.approx(
+            max(bounds["tri_min"]["value"], bounds["dscr_min"]["value"]), abs=0.01
+        )
+        assert result["metrics"]["dscr"] >= 1.25
+
+    def test_ltv_gives_lower_bound_on_price(self):
+        """LTV max : le prix ne peut pas descendre sous prêt / LTV"""
+        result = goal_seek_service.solve(
+            BASE, "purchase_price", {"ltv_max": 0.8}, objective="min"
+        )
+
+        assert result["value"] == pytest.approx(180000 / 0.8, abs=1)
+        assert result["binding_constraint"] == "ltv_max"
+
+    def test_infeasible_constraint(self):
+        """DSCR indépendant du prix : contrainte impossible = pas de solution"""
+        result = goal_seek_service.solve(BASE, "purchase_price", {"dscr_min": 5})
+
+        assert result["feasible"] is False
+        assert result["value"] is None
+        assert result["constraints"]["dscr_min"]["type"] == "infeasible"
+
+    def test_invalid_inputs(self):
+        """Variable ou contrainte inconnue"""
+        with pytest.raises(ValueError):
+            goal_seek_service.solve(BASE, "surface", {"tri_min": 0.1})
+        with pytest.raises(ValueError):
+            goal_seek_service.solve(BASE, "purchase_price", {"irr_min": 0.1})
+
+
+class TestGoalSeekBatch:
+    """Tests pipeline d'affaires"""
+
+    def test_batch_matches_single(self):
+        """Lot hétérogène (durées différentes) = résolutions unitaires"""
+        deals = [
+            BASE,
+            {**BASE, "monthly_rent": 1800, "loan_duration": 25},
+            {**BASE, "monthly_rent": 1000, "resale_price": 250000},
+        ]
+        constraints = {"tri_min": 0.10, "dscr_min": 1.2}
+        batch = goal_seek_service.solve_batch(deals, "purchase_price", constraints)
+
+        for deal, result in zip(deals, batch):
+            single = goal_seek_service.solve(deal, "purchase_price", constraints)
+            assert result["value"] == single["value"]
+            assert result["feasible"] == single["feasible"]
+
+    def test_batch_endpoint(self):
+        """POST /financial/goal-seek/batch"""
+        client = TestClient(app)
+        response = client.post("/api/financial/goal-seek/batch", json={
+            "deals": [BASE, {**BASE, "monthly_rent": 2000}],
+            "variable": "purchase_price",
+            "constraints": {"tri_min": 0.12}
+        })
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 2
+        assert data["results"][1]["value"] > data["results"][0]["value"]
@@ -0,0 +1,169 @@
+"""
+Tests de l'allocation multi-investisseurs
+"""
+from datetime import date, timedelta
+from io import BytesIO
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from openpyxl import load_workbook
+
+from app.main import app
+from app.services.excel_service import excel_service
+from app.services.investor_allocation_service import investor_allocation_service
+from app.services.waterfall_service import waterfall_service
+
+
+TIERS = [{"hurdle_irr": None, "gp_share": 0.20}]
+CALLS = [{"date": date(2025, 1, 1), "amount": 1e6}]
+DISTRIBUTIONS = [{"date": date(2028, 1, 1), "amount": 1.8e6}]
+
+
+class TestInvestorAllocation:
+    """Tests des comptes de capital"""
+
+    def test_pro_rata_matches_aggregate_waterfall(self):
+        """Mêmes termes pour tous : somme des comptes = waterfall agrégé"""
+        investors = [
+            {"id": "LP1", "commitment": 3e6},
+            {"id": "LP2", "commitment": 1e6},
+        ]
+        result = investor_allocation_service.allocate(investors, CALLS, DISTRIBUTIONS, tiers=TIERS)
+        aggregate = waterfall_service.calculate_waterfall_timeseries(CALLS, DISTRIBUTIONS, tiers=TIERS)
+
+        lp1, lp2 = result["investors"]
+        assert lp1["contributed"] == pytest.approx(0.75e6)
+        assert lp1["distributed"] == pytest.approx(3 * lp2["distributed"])
+        assert result["GP"]["promote"] == pytest.approx(aggregate["GP"]["promote"])
+        assert lp1["irr"] == pytest.approx(aggregate["LP"]["irr"], abs=1e-9)
+
+    def test_commitment_dates(self):
+        """Un investisseur entré après un appel n'y participe pas"""
+        investors = [
+            {"id": "LP1", "commitment": 1e6, "commitment_date": "2025-01-01"},
+            {"id": "LP2", "commitment": 1e6, "commitment_date": "2025-06-01"},
+        ]
+        calls = [{"date": date(2025, 1, 1), "amount": 4e5}, {"date": date(2025, 7, 1), "amount": 4e5}]
+        result = investor_allocation_service.allocate(investors, calls, DISTRIBUTIONS, tiers=TIERS)
+
+        lp1, lp2 = result["investors"]
+        assert lp1["contributed"] == pytest.approx(6e5)
+        assert lp2["contributed"] == pytest.approx(2e5)
+        # Distributions au prorata des comptes de capital (3:1)
+        assert lp1["gross_distributions"] == pytest.approx(3 * lp2["gross_distributions"])
+
+    def test_class_and_side_letter_overrides(self):
+        """Surcharges par classe et side letter (promote, frais)"""
+        investors = [
+            {"id": "LP1", "commitment": 1e6, "class": "A"},
+            {"id": "LP2", "commitment": 1e6, "class": "B"},
+            {"id": "LP3", "commitment": 1e6, "class": "A", "side_letter": {"tiers": [{"hurdle_irr": None, "gp_share": 0.0}]}},
+        ]
+        result = investor_allocation_service.allocate(
+            investors, CALLS, DISTRIBUTIONS, tiers=TIERS, management_fee=0.02,
+            classes={"B": {"tiers": [{"hurdle_irr": None, "gp_share": 0.10}], "management_fee": 0.01}},
+        )
+
+        lp1, lp2, lp3 = result["investors"]
+        assert lp2["promote"] == pytest.approx(lp1["promote"] / 2)
+        assert lp3["promote"] == 0
+        assert lp1["fees"] == pytest.approx(0.02 * 1e6 * 1095 / 365)
+        assert lp2["fees"] == pytest.approx(lp1["fees"] / 2)
+        assert result["classes"]["A"]["investors"] == 2
+
+    def test_late_entrant_fees(self):
+        """Frais courus à partir de la date d'engagement, pas sur les périodes antérieures"""
+        investors = [
+            {"id": "LP1", "commitment": 1e6, "commitment_date": "2021-01-01"},
+            {"id": "LP2", "commitment": 1e6, "commitment_date": "2023-01-01"},
+        ]
+        calls = [{"date": date(2021, 1, 1), "amount": 4e5}]
+        distributions = [{"date": date(2025, 1, 1), "amount": 6e5}]
+        result = investor_allocation_service.allocate(
+            investors, calls, distributions, tiers=TIERS, management_fee=0.02
+        )
+
+        lp1, lp2 = result["investors"]
+        assert lp1["fees"] == pytest.approx(0.02 * 1e6 * 1461 / 365)
+        assert lp2["fees"] == pytest.approx(0.02 * 1e6 * 731 / 365)
+
+    def test_invalid_side_letter(self):
+        """Terme non surchargeable refusé"""
+        with pytest.raises(ValueError):
+            investor_allocation_service.allocate(
+                [{"id": "LP1", "commitment": 1e6, "side_letter": {"commitment": 0}}],
+                CALLS, DISTRIBUTIONS,
+            )
+
+    def test_duplicate_ids(self):
+        """Identifiants uniques requis"""
+        with pytest.raises(ValueError):
+            investor_allocation_service.allocate(
+                [{"id": "LP1", "commitment": 1e6}, {"id": "LP1", "commitment": 2e6}],
+                CALLS, DISTRIBUTIONS,
+            )
+
+    def test_four_hundred_investors(self):
+        """400 LP x 120 dates : conservation des montants"""
+        rng = np.random.default_rng(3)
+        start = date(2025, 1, 1)
+        investors = [
+            {"id": f"LP{i}", "commitment": float(rng.uniform(1e5, 5e6)), "class": "AB"[i % 2]}
+            for i in range(400)
+        ]
+        calls = [{"date": start + timedelta(days=30 * m), "amount": 2e7} for m in range(12)]
+        distributions = [{"date": start + timedelta(days=30 * m), "amount": 4e6} for m in range(12, 120)]
+
+        result = investor_allocation_service.allocate(
+            investors, calls, distributions,
+            classes={"B": {"tiers": [{"hurdle_irr": 0.12, "gp_share": 0.15}, {"hurdle_irr": None, "gp_share": 0.25}]}},
+            include_flows=True,
+        )
+
+        assert result["n_investors"] == 400
+        assert result["totals"]["lp_distributed"] + result["GP"]["promote"] == pytest.approx(4e6 * 108)
+        assert len(result["flows"]["net"]) == 400
+        assert all(account["irr_status"] == "converged" for account in result["investors"])
+
+
+class TestInvestorAllocationExport:
+    """Tests de l'export Excel et des endpoints"""
+
+    def test_excel_export(self):
+        """Onglets Synthèse / Investisseurs / Classes / Flux"""
+        allocation = investor_allocation_service.allocate(
+            [{"id": "LP1", "commitment": 1e6, "class": "A"}, {"id": "LP2", "commitment": 1e6}],
+            CALLS, DISTRIBUTIONS, include_flows=True,
+        )
+        content = excel_service.generate_investor_allocation_excel(allocation, fund_name="Fonds I")
+        workbook = load_workbook(BytesIO(content))
+
+        assert workbook.sheetnames == ["Synthèse", "Investisseurs", "Classes", "Flux"]
+        assert workbook["Investisseurs"]["A2"].value == "LP1"
+        assert workbook["Investisseurs"].max_row == 3
+
+    def test_endpoints(self):
+        """POST /financial/waterfall/investors et /export"""
+        client = TestClient(app)
+        payload = {
+            "investors": [
+                {"id": "LP1", "commitment": 1000000, "class": "A"},
+                {"id": "LP2", "commitment": 1000000, "class": "B"},
+            ],
+            "capital_calls": [{"date": "2025-01-01", "amount": 1000000}],
+            "distributions": [{"date": "2028-01-01", "amount": 1800000}],
+            "classes": {"B": {"tiers": [{"hurdle_irr": None, "gp_share": 0.1}]}},
+        }
+
+        response = client.post("/api/financial/waterfall/investors", json=payload)
+        assert response.status_code == 200
+        accounts = response.json()["investors"]
+        assert accounts[1]["class"] == "B"
+        assert accounts[0]["promote"] > accounts[1]["promote"]
+
+        response = client.post("/api/financial/waterfall/investors/export", json=payload)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith(
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
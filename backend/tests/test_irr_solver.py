@@ -0,0 +1,107 @@
+"""
+Tests du solveur TRI / VAN vectorisé
+"""
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.irr_solver import (
+    irr_batch,
+    npv_batch,
+    STATUS_CONVERGED,
+    STATUS_NO_SIGN_CHANGE,
+    STATUS_INVALID,
+)
+from app.services.financial_service import financial_service
+
+
+class TestIRRSolver:
+    """Tests TRI en lot"""
+
+    def test_known_rates(self):
+        """TRI connus (obligation au pair, flux unique)"""
+        result = irr_batch([
+            [-1000, 50, 50, 50, 1050],
+            [-100, 121],
+            [-100, 0, 121],
+        ])
+
+        assert result.converged.all()
+        assert result.rates == pytest.approx([0.05, 0.21, 0.10], abs=1e-9)
+
+    def test_npv_is_zero_at_irr(self):
+        """La VAN au TRI est nulle pour des milliers de vecteurs"""
+        rng = np.random.default_rng(7)
+        flows = np.column_stack([
+            -rng.uniform(1e5, 1e6, 5000),
+            rng.uniform(0, 1.5e5, (5000, 15)),
+        ])
+        result = irr_batch(flows)
+        solved = result.converged
+
+        assert solved.sum() > 4900
+        npv = npv_batch(flows[solved], result.rates[solved])
+        assert np.all(np.abs(npv) <= 1e-6 * np.abs(flows[solved]).sum(axis=1))
+
+    def test_status_per_vector(self):
+        """Statut explicite au lieu d'un 0.0 silencieux"""
+        result = irr_batch([
+            [-100, 110],
+            [100, 10, 10],  # Aucun changement de signe
+            [-100, float("nan")],
+        ])
+
+        assert list(result.status) == [STATUS_CONVERGED, STATUS_NO_SIGN_CHANGE, STATUS_INVALID]
+        assert np.isnan(result.rates[1])
+        assert result.to_list()[1]["tri"] is None
+
+    def test_ragged_vectors_are_padded(self):
+        """Vecteurs de longueurs différentes"""
+        result = irr_batch([[-100, 110], [-100, 0, 0, 133.1]])
+
+        assert result.rates == pytest.approx([0.10, 0.10], abs=1e-9)
+
+    def test_npv_matches_loop(self):
+        """VAN matricielle = VAN en boucle"""
+        cash_flows = [12000, 15000, 18000, 250000]
+        expected = -200000 + sum(cf / 1.08 ** (i + 1) for i, cf in enumerate(cash_flows))
+
+        assert financial_service.calculate_van(200000, cash_flows, 0.08) == pytest.approx(expected)
+
+
+class TestTRIIntegration:
+    """Tests intégration FinancialService / API"""
+
+    def test_full_analysis_reports_convergence(self):
+        """calculate_full_analysis expose le statut du TRI"""
+        analysis = financial_service.calculate_full_analysis(
+            purchase_price=200000,
+            renovation_budget=20000,
+            notary_fees=15000,
+            loan_amount=180000,
+            interest_rate=0.04,
+            loan_duration=20,
+            monthly_rent=1200,
+            resale_price=260000
+        )
+
+        assert analysis["tri_converged"] is True
+        flows = [-analysis["equity"], *analysis["cash_flows"]]
+        assert npv_batch([flows], analysis["tri"])[0] == pytest.approx(0, abs=1e-4)
+
+    def test_tri_batch_endpoint(self):
+        """POST /financial/tri/batch"""
+        client = TestClient(app)
+        response = client.post("/api/financial/tri/batch", json={
+            "cash_flows": [[-100, 10, 10, 110], [100, 10]],
+            "discount_rate": 0.1
+        })
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 2
+        assert data["converged_count"] == 1
+        assert data["results"][0]["tri"] == pytest.approx(0.10)
+        assert data["results"][0]["van"] == pytest.approx(0, abs=1e-9)
+        assert data["results"][1]["status"] == STATUS_NO_SIGN_CHANGE
@@ -0,0 +1,80 @@
+"""
+Tests du chargement différé et du budget de temps d'import de l'API
+"""
+import logging
+from unittest.mock import patch
+
+import pytest
+
+from app.core.config import settings
+from app.core.import_profile import HEAVY_MODULES, format_report, package_totals, profile_imports
+from app.core.lazy import lazy_import, lazy_instance, lazy_status, warm_up
+
+
+class TestLazyProxies:
+    """Tests des mandataires"""
+
+    def test_module_loaded_on_first_attribute(self):
+        """Aucun import avant le premier accès, puis accès direct au module"""
+        proxy = lazy_import("colorsys")
+
+        assert not proxy.is_loaded
+        assert proxy.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+        assert proxy.is_loaded
+
+    def test_instance_built_once_and_patchable(self):
+        """Fabrique appelée une seule fois ; patch.object agit sur l'instance réelle"""
+        calls = []
+
+        class Service:
+            def __init__(self):
+                calls.append(1)
+
+            def answer(self):
+                return 42
+
+        service = lazy_instance("test.service", Service)
+        assert calls == []
+        assert service.answer() == 42 and service.answer() == 42
+        assert calls == [1]
+
+        with patch.object(service, "answer", return_value=0):
+            assert service.answer() == 0
+        assert service.answer() == 42
+
+    def test_warm_up(self, caplog):
+        """Seuls les mandataires non chargés ; un échec est journalisé sans interrompre"""
+        lazy_import("wave")
+        broken = lazy_import("module_inexistant_refyai")
+
+        with caplog.at_level(logging.WARNING):
+            timings = warm_up(["wave", "module_inexistant_refyai"])
+
+        assert list(timings) == ["wave"]
+        assert not broken.is_loaded
+        assert "module_inexistant_refyai" in caplog.text
+        assert warm_up(["wave"]) == {}
+        assert lazy_status()["wave"] is True
+
+
+class TestImportBudget:
+    """Non-régression du démarrage (interpréteur neuf)"""
+
+    @pytest.fixture(scope="class")
+    def profile(self):
+        # Meilleure de deux mesures : la première peut inclure la compilation des .pyc
+        return min((profile_imports("app.main") for _ in range(2)), key=lambda p: p["seconds"])
+
+    def test_heavy_dependencies_not_imported(self, profile):
+        """openai, langchain, scipy, reportlab, PyPDF2, PIL... absents au démarrage"""
+        loaded = [name for name in HEAVY_MODULES if name in profile["modules"]]
+
+        assert loaded == []
+        assert profile["lazy"]["ai_service"] is False
+
+    def test_import_time_budget(self, profile):
+        """Import de app.main sous IMPORT_TIME_BUDGET_SECONDS"""
+        report = format_report(profile, top=10)
+
+        assert profile["seconds"] < settings.IMPORT_TIME_BUDGET_SECONDS, report
+        assert "app" in package_totals(profile["imports"])
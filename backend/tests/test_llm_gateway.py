@@ -0,0 +1,271 @@
+"""
+Tests de la passerelle LLM (appels async, fusion, sémaphore, cache persistant)
+
+Les appels passent par un serveur local compatible OpenAI (uvicorn dans un thread)
+qui répond après un délai fixe et compte les appels reçus.
+"""
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from openai import AsyncOpenAI
+
+from app.services.capex_ai_service import capex_ai_service
+from app.services.capex_index import CapexHistoryIndex
+from app.services.capex_service import CAPEXService
+from app.services.llm_gateway import LLMGateway, LLMResponseCache
+from app.services.reference_data import ReferenceSnapshot
+
+
+MODEL_DELAY = 0.05
+
+SUGGESTION = {
+    "postes_suggeres": [
+        {"key": "facade_ravalement_simple", "label": "Ravalement", "quantity": 100, "unit": "m2"},
+        {"key": "poste_inconnu", "quantity": 3},
+    ],
+    "niveau_confiance": "HIGH",
+    "warnings": [],
+}
+
+# Lucarne tarifée seulement en tier 2 : non valorisée pour un projet en tier 1
+SUGGESTION_TIER_2_ITEM = {
+    "postes_suggeres": [
+        {"key": "lucarne_creation", "quantity": 2},
+        {"key": "cloisons_placo", "quantity": 10},
+    ],
+}
+
+
+class StandInModel:
+    """Serveur de chat minimal : écho du dernier message, erreur 500 sur « boom »"""
+
+    def __init__(self):
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self.app = FastAPI()
+        self.app.post("/v1/chat/completions")(self.chat)
+
+    async def chat(self, body: dict):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(MODEL_DELAY)
+        finally:
+            self.active -= 1
+
+        prompt = body["messages"][-1]["content"]
+        if prompt == "boom":
+            raise HTTPException(status_code=500, detail="boom")
+        if "malformée" in prompt:
+            content = "Voici mes suggestions : ravalement de façade"
+        elif "lucarnes" in prompt:
+            content = json.dumps(SUGGESTION_TIER_2_ITEM)
+        elif "Projet à analyser" in prompt:
+            content = json.dumps(SUGGESTION)
+        else:
+            content = f"echo: {prompt}"
+        return {
+            "id": f"chatcmpl-{self.calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }
+
+
+@pytest.fixture(scope="module")
+def model_server():
+    model = StandInModel()
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(model.app, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    model.base_url = f"http://127.0.0.1:{sock.getsockname()[1]}/v1"
+    yield model
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+@pytest.fixture
+def make_gateway(model_server, tmp_path):
+    model_server.calls = model_server.max_active = 0
+
+    def make(ttl_seconds=None, max_concurrency=4):
+        return LLMGateway(
+            client_factory=lambda: AsyncOpenAI(api_key="test", base_url=model_server.base_url, max_retries=0),
+            model="stand-in",
+            cache=LLMResponseCache(str(tmp_path / "llm_cache.sqlite3"), ttl_seconds=ttl_seconds),
+            max_concurrency=max_concurrency,
+        )
+    return make
+
+
+def ask(prompt):
+    return [{"role": "user", "content": prompt}]
+
+
+class TestLLMGateway:
+    """Tests de la passerelle"""
+
+    def test_identical_requests_are_coalesced(self, make_gateway, model_server):
+        """20 requêtes identiques simultanées : un seul appel au modèle"""
+        gateway = make_gateway()
+
+        async def run():
+            return await asyncio.gather(*(gateway.complete(ask("même question")) for _ in range(20)))
+
+        assert asyncio.run(run()) == ["echo: même question"] * 20
+        assert model_server.calls == 1
+        assert gateway.stats()["coalesced"] == 19
+        assert gateway.stats()["in_flight"] == 0
+
+    def test_concurrency_cap_and_throughput(self, make_gateway, model_server):
+        """Requêtes distinctes : au plus 4 appels simultanés, débit ~4x l'appel séquentiel"""
+        gateway = make_gateway(max_concurrency=4)
+
+        async def run():
+            start = time.perf_counter()
+            answers = await asyncio.gather(*(gateway.complete(ask(f"question {i}")) for i in range(16)))
+            return answers, time.perf_counter() - start
+
+        answers, elapsed = asyncio.run(run())
+        throughput = len(answers) / elapsed
+
+        assert answers[3] == "echo: question 3"
+        assert model_server.calls == 16
+        assert model_server.max_active == 4
+        assert elapsed < 16 * MODEL_DELAY * 0.6
+        assert throughput > 1 / MODEL_DELAY * 1.5
+
+    def test_event_loop_stays_responsive(self, make_gateway):
+        """Pendant l'appel au modèle, les autres tâches de la boucle continuent"""
+        gateway = make_gateway()
+
+        async def run():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.005)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            await gateway.complete(ask("lente"))
+            task.cancel()
+            return ticks
+
+        assert asyncio.run(run()) >= 4
+
+    def test_persistent_cache_and_ttl(self, make_gateway, model_server):
+        """Réponse relue après redémarrage (nouvelle instance) ; entrée expirée rappelée"""
+        asyncio.run(make_gateway().complete(ask("question en cache")))
+        restarted = make_gateway()
+
+        assert asyncio.run(restarted.complete(ask("question en cache"))) == "echo: question en cache"
+        assert model_server.calls == 1
+        assert restarted.stats()["cache_hits"] == 1
+
+        # Autre modèle ou autre température : autre clé
+        asyncio.run(restarted.complete(ask("question en cache"), temperature=0.0))
+        assert model_server.calls == 2
+
+        short = make_gateway(ttl_seconds=0.05)
+        asyncio.run(short.complete(ask("éphémère")))
+        time.sleep(0.1)
+        asyncio.run(short.complete(ask("éphémère")))
+        assert model_server.calls == 4
+        time.sleep(0.1)
+        assert short.cache.purge_expired() == 1
+
+    def test_errors_are_not_cached(self, make_gateway, model_server):
+        """Erreur transmise aux appelants fusionnés, appel refait ensuite"""
+        gateway = make_gateway()
+
+        async def run():
+            return await asyncio.gather(*(gateway.complete(ask("boom")) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(run())
+        assert all(isinstance(result, Exception) for result in results)
+        assert model_server.calls == 1
+        with pytest.raises(Exception):
+            asyncio.run(gateway.complete(ask("boom")))
+        assert model_server.calls == 2
+        assert gateway.stats()["errors"] == 2
+
+
+    def test_invalid_replies_are_not_cached(self, make_gateway, model_server):
+        """Réponse refusée par la validation : transmise en erreur, ni mise en cache ni relue"""
+        gateway = make_gateway()
+        asyncio.run(gateway.complete(ask("non json")))
+
+        with pytest.raises(json.JSONDecodeError):
+            asyncio.run(gateway.complete(ask("non json"), validate=json.loads))
+        with pytest.raises(json.JSONDecodeError):
+            asyncio.run(gateway.complete(ask("non json"), validate=json.loads))
+        assert model_server.calls == 3
+        assert gateway.stats()["invalid"] == 2
+        assert gateway.stats()["cache_hits"] == 0
+
+
+class TestCapexAISuggest:
+    """suggest_capex_with_ai branché sur la passerelle"""
+
+    def test_suggestion_through_gateway(self, make_gateway, model_server, monkeypatch, tmp_path):
+        """Postes connus valorisés, réponse identique servie par le cache"""
+        monkeypatch.setattr(capex_ai_service, "llm", make_gateway())
+        monkeypatch.setattr(capex_ai_service, "history_index", CapexHistoryIndex(str(tmp_path / "index")))
+
+        async def run():
+            return await asyncio.gather(*(
+                capex_ai_service.suggest_capex_with_ai("Immeuble à ravaler", 400, "RENOVATION") for _ in range(3)
+            ))
+
+        results = asyncio.run(run())
+        assert model_server.calls == 1
+        assert results[0]["success"] and results[0] == results[2]
+        assert [item["key"] for item in results[0]["suggested_items"]] == ["facade_ravalement_simple"]
+        assert results[0]["budget_estimate"]["total_avg"] > 0
+
+        asyncio.run(capex_ai_service.suggest_capex_with_ai("Immeuble à ravaler", 400, "RENOVATION"))
+        assert model_server.calls == 1
+
+    def test_malformed_reply_is_retried(self, make_gateway, model_server, monkeypatch, tmp_path):
+        """Réponse non JSON : erreur de parsing renvoyée, modèle rappelé à la requête suivante"""
+        monkeypatch.setattr(capex_ai_service, "llm", make_gateway())
+        monkeypatch.setattr(capex_ai_service, "history_index", CapexHistoryIndex(str(tmp_path / "index")))
+
+        result = asyncio.run(capex_ai_service.suggest_capex_with_ai("Réponse malformée", 100, "RENOVATION"))
+        asyncio.run(capex_ai_service.suggest_capex_with_ai("Réponse malformée", 100, "RENOVATION"))
+
+        assert result["success"] is False
+        assert result["raw_response"].startswith("Voici mes suggestions")
+        assert model_server.calls == 2
+
+    def test_item_unpriced_at_tier_is_skipped(self, make_gateway, model_server, monkeypatch, tmp_path):
+        """Poste connu mais non tarifé au tier du projet : écarté, les suivants gardent leur estimation"""
+        monkeypatch.setattr(capex_ai_service, "llm", make_gateway())
+        monkeypatch.setattr(capex_ai_service, "history_index", CapexHistoryIndex(str(tmp_path / "index")))
+        record = {"min": 80.0, "avg": 100.0, "max": 120.0, "unit": "m2"}
+        snapshot = ReferenceSnapshot({}, {("cloisons_placo", 1): record, ("lucarne_creation", 2): record}, {})
+        monkeypatch.setattr(CAPEXService, "reference", property(lambda self: snapshot))
+
+        result = asyncio.run(capex_ai_service.suggest_capex_with_ai("Combles avec lucarnes", 60, "RENOVATION"))
+        [item] = result["suggested_items"]
+
+        assert item["key"] == "cloisons_placo"
+        assert item["estimate"]["quantity"] == 10
+        assert item["estimate"]["total_costs"]["avg"] == 1000
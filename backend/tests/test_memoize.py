@@ -0,0 +1,164 @@
+"""
+Tests de la mémoïsation des calculateurs purs
+"""
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core.memoize import MemoCache, canonical_key, memoize, memo_cache
+from app.services.financial_service import financial_service
+from app.services.financing_calculator import StrategyType, get_recommended_ltv
+
+
+BASE = {
+    "purchase_price": 200000,
+    "renovation_budget": 20000,
+    "notary_fees": 15000,
+    "loan_amount": 180000,
+    "interest_rate": 0.04,
+    "loan_duration": 20,
+    "monthly_rent": 1400,
+    "resale_price": 300000,
+}
+
+
+class TestCanonicalKey:
+    """Tests de canonisation des clés"""
+
+    def test_key_order_and_numeric_type(self):
+        """Ordre des clés et 200000 / 200000.0 sans effet"""
+        first = canonical_key("f", {"a": 1, "b": {"x": 200000, "y": [1.5, 2]}})
+        second = canonical_key("f", {"b": {"y": [1.5, 2.0], "x": 200000.0}, "a": 1})
+
+        assert first == second
+        assert first != canonical_key("g", {"a": 1, "b": {"x": 200000, "y": [1.5, 2]}})
+
+    def test_enum_matches_value(self):
+        """Une énumération a la même clé que sa valeur"""
+        assert canonical_key("f", {"s": StrategyType.CORE}) == canonical_key("f", {"s": "core"})
+
+
+class TestMemoCache:
+    """Tests du cache LRU / TTL"""
+
+    def test_hits_and_positional_keyword_equivalence(self):
+        """Appels positionnels et nommés partagent la même entrée"""
+        cache = MemoCache(maxsize=10, ttl_seconds=None)
+        calls = []
+
+        @memoize("test.add", cache=cache)
+        def add(a, b=1):
+            calls.append((a, b))
+            return {"sum": a + b}
+
+        assert add(1, 2) == {"sum": 3}
+        assert add(a=1, b=2) == {"sum": 3}
+        assert add(1, b=2.0) == {"sum": 3}
+        assert len(calls) == 1
+        assert cache.stats()["functions"]["test.add"]["hits"] == 2
+
+    def test_lru_eviction(self):
+        """L'entrée la moins récemment utilisée est évincée"""
+        cache = MemoCache(maxsize=2, ttl_seconds=None)
+
+        @memoize("test.square", cache=cache)
+        def square(x):
+            return x * x
+
+        square(1)
+        square(2)
+        square(1)
+        square(3)  # Évince 2
+
+        stats = cache.stats()["functions"]["test.square"]
+        assert stats["evictions"] == 1
+        square(1)
+        assert cache.stats()["functions"]["test.square"]["hits"] == 2
+        square(2)
+        assert cache.stats()["functions"]["test.square"]["misses"] == 4
+
+    def test_ttl_expiration(self):
+        """Une entrée expirée est recalculée"""
+        cache = MemoCache(maxsize=10, ttl_seconds=0.01)
+
+        @memoize("test.identity", cache=cache)
+        def identity(x):
+            return x
+
+        identity(1)
+        time.sleep(0.02)
+        identity(1)
+
+        stats = cache.stats()["functions"]["test.identity"]
+        assert stats["expirations"] == 1
+        assert stats["misses"] == 2
+
+    def test_use_cache_false_bypasses(self):
+        """use_cache=False recalcule sans lire ni écrire le cache"""
+        cache = MemoCache(maxsize=10, ttl_seconds=None)
+        calls = []
+
+        @memoize("test.bypass", cache=cache)
+        def compute(x):
+            calls.append(x)
+            return x
+
+        compute(1)
+        compute(1, use_cache=False)
+
+        assert len(calls) == 2
+        assert cache.stats()["functions"]["test.bypass"]["bypassed"] == 1
+
+    def test_returned_values_are_copies(self):
+        """Modifier un résultat ne modifie pas le cache"""
+        cache = MemoCache(maxsize=10, ttl_seconds=None)
+
+        @memoize("test.copy", cache=cache)
+        def build(x):
+            return {"values": [x]}
+
+        first = build(1)
+        first["values"].append(99)
+        first["extra"] = True
+
+        assert build(1) == {"values": [1]}
+
+
+class TestServiceMemoization:
+    """Tests sur les services décorés"""
+
+    def test_full_analysis_is_cached(self):
+        """Deuxième appel identique servi par le cache, résultat isolé"""
+        memo_cache.clear("financial.calculate_full_analysis")
+        before = memo_cache.stats()["functions"].get("financial.calculate_full_analysis", {"hits": 0})["hits"]
+
+        first = financial_service.calculate_full_analysis(**BASE)
+        first["cash_flows"][0] = 0
+        second = financial_service.calculate_full_analysis(**BASE)
+
+        stats = memo_cache.stats()["functions"]["financial.calculate_full_analysis"]
+        assert stats["hits"] == before + 1
+        assert second["cash_flows"][0] != 0
+
+    def test_financing_calculator_function(self):
+        """Fonctions de module décorées"""
+        assert get_recommended_ltv(StrategyType.CORE) == get_recommended_ltv("core")
+        assert get_recommended_ltv(StrategyType.CORE, use_cache=False) == get_recommended_ltv(StrategyType.CORE)
+
+    def test_stats_endpoint_and_query_flag(self):
+        """GET /financial/cache/stats et ?use_cache=false"""
+        client = TestClient(app)
+        payload = {"purchase_price": 250000, "buyer_profile": "INVESTOR", "building_age_years": 20}
+
+        client.post("/api/financial/notary-fees", json=payload)
+        client.post("/api/financial/notary-fees", json=payload)
+        client.post("/api/financial/notary-fees?use_cache=false", json=payload)
+
+        stats = client.get("/api/financial/cache/stats").json()
+        counters = stats["functions"]["notary.calculate_notary_fees"]
+        assert counters["hits"] >= 1
+        assert counters["bypassed"] >= 1
+
+        response = client.delete("/api/financial/cache", params={"function": "notary.calculate_notary_fees"})
+        assert response.json()["removed"] >= 1
@@ -0,0 +1,125 @@
+"""
+Tests de la simulation Monte Carlo
+"""
+import numpy as np
+import pytest
+
+from app.services.financial_service import financial_service
+from app.services.monte_carlo_service import monte_carlo_service
+
+
+BASE = {
+    "purchase_price": 200000,
+    "renovation_budget": 20000,
+    "notary_fees": 15000,
+    "loan_amount": 180000,
+    "interest_rate": 0.04,
+    "loan_duration": 20,
+    "monthly_rent": 1200,
+    "resale_price": 260000,
+    "project_type": "rental",
+}
+
+
+class TestFullAnalysisBatch:
+    """Tests du noyau vectorisé"""
+
+    def test_batch_matches_scalar(self):
+        """Chaque scénario du lot = calculate_full_analysis"""
+        rents = np.array([900.0, 1200.0, 1500.0])
+        rates = np.array([0.03, 0.04, 0.05])
+        batch = financial_service.calculate_full_analysis_batch(
+            **{**BASE, "monthly_rent": rents, "interest_rate": rates}
+        )
+
+        for i in range(3):
+            scalar = financial_service.calculate_full_analysis(
+                **{**BASE, "monthly_rent": rents[i], "interest_rate": rates[i]}
+            )
+            for key in ("tri", "van", "dscr", "roi", "monthly_payment"):
+                assert batch[key][i] == pytest.approx(scalar[key])
+
+
+class TestMonteCarlo:
+    """Tests simulation"""
+
+    def test_seed_is_reproducible(self):
+        """Même graine = mêmes résultats"""
+        first = monte_carlo_service.run_simulation(BASE, n_simulations=2000, seed=42)
+        second = monte_carlo_service.run_simulation(BASE, n_simulations=2000, seed=42)
+
+        assert first["metrics"] == second["metrics"]
+        assert first["probabilities"] == second["probabilities"]
+
+    def test_fixed_distributions_give_deterministic_result(self):
+        """Distributions dégénérées = analyse déterministe"""
+        fixed = {
+            "monthly_rent": {"distribution": "fixed", "value": 1200},
+            "resale_price": {"distribution": "fixed", "value": 260000},
+            "interest_rate": {"distribution": "fixed", "value": 0.04},
+            "capex_overrun": {"distribution": "fixed", "value": 0},
+            "vacancy_rate": {"distribution": "fixed", "value": 0},
+        }
+        result = monte_carlo_service.run_simulation(BASE, fixed, n_simulations=100, seed=1)
+        deterministic = financial_service.calculate_full_analysis(**BASE)
+
+        assert result["metrics"]["tri"]["percentiles"]["p50"] == pytest.approx(deterministic["tri"])
+        assert result["metrics"]["dscr"]["percentiles"]["p5"] == pytest.approx(deterministic["dscr"])
+
+    def test_percentiles_histogram_and_probabilities(self):
+        """Structure des résultats"""
+        result = monte_carlo_service.run_simulation(
+            BASE, n_simulations=10000, seed=7, thresholds={"dscr_min": 1.2}, histogram_bins=15
+        )
+        tri = result["metrics"]["tri"]
+
+        assert tri["percentiles"]["p5"] <= tri["percentiles"]["p50"] <= tri["percentiles"]["p95"]
+        assert len(tri["histogram"]["counts"]) == 15
+        assert sum(tri["histogram"]["counts"]) == tri["count"]
+        assert 0 <= result["probabilities"]["dscr_below_min"] <= 1
+        # 10k scénarios : une passe vectorisée, pas un appel par scénario
+        assert result["elapsed_ms"] < 1000
+
+    def test_total_losses_count_below_tri_min(self):
+        """Pertes totales (sans changement de signe) : TRI -100 %, comptées sous le seuil"""
+        distributions = {
+            "monthly_rent": {"distribution": "uniform", "low": -1000, "high": 3000},
+            "resale_price": {"distribution": "fixed", "value": 0},
+            "vacancy_rate": {"distribution": "fixed", "value": 0},
+        }
+        result = monte_carlo_service.run_simulation(BASE, distributions, n_simulations=4000, seed=3)
+        outcomes = result["tri_outcomes"]
+        tri = result["metrics"]["tri"]
+
+        # Loyer inférieur à l'annuité (~1 090 €/mois) et revente nulle : perte totale
+        assert outcomes["total_loss"] > 1000
+        assert outcomes["converged"] + outcomes["total_loss"] + outcomes["unresolved"] == 4000
+        assert tri["count"] == outcomes["converged"] + outcomes["total_loss"]
+        assert tri["min"] == -1.0
+        assert result["probabilities"]["tri_below_min"] >= outcomes["total_loss"] / 4000
+
+    def test_unresolved_classified_by_npv(self):
+        """Sans racine de TRI (VAN < 0 à tout taux) : scénarios comptés sous le seuil"""
+        fixed = {
+            "monthly_rent": {"distribution": "fixed", "value": 1300},
+            "resale_price": {"distribution": "fixed", "value": 165000},
+            "interest_rate": {"distribution": "fixed", "value": 0.041},
+            "capex_overrun": {"distribution": "fixed", "value": 0.1},
+            "vacancy_rate": {"distribution": "fixed", "value": 0},
+        }
+        result = monte_carlo_service.run_simulation(BASE, fixed, n_simulations=100, seed=1)
+
+        # Flux positifs puis revente sous le capital restant dû : la VAN ne s'annule jamais
+        assert result["tri_outcomes"]["unresolved"] == 100
+        assert result["tri_outcomes"]["unresolved_below_min"] == 100
+        assert result["metrics"]["tri"]["count"] == 0
+        assert result["probabilities"]["tri_below_min"] == 1.0
+
+    def test_invalid_inputs(self):
+        """Variable ou distribution inconnue"""
+        with pytest.raises(ValueError):
+            monte_carlo_service.run_simulation(BASE, {"surface": {"distribution": "normal"}})
+        with pytest.raises(ValueError):
+            monte_carlo_service.run_simulation(BASE, {"monthly_rent": {"distribution": "cauchy"}})
+        with pytest.raises(ValueError):
+            monte_carlo_service.run_simulation(BASE, n_simulations=0)
@@ -0,0 +1,214 @@
+"""
+Tests du moteur portefeuille (flux mensuels, agrégation, indicateurs fonds)
+"""
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.user import User
+from app.models.project import Project
+from app.models.timeline import ProjectTimeline
+from app.models.cashflow import ProjectCashflow
+from app.services.amortization_engine import build_loan_schedules
+from app.services.portfolio_service import portfolio_service
+from app.services.timeline_service import timeline_service
+
+
+def make_project(**overrides):
+    values = dict(
+        user_id=1,
+        name="Immeuble test",
+        purchase_price=1_000_000,
+        notary_fees=80_000,
+        renovation_budget=240_000,
+        current_rent=90_000,
+        occupancy_rate=100,
+        estimated_value=1_600_000,
+        financing_amount=600_000,
+        interest_rate=0.04,
+        loan_duration=20,
+        bp_duration=5,
+        created_at=datetime(2026, 1, 15),
+    )
+    values.update(overrides)
+    return Project(**values)
+
+
+def make_timeline(project_id=1):
+    return ProjectTimeline(
+        project_id=project_id,
+        project_start_date=datetime(2026, 1, 1),
+        study_phase_start=datetime(2026, 1, 1),
+        study_phase_end=datetime(2026, 4, 1),
+        study_phase_budget=30_000,
+        permit_phase_start=datetime(2026, 4, 1),
+        permit_phase_end=datetime(2026, 10, 1),
+        permit_fees=10_000,
+        construction_phase_start=datetime(2026, 10, 1),
+        construction_phase_end=datetime(2027, 10, 1),
+        construction_budget=240_000,
+        capex_curve_type="s_curve",
+        commercialization_phase_start=datetime(2027, 10, 1),
+        commercialization_phase_end=datetime(2028, 4, 1),
+    )
+
+
+class TestProjectCashflows:
+    """Tests flux mensuels d'un projet"""
+
+    def test_totals_are_conserved(self):
+        """Chaque poste se retrouve intégralement dans les flux"""
+        ledger = portfolio_service.build_project_cashflows(make_project(), make_timeline())
+        columns = ledger["columns"]
+
+        assert ledger["start"] == date(2026, 1, 1)
+        assert ledger["months"] == 61  # 5 ans + mois de sortie
+        assert columns["acquisition"].sum() == pytest.approx(1_080_000)
+        assert columns["capex"].sum() == pytest.approx(30_000 + 10_000 + 240_000, abs=0.1)
+        assert columns["sale"][-1] == 1_600_000
+        assert columns["debt_drawdown"][0] == 600_000
+
+    def test_capex_follows_timeline_phases(self):
+        """CAPEX travaux uniquement pendant la phase travaux"""
+        ledger = portfolio_service.build_project_cashflows(
+            make_project(), make_timeline()
+        )
+        capex = ledger["columns"]["capex"]
+
+        # Études sur 3 mois, permis au mois 3, travaux mois 9 à 20
+        assert capex[:3] == pytest.approx([10_000] * 3)
+        assert capex[3] == pytest.approx(10_000)
+        assert np.all(capex[4:9] == 0)
+        assert capex[9:21].sum() == pytest.approx(240_000, abs=0.1)
+        assert np.all(capex[21:] == 0)
+
+    def test_debt_is_repaid_at_exit(self):
+        """Capital restant remboursé à la sortie : seuls les intérêts restent à charge"""
+        ledger = portfolio_service.build_project_cashflows(make_project(), make_timeline())
+        columns = ledger["columns"]
+        schedule = build_loan_schedules(600_000, 0.04, 20)
+        interest_paid = schedule["cumulative_interest"][0, 59]
+
+        assert columns["debt_service"].sum() - 600_000 == pytest.approx(interest_paid)
+        # Loyers à partir de la commercialisation (mois 21)
+        assert np.all(columns["revenue"][:21] == 0)
+        assert columns["revenue"][21] == pytest.approx(7_500)
+
+    def test_same_flows_as_timeline_ledger(self):
+        """Travaux, VEFA, loyers et revente repris de l'échéancier de la timeline"""
+        timeline = make_timeline()
+        timeline.commercialization_type = "VEFA"
+        timeline.vefa_reservations_schedule = [{"month": 1, "pct_sold": 40}, {"month": 3, "pct_sold": 60}]
+        project = make_project()
+        timeline_service.refresh_cashflow_schedule(timeline, project)
+        schedule = timeline.cashflow_schedule
+
+        ledger = portfolio_service.build_project_cashflows(project, timeline)
+        columns = ledger["columns"]
+
+        assert ledger["months"] == schedule["months"]
+        assert columns["capex"].tolist() == schedule["columns"]["outflows"]
+        assert columns["revenue"].sum() == pytest.approx(1_600_000)
+        # VEFA : vendue par les réservations, pas de revente ni de loyers
+        assert columns["sale"].sum() == 0
+        assert columns["debt_service"][-1] > 0
+
+    def test_without_timeline_uses_defaults(self):
+        """Projet sans timeline : hypothèses par défaut"""
+        ledger = portfolio_service.build_project_cashflows(make_project(bp_duration=None), None)
+
+        assert ledger["has_timeline"] is False
+        assert ledger["months"] == 61
+        assert ledger["columns"]["capex"][:12] == pytest.approx([20_000] * 12)
+
+
+class TestFundMetrics:
+    """Tests indicateurs fonds"""
+
+    def test_metrics_on_known_flows(self):
+        """Appel de 100, distribution de 121 deux ans plus tard"""
+        months = [date(2026, 1, 1), date(2028, 1, 1)]
+        metrics = portfolio_service.compute_fund_metrics(months, np.array([-100.0, 121.0]))
+
+        assert metrics["fund_irr"] == pytest.approx(0.10, abs=1e-9)
+        assert metrics["tvpi"] == pytest.approx(1.21)
+        assert metrics["dpi"] == pytest.approx(1.21)
+        assert metrics["peak_equity"] == pytest.approx(100)
+
+    def test_as_of_splits_realized_and_residual(self):
+        """DPI à date, valeur résiduelle projetée dans le TVPI"""
+        months = [date(2026, 1, 1), date(2026, 6, 1), date(2028, 1, 1)]
+        metrics = portfolio_service.compute_fund_metrics(
+            months, np.array([-100.0, 10.0, 120.0]), as_of=date(2027, 1, 1)
+        )
+
+        assert metrics["dpi"] == pytest.approx(0.10)
+        assert metrics["tvpi"] == pytest.approx(1.30)
+
+
+class TestPortfolioAggregation:
+    """Tests stockage (project_id, month) et GROUP BY"""
+
+    @pytest.fixture
+    async def session(self):
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(
+                Base.metadata.create_all,
+                tables=[
+                    User.__table__, Project.__table__,
+                    ProjectTimeline.__table__, ProjectCashflow.__table__,
+                ]
+            )
+        async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with async_session() as session:
+            session.add(User(id=1, email="fund@example.com", hashed_password="x"))
+            session.add(make_project(id=1))
+            session.add(make_project(id=2, created_at=datetime(2026, 7, 1), estimated_value=1_500_000))
+            session.add(make_timeline(project_id=1))
+            await session.commit()
+            yield session
+        await engine.dispose()
+
+    async def test_aggregate_matches_sum_of_projects(self, session):
+        """Flux fonds = somme des flux projets alignés sur le calendrier"""
+        await portfolio_service.refresh_user_projects(session, user_id=1)
+        summary = await portfolio_service.get_portfolio_summary(session, user_id=1)
+
+        first = portfolio_service.build_project_cashflows(
+            await session.get(Project, 1), (await session.execute(select(ProjectTimeline))).scalar_one()
+        )
+        second = portfolio_service.build_project_cashflows(await session.get(Project, 2), None)
+        expected_net = first["columns"]["net"].sum() + second["columns"]["net"].sum()
+
+        assert sum(summary["cashflows"]["net"]) == pytest.approx(expected_net)
+        assert summary["cashflows"]["month"][0] == "2026-01-01"
+        assert max(summary["cashflows"]["project_count"]) == 2
+        assert summary["metrics"]["fund_irr"] is not None
+        assert summary["metrics"]["peak_equity"] > 0
+
+    async def test_refresh_only_touches_one_project(self, session):
+        """Modifier un projet ne réécrit que ses lignes"""
+        await portfolio_service.refresh_user_projects(session, user_id=1)
+        before = (await session.execute(
+            select(ProjectCashflow.month, ProjectCashflow.net).where(ProjectCashflow.project_id == 1)
+        )).all()
+
+        project = await session.get(Project, 2)
+        project.estimated_value = 2_000_000
+        await portfolio_service.refresh_project_cashflows(session, 2)
+
+        after = (await session.execute(
+            select(ProjectCashflow.month, ProjectCashflow.net).where(ProjectCashflow.project_id == 1)
+        )).all()
+        sale = (await session.execute(
+            select(func.sum(ProjectCashflow.sale)).where(ProjectCashflow.project_id == 2)
+        )).scalar()
+
+        assert before == after
+        assert sale == 2_000_000
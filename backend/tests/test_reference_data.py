@@ -0,0 +1,158 @@
+"""
+Tests du cache des données de référence (index, rechargement par version, repli)
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.core.database import Base, get_db
+from app.models.reference import AdministrativeDelay, CapexCost, PluZone, ReferenceDataVersion
+from app.services.administrative_delay_service import administrative_delay_service
+from app.services.capex_service import capex_service
+from app.services.reference_data import reference_data
+
+
+class TestReferenceDefaults:
+    """Tests des valeurs intégrées indexées"""
+
+    def test_default_lookups(self):
+        """Ville spécifique, repli national, villes et procédures précalculées"""
+        paris = administrative_delay_service.get_procedure_delay("Paris", "permis_construire")
+        nantes = administrative_delay_service.get_procedure_delay("Nantes", "permis_construire")
+
+        assert paris["delays_days"]["avg"] == int(90 * 1.5)
+        assert nantes["delays_days"]["avg"] == 60
+        assert administrative_delay_service.get_cities_with_data() == ["Bordeaux", "Lyon", "Marseille", "Paris"]
+        assert "purge_recours" in administrative_delay_service._get_available_procedures()
+        assert "error" in administrative_delay_service.get_procedure_delay("Paris", "inconnue")
+
+    def test_capex_tier_multiplier(self):
+        """Sans prix propre au niveau, prix de référence x multiplicateur"""
+        estimate = capex_service.get_cost_estimate("facade_ravalement_simple", 100, city_tier=3)
+
+        assert estimate["unit_prices"]["avg"] == pytest.approx(60 * 0.70)
+        assert "facade_ravalement_simple" in capex_service.get_all_categories()["facade"]
+
+    def test_snapshot_is_immutable(self):
+        """Index et enregistrements en lecture seule"""
+        snapshot = reference_data.snapshot
+
+        with pytest.raises(TypeError):
+            snapshot.delays[("Paris", "permis_construire")] = {}
+        with pytest.raises(TypeError):
+            snapshot.delay("Paris", "permis_construire")["avg_delay"] = 1
+
+
+class TestReferenceRefresh:
+    """Tests du rechargement depuis les tables"""
+
+    @pytest.fixture
+    def session_factory(self):
+        engine = create_async_engine(
+            "sqlite+aiosqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        async def setup():
+            async with engine.begin() as conn:
+                await conn.run_sync(
+                    Base.metadata.create_all,
+                    tables=[
+                        AdministrativeDelay.__table__, CapexCost.__table__,
+                        PluZone.__table__, ReferenceDataVersion.__table__,
+                    ]
+                )
+            async with async_session() as session:
+                session.add_all([
+                    AdministrativeDelay(
+                        city="Nantes", procedure_type="permis_construire",
+                        avg_delay_days=80, min_delay_days=50, max_delay_days=140, complexity_factor=1.0,
+                    ),
+                    CapexCost(
+                        category="facade", subcategory="ravalement_simple", unit="m2",
+                        min_price=30, avg_price=45, max_price=70, city_tier=3,
+                    ),
+                    PluZone(
+                        city="Nantes", zone_name="UM", zone_type="urbain", is_constructible=True,
+                        max_height=18, ces=0.6, permitted_uses=["habitation", "bureaux"],
+                    ),
+                    ReferenceDataVersion(dataset="administrative_delays", version=1),
+                    ReferenceDataVersion(dataset="capex_costs", version=1),
+                    ReferenceDataVersion(dataset="plu_zones", version=1),
+                ])
+                await session.commit()
+
+        asyncio.run(setup())
+        saved = reference_data._snapshot
+        yield async_session
+        reference_data._snapshot = saved
+        asyncio.run(engine.dispose())
+
+    @staticmethod
+    def refresh(session_factory):
+        async def run():
+            async with session_factory() as session:
+                return await reference_data.refresh(session)
+        return asyncio.run(run())
+
+    def test_refresh_loads_tables_over_defaults(self, session_factory):
+        """Lignes de la base prioritaires, valeurs intégrées en repli"""
+        previous = reference_data.snapshot
+
+        assert self.refresh(session_factory) == ["administrative_delays", "capex_costs", "plu_zones"]
+        assert administrative_delay_service.get_procedure_delay("Nantes", "permis_construire")["delays_days"] == {
+            "min": 50, "avg": 80, "max": 140,
+        }
+        assert "Nantes" in administrative_delay_service.get_cities_with_data()
+        assert administrative_delay_service.get_procedure_delay("Paris", "permis_construire")["delays_days"]["avg"] == 135
+        # Prix propre au niveau 3 : pas de multiplicateur
+        assert capex_service.get_cost_estimate("facade_ravalement_simple", 1, city_tier=3)["unit_prices"]["avg"] == 45
+        assert capex_service.get_cost_estimate("facade_ravalement_simple", 1, city_tier=2)["unit_prices"]["avg"] == 51
+        assert reference_data.snapshot.plu_zone("Nantes", "UM")["permitted_uses"] == ("habitation", "bureaux")
+        # L'instantané précédent n'a pas bougé
+        assert ("Nantes", "permis_construire") not in previous.delays
+
+    def test_reload_only_on_version_change(self, session_factory):
+        """Version inchangée : rien ; version incrémentée : seul ce jeu est rechargé"""
+        self.refresh(session_factory)
+        assert self.refresh(session_factory) == []
+
+        async def update():
+            async with session_factory() as session:
+                row = await session.get(AdministrativeDelay, 1)
+                row.avg_delay_days = 100
+                await session.commit()
+            async with session_factory() as session:
+                assert await reference_data.refresh(session) == []
+                await reference_data.bump_version(session, "administrative_delays")
+                await session.commit()
+                return await reference_data.refresh(session)
+
+        assert asyncio.run(update()) == ["administrative_delays"]
+        assert administrative_delay_service.get_procedure_delay("Nantes", "permis_construire")["delays_days"]["avg"] == 100
+        assert reference_data.snapshot.versions["administrative_delays"] == 2
+
+    def test_endpoints(self, session_factory):
+        """POST /reference-data/refresh puis lecture des zones PLU"""
+        async def override_get_db():
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        try:
+            client = TestClient(app)
+            assert client.post("/api/reference-data/refresh").json()["reloaded"] == [
+                "administrative_delays", "capex_costs", "plu_zones",
+            ]
+            zone = client.get("/api/reference-data/plu-zones/Nantes/UM").json()
+            assert zone["ces"] == 0.6
+            assert len(client.get("/api/reference-data/plu-zones/Nantes").json()["zones"]) == 1
+            assert client.get("/api/reference-data/plu-zones/Nantes/N").status_code == 404
+            assert client.get("/api/reference-data/status").json()["counts"]["plu_zones"] == 1
+        finally:
+            app.dependency_overrides.pop(get_db, None)
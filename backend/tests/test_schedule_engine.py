@@ -0,0 +1,424 @@
+"""
+Tests de l'ordonnancement par chemin critique (réseau de tâches, procédures, timeline)
+"""
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.core.database import Base, get_db
+from app.models.user import User
+from app.models.project import Project
+from app.models.timeline import ProjectTimeline
+from app.models.cashflow import ProjectCashflow
+from app.services.administrative_delay_service import administrative_delay_service
+from app.services.schedule_engine import ScheduleNetwork
+from app.services.timeline_service import timeline_service
+
+
+TASKS = [
+    {"id": "a", "duration": 10},
+    {"id": "b", "duration": 20},
+    {"id": "c", "duration": 5},
+    {"id": "d", "duration": 8},
+]
+LINKS = [
+    {"from": "a", "to": "b", "type": "FS"},
+    {"from": "a", "to": "c", "type": "SS", "lag": 2},
+    {"from": "b", "to": "d", "type": "FF"},
+    {"from": "c", "to": "d", "type": "FS"},
+]
+
+
+def naive_schedule(durations, links, ids):
+    """Référence : relaxation de Bellman-Ford sur les contraintes de départ"""
+    index = {task_id: i for i, task_id in enumerate(ids)}
+    coef = {"FS": (1, 0), "SS": (0, 0), "FF": (1, 1)}
+    early_start = np.zeros(len(ids))
+    for _ in ids:
+        for link in links:
+            p, s = index[link["from"]], index[link["to"]]
+            a, b = coef[link.get("type", "FS")]
+            early_start[s] = max(early_start[s], early_start[p] + a * durations[p] - b * durations[s] + link.get("lag", 0))
+    return early_start
+
+
+def random_network(n_tasks, n_links, seed):
+    """Réseau acyclique aléatoire (liens toujours vers un indice supérieur)"""
+    rng = np.random.default_rng(seed)
+    tasks = [{"id": f"t{i}", "duration": float(rng.integers(1, 60))} for i in range(n_tasks)]
+    pairs = np.sort(rng.choice(n_tasks, size=(n_links, 2)), axis=1)
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    links = [
+        {"from": f"t{p}", "to": f"t{s}", "type": ("FS", "SS", "FF")[k % 3], "lag": float(k % 4)}
+        for k, (p, s) in enumerate(pairs)
+    ]
+    return tasks, links
+
+
+class TestScheduleNetwork:
+    """Tests du moteur d'ordonnancement"""
+
+    def test_link_types_and_floats(self):
+        """FS / SS décalé / FF : dates, marges et chemin critique"""
+        network = ScheduleNetwork(TASKS, LINKS)
+        result = network.compute()
+
+        assert result.early_start.tolist() == [0, 10, 2, 22]
+        assert float(result.project_duration) == 30
+        assert network.critical_path() == ["a", "b", "d"]
+        # c : fin au plus tôt 7, doit finir avant le début de d (22)
+        assert result.total_float.tolist() == [0, 0, 15, 0]
+        assert result.free_float.tolist() == [0, 0, 15, 0]
+
+    def test_matches_reference(self):
+        """Réseau aléatoire de 300 tâches : dates identiques à la relaxation naïve"""
+        tasks, links = random_network(300, 900, seed=11)
+        network = ScheduleNetwork(tasks, links)
+        result = network.compute()
+
+        reference = naive_schedule(network.durations, links, network.ids)
+        assert result.early_start == pytest.approx(reference)
+        assert np.all(result.total_float >= -1e-9)
+        assert np.all(result.free_float <= result.total_float + 1e-9)
+
+    def test_incremental_update_equals_full_compute(self):
+        """update_duration donne le même résultat qu'un recalcul complet"""
+        tasks, links = random_network(200, 500, seed=5)
+        network = ScheduleNetwork(tasks, links)
+        network.compute()
+
+        rng = np.random.default_rng(2)
+        for task_id in rng.choice(network.ids, size=20):
+            duration = float(rng.integers(0, 120))
+            incremental = network.update_duration(str(task_id), duration)
+            full = ScheduleNetwork(network.tasks, links).compute()
+
+            assert incremental.early_start == pytest.approx(full.early_start)
+            assert incremental.late_start == pytest.approx(full.late_start)
+            assert incremental.free_float == pytest.approx(full.free_float)
+
+    def test_scenario_batch(self):
+        """Durées (scénarios x tâches) : chaque ligne = calcul individuel"""
+        network = ScheduleNetwork(TASKS, LINKS)
+        durations = np.array([[10, 20, 5, 8], [10, 5, 30, 8], [0, 0, 0, 0]])
+        batch = network.compute(durations)
+
+        for row, row_durations in enumerate(durations):
+            single = network.compute(row_durations)
+            assert batch.early_start[row] == pytest.approx(single.early_start)
+            assert batch.total_float[row] == pytest.approx(single.total_float)
+        assert batch.project_duration.tolist() == [30, 40, 2]
+
+    def test_invalid_networks(self):
+        """Cycle, tâche inconnue, type de lien inconnu"""
+        with pytest.raises(ValueError):
+            ScheduleNetwork(TASKS, LINKS + [{"from": "d", "to": "a"}])
+        with pytest.raises(ValueError):
+            ScheduleNetwork(TASKS, [{"from": "a", "to": "z"}])
+        with pytest.raises(ValueError):
+            ScheduleNetwork(TASKS, [{"from": "a", "to": "b", "type": "SF"}])
+
+    def test_phase_dates_unchanged(self):
+        """generate_phase_dates (séquentiel et parallèle) repose sur le réseau"""
+        start = datetime(2026, 1, 15)
+        sequential = timeline_service.generate_phase_dates(start, 3, 6, 12, 6)
+        parallel = timeline_service.generate_phase_dates(start, 3, 6, 12, 6, "parallel")
+
+        assert sequential["permit"]["start"] == datetime(2026, 4, 15)
+        assert sequential["construction"]["end"] == datetime(2027, 10, 15)
+        assert sequential["commercialization"]["end"] == datetime(2028, 4, 15)
+        assert parallel["commercialization"]["start"] == datetime(2027, 4, 15)
+        assert parallel["commercialization"]["end"] == datetime(2027, 10, 15)
+
+
+class TestAdministrativeCriticalPath:
+    """Tests du planning des procédures"""
+
+    def test_default_chain(self):
+        """Études -> procédures en parallèle -> recours -> travaux -> DAACT"""
+        result = administrative_delay_service.calculate_critical_path(
+            "Paris",
+            [{"id": "pc", "type": "permis_construire", "has_abf": True}, {"id": "cu", "type": "certificat_urbanisme"}],
+            construction_months=12,
+        )
+
+        assert result["critical_path"] == ["studies", "pc", "recours", "construction", "daact"]
+        assert result["total_delays_days"]["min"] < result["total_delays_days"]["avg"] < result["total_delays_days"]["max"]
+        floats = {task["id"]: task["total_float"] for task in result["tasks"]}
+        assert floats["cu"] > 0
+
+    def test_extra_link_and_unknown_procedure(self):
+        """Lien CU -> PC ajouté au réseau ; procédure inconnue refusée"""
+        procedures = [{"id": "pc", "type": "permis_construire"}, {"id": "cu", "type": "certificat_urbanisme"}]
+        base = administrative_delay_service.calculate_critical_path("Paris", procedures)
+        chained = administrative_delay_service.calculate_critical_path(
+            "Paris", procedures, links=[{"from": "cu", "to": "pc", "type": "FS"}]
+        )
+
+        cu = next(task for task in chained["tasks"] if task["id"] == "cu")
+        assert chained["total_delays_days"]["avg"] == base["total_delays_days"]["avg"] + cu["duration"]
+        assert "cu" in chained["critical_path"]
+        with pytest.raises(ValueError):
+            administrative_delay_service.calculate_critical_path("Paris", [{"type": "inconnue"}])
+
+
+class TestDurationSimulation:
+    """Tests de la distribution Monte Carlo des durées"""
+
+    PROCEDURES = [
+        {"id": "pc", "type": "permis_construire", "has_abf": True},
+        {"id": "cu", "type": "certificat_urbanisme"},
+    ]
+
+    def test_percentiles_bracket_deterministic_range(self):
+        """P10 <= P50 <= P90, bornés par les scénarios min / max"""
+        bounds = administrative_delay_service.calculate_critical_path("Paris", self.PROCEDURES, construction_months=12)
+        for distribution in ("pert", "triangular"):
+            result = administrative_delay_service.simulate_project_duration(
+                "Paris", self.PROCEDURES, construction_months=12, construction_overrun=0,
+                distribution=distribution, n_simulations=5000, seed=7,
+            )
+            p = {key: value["duration_days"] for key, value in result["duration"]["percentiles"].items()}
+
+            assert bounds["total_delays_days"]["min"] <= result["duration"]["min"]
+            assert result["duration"]["max"] <= bounds["total_delays_days"]["max"]
+            assert p["p10"] <= p["p50"] <= p["p90"]
+            assert result["criticality_index"]["construction"] == 1.0
+            assert result["criticality_index"]["cu"] < 0.5
+
+    def test_reproducible_and_certain_tasks(self):
+        """Même graine, mêmes résultats ; délais certains = durée constante"""
+        kwargs = {"n_simulations": 2000, "seed": 3, "studies_days": {"min": 60, "avg": 60, "max": 60}}
+        first = administrative_delay_service.simulate_project_duration("Lyon", self.PROCEDURES, **kwargs)
+        second = administrative_delay_service.simulate_project_duration("Lyon", self.PROCEDURES, **kwargs)
+
+        assert first["duration"] == second["duration"]
+        fixed = administrative_delay_service.simulate_project_duration(
+            "Lyon", [], construction_overrun=0, n_simulations=100,
+            studies_days={"min": 60, "avg": 60, "max": 60},
+        )
+        assert fixed["duration"]["std"] < 15
+
+    def test_carry_costs(self):
+        """Surcoût de portage = coût journalier x retard par rapport au planning moyen"""
+        result = administrative_delay_service.simulate_project_duration(
+            "Paris", self.PROCEDURES, construction_months=12, n_simulations=4000, seed=1,
+            carry={"debt_amount": 2_000_000, "interest_rate": 0.05, "monthly_holding_costs": 3_000},
+        )
+        carry = result["carry"]
+        p90 = result["duration"]["percentiles"]["p90"]
+
+        assert carry["daily_cost"] == pytest.approx((100_000 + 36_000) / 365, abs=0.01)
+        assert carry["percentiles"]["p90"]["extra_cost"] == pytest.approx(
+            carry["daily_cost"] * max(p90["delay_days"], 0), rel=1e-3
+        )
+        assert carry["expected_extra_cost"] >= 0
+
+    def test_twenty_procedures_ten_thousand_draws(self):
+        """20 procédures x 10 000 tirages"""
+        types = ["permis_construire", "declaration_prealable", "avis_abf", "certificat_urbanisme", "permis_demolir"]
+        procedures = [{"id": f"p{i}", "type": types[i % 5]} for i in range(20)]
+        result = administrative_delay_service.simulate_project_duration("Paris", procedures, n_simulations=10_000)
+
+        assert result["n_simulations"] == 10_000
+        assert len(result["criticality_index"]) == 24
+
+    def test_invalid_parameters(self):
+        """Distribution inconnue et nombre de tirages hors bornes"""
+        with pytest.raises(ValueError):
+            administrative_delay_service.simulate_project_duration("Paris", [], distribution="normal")
+        with pytest.raises(ValueError):
+            administrative_delay_service.simulate_project_duration("Paris", [], n_simulations=0)
+
+    def test_endpoint(self):
+        """POST /admin-delays/simulate-duration"""
+        response = TestClient(app).post("/api/admin-delays/simulate-duration", json={
+            "city": "Paris",
+            "procedures": self.PROCEDURES,
+            "n_simulations": 1000,
+            "start_date": "2026-01-01T00:00:00",
+            "carry": {"debt_amount": 1000000, "interest_rate": 0.04},
+        })
+
+        assert response.status_code == 200
+        assert response.json()["duration"]["percentiles"]["p50"]["completion_date"] > "2026-01-01"
+        assert "carry" in response.json()
+
+
+class TestScheduleEndpoints:
+    """Tests de l'ordonnancement stocké sur la timeline"""
+
+    @pytest.fixture
+    def client(self):
+        engine = create_async_engine(
+            "sqlite+aiosqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        async def setup():
+            async with engine.begin() as conn:
+                await conn.run_sync(
+                    Base.metadata.create_all,
+                    tables=[
+                        User.__table__, Project.__table__,
+                        ProjectTimeline.__table__, ProjectCashflow.__table__,
+                    ]
+                )
+            async with async_session() as session:
+                session.add(User(id=1, email="fund@example.com", hashed_password="x"))
+                session.add(Project(
+                    id=1, user_id=1, name="Immeuble", purchase_price=1_000_000,
+                    current_rent=120_000, estimated_value=1_600_000, created_at=datetime(2026, 1, 1),
+                ))
+                await session.commit()
+
+        asyncio.run(setup())
+
+        async def override_get_db():
+            async with async_session() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        yield TestClient(app)
+        app.dependency_overrides.pop(get_db, None)
+        asyncio.run(engine.dispose())
+
+    def test_schedule_and_incremental_update(self, client):
+        """POST : dates de phases reportées ; PATCH : durée modifiée, dates recalculées"""
+        response = client.post("/api/timeline/", json={
+            "project_id": 1,
+            "study_phase_start": "2026-01-01T00:00:00",
+            "study_duration_months": 3,
+            "study_phase_budget": 30000,
+            "permit_duration_months": 6,
+            "construction_duration_months": 12,
+            "construction_budget": 240000,
+            "commercialization_duration_months": 6,
+            "commercialization_type": "RENTAL",
+        })
+        assert response.status_code == 201
+        network = {
+            "tasks": [
+                {"id": "studies", "duration": 60, "phase": "studies"},
+                {"id": "pc", "duration": 150, "phase": "permit"},
+                {"id": "works", "duration": 300, "phase": "construction"},
+                {"id": "sales", "duration": 180, "phase": "commercialization"},
+            ],
+            "links": [
+                {"from": "studies", "to": "pc"},
+                {"from": "pc", "to": "works"},
+                {"from": "works", "to": "sales", "type": "SS", "lag": 120},
+            ],
+        }
+
+        response = client.post("/api/timeline/1/schedule", json=network)
+        assert response.status_code == 200
+        schedule = response.json()
+        assert schedule["duration_days"] == 510
+        assert schedule["phases"]["construction"]["start"] == "2026-07-30"
+        assert client.get("/api/timeline/1").json()["construction_phase_start"].startswith("2026-07-30")
+
+        response = client.patch("/api/timeline/1/schedule/tasks/pc", json={"duration": 200})
+        assert response.status_code == 200
+        assert response.json()["duration_days"] == 560
+
+        stored = client.get("/api/timeline/1/schedule").json()
+        assert stored["duration_days"] == 560
+        assert stored["critical_path"] == ["studies", "pc", "works", "sales"]
+        assert len(client.get("/api/timeline/1/capex-curve").json()["curve"]) == 10
+
+        cyclic = {**network, "links": network["links"] + [{"from": "sales", "to": "studies"}]}
+        assert client.post("/api/timeline/1/schedule", json=cyclic).status_code == 400
+        assert client.patch("/api/timeline/1/schedule/tasks/zz", json={"duration": 1}).status_code == 400
+
+    def test_phase_update_keeps_network(self, client):
+        """PUT d'une durée de phase : réseau recalculé, dates de la timeline cohérentes avec /schedule"""
+        client.post("/api/timeline/", json={
+            "project_id": 1,
+            "study_phase_start": "2026-01-01T00:00:00",
+            "study_duration_months": 3,
+            "study_phase_budget": 30000,
+            "permit_duration_months": 6,
+            "construction_duration_months": 12,
+            "construction_budget": 240000,
+            "commercialization_duration_months": 6,
+            "commercialization_type": "RENTAL",
+        })
+        client.post("/api/timeline/1/schedule", json={
+            "tasks": [
+                {"id": "studies", "duration": 60, "phase": "studies"},
+                {"id": "pc", "duration": 100, "phase": "permit"},
+                {"id": "recours", "duration": 50, "phase": "permit"},
+                {"id": "works", "duration": 300, "phase": "construction"},
+            ],
+            "links": [
+                {"from": "studies", "to": "pc"},
+                {"from": "pc", "to": "recours"},
+                {"from": "recours", "to": "works"},
+            ],
+        })
+
+        # Permis (2 tâches) porté à 10 mois : durées mises à l'échelle ; travaux à 12 mois
+        response = client.put("/api/timeline/1", json={"permit_duration_months": 10, "construction_duration_months": 12})
+        assert response.status_code == 200
+        timeline = response.json()
+
+        stored = client.get("/api/timeline/1/schedule").json()
+        durations = {task["id"]: task["duration"] for task in stored["tasks"]}
+        assert durations["pc"] + durations["recours"] == pytest.approx(10 * 365.25 / 12, abs=1e-3)
+        assert durations["pc"] / durations["recours"] == pytest.approx(2)
+        assert durations["works"] == pytest.approx(365.25, abs=1e-3)
+        works = next(task for task in stored["tasks"] if task["id"] == "works")
+        assert timeline["construction_phase_start"].startswith(works["start_date"])
+        assert timeline["project_end_date"].startswith(works["end_date"])
+
+        # Phase sans tâche dans le réseau : refus explicite
+        assert client.put("/api/timeline/1", json={"commercialization_duration_months": 3}).status_code == 400
+
+    def test_failed_update_leaves_network_unchanged(self, client):
+        """PUT refusé après une première mise à l'échelle : réseau stocké et cache intacts"""
+        client.post("/api/timeline/", json={
+            "project_id": 1,
+            "study_phase_start": "2026-01-01T00:00:00",
+            "study_duration_months": 3,
+            "study_phase_budget": 30000,
+            "permit_duration_months": 6,
+            "construction_duration_months": 12,
+            "construction_budget": 240000,
+            "commercialization_duration_months": 6,
+            "commercialization_type": "RENTAL",
+        })
+        client.post("/api/timeline/1/schedule", json={
+            "tasks": [
+                {"id": "studies", "duration": 60, "phase": "studies"},
+                {"id": "works", "duration": 300, "phase": "construction"},
+            ],
+            "links": [{"from": "studies", "to": "works"}],
+        })
+
+        # Études reportées sur le réseau, puis refus sur la phase permis absente
+        response = client.put("/api/timeline/1", json={"study_duration_months": 4, "permit_duration_months": 8})
+        assert response.status_code == 400
+
+        stored = client.get("/api/timeline/1/schedule").json()
+        durations = {task["id"]: task["duration"] for task in stored["tasks"]}
+        assert durations["studies"] == 60
+        assert stored["duration_days"] == 360
+
+    def test_critical_path_endpoint(self):
+        """POST /admin-delays/critical-path"""
+        response = TestClient(app).post("/api/admin-delays/critical-path", json={
+            "city": "Lyon",
+            "procedures": [{"id": "pc", "type": "permis_construire"}],
+            "links": [{"from": "studies", "to": "pc", "type": "FS", "lag": 15}],
+        })
+
+        assert response.status_code == 200
+        assert response.json()["critical_path"][:2] == ["studies", "pc"]
@@ -0,0 +1,101 @@
+"""
+Tests de l'analyse de sensibilité (grille et tornado)
+"""
+import time
+import pytest
+
+from app.services.financial_service import financial_service
+from app.services.sensitivity_service import sensitivity_service
+
+
+BASE = {
+    "purchase_price": 200000,
+    "renovation_budget": 20000,
+    "notary_fees": 15000,
+    "loan_amount": 180000,
+    "interest_rate": 0.04,
+    "loan_duration": 20,
+    "monthly_rent": 1200,
+    "resale_price": 260000,
+    "project_type": "rental",
+}
+
+
+class TestSensitivityGrid:
+    """Tests grille de sensibilité"""
+
+    def test_grid_matches_full_analysis(self):
+        """Chaque cellule = calculate_full_analysis"""
+        result = sensitivity_service.calculate_grid(BASE, [
+            {"name": "purchase_price", "min": 180000, "max": 220000, "steps": 3},
+            {"name": "monthly_rent", "min": 1000, "max": 1400, "steps": 5},
+        ])
+
+        assert len(result["metrics"]["tri"]) == 3
+        assert len(result["metrics"]["tri"][0]) == 5
+
+        price = result["rows"]["values"][2]
+        rent = result["columns"]["values"][1]
+        expected = financial_service.calculate_full_analysis(
+            **{**BASE, "purchase_price": price, "monthly_rent": rent}
+        )
+        assert result["metrics"]["tri"][2][1] == pytest.approx(expected["tri"])
+        assert result["metrics"]["dscr"][2][1] == pytest.approx(expected["dscr"])
+        assert result["metrics"]["van"][2][1] == pytest.approx(expected["van"])
+
+    def test_exit_yield_sets_resale_price(self):
+        """Taux de sortie : revente = loyer annuel / taux"""
+        result = sensitivity_service.calculate_grid(BASE, [
+            {"name": "exit_yield", "min": 0.05, "max": 0.06, "steps": 2},
+        ])
+        expected = financial_service.calculate_full_analysis(
+            **{**BASE, "resale_price": 1200 * 12 / 0.05}
+        )
+
+        assert result["columns"] is None
+        assert result["metrics"]["tri"][0] == pytest.approx(expected["tri"])
+        # Taux de sortie plus élevé = revente plus faible = TRI plus faible
+        assert result["metrics"]["tri"][1] < result["metrics"]["tri"][0]
+
+    def test_50x50_grid_is_fast(self):
+        """Grille 50x50 en une passe"""
+        start = time.perf_counter()
+        result = sensitivity_service.calculate_grid(BASE, [
+            {"name": "purchase_price", "min": 150000, "max": 250000, "steps": 50},
+            {"name": "interest_rate", "min": 0.02, "max": 0.06, "steps": 50},
+        ])
+
+        assert time.perf_counter() - start < 1.0
+        assert len(result["metrics"]["roi"]) == 50
+
+    def test_invalid_variables(self):
+        """Variables inconnues ou incompatibles"""
+        with pytest.raises(ValueError):
+            sensitivity_service.calculate_grid(BASE, [{"name": "surface", "min": 1, "max": 2}])
+        with pytest.raises(ValueError):
+            sensitivity_service.calculate_grid(BASE, [
+                {"name": "exit_yield", "min": 0.04, "max": 0.06},
+                {"name": "resale_price", "min": 200000, "max": 300000},
+            ])
+
+
+class TestTornado:
+    """Tests tornado"""
+
+    def test_bars_sorted_by_swing(self):
+        """Barres triées par écart de TRI décroissant"""
+        result = sensitivity_service.calculate_tornado(BASE, variation=0.10)
+        swings = [bar["swing"] for bar in result["bars"]]
+
+        assert result["base_tri"] == pytest.approx(financial_service.calculate_full_analysis(**BASE)["tri"])
+        assert swings == sorted(swings, reverse=True)
+        assert len(result["bars"]) == 5
+
+    def test_bar_values(self):
+        """TRI bas/haut = analyse à ±X%"""
+        result = sensitivity_service.calculate_tornado(BASE, variation=0.2, variables=["monthly_rent"])
+        bar = result["bars"][0]
+        expected = financial_service.calculate_full_analysis(**{**BASE, "monthly_rent": 1440})
+
+        assert bar["tri_high"] == pytest.approx(expected["tri"])
+        assert bar["tri_high"] > bar["tri_low"]
@@ -0,0 +1,354 @@
+"""
+Tests de l'échéancier de trésorerie mensuel des timelines (calcul, stockage, invalidation)
+"""
+import asyncio
+from datetime import date, datetime
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.core.database import Base, get_db
+from app.models.user import User
+from app.models.project import Project
+from app.models.timeline import ProjectTimeline
+from app.models.cashflow import ProjectCashflow
+from app.services.capex_curves import CURVE_GENERATORS, curve_weights, register_curve
+from app.services.irr_solver import xirr_batch
+from app.services.portfolio_service import portfolio_service
+from app.services.timeline_service import index_to_month, month_index, timeline_service
+
+
+TIMELINE = {
+    "project_start_date": datetime(2026, 1, 1),
+    "study_phase_start": datetime(2026, 1, 1),
+    "study_phase_end": datetime(2026, 4, 1),
+    "study_phase_budget": 30_000,
+    "permit_phase_start": datetime(2026, 4, 1),
+    "permit_fees": 10_000,
+    "construction_phase_start": datetime(2026, 10, 1),
+    "construction_phase_end": datetime(2027, 10, 1),
+    "construction_budget": 240_000,
+    "capex_curve_type": "linear",
+    "commercialization_phase_start": datetime(2027, 10, 1),
+    "project_end_date": datetime(2028, 4, 1),
+    "commercialization_type": "MIXED",
+    "resale_date": datetime(2030, 1, 1),
+}
+
+FINANCIAL = {"annual_rent": 120_000, "occupancy_rate": 90, "resale_price": 1_600_000}
+
+
+class TestCashflowSchedule:
+    """Tests du registre mensuel"""
+
+    def test_ledger_columns(self):
+        """Chaque poste placé sur son mois, totaux conservés"""
+        schedule = timeline_service.generate_cashflow_schedule(TIMELINE, FINANCIAL)
+        columns = schedule["columns"]
+
+        assert schedule["start"] == "2026-01-01"
+        assert schedule["months"] == 49  # janv. 2026 -> janv. 2030 inclus
+        assert columns["studies"][:3] == [10_000] * 3
+        assert columns["permit"][3] == 10_000
+        assert columns["construction"][9:21] == [20_000] * 12
+        # Loyers d'oct. 2027 jusqu'à la revente (exclue), taux d'occupation appliqué
+        assert schedule["totals"]["rent"] == pytest.approx(27 * 9_000)
+        assert columns["sale"][-1] == 1_600_000
+        assert columns["cumulative"][-1] == pytest.approx(schedule["totals"]["net"])
+        assert schedule["peak_funding"] == pytest.approx(280_000)
+
+    def test_vefa_reservations(self):
+        """Réservations VEFA en % du prix de vente ou en montant"""
+        timeline = {
+            **TIMELINE,
+            "commercialization_type": "VEFA",
+            "resale_date": None,
+            "vefa_reservations_schedule": [
+                {"month": 1, "pct_sold": 30},
+                {"month": 4, "pct_sold": 0.5},
+                {"month": 8, "cash_in": 150_000},
+            ],
+        }
+        schedule = timeline_service.generate_cashflow_schedule(timeline, {"sale_price": 1_000_000})
+        vefa = schedule["columns"]["vefa"]
+
+        assert vefa[21] == 300_000
+        assert vefa[24] == 500_000
+        assert vefa[28] == 150_000
+        assert schedule["totals"]["rent"] == 0
+        assert schedule["totals"]["sale"] == 0
+
+    def test_curve_from_stored_schedule(self):
+        """La courbe CAPEX est lue dans le registre, identique au calcul direct"""
+        schedule = timeline_service.generate_cashflow_schedule({**TIMELINE, "capex_curve_type": "s_curve"}, FINANCIAL)
+        curve = timeline_service.schedule_capex_curve(schedule)
+        direct = timeline_service.calculate_capex_curve(240_000, 12, "s_curve")
+
+        assert [point["amount"] for point in curve] == [point["amount"] for point in direct]
+        assert curve[0]["date"] == "2026-10-01"
+        assert curve[-1]["pct_complete"] == pytest.approx(100)
+
+    def test_phases_before_project_start(self):
+        """Études, travaux et réservation antérieurs au début de projet : registre avancé, rien de perdu"""
+        timeline = {
+            **TIMELINE,
+            "project_start_date": datetime(2026, 6, 1),
+            "construction_phase_start": datetime(2025, 10, 1),
+            "construction_phase_end": datetime(2026, 10, 1),
+            "commercialization_phase_start": datetime(2025, 9, 1),
+            "vefa_reservations_schedule": [{"month": 1, "cash_in": 50_000}],
+        }
+        schedule = timeline_service.generate_cashflow_schedule(timeline, FINANCIAL)
+        curve = timeline_service.schedule_capex_curve(schedule)
+
+        assert schedule["start"] == "2025-09-01"
+        assert schedule["columns"]["vefa"][0] == 50_000
+        assert schedule["totals"]["studies"] == pytest.approx(30_000)
+        assert schedule["totals"]["construction"] == pytest.approx(240_000)
+        assert len(curve) == 12
+        assert curve[0]["date"] == "2025-10-01"
+        assert sum(point["amount"] for point in curve) == pytest.approx(240_000)
+
+    def test_hash_tracks_schedule_inputs_only(self):
+        """Empreinte stable au jour près, modifiée par un budget"""
+        schedule = timeline_service.generate_cashflow_schedule(TIMELINE, FINANCIAL)
+
+        same_month = {**TIMELINE, "resale_date": datetime(2030, 1, 20)}
+        assert timeline_service.is_schedule_current(schedule, same_month, FINANCIAL)
+        assert timeline_service.is_schedule_current(schedule, {**TIMELINE, "notes": "x"}, FINANCIAL)
+        assert not timeline_service.is_schedule_current(
+            schedule, {**TIMELINE, "construction_budget": 250_000}, FINANCIAL
+        )
+        assert not timeline_service.is_schedule_current(schedule, TIMELINE, {**FINANCIAL, "annual_rent": 1})
+
+
+class TestCapexCurves:
+    """Tests de la bibliothèque de courbes"""
+
+    def test_standard_shapes(self):
+        """Tiers 40/35/25, courbe en S symétrique et centrée"""
+        front = timeline_service.calculate_capex_curve(1_200_000, 12, "front_loaded")
+        s_curve = [point["amount"] for point in timeline_service.calculate_capex_curve(1_000_000, 12, "s_curve")]
+
+        assert [point["amount"] for point in front[::4]] == [120_000, 105_000, 75_000]
+        assert front[-1]["cumulative"] == 1_200_000
+        assert s_curve[0] == pytest.approx(s_curve[-1], abs=0.05)
+        assert max(s_curve) in s_curve[5:7]
+
+    def test_parametric_curves(self):
+        """Pente de la sigmoïde, asymétrie bêta, jalons et table"""
+        flat = curve_weights("s_curve", 24, steepness=1.0)
+        steep = curve_weights("s_curve", 24, steepness=6.0)
+        early = curve_weights("beta", 24, alpha=2, beta=5)
+        milestones = curve_weights("milestones", 6, milestones=[
+            {"month": 1, "budget_pct": 30}, {"month": 4, "budget_pct": 50}, {"month": 6, "budget_pct": 20},
+        ])
+
+        assert steep.max() > flat.max()
+        assert early[:12].sum() > 0.8
+        assert milestones.tolist() == pytest.approx([0.3, 0, 0, 0.5, 0, 0.2])
+        assert curve_weights("table", 3, percentages=[10, 10, 20]).tolist() == pytest.approx([0.25, 0.25, 0.5])
+
+    def test_invalid_curves(self):
+        """Courbe inconnue, table de mauvaise longueur, jalon hors période"""
+        with pytest.raises(ValueError):
+            timeline_service.calculate_capex_curve(1e6, 12, "bell")
+        with pytest.raises(ValueError):
+            curve_weights("table", 3, percentages=[50, 50])
+        with pytest.raises(ValueError):
+            curve_weights("milestones", 6, milestones=[{"month": 7, "budget_pct": 100}])
+
+    def test_invalid_curve_params(self):
+        """Paramètre inconnu, jalon incomplet ou valeur mal typée : ValueError"""
+        with pytest.raises(ValueError, match="steepness"):
+            curve_weights("linear", 6, steepness=5)
+        with pytest.raises(ValueError):
+            curve_weights("milestones", 6, milestones=[{"budget_pct": 100}])
+        with pytest.raises(ValueError):
+            curve_weights("s_curve", 6, steepness="3")
+
+    def test_register_curve(self):
+        """Nouvelle courbe enregistrable sans modifier le service"""
+        @register_curve("test_two_steps")
+        def two_steps(months, split=0.5):
+            half = months // 2
+            return [split / half] * half + [(1 - split) / (months - half)] * (months - half)
+
+        try:
+            curve = timeline_service.calculate_capex_curve(1000, 4, "test_two_steps", split=0.8)
+            assert [point["amount"] for point in curve] == [400, 400, 100, 100]
+        finally:
+            CURVE_GENERATORS.pop("test_two_steps")
+
+    def test_long_curve(self):
+        """600 mois : cumul final = budget"""
+        curve = timeline_service.calculate_capex_curve(5e7, 600, "beta", alpha=3, beta=2)
+
+        assert len(curve) == 600
+        assert curve[-1]["cumulative"] == 5e7
+
+
+class TestTimelineEndpoints:
+    """Tests du stockage et de l'invalidation via l'API"""
+
+    @pytest.fixture
+    def client(self):
+        engine = create_async_engine(
+            "sqlite+aiosqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        async def setup():
+            async with engine.begin() as conn:
+                await conn.run_sync(
+                    Base.metadata.create_all,
+                    tables=[
+                        User.__table__, Project.__table__,
+                        ProjectTimeline.__table__, ProjectCashflow.__table__,
+                    ]
+                )
+            async with async_session() as session:
+                session.add(User(id=1, email="fund@example.com", hashed_password="x"))
+                session.add(Project(
+                    id=1, user_id=1, name="Immeuble", purchase_price=1_000_000,
+                    current_rent=120_000, estimated_value=1_600_000, created_at=datetime(2026, 1, 1),
+                ))
+                await session.commit()
+
+        asyncio.run(setup())
+
+        async def override_get_db():
+            async with async_session() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        yield TestClient(app)
+        app.dependency_overrides.pop(get_db, None)
+        asyncio.run(engine.dispose())
+
+    def test_schedule_stored_and_recomputed_on_change(self, client):
+        """Création : registre stocké ; PUT : recalcul seulement si une entrée change"""
+        response = client.post("/api/timeline/", json={
+            "project_id": 1,
+            "study_phase_start": "2026-01-01T00:00:00",
+            "study_duration_months": 3,
+            "study_phase_budget": 30000,
+            "permit_duration_months": 6,
+            "construction_duration_months": 12,
+            "construction_budget": 240000,
+            "commercialization_duration_months": 6,
+            "commercialization_type": "RENTAL",
+        })
+        assert response.status_code == 201
+
+        with patch.object(
+            timeline_service, "generate_cashflow_schedule", wraps=timeline_service.generate_cashflow_schedule
+        ) as generate:
+            client.put("/api/timeline/1", json={"notes": "Relecture"})
+            summary = client.get("/api/timeline/1/summary").json()
+            curve = client.get("/api/timeline/1/capex-curve").json()
+            assert generate.call_count == 0
+
+            client.put("/api/timeline/1", json={"construction_duration_months": 18})
+            assert generate.call_count == 1
+
+        assert summary["cashflow"]["totals"]["construction"] == pytest.approx(240_000, abs=0.1)
+        assert summary["xirr"] is not None
+        assert len(curve["curve"]) == 12
+        assert len(client.get("/api/timeline/1/capex-curve").json()["curve"]) == 18
+        assert client.get("/api/timeline/1").json()["total_duration_months"] == 33
+
+    def test_summary_xirr_on_project_flows(self, client):
+        """TRI du résumé sur les flux complets du projet (acquisition à 1 M€ incluse)"""
+        client.post("/api/timeline/", json={
+            "project_id": 1,
+            "study_phase_start": "2026-01-01T00:00:00",
+            "study_duration_months": 3,
+            "study_phase_budget": 30000,
+            "permit_duration_months": 6,
+            "construction_duration_months": 12,
+            "construction_budget": 240000,
+            "commercialization_duration_months": 6,
+            "commercialization_type": "RENTAL",
+        })
+        xirr = client.get("/api/timeline/1/summary").json()["xirr"]
+
+        async def load():
+            async for session in app.dependency_overrides[get_db]():
+                project = await session.get(Project, 1)
+                timeline = (await session.execute(select(ProjectTimeline))).scalar_one()
+                return project, timeline
+
+        project, timeline = asyncio.run(load())
+        schedule = timeline.cashflow_schedule
+        start = month_index(date.fromisoformat(schedule["start"]))
+        months = [index_to_month(start + offset) for offset in range(schedule["months"])]
+        ledger_only = xirr_batch([months], [schedule["columns"]["net"]]).to_list()[0]
+
+        assert xirr["tri"] == pytest.approx(portfolio_service.project_xirr(project, timeline)["tri"])
+        assert xirr["tri"] < ledger_only["tri"]
+
+    def test_curve_params_and_types(self, client):
+        """Courbe paramétrée stockée, courbe inconnue refusée"""
+        payload = {
+            "project_id": 1,
+            "study_phase_start": "2026-01-01T00:00:00",
+            "study_duration_months": 3,
+            "study_phase_budget": 0,
+            "permit_duration_months": 6,
+            "construction_duration_months": 4,
+            "construction_budget": 100000,
+            "capex_curve_type": "table",
+            "capex_curve_params": {"percentages": [10, 20, 30, 40]},
+            "commercialization_duration_months": 6,
+            "commercialization_type": "RESALE",
+        }
+        assert client.post("/api/timeline/", json={**payload, "capex_curve_type": "bell"}).status_code == 400
+        assert client.post("/api/timeline/", json=payload).status_code == 201
+
+        curve = client.get("/api/timeline/1/capex-curve").json()["curve"]
+        assert [point["amount"] for point in curve] == [10000, 20000, 30000, 40000]
+
+        types = [curve["curve_type"] for curve in client.get("/api/timeline/curve-types").json()["curves"]]
+        assert {"linear", "s_curve", "beta", "milestones", "table"} <= set(types)
+
+    def test_invalid_curve_params_rejected(self, client):
+        """Paramètres de courbe invalides : 400 ; changement de courbe sans paramètres : anciens effacés"""
+        payload = {
+            "project_id": 1,
+            "study_phase_start": "2026-01-01T00:00:00",
+            "study_duration_months": 3,
+            "study_phase_budget": 0,
+            "permit_duration_months": 6,
+            "construction_duration_months": 6,
+            "construction_budget": 60000,
+            "capex_curve_type": "s_curve",
+            "capex_curve_params": {"steepness": 5},
+            "commercialization_duration_months": 6,
+            "commercialization_type": "RESALE",
+        }
+        for curve_type, params in (
+            ("linear", {"steepness": 5}),
+            ("milestones", {"milestones": [{"budget_pct": 100}]}),
+            ("s_curve", {"steepness": "3"}),
+        ):
+            response = client.post("/api/timeline/", json={
+                **payload, "capex_curve_type": curve_type, "capex_curve_params": params,
+            })
+            assert response.status_code == 400
+        assert client.post("/api/timeline/", json=payload).status_code == 201
+
+        response = client.put("/api/timeline/1", json={"capex_curve_type": "linear"})
+        assert response.status_code == 200
+        assert response.json()["capex_curve_params"] is None
+        curve = client.get("/api/timeline/1/capex-curve").json()["curve"]
+        assert [point["amount"] for point in curve] == [10000] * 6
+
+        response = client.put("/api/timeline/1", json={"capex_curve_params": {"steepness": 2}})
+        assert response.status_code == 400
@@ -0,0 +1,239 @@
+"""
+Tests du waterfall daté (TRI réels, catch-up, clawback)
+"""
+from datetime import date, timedelta
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.waterfall_engine import as_event_matrices, promote_payout, run_waterfall
+from app.services.waterfall_service import waterfall_service
+
+
+TIERS = [
+    {"hurdle_irr": 0.15, "gp_share": 0.20},
+    {"hurdle_irr": None, "gp_share": 0.30},
+]
+
+
+class TestWaterfallEngine:
+    """Tests du moteur vectorisé"""
+
+    def test_hurdle_uses_timing(self):
+        """Pref 8% sur 2 ans = 1,1664x (et non 1,08x)"""
+        result = run_waterfall(
+            np.array([0.0, 2.0]), [[1e6, 0]], [[0, 1.5e6]], 0.08, TIERS,
+            catch_up={"rate": 1.0, "target_share": 0.20}
+        )
+        steps = {step["step"]: step for step in result.step_totals()}
+
+        assert steps["return_of_capital"]["amount"] == pytest.approx(1e6)
+        assert steps["preferred_return"]["amount"] == pytest.approx(1e6 * (1.08 ** 2 - 1))
+        # Catch-up : promote = 20% du profit cumulé
+        assert steps["catch_up"]["gp_amount"] == pytest.approx(0.25 * 166400)
+        # Palier 1 jusqu'à un TRI investisseur de 15%
+        investor_after_tier_1 = 1e6 * 1.08 ** 2 + steps["tier_1"]["investor_amount"]
+        assert investor_after_tier_1 == pytest.approx(1e6 * 1.15 ** 2)
+        assert result.distributions.sum() == pytest.approx(result.investor.sum() + result.promote.sum())
+
+    def test_below_hurdle_no_promote(self):
+        """Sous le rendement préférentiel, tout revient aux investisseurs"""
+        result = run_waterfall(np.array([0.0, 3.0]), [[1e6, 0]], [[0, 1.2e6]], 0.08, TIERS)
+
+        assert result.promote.sum() == 0
+        assert result.pref_balance[0, -1] == pytest.approx(1e6 * 1.08 ** 3 - 1.2e6)
+
+    def test_deals_are_independent_rows(self):
+        """Chaque ligne est un deal distribué indépendamment"""
+        times = np.array([0.0, 1.0, 2.0])
+        contributions = np.array([[1e6, 0, 0], [1e6, 0, 0]])
+        distributions = np.array([[0, 0, 2e6], [0, 0.5e6, 0]])
+        batch = run_waterfall(times, contributions, distributions, 0.08, TIERS)
+        single = run_waterfall(times, contributions[:1], distributions[:1], 0.08, TIERS)
+
+        assert batch.promote[0] == pytest.approx(single.promote[0])
+        assert batch.promote[1].sum() == 0
+
+    def test_invalid_tiers(self):
+        """Hurdles non croissants ou catch-up incohérent refusés"""
+        with pytest.raises(ValueError):
+            run_waterfall([0.0], [[1.0]], [[0.0]], 0.10, [{"hurdle_irr": 0.08, "gp_share": 0.2},
+                                                           {"hurdle_irr": None, "gp_share": 0.3}])
+        with pytest.raises(ValueError):
+            run_waterfall([0.0], [[1.0]], [[0.0]], 0.08, TIERS, catch_up={"rate": 0.1, "target_share": 0.2})
+
+    def test_event_matrices(self):
+        """Flux datés placés sur une grille commune par deal"""
+        dates, deals, contributions, distributions = as_event_matrices(
+            [{"date": "2025-01-01", "amount": 100, "deal": "B"}, {"date": "2025-01-01", "amount": 50, "deal": "A"}],
+            [{"date": "2026-01-01", "amount": 200, "deal": "A"}],
+        )
+
+        assert deals == ["A", "B"]
+        assert dates.size == 2
+        assert contributions[:, 0].tolist() == [50, 100]
+        assert distributions[0, 1] == 200
+
+
+class TestWaterfallTimeseries:
+    """Tests du service (styles, clawback, TRI)"""
+
+    def test_european_irr_matches_hurdle(self):
+        """Distribution exactement au hurdle : TRI LP = pref, aucun promote"""
+        result = waterfall_service.calculate_waterfall_timeseries(
+            [{"date": date(2025, 1, 1), "amount": 1e6}],
+            [{"date": date(2027, 1, 1), "amount": 1e6 * 1.08 ** (730 / 365)}],
+            preferred_return=0.08,
+            tiers=TIERS,
+        )
+
+        assert result["LP"]["irr"] == pytest.approx(0.08, abs=1e-8)
+        assert result["GP"]["promote"] == pytest.approx(0, abs=1e-6)
+
+    def test_american_clawback(self):
+        """American : promote sur le deal gagnant restitué si le fonds n'atteint pas le pref"""
+        contributions = [
+            {"date": date(2025, 1, 1), "amount": 1e6, "deal": "A"},
+            {"date": date(2025, 1, 1), "amount": 1e6, "deal": "B"},
+        ]
+        distributions = [
+            {"date": date(2026, 1, 1), "amount": 1.6e6, "deal": "A"},
+            {"date": date(2027, 1, 1), "amount": 0.5e6, "deal": "B"},
+        ]
+        european = waterfall_service.calculate_waterfall_timeseries(
+            contributions, distributions, tiers=TIERS, style="european"
+        )
+        american = waterfall_service.calculate_waterfall_timeseries(
+            contributions, distributions, tiers=TIERS, style="american"
+        )
+        no_clawback = waterfall_service.calculate_waterfall_timeseries(
+            contributions, distributions, tiers=TIERS, style="american", clawback=False
+        )
+
+        assert european["GP"]["promote"] == 0
+        assert no_clawback["GP"]["promote"] > 0
+        assert american["clawback"] == pytest.approx(no_clawback["GP"]["promote"])
+        assert american["GP"]["promote"] == pytest.approx(0, abs=1e-6)
+
+    def test_gp_commitment(self):
+        """Co-investissement GP pari passu"""
+        result = waterfall_service.calculate_waterfall_timeseries(
+            [{"date": date(2025, 1, 1), "amount": 1e6}],
+            [{"date": date(2028, 1, 1), "amount": 2e6}],
+            tiers=TIERS,
+            gp_commitment_pct=0.1,
+        )
+
+        assert result["GP"]["paid_in"] == pytest.approx(1e5)
+        assert result["GP"]["irr"] > result["LP"]["irr"]
+        assert result["LP"]["distributed"] + result["GP"]["distributed"] == pytest.approx(2e6)
+
+    def test_ten_year_monthly_five_tiers(self):
+        """120 mois, 5 paliers : conservation des montants"""
+        start = date(2025, 1, 1)
+        tiers = [
+            {"hurdle_irr": 0.10, "gp_share": 0.10},
+            {"hurdle_irr": 0.12, "gp_share": 0.15},
+            {"hurdle_irr": 0.15, "gp_share": 0.20},
+            {"hurdle_irr": 0.20, "gp_share": 0.25},
+            {"hurdle_irr": None, "gp_share": 0.30},
+        ]
+        result = waterfall_service.calculate_waterfall_timeseries(
+            [{"date": start + timedelta(days=30 * m), "amount": 1e6} for m in range(12)],
+            [{"date": start + timedelta(days=30 * m), "amount": 2.4e5} for m in range(12, 120)],
+            tiers=tiers,
+            catch_up={"rate": 1.0, "target_share": 0.10},
+        )
+
+        assert len(result["timeline"]["date"]) == 120
+        assert sum(step["amount"] for step in result["steps"]) == pytest.approx(2.4e5 * 108)
+        assert 0.08 < result["LP"]["irr"] < 0.20
+
+    def test_endpoint(self):
+        """POST /financial/waterfall/timeseries"""
+        client = TestClient(app)
+        response = client.post("/api/financial/waterfall/timeseries", json={
+            "contributions": [{"date": "2025-01-01", "amount": 1000000}],
+            "distributions": [{"date": "2028-01-01", "amount": 1800000}],
+            "preferred_return": 0.08,
+            "catch_up": {"rate": 1.0, "target_share": 0.2},
+            "tiers": [{"hurdle_irr": None, "gp_share": 0.2}],
+        })
+
+        assert response.status_code == 200
+        data = response.json()
+        # Catch-up complet : promote = 20% du profit total
+        assert data["GP"]["promote"] == pytest.approx(0.2 * 800000, rel=1e-9)
+
+
+class TestPromoteSurface:
+    """Tests de la sensibilité promote en forme fermée"""
+
+    def test_payout_is_piecewise_linear(self):
+        """Promote par palier : 0% jusqu'à 100, 20% jusqu'à 300, 30% au-delà"""
+        payout = promote_payout([0, 50, 150, 400], [100, 300], [0.0, 0.2, 0.3])
+
+        assert payout.tolist() == pytest.approx([0, 0, 10, 70])
+
+    def test_sensitivity_matches_simple_waterfall(self):
+        """Mêmes montants que calculate_waterfall_simple point par point"""
+        profits = [0, 5000, 10000, 25000]
+        scenarios = waterfall_service.calculate_promote_sensitivity(
+            100000, profits, hurdle_rate=0.08, promote_share=0.25, use_cache=False
+        )
+
+        for profit, scenario in zip(profits, scenarios):
+            simple = waterfall_service.calculate_waterfall_simple(
+                lp_contrib=100000, profit=profit, hurdle_rate=0.08,
+                lp_share_above_hurdle=0.75, gp_share_above_hurdle=0.25
+            )
+            assert scenario["gp_promote"] == pytest.approx(simple["distribution"]["GP"]["total"])
+            assert scenario["lp_total"] == pytest.approx(simple["distribution"]["LP"]["total"])
+            assert scenario["scenario"] == simple["distribution"]["scenario"]
+
+    def test_surface_rows(self):
+        """Chaque ligne de la surface = sensibilité 1D à cette valeur"""
+        profits = np.linspace(0, 1e6, 1000).tolist()
+        hurdles = np.linspace(0.05, 0.20, 100).tolist()
+        start = time.perf_counter()
+        surface = waterfall_service.calculate_promote_surface(
+            1e6, profits, "hurdle_rate", hurdles, promote_share=0.2, use_cache=False
+        )
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        row = waterfall_service.calculate_promote_sensitivity(
+            1e6, profits, hurdle_rate=hurdles[40], promote_share=0.2, use_cache=False
+        )
+
+        assert len(surface["gp_promote"]) == 100
+        assert surface["gp_promote"][40] == pytest.approx([point["gp_promote"] for point in row])
+        assert elapsed_ms < 100
+        # Durée mesurée hors du résultat mémoïsé
+        assert "elapsed_ms" not in surface
+
+    def test_surface_endpoint(self):
+        """POST /financial/waterfall/sensitivity/surface (profit x promote)"""
+        client = TestClient(app)
+        response = client.post("/api/financial/waterfall/sensitivity/surface", json={
+            "equity_invested": 1000000,
+            "min_profit": 0,
+            "max_profit": 500000,
+            "profit_steps": 11,
+            "parameter": "promote_share",
+            "min_value": 0.1,
+            "max_value": 0.3,
+            "value_steps": 3,
+        })
+
+        assert response.status_code == 200
+        data = response.json()
+        # Profit 500k, hurdle 10% : promote 30% x 400k
+        assert data["gp_promote"][2][-1] == pytest.approx(120000)
+
+        response = client.post("/api/financial/waterfall/sensitivity/surface", json={
+            "equity_invested": 1000000, "min_profit": 0, "max_profit": 500000,
+            "parameter": "catch_up", "min_value": 0.1, "max_value": 0.3,
+        })
+        assert response.status_code == 400
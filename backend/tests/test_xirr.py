@@ -0,0 +1,151 @@
+"""
+Tests du TRI daté (XIRR)
+"""
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.irr_solver import (
+    as_dated_matrices,
+    xirr_batch,
+    xnpv_batch,
+    STATUS_CONVERGED,
+    STATUS_INVALID,
+)
+from app.services.financial_service import financial_service
+
+
+# Exemple de la documentation Excel XIRR (résultat 37,34%)
+EXCEL_DATES = [date(2008, 1, 1), date(2008, 3, 1), date(2008, 10, 30), date(2009, 2, 15), date(2009, 4, 1)]
+EXCEL_AMOUNTS = [-10000, 2750, 4250, 3250, 2750]
+
+
+class TestXIRRSolver:
+    """Tests XIRR en lot"""
+
+    def test_excel_reference(self):
+        """Même résultat que la fonction XIRR d'Excel"""
+        result = xirr_batch([EXCEL_DATES], [EXCEL_AMOUNTS])
+
+        assert result.status[0] == STATUS_CONVERGED
+        assert result.rates[0] == pytest.approx(0.373362535, abs=1e-8)
+
+    def test_xnpv_is_zero_at_xirr(self):
+        """La VAN datée au XIRR est nulle"""
+        rate = xirr_batch([EXCEL_DATES], [EXCEL_AMOUNTS]).rates[0]
+
+        assert xnpv_batch([EXCEL_DATES], [EXCEL_AMOUNTS], rate)[0] == pytest.approx(0, abs=1e-6)
+
+    def test_ragged_series_are_masked(self):
+        """Séries de longueurs différentes : le remplissage n'influence pas le taux"""
+        short = ([date(2025, 1, 1), date(2026, 1, 1)], [-100, 110])
+        result = xirr_batch(
+            [EXCEL_DATES, short[0]],
+            [EXCEL_AMOUNTS, short[1]],
+        )
+        alone = xirr_batch([short[0]], [short[1]])
+
+        assert result.converged.all()
+        assert result.rates[1] == pytest.approx(alone.rates[0], abs=1e-10)
+        assert result.rates[1] == pytest.approx(0.10, abs=1e-9)
+
+        matrix, times, mask = as_dated_matrices([EXCEL_DATES, short[0]], [EXCEL_AMOUNTS, short[1]])
+        assert matrix.shape == (2, 5)
+        assert mask[1].tolist() == [True, True, False, False, False]
+        assert times[1, 1] == pytest.approx(1.0)
+
+    def test_unsorted_dates(self):
+        """Les temps partent de la date la plus ancienne, quel que soit l'ordre"""
+        order = [4, 2, 0, 3, 1]
+        result = xirr_batch(
+            [[EXCEL_DATES[i] for i in order]],
+            [[EXCEL_AMOUNTS[i] for i in order]],
+        )
+
+        assert result.rates[0] == pytest.approx(0.373362535, abs=1e-8)
+
+    def test_invalid_series(self):
+        """Série d'un seul flux ou non finie : statut invalide"""
+        result = xirr_batch(
+            [[date(2024, 1, 1)], [date(2024, 1, 1), date(2025, 1, 1)]],
+            [[-100], [-100, float("nan")]],
+        )
+
+        assert list(result.status) == [STATUS_INVALID, STATUS_INVALID]
+
+    def test_mismatched_lengths(self):
+        """Autant de dates que de montants"""
+        with pytest.raises(ValueError):
+            xirr_batch([[date(2024, 1, 1)]], [[-100, 110]])
+
+    def test_mid_year_exit_differs_from_periodic_irr(self):
+        """Une sortie en cours d'année n'est pas arrondie à une période entière"""
+        dates = [date(2024, 1, 1), date(2025, 7, 1)]
+        result = xirr_batch([dates], [[-100, 115]])
+
+        years = (dates[1] - dates[0]).days / 365
+        assert result.rates[0] == pytest.approx(1.15 ** (1 / years) - 1, abs=1e-9)
+
+
+class TestFinancialServiceXIRR:
+    """Tests XIRR via le service financier"""
+
+    def test_calculate_xirr(self):
+        """Résultat détaillé"""
+        result = financial_service.calculate_xirr(EXCEL_DATES, EXCEL_AMOUNTS)
+
+        assert result["converged"] is True
+        assert result["tri"] == pytest.approx(0.373362535, abs=1e-8)
+
+    def test_cashflows_xirr_matches_monthly_irr(self):
+        """XIRR des cashflows mensuels proche du TRI périodique annualisé"""
+        cashflows = [
+            {"date": date(2024, month, 1), "net_cashflow": 1000.0}
+            for month in range(1, 13)
+        ]
+        cashflows[-1]["net_cashflow"] += 100000
+
+        result = financial_service.calculate_cashflows_xirr(
+            cashflows, initial_investment=100000
+        )
+        monthly = financial_service.calculate_tri(99000, [1000.0] * 10 + [101000.0])
+
+        assert result["converged"] is True
+        assert result["tri"] == pytest.approx((1 + monthly) ** 12 - 1, abs=5e-3)
+
+
+class TestXIRREndpoints:
+    """Tests des endpoints /financial/xirr"""
+
+    def test_xirr_endpoint(self):
+        """POST /financial/xirr"""
+        client = TestClient(app)
+        response = client.post("/api/financial/xirr", json={
+            "cash_flows": [
+                {"date": d.isoformat(), "amount": a} for d, a in zip(EXCEL_DATES, EXCEL_AMOUNTS)
+            ],
+            "discount_rate": 0.1,
+        })
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["tri"] == pytest.approx(0.373362535, abs=1e-8)
+        assert data["converged"] is True
+        assert "xnpv" in data
+
+    def test_xirr_batch_endpoint(self):
+        """POST /financial/xirr/batch"""
+        client = TestClient(app)
+        response = client.post("/api/financial/xirr/batch", json={
+            "series": [
+                [{"date": d.isoformat(), "amount": a} for d, a in zip(EXCEL_DATES, EXCEL_AMOUNTS)],
+                [{"date": "2025-01-01", "amount": -100}, {"date": "2026-01-01", "amount": 110}],
+            ],
+        })
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert len(results) == 2
+        assert results[1]["tri"] == pytest.approx(0.10, abs=1e-9)